@@ -2,9 +2,12 @@ from contextlib import contextmanager
 from pathlib import Path
 from typing import Optional
 
-from .engines.gdal_engine.preprocessor import GDALPreprocessor
 from .utils.config import ConfigManager
 from .utils.logger import setup_logger
+from .engines.gdal_engine.analyzer import GDALAnalyzer
+from .engines.gdal_engine.preprocessor import GDALPreprocessor
+from .interfaces.async_preprocessor import AsyncPreprocessor
+from .utils.progress import CancellationToken, Progress
 
 global logger
 
@@ -32,10 +35,38 @@ class PreprocessorFactory:
             from .engines.arcpy_engine.preprocessor import ArcPyPreprocessor
 
             return ArcPyPreprocessor()
+        elif engine == "auto":
+            from .engines.auto_engine.preprocessor import AutoPreprocessor
+
+            return AutoPreprocessor()
         else:
             raise ValueError(f"Unsupported engine: {engine}")
 
 
+class Analyzer:
+    """High-level interface for analysis operations"""
+
+    def __init__(self, engine: Optional[str] = None):
+        self.engine = engine or ConfigManager().config.preferred_engine
+        self._analyzer = AnalyzerFactory.create(self.engine)
+
+    def __getattr__(self, name):
+        """Delegate methods to engine implementation"""
+        return getattr(self._analyzer, name)
+
+
+class AnalyzerFactory:
+    """Factory for creating analyzer instances"""
+
+    @staticmethod
+    def create(engine: str):
+        # Analysis is only implemented by the GDAL engine, which "auto" selects
+        if engine.lower() in ("gdal", "auto"):
+            return GDALAnalyzer()
+        else:
+            raise ValueError(f"Unsupported analyzer engine: {engine}")
+
+
 @contextmanager
 def GeoToolKitContext(**kwargs):
     """Context manager for temporary settings"""
@@ -19,3 +19,11 @@ class BaseAnalyzer(ABC):
     @abstractmethod
     def perform_overlay(self, layer1, layer2, overlay_type):
         pass
+
+    @abstractmethod
+    def spatial_join(self, left, right, predicate):
+        pass
+
+    @abstractmethod
+    def nearest(self, left, right, k):
+        pass
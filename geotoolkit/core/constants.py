@@ -1,4 +1,4 @@
-from enum import Enum
+from enum import Enum, IntFlag
 from typing import Dict, List
 
 
@@ -29,6 +29,18 @@ class GeometryType(Enum):
     MULTIPOLYGON = "multipolygon"
 
 
+class QCFlag(IntFlag):
+    """Per-feature quality-control flags, combined into a single bit field"""
+
+    NULL_GEOMETRY = 1
+    EMPTY_GEOMETRY = 2
+    INVALID_GEOMETRY = 4
+    SMALL_AREA = 8
+    TOO_MANY_VERTICES = 16
+    DUPLICATE_GEOMETRY = 32
+    SHORT_LENGTH = 64
+
+
 # Common coordinate systems
 COMMON_PROJECTIONS: Dict[str, int] = {
     "WGS84": 4326,
@@ -41,16 +53,98 @@ COMMON_PROJECTIONS: Dict[str, int] = {
 DEFAULT_CONFIG: Dict[str, any] = {
     "preferred_engine": EngineType.AUTO.value,
     "max_threads": 4,
+    "max_pending_jobs": 64,
     "log_level": "INFO",
     "chunk_size": 1000,
     "timeout": 300,
+    "warp_memory": 512,
+    "memory_budget": 2048,
+    "parquet_row_group_size": 65536,
+    "parquet_compression": "ZSTD",
+    "build_indexes": True,
+    "checkpoints": True,
+    "progress_interval": 10,
+    "gdal_profile": "default",
+    "profiling": False,
+}
+
+# GDAL runtime tuning profiles: configuration options applied around each operation.
+# GDAL_CACHEMAX is in megabytes or a percentage of memory_budget.
+GDAL_PROFILES: Dict[str, Dict[str, str]] = {
+    "default": {},
+    # Large batch writes: every core, a large block cache and unsynced SQLite writes
+    "bulk_load": {
+        "GDAL_NUM_THREADS": "ALL_CPUS",
+        "GDAL_CACHEMAX": "25%",
+        "OGR_SQLITE_SYNCHRONOUS": "OFF",
+        "OGR_SQLITE_CACHE": "512",
+        "VSI_CACHE": "TRUE",
+        "VSI_CACHE_SIZE": "67108864",
+    },
+    # Short requests: few threads, quick opens and HTTP/2 for remote data
+    "interactive": {
+        "GDAL_NUM_THREADS": "2",
+        "OGR_SQLITE_CACHE": "64",
+        "VSI_CACHE": "TRUE",
+        "VSI_CACHE_SIZE": "16777216",
+        "GDAL_DISABLE_READDIR_ON_OPEN": "EMPTY_DIR",
+        "GDAL_HTTP_MULTIPLEX": "YES",
+        "GDAL_HTTP_VERSION": "2",
+    },
+    # Constrained hosts: one thread, small caches and fewer open datasets
+    "low_memory": {
+        "GDAL_NUM_THREADS": "1",
+        "GDAL_CACHEMAX": "5%",
+        "OGR_SQLITE_CACHE": "16",
+        "VSI_CACHE": "FALSE",
+        "GDAL_MAX_DATASET_POOL_SIZE": "32",
+    },
 }
 
 # Supported file formats
 SUPPORTED_VECTOR_FORMATS: List[str] = ["shp", "geojson", "gdb", "gpkg", "kml"]
 
+# Vector output formats: GDAL driver, file extension and layer creation options
+OUTPUT_FORMATS: Dict[str, Dict[str, any]] = {
+    "shp": {"driver": "ESRI Shapefile", "extension": ".shp", "layer_options": []},
+    "gpkg": {"driver": "GPKG", "extension": ".gpkg", "layer_options": []},
+    "geojson": {"driver": "GeoJSON", "extension": ".geojson", "layer_options": []},
+    "parquet": {"driver": "Parquet", "extension": ".parquet", "layer_options": []},
+    "fgb": {"driver": "FlatGeobuf", "extension": ".fgb", "layer_options": ["SPATIAL_INDEX=YES"]},
+}
+
+OUTPUT_FORMAT_ALIASES: Dict[str, str] = {
+    "shapefile": "shp",
+    "geopackage": "gpkg",
+    "geoparquet": "parquet",
+    "flatgeobuf": "fgb",
+}
+
 SUPPORTED_RASTER_FORMATS: List[str] = ["tif", "img", "jpg", "png", "dem"]
 
+# Resampling methods accepted by raster warping
+RESAMPLING_METHODS: List[str] = [
+    "near",
+    "bilinear",
+    "cubic",
+    "cubicspline",
+    "lanczos",
+    "average",
+    "mode",
+    "min",
+    "max",
+    "med",
+]
+
+# Creation options for tiled, compressed GeoTIFF output
+GTIFF_CREATION_OPTIONS: List[str] = [
+    "TILED=YES",
+    "BLOCKXSIZE=512",
+    "BLOCKYSIZE=512",
+    "COMPRESS=DEFLATE",
+    "BIGTIFF=IF_SAFER",
+]
+
 # Processing constants
 BUFFER_DISTANCES: Dict[str, float] = {
     "VERY_SMALL": 0.1,
@@ -46,6 +46,12 @@ class ProcessingError(GeoToolKitError):
     pass
 
 
+class OperationCancelledError(ProcessingError):
+    """Raised when an operation is cancelled through its CancellationToken"""
+
+    pass
+
+
 class ConfigurationError(GeoToolKitError):
     """Raised when configuration is invalid"""
 
@@ -0,0 +1,2 @@
+from .client import WorkerClient
+from .server import WorkerServer, serve
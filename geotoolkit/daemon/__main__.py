@@ -0,0 +1,19 @@
+import argparse
+
+from .server import serve
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the GeoToolKit worker daemon")
+    parser.add_argument(
+        "--address",
+        help="Unix socket path, port or host:port (default: worker.sock in the config directory)",
+    )
+    parser.add_argument("--engine", help="Processing engine (default: preferred_engine)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: max_threads)")
+    args = parser.parse_args()
+    serve(args.address, args.engine, args.workers)
+
+
+if __name__ == "__main__":
+    main()
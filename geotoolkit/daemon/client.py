@@ -0,0 +1,111 @@
+import itertools
+import socket
+from typing import Any, Dict, List, Optional
+
+from ..core.exceptions import ProcessingError
+from .protocol import Address, decode, encode, parse_address
+
+
+class WorkerClient:
+    """
+    Client of a running worker daemon.
+
+    Engine operations are available as methods and return the daemon's result:
+
+        with WorkerClient() as client:
+            path = client.run_pipeline("roads.gpkg", ["force_2d", "repair"])
+
+    The metrics of the last call of each operation are kept in metrics.
+    """
+
+    def __init__(self, address: Optional[Address] = None, timeout: Optional[float] = None):
+        """
+        Args:
+            address: Daemon address, defaults to the daemon's default address
+            timeout: Socket timeout in seconds, None to wait indefinitely
+        """
+        self.address = parse_address(address)
+        self.timeout = timeout
+        self.metrics: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._socket: Optional[socket.socket] = None
+        self._reader = None
+
+    def connect(self) -> "WorkerClient":
+        if self._socket is not None:
+            return self
+        if isinstance(self.address, tuple):
+            self._socket = socket.create_connection(self.address, timeout=self.timeout)
+        else:
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(self.timeout)
+            self._socket.connect(str(self.address))
+        self._reader = self._socket.makefile("rb")
+        return self
+
+    def close(self):
+        if self._socket is not None:
+            self._reader.close()
+            self._socket.close()
+            self._socket = None
+            self._reader = None
+
+    def _request(self, message: Dict[str, Any]) -> Dict[str, Any]:
+        self.connect()
+        message["id"] = next(self._ids)
+        self._socket.sendall(encode(message))
+        line = self._reader.readline()
+        if not line:
+            self.close()
+            raise ProcessingError("Worker daemon closed the connection")
+        return decode(line)
+
+    def _result(self, method: str, response: Dict[str, Any]) -> Any:
+        if not response["ok"]:
+            raise ProcessingError(f"Worker job {method} failed: {response['error']}")
+        if response.get("metrics") is not None:
+            self.metrics[method] = response["metrics"]
+        return response["result"]
+
+    def call(self, method: str, *args, **kwargs) -> Any:
+        """Run a method on the daemon and return its result."""
+        response = self._request({"method": method, "args": list(args), "kwargs": kwargs})
+        return self._result(method, response)
+
+    def batch(self, jobs: List[Dict[str, Any]]) -> List[Any]:
+        """
+        Run several jobs concurrently on the daemon.
+
+        Args:
+            jobs: Dictionaries with a method and optional args and kwargs
+
+        Returns:
+            Results in job order; failed jobs raise ProcessingError
+        """
+        response = self._request({"method": "batch", "jobs": jobs})
+        responses = self._result("batch", response)
+        return [self._result(job["method"], r) for job, r in zip(jobs, responses)]
+
+    def ping(self) -> Dict[str, Any]:
+        return self.call("ping")
+
+    def shutdown(self):
+        """Ask the daemon to stop."""
+        self.call("shutdown")
+        self.close()
+
+    def __getattr__(self, name):
+        """Expose daemon operations as methods"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        def method(*args, **kwargs):
+            return self.call(name, *args, **kwargs)
+
+        return method
+
+    def __enter__(self) -> "WorkerClient":
+        return self.connect()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
@@ -0,0 +1,87 @@
+import ipaddress
+import json
+import socket
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple, Union
+
+from ..core.exceptions import ConfigurationError
+from ..utils.config import ConfigManager
+
+# Default TCP port of the worker daemon, bound to localhost only: the daemon has
+# no authentication and runs jobs reading and writing any path its user can
+DEFAULT_PORT = 8765
+
+# File name of the default Unix socket inside the config directory
+SOCKET_NAME = "worker.sock"
+
+# Largest accepted message, in bytes
+MAX_MESSAGE_SIZE = 64 * 1024 * 1024
+
+Address = Union[str, Path, Tuple[str, int], int]
+
+
+def default_address() -> Address:
+    """Unix socket in the config directory where supported, localhost TCP otherwise."""
+    if hasattr(socket, "AF_UNIX"):
+        config_dir = ConfigManager().config.config_dir or Path.home() / ".geotoolkit"
+        return Path(config_dir) / SOCKET_NAME
+    return ("127.0.0.1", DEFAULT_PORT)
+
+
+def is_loopback(host: str) -> bool:
+    """Whether a host name or IP address is this machine's loopback interface."""
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host.strip("[]")).is_loopback
+    except ValueError:
+        return False
+
+
+def parse_address(address: Optional[Address]) -> Address:
+    """
+    Normalize an address: a port or "host:port" string becomes a (host, port) tuple,
+    anything else is a Unix socket path.
+
+    Raises:
+        ConfigurationError: For a TCP host other than localhost or a loopback
+            address, which would expose the daemon to the network
+    """
+    if address is None:
+        return default_address()
+    if isinstance(address, int):
+        return ("127.0.0.1", address)
+    if isinstance(address, tuple):
+        host, port = address
+    else:
+        text = str(address)
+        host, _, port = text.rpartition(":")
+        if not port.isdigit() or "/" in text:
+            return Path(text)
+        host, port = host or "127.0.0.1", int(port)
+    if not is_loopback(host):
+        raise ConfigurationError(
+            f"Worker daemon address must be on localhost, not {host}: "
+            f"the daemon does not authenticate its clients"
+        )
+    return (host.strip("[]"), port)
+
+
+def _default(value: Any):
+    """JSON encoding of paths and numpy values."""
+    if isinstance(value, Path):
+        return str(value)
+    if hasattr(value, "tolist"):
+        return value.tolist()
+    if isinstance(value, (set, frozenset)):
+        return sorted(value)
+    return str(value)
+
+
+def encode(message: Dict[str, Any]) -> bytes:
+    """Encode a message as one line of JSON."""
+    return json.dumps(message, default=_default).encode() + b"\n"
+
+
+def decode(line: bytes) -> Dict[str, Any]:
+    return json.loads(line)
@@ -0,0 +1,185 @@
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .. import setup_logger
+from ..interfaces.async_preprocessor import AsyncPreprocessor
+from .protocol import MAX_MESSAGE_SIZE, Address, decode, encode, parse_address
+
+logger = setup_logger(
+    "worker_daemon",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+
+class WorkerServer:
+    """
+    Long-lived local service running preprocessing jobs on warm workers.
+
+    Worker processes are started once, with their engine created and PROJ
+    database loaded, so jobs skip interpreter, GDAL and CRS start-up costs.
+    Clients send newline-delimited JSON requests over a Unix socket or a localhost
+    TCP port:
+
+        {"id": 1, "method": "run_pipeline", "args": ["roads.gpkg", ["force_2d"]], "kwargs": {}}
+
+    and receive one JSON response per request:
+
+        {"id": 1, "ok": true, "result": "roads_pipeline.gpkg", "metrics": {...}, "seconds": 0.2}
+
+    Besides engine operations, the methods "batch" (a list of jobs run
+    concurrently), "ping", "metrics" and "shutdown" are available.
+    """
+
+    def __init__(
+        self,
+        address: Optional[Address] = None,
+        engine: Optional[str] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Args:
+            address: Unix socket path, port or (host, port); defaults to a socket
+                in the config directory
+            engine: Processing engine, defaults to the configured preferred_engine
+            max_workers: Worker processes, defaults to max_threads
+        """
+        self.address = parse_address(address)
+        self.preprocessor = AsyncPreprocessor(engine=engine, max_concurrency=max_workers)
+        self.jobs = 0
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._stopped: Optional[asyncio.Event] = None
+
+    async def start(self):
+        """Warm the workers up and start listening."""
+        self._stopped = asyncio.Event()
+        start = time.perf_counter()
+        workers = await self.preprocessor.warm_up()
+        logger.info(f"Warmed up {workers} workers in {time.perf_counter() - start:.2f}s")
+
+        if isinstance(self.address, tuple):
+            host, port = self.address
+            self._server = await asyncio.start_server(
+                self._handle, host, port, limit=MAX_MESSAGE_SIZE
+            )
+        else:
+            self.address.parent.mkdir(parents=True, exist_ok=True)
+            if self.address.exists():
+                self.address.unlink()
+            # Create the socket accessible to its owner only, with no window
+            # in which other users could connect
+            umask = os.umask(0o077)
+            try:
+                self._server = await asyncio.start_unix_server(
+                    self._handle, str(self.address), limit=MAX_MESSAGE_SIZE
+                )
+            finally:
+                os.umask(umask)
+            os.chmod(self.address, 0o600)
+        logger.info(f"Worker daemon listening on {self.address}")
+
+    async def serve_forever(self):
+        """Serve until a shutdown request arrives."""
+        await self.start()
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.stop()
+
+    async def stop(self):
+        """Stop listening and shut the workers down."""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+        await self.preprocessor.close(cancel_pending=True)
+        if not isinstance(self.address, tuple) and self.address.exists():
+            self.address.unlink()
+        logger.info(f"Worker daemon stopped after {self.jobs} jobs")
+
+    async def _run_job(self, job: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one job and build its response."""
+        if not isinstance(job, dict):
+            return {"id": None, "ok": False, "error": "Invalid request: expected a JSON object"}
+        method = job.get("method")
+        start = time.perf_counter()
+        try:
+            if method == "ping":
+                result = {
+                    "pid": os.getpid(),
+                    "jobs": self.jobs,
+                    "pending": self.preprocessor.pending,
+                }
+            elif method == "metrics":
+                result = self.preprocessor.metrics
+            elif method == "shutdown":
+                self._stopped.set()
+                result = True
+            elif method == "batch":
+                result = await asyncio.gather(*(self._run_job(j) for j in job.get("jobs", [])))
+            elif not isinstance(method, str) or not method or method.startswith("_"):
+                raise ValueError(f"Invalid method: {method}")
+            else:
+                result = await self.preprocessor.run(
+                    method, *job.get("args", []), **job.get("kwargs", {})
+                )
+                self.jobs += 1
+        except Exception as e:
+            logger.error(f"Job {method} failed: {str(e)}")
+            return {"id": job.get("id"), "ok": False, "error": str(e)}
+
+        return {
+            "id": job.get("id"),
+            "ok": True,
+            "result": result,
+            "metrics": self.preprocessor.metrics.get(method),
+            "seconds": time.perf_counter() - start,
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        Serve one client connection; requests on it are answered in order.
+
+        A request longer than MAX_MESSAGE_SIZE is answered with an error and the
+        connection is closed, as the rest of the stream can no longer be split
+        into requests.
+        """
+        try:
+            while not reader.at_eof():
+                try:
+                    line = await reader.readline()
+                except ValueError:
+                    response = {
+                        "id": None,
+                        "ok": False,
+                        "error": f"Invalid request: longer than {MAX_MESSAGE_SIZE} bytes",
+                    }
+                    writer.write(encode(response))
+                    await writer.drain()
+                    break
+                if not line.strip():
+                    continue
+                try:
+                    job = decode(line)
+                except ValueError as e:
+                    response = {"id": None, "ok": False, "error": f"Invalid request: {str(e)}"}
+                else:
+                    response = await self._run_job(job)
+                writer.write(encode(response))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+
+def serve(
+    address: Optional[Address] = None,
+    engine: Optional[str] = None,
+    max_workers: Optional[int] = None,
+):
+    """Run a worker daemon in the foreground until it receives a shutdown request."""
+    asyncio.run(WorkerServer(address, engine, max_workers).serve_forever())
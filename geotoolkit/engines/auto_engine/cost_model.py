@@ -0,0 +1,232 @@
+import json
+import random
+import tempfile
+import time
+from datetime import datetime
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ...core.constants import EngineType, OUTPUT_FORMATS
+from ...core.exceptions import ConfigurationError
+from ...utils.config import ConfigManager
+
+COST_MODEL_VERSION = 1
+
+# Operations timed by the calibration benchmark, with their extra arguments
+BENCHMARK_OPERATIONS: Dict[str, Tuple[tuple, Dict[str, Any]]] = {
+    "clean_field_names": ((), {}),
+    "standardize_projection": ((3857,), {}),
+    "repair_geometry": ((), {}),
+    "calculate_sinuosity": (("sinuosity",), {}),
+}
+
+# Feature counts of the benchmark datasets; two sizes give fixed and per-feature cost
+BENCHMARK_SIZES: Tuple[int, int] = (500, 5000)
+
+BENCHMARK_FORMATS: Tuple[str, ...] = ("shp", "gpkg")
+
+# Weight of a new observation when refining the model after a real run
+OBSERVATION_WEIGHT = 0.2
+
+
+def available_engines() -> List[str]:
+    """Engines whose Python packages are importable on this host, fastest-to-load first."""
+    engines = []
+    if find_spec("osgeo") is not None:
+        engines.append(EngineType.GDAL.value)
+    if find_spec("arcpy") is not None:
+        engines.append(EngineType.ARCPY.value)
+    return engines
+
+
+def cost_model_path() -> Path:
+    """Location of the persisted cost model inside the config directory."""
+    config_dir = ConfigManager().config.config_dir or Path.home() / ".geotoolkit"
+    return Path(config_dir) / "cost_model.json"
+
+
+def dataset_format(dataset) -> str:
+    """Format key of a dataset from its extension (gdb for file geodatabases)."""
+    path = Path(dataset)
+    for parent in (path, *path.parents):
+        if parent.suffix.lower() == ".gdb":
+            return "gdb"
+    return path.suffix.lower().lstrip(".")
+
+
+def dataset_size(dataset) -> int:
+    """Feature count of a vector dataset, estimated from its file size if it cannot be read."""
+    from osgeo import ogr
+
+    ds = ogr.Open(str(dataset), 0)
+    if ds is not None:
+        count = sum(max(layer.GetFeatureCount(), 0) for layer in ds)
+        ds = None
+        return count
+    path = Path(dataset)
+    return path.stat().st_size // 200 if path.is_file() else 0
+
+
+def write_benchmark_dataset(path: Path, fmt: str, n_features: int, seed: int = 0):
+    """Write a synthetic layer of random-walk lines in EPSG:4326."""
+    from osgeo import ogr, osr
+
+    rng = random.Random(seed)
+    driver = ogr.GetDriverByName(OUTPUT_FORMATS[fmt]["driver"])
+    ds = driver.CreateDataSource(str(path))
+    srs = osr.SpatialReference()
+    srs.ImportFromEPSG(4326)
+    layer = ds.CreateLayer("benchmark", srs, ogr.wkbLineString)
+    layer.CreateField(ogr.FieldDefn("Stream Name", ogr.OFTString))
+    layer.CreateField(ogr.FieldDefn("Order#", ogr.OFTInteger))
+
+    layer.StartTransaction()
+    for i in range(n_features):
+        x, y = rng.uniform(-100, -90), rng.uniform(30, 40)
+        line = ogr.Geometry(ogr.wkbLineString)
+        for _ in range(20):
+            x += rng.uniform(-0.01, 0.01)
+            y += rng.uniform(-0.01, 0.01)
+            line.AddPoint_2D(x, y)
+        feature = ogr.Feature(layer.GetLayerDefn())
+        feature.SetField(0, f"stream {i}")
+        feature.SetField(1, i % 7)
+        feature.SetGeometry(line)
+        layer.CreateFeature(feature)
+    layer.CommitTransaction()
+    ds = None
+
+
+class CostModel:
+    """
+    Estimates the run time of an operation on each engine.
+
+    Each (engine, operation, format) has a fixed cost and a per-feature cost in
+    seconds, fitted by a micro-benchmark on synthetic datasets of two sizes and
+    refined with the timings of real runs.
+    """
+
+    def __init__(
+        self,
+        coefficients: Optional[Dict[str, Any]] = None,
+        engines: Optional[List[str]] = None,
+        calibrated: Optional[str] = None,
+    ):
+        self.coefficients: Dict[str, Dict[str, Dict[str, List[float]]]] = coefficients or {}
+        self.engines: List[str] = list(engines or [])
+        self.calibrated = calibrated or datetime.now().isoformat()
+
+    @classmethod
+    def load(cls, path: Optional[Path] = None) -> Optional["CostModel"]:
+        """Load a persisted model, or None if missing, outdated or for other engines."""
+        path = path or cost_model_path()
+        if not path.exists():
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if data.get("version") != COST_MODEL_VERSION:
+            return None
+        if sorted(data.get("engines", [])) != sorted(available_engines()):
+            return None
+        return cls(data.get("coefficients"), data.get("engines"), data.get("calibrated"))
+
+    def save(self, path: Optional[Path] = None):
+        """Persist the model in the config directory."""
+        path = path or cost_model_path()
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with open(path, "w") as f:
+                json.dump(
+                    {
+                        "version": COST_MODEL_VERSION,
+                        "calibrated": self.calibrated,
+                        "engines": self.engines,
+                        "coefficients": self.coefficients,
+                    },
+                    f,
+                    indent=4,
+                )
+        except Exception as e:
+            raise ConfigurationError(f"Failed to save cost model: {str(e)}")
+
+    def _coefficients(self, engine: str, operation: str, fmt: str) -> Optional[List[float]]:
+        by_format = self.coefficients.get(engine, {}).get(operation)
+        if not by_format:
+            return None
+        if fmt in by_format:
+            return by_format[fmt]
+        # Unbenchmarked format: average the benchmarked ones
+        known = list(by_format.values())
+        return [sum(c[0] for c in known) / len(known), sum(c[1] for c in known) / len(known)]
+
+    def estimate(self, engine: str, operation: str, fmt: str, n_features: int) -> Optional[float]:
+        """Estimated seconds, or None when the model has no data for the operation."""
+        coefficients = self._coefficients(engine, operation, fmt)
+        if coefficients is None:
+            return None
+        fixed, per_feature = coefficients
+        return fixed + per_feature * n_features
+
+    def fit(self, engine: str, operation: str, fmt: str, timings: Dict[int, float]):
+        """Fit fixed and per-feature cost from timings at two dataset sizes."""
+        (n1, t1), (n2, t2) = sorted(timings.items())[:2]
+        per_feature = max((t2 - t1) / (n2 - n1), 0.0)
+        fixed = max(t1 - per_feature * n1, 0.0)
+        self.coefficients.setdefault(engine, {}).setdefault(operation, {})[fmt] = [
+            fixed,
+            per_feature,
+        ]
+
+    def observe(self, engine: str, operation: str, fmt: str, n_features: int, seconds: float):
+        """Refine the per-feature cost with the timing of a real run."""
+        coefficients = self._coefficients(engine, operation, fmt)
+        if coefficients is None or n_features <= 0:
+            return
+        fixed, per_feature = coefficients
+        observed = max(seconds - fixed, 0.0) / n_features
+        per_feature += OBSERVATION_WEIGHT * (observed - per_feature)
+        self.coefficients.setdefault(engine, {}).setdefault(operation, {})[fmt] = [
+            fixed,
+            per_feature,
+        ]
+
+
+def calibrate(engine_factory: Callable[[str], Any], engines: List[str]) -> CostModel:
+    """
+    Run the micro-benchmark and fit a cost model.
+
+    Every operation in BENCHMARK_OPERATIONS that an engine implements is timed on
+    fresh synthetic datasets of each size in BENCHMARK_SIZES and each format in
+    BENCHMARK_FORMATS.
+
+    Args:
+        engine_factory: Creates a preprocessor for an engine name
+        engines: Engines to benchmark
+
+    Returns:
+        Fitted cost model
+    """
+    model = CostModel(engines=engines)
+    with tempfile.TemporaryDirectory(prefix="geotoolkit_benchmark_") as tmp:
+        for engine in engines:
+            preprocessor = engine_factory(engine)
+            for operation, (args, kwargs) in BENCHMARK_OPERATIONS.items():
+                if not hasattr(preprocessor, operation):
+                    continue
+                for fmt in BENCHMARK_FORMATS:
+                    timings = {}
+                    for n in BENCHMARK_SIZES:
+                        path = (
+                            Path(tmp)
+                            / f"{engine}_{operation}_{n}{OUTPUT_FORMATS[fmt]['extension']}"
+                        )
+                        write_benchmark_dataset(path, fmt, n)
+                        start = time.perf_counter()
+                        getattr(preprocessor, operation)(str(path), *args, **kwargs)
+                        timings[n] = time.perf_counter() - start
+                    model.fit(engine, operation, fmt, timings)
+    return model
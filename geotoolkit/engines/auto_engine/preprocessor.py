@@ -0,0 +1,142 @@
+import inspect
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from ... import setup_logger
+from ...core.constants import EngineType
+from ...core.exceptions import EngineNotFoundError, ProcessingError
+from .cost_model import CostModel, available_engines, calibrate, dataset_format, dataset_size
+
+logger = setup_logger(
+    "auto_processor",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+
+def _engine_class(engine: str):
+    """Preprocessor class of an engine, imported without instantiating it."""
+    if engine == EngineType.GDAL.value:
+        from ..gdal_engine.preprocessor import GDALPreprocessor
+
+        return GDALPreprocessor
+    if engine == EngineType.ARCPY.value:
+        from ..arcpy_engine.preprocessor import ArcPyPreprocessor
+
+        return ArcPyPreprocessor
+    raise ValueError(f"Unsupported engine: {engine}")
+
+
+class AutoPreprocessor:
+    """
+    Runs each operation on whichever available engine is expected to be fastest.
+
+    Engines that lack an operation, or whose signature does not accept the given
+    arguments, are skipped. When several engines qualify, a CostModel estimates
+    their run times from the dataset's feature count and format. The model is
+    calibrated by a micro-benchmark on first use, persisted in the config
+    directory and refined with the timings of every run.
+    """
+
+    def __init__(self, engines: Optional[List[str]] = None):
+        self.engines = engines or available_engines()
+        if not self.engines:
+            raise EngineNotFoundError("No supported GIS engine found")
+        self.metrics: Dict[str, Dict[str, Any]] = {"engine_selection": {}}
+        self._instances: Dict[str, Any] = {}
+        self._model: Optional[CostModel] = None
+
+    def _engine(self, engine: str):
+        if engine not in self._instances:
+            from ... import PreprocessorFactory
+
+            self._instances[engine] = PreprocessorFactory.create(engine)
+        return self._instances[engine]
+
+    @property
+    def cost_model(self) -> CostModel:
+        """Persisted cost model, calibrated on first use."""
+        if self._model is None:
+            self._model = CostModel.load() or self.calibrate()
+        return self._model
+
+    def calibrate(self) -> CostModel:
+        """Run the calibration benchmark and persist the fitted model."""
+        logger.info(f"Calibrating engine cost model for {', '.join(self.engines)}")
+        start = time.perf_counter()
+        self._model = calibrate(self._engine, self.engines)
+        self._model.save()
+        logger.info(f"Calibrated engine cost model in {time.perf_counter() - start:.1f}s")
+        return self._model
+
+    def _supports(self, engine: str, operation: str, args: tuple, kwargs: Dict) -> bool:
+        method = getattr(_engine_class(engine), operation, None)
+        if method is None:
+            return False
+        try:
+            inspect.signature(method).bind(None, *args, **kwargs)
+        except TypeError:
+            return False
+        return True
+
+    def select_engine(self, operation: str, *args, **kwargs) -> Tuple[str, Dict[str, Any]]:
+        """
+        Choose the engine for an operation call.
+
+        Returns:
+            Tuple of (engine name, selection details)
+        """
+        candidates = [e for e in self.engines if self._supports(e, operation, args, kwargs)]
+        if not candidates:
+            raise ProcessingError(f"No available engine supports {operation} with these arguments")
+
+        dataset = args[0] if args else kwargs.get("dataset")
+        if len(candidates) == 1 or not isinstance(dataset, (str, Path)):
+            return candidates[0], {"candidates": candidates}
+
+        fmt = dataset_format(dataset)
+        n_features = dataset_size(dataset)
+        estimates = {
+            engine: self.cost_model.estimate(engine, operation, fmt, n_features)
+            for engine in candidates
+        }
+        known = {engine: seconds for engine, seconds in estimates.items() if seconds is not None}
+        engine = min(known, key=known.get) if known else candidates[0]
+        return engine, {
+            "candidates": candidates,
+            "format": fmt,
+            "features": n_features,
+            "estimates": estimates,
+        }
+
+    def __getattr__(self, name):
+        """Dispatch operations to the selected engine"""
+        if name.startswith("_") or not any(
+            hasattr(_engine_class(engine), name) for engine in self.engines
+        ):
+            raise AttributeError(name)
+
+        def operation(*args, **kwargs):
+            engine, selection = self.select_engine(name, *args, **kwargs)
+            preprocessor = self._engine(engine)
+
+            start = time.perf_counter()
+            result = getattr(preprocessor, name)(*args, **kwargs)
+            elapsed = time.perf_counter() - start
+
+            if "estimates" in selection:
+                self.cost_model.observe(
+                    engine, name, selection["format"], selection["features"], elapsed
+                )
+                self.cost_model.save()
+
+            selection.update(engine=engine, seconds=elapsed)
+            self.metrics["engine_selection"][name] = selection
+            engine_metrics = getattr(preprocessor, "metrics", {})
+            if name in engine_metrics:
+                self.metrics[name] = engine_metrics[name]
+            logger.info(f"Ran {name} on {engine} in {elapsed:.2f}s")
+            return result
+
+        return operation
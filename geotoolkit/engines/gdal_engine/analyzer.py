@@ -0,0 +1,790 @@
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import replace
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import shapely
+from osgeo import gdal, ogr, osr
+
+from ...core.base import BaseAnalyzer
+from ...core.exceptions import ProcessingError
+from ...utils.config import ConfigManager
+from ...utils.logger import setup_logger
+from ...utils.memory import BATCH_BUDGET_FRACTION, WORKING_SET_FACTOR, memory_budget, worker_limit
+from .filters import apply_filters
+from .formats import OutputFormat, output_path_for, resolve_output_format
+from .geometry_buffer import FieldSpec, GeometryBuffer, LayerSchema, write_buffer
+from .precision import create_layer
+from .profiles import profiled
+from .raster import north_up_geotransform
+from .spatial_index import SpatialIndex
+from .srs import spatial_reference
+from .zonal import (
+    COUNT_STATISTICS,
+    DEFAULT_ZONAL_STATISTICS,
+    new_zonal_results,
+    raster_zonal_statistics,
+    resolve_zonal_statistics,
+    zonal_task,
+    zonal_tasks,
+)
+
+logger = setup_logger(
+    "gdal_analyzer",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+# Left-hand layers with more features than this are queried in worker processes
+PARALLEL_QUERY_THRESHOLD = 50000
+
+OVERLAY_TYPES = ("intersection", "difference")
+
+JOIN_TYPES = ("inner", "left")
+
+# Index loaded once per worker process
+_WORKER_INDEX: Optional[SpatialIndex] = None
+
+
+def _init_query_worker(index: SpatialIndex):
+    """Worker initializer: receive the index; unpickling rebuilds its STRtree."""
+    global _WORKER_INDEX
+    _WORKER_INDEX = index
+
+
+def run_query(
+    index: SpatialIndex, geoms: np.ndarray, kind: str, params: Dict[str, Any]
+) -> Tuple[np.ndarray, np.ndarray, Optional[np.ndarray]]:
+    """Run a predicate ("query") or k-nearest ("nearest") query for a batch."""
+    if kind == "nearest":
+        return index.nearest(geoms, **params)
+    left, right = index.query(geoms, **params)
+    return left, right, None
+
+
+def _query_worker(geoms: np.ndarray, kind: str, params: Dict[str, Any]):
+    """Worker: query the worker's index with a batch of geometries."""
+    return run_query(_WORKER_INDEX, geoms, kind, params)
+
+
+def _take_column(values: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """Gather an attribute column as objects, with None where index is -1 or masked."""
+    mask = np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else None
+    taken = np.asarray(np.ma.getdata(values), dtype=object)[np.maximum(index, 0)]
+    missing = index < 0
+    if mask is not None:
+        missing |= mask[np.maximum(index, 0)]
+    taken[missing] = None
+    return taken
+
+
+def _keep_dimension(geoms: np.ndarray, dimensions: np.ndarray) -> np.ndarray:
+    """
+    Keep the parts of overlay results with the expected dimension.
+
+    GeometryCollections are reduced to their parts of that dimension, and
+    lower-dimensional results (e.g. the shared edge of touching polygons) are
+    dropped.
+    """
+    geoms = geoms.copy()
+    for i in np.flatnonzero(shapely.get_type_id(geoms) == 7):
+        parts = shapely.get_parts(geoms[i])
+        parts = parts[shapely.get_dimensions(parts) == dimensions[i]]
+        geoms[i] = shapely.union_all(parts) if len(parts) else None
+    geoms[shapely.is_empty(geoms) | (shapely.get_dimensions(geoms) != dimensions)] = None
+    return geoms
+
+
+class GDALAnalyzer(BaseAnalyzer):
+    """GDAL implementation of analysis operations."""
+
+    def __init__(self):
+        gdal.UseExceptions()
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+        self._indexes: Dict[Tuple, SpatialIndex] = {}
+
+    def spatial_index(self, dataset: Union[str, Path], layer: Optional[str] = None) -> SpatialIndex:
+        """
+        STRtree index of a dataset's layer, built once and reused until the file changes.
+
+        Args:
+            dataset: Path to the dataset
+            layer: Layer name, defaults to the first layer
+
+        Returns:
+            SpatialIndex of the layer
+        """
+        path = Path(dataset).resolve()
+        if not path.exists():
+            raise ProcessingError(f"Dataset not found: {dataset}")
+        stat = os.stat(path)
+        key = (str(path), layer, stat.st_size, stat.st_mtime)
+        if key not in self._indexes:
+            # Drop indexes of older versions of the same layer
+            for stale in [k for k in self._indexes if k[:2] == key[:2]]:
+                del self._indexes[stale]
+            ds = ogr.Open(str(path), 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+            source = ds.GetLayerByName(layer) if layer else ds.GetLayer()
+            if source is None:
+                raise ProcessingError(f"Layer not found: {layer}")
+            started = time.perf_counter()
+            self._indexes[key] = SpatialIndex.from_layer(source)
+            logger.info(
+                f"Indexed {len(self._indexes[key])} features of {path} "
+                f"in {time.perf_counter() - started:.2f}s"
+            )
+            ds = None
+        return self._indexes[key]
+
+    @profiled
+    def calculate_statistics(self, dataset: Union[str, Path]) -> Dict[str, Any]:
+        """
+        Summarize every layer of a dataset in a single vectorized pass.
+
+        Args:
+            dataset: Path to input dataset
+
+        Returns:
+            Per layer: feature count, geometry type counts, extent, total area and
+            length, and count, nulls, min, max and mean of numeric fields
+        """
+        try:
+            ds = ogr.Open(str(dataset), 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+
+            statistics = {}
+            for layer in ds:
+                stats: Dict[str, Any] = {
+                    "features": 0,
+                    "geometry_types": {},
+                    "extent": None,
+                    "area": 0.0,
+                    "length": 0.0,
+                    "fields": {},
+                }
+                bounds = []
+                for buffer in GeometryBuffer.iter_layer(layer):
+                    geoms = buffer.to_shapely()
+                    stats["features"] += len(buffer)
+                    names, counts = np.unique(
+                        shapely.get_type_id(geoms[~shapely.is_missing(geoms)]), return_counts=True
+                    )
+                    types = stats["geometry_types"]
+                    for type_id, count in zip(names, counts):
+                        name = shapely.GeometryType(type_id).name
+                        types[name] = types.get(name, 0) + int(count)
+                    stats["area"] += float(np.nansum(shapely.area(geoms)))
+                    stats["length"] += float(np.nansum(shapely.length(geoms)))
+                    if len(buffer):
+                        bounds.append(shapely.total_bounds(geoms))
+                    for spec in buffer.schema.fields:
+                        self._update_field_statistics(
+                            stats["fields"], spec.name, buffer.attributes[spec.name]
+                        )
+
+                if bounds:
+                    bounds = np.array(bounds)
+                    stats["extent"] = (
+                        float(np.nanmin(bounds[:, 0])),
+                        float(np.nanmin(bounds[:, 1])),
+                        float(np.nanmax(bounds[:, 2])),
+                        float(np.nanmax(bounds[:, 3])),
+                    )
+                for field_stats in stats["fields"].values():
+                    count = field_stats["count"]
+                    field_stats["mean"] = field_stats.pop("sum") / count if count else None
+                statistics[layer.GetName()] = stats
+
+            ds = None
+            self.metrics["calculate_statistics"] = statistics
+            return statistics
+
+        except Exception as e:
+            raise ProcessingError(f"Error calculating statistics: {str(e)}")
+
+    @staticmethod
+    def _update_field_statistics(fields: Dict[str, Dict], name: str, values: np.ndarray):
+        """Accumulate count, nulls, min, max and sum of a numeric attribute column."""
+        data = np.ma.getdata(values)
+        if data.dtype.kind not in "iuf":
+            if data.dtype.kind != "O":
+                return
+            # Object columns read feature by feature: numeric when every value is
+            numeric = [v for v in data if v is not None]
+            if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in numeric):
+                return
+            data = np.array([np.nan if v is None else v for v in data], dtype=np.float64)
+        valid = ~np.ma.getmaskarray(values) & ~np.isnan(data.astype(np.float64))
+        stats = fields.setdefault(
+            name, {"count": 0, "nulls": 0, "min": None, "max": None, "sum": 0.0}
+        )
+        stats["nulls"] += int((~valid).sum())
+        if not valid.any():
+            return
+        present = data[valid].astype(np.float64)
+        stats["count"] += len(present)
+        stats["sum"] += float(present.sum())
+        low, high = float(present.min()), float(present.max())
+        stats["min"] = low if stats["min"] is None else min(stats["min"], low)
+        stats["max"] = high if stats["max"] is None else max(stats["max"], high)
+
+    @profiled
+    def perform_overlay(
+        self,
+        layer1: Union[str, Path],
+        layer2: Union[str, Path],
+        overlay_type: str = "intersection",
+        output_format: Optional[str] = None,
+        suffix: str = "_right",
+    ) -> Path:
+        """
+        Overlay two datasets using an STRtree index of the second.
+
+        "intersection" writes the intersection of every intersecting pair with the
+        attributes of both features; "difference" writes each feature of layer1
+        minus the features of layer2 it intersects. Both layers must share a
+        coordinate system.
+
+        Args:
+            layer1: Path to the input dataset
+            layer2: Path to the overlay dataset
+            overlay_type: One of OVERLAY_TYPES
+            output_format: Output format (see OUTPUT_FORMATS), defaults to layer1's format
+            suffix: Suffix for layer2 fields whose names exist in layer1
+
+        Returns:
+            Path to the output dataset, {stem}_{overlay_type}{ext}
+        """
+        try:
+            if overlay_type not in OVERLAY_TYPES:
+                raise ProcessingError(
+                    f"Unsupported overlay type: {overlay_type}. "
+                    f"Choose from {', '.join(OVERLAY_TYPES)}"
+                )
+            index = self.spatial_index(layer2)
+            input_path = Path(layer1)
+            ds, layer, fmt, output_path = self._open_input(
+                input_path, overlay_type, output_format, None, None, None
+            )
+            if self._layer_transform(layer, index.schema.srs_wkt) is not None:
+                raise ProcessingError(
+                    "Overlay layers must share a coordinate system; reproject one first"
+                )
+
+            left_schema = LayerSchema.from_layer(layer)
+            right_fields = self._right_fields(left_schema, index, suffix)
+            schema = left_schema
+            if overlay_type == "intersection":
+                schema = replace(
+                    left_schema,
+                    geom_type=ogr.wkbUnknown,
+                    fields=left_schema.fields + [spec for _, spec in right_fields],
+                )
+            out_ds, out_layer = self._create_output(output_path, fmt, schema)
+
+            stats = {"input_features": 0, "output_features": 0}
+            for buffer in GeometryBuffer.iter_layer(layer):
+                geoms = buffer.to_shapely()
+                left, right = index.query(geoms, "intersects")
+                stats["input_features"] += len(buffer)
+
+                if overlay_type == "intersection":
+                    dimensions = np.minimum(
+                        shapely.get_dimensions(geoms[left]),
+                        shapely.get_dimensions(index.geoms[right]),
+                    )
+                    result = _keep_dimension(
+                        shapely.intersection(geoms[left], index.geoms[right]), dimensions
+                    )
+                    keep = ~shapely.is_missing(result)
+                    attributes = {
+                        name: _take_column(values, left[keep])
+                        for name, values in buffer.attributes.items()
+                    }
+                    for source, spec in right_fields:
+                        attributes[spec.name] = _take_column(index.attributes[source], right[keep])
+                    out = GeometryBuffer.from_shapely(
+                        result[keep], schema, buffer.fids[left[keep]], attributes
+                    )
+                else:
+                    result = geoms.copy()
+                    groups = np.split(right, np.searchsorted(left, np.arange(1, len(geoms))))
+                    for i in np.unique(left):
+                        result[i] = shapely.difference(
+                            geoms[i], shapely.union_all(index.geoms[groups[i]])
+                        )
+                    result = _keep_dimension(result, shapely.get_dimensions(geoms))
+                    keep = np.flatnonzero(~shapely.is_missing(result))
+                    out = GeometryBuffer.from_shapely(
+                        result[keep],
+                        schema,
+                        buffer.fids[keep],
+                        {name: values[keep] for name, values in buffer.attributes.items()},
+                    )
+                stats["output_features"] += write_buffer(out, out_layer)
+
+            ds = None
+            out_ds = None
+            self.metrics["perform_overlay"] = stats
+            logger.info(f"Wrote {overlay_type} overlay to {output_path}: {stats}")
+            return output_path
+
+        except Exception as e:
+            raise ProcessingError(f"Error performing overlay: {str(e)}")
+
+    @profiled
+    def spatial_join(
+        self,
+        left: Union[str, Path],
+        right: Union[str, Path],
+        predicate: str = "intersects",
+        how: str = "inner",
+        distance: Optional[float] = None,
+        right_layer: Optional[str] = None,
+        suffix: str = "_right",
+        max_workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+    ) -> Path:
+        """
+        Join the attributes of right features to the left features they relate to.
+
+        The right dataset is indexed once (see spatial_index) and left features are
+        matched in batches with bulk STRtree queries. Left layers larger than
+        PARALLEL_QUERY_THRESHOLD are queried in worker processes, each holding a
+        copy of the index, while the main process writes the output. A left
+        feature matching several right features is written once per match.
+
+        Args:
+            left: Path to the left dataset, whose geometries are written
+            right: Path to the right dataset
+            predicate: One of SPATIAL_PREDICATES, evaluated as predicate(left, right),
+                e.g. "within" for a point-in-polygon join of points on the left
+            how: "inner" drops unmatched left features, "left" keeps them with null
+                right attributes
+            distance: Search distance of the "dwithin" predicate
+            right_layer: Right layer name, defaults to the first layer
+            suffix: Suffix for right fields whose names exist on the left
+            max_workers: Worker processes, defaults to max_threads and throttled to
+                the memory budget
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the left's format
+            where: Attribute filter on the left layer (OGR SQL WHERE clause)
+            bbox: Spatial filter on the left layer (minx, miny, maxx, maxy)
+            mask: Spatial filter geometry on the left layer
+
+        Returns:
+            Path to the output dataset, {stem}_join{ext}
+        """
+        try:
+            return self._join(
+                "spatial_join",
+                left,
+                right,
+                "query",
+                {"predicate": predicate, "distance": distance},
+                how,
+                right_layer,
+                suffix,
+                None,
+                max_workers,
+                output_format,
+                (where, bbox, mask),
+            )
+        except Exception as e:
+            raise ProcessingError(f"Error performing spatial join: {str(e)}")
+
+    @profiled
+    def nearest(
+        self,
+        left: Union[str, Path],
+        right: Union[str, Path],
+        k: int = 1,
+        max_distance: Optional[float] = None,
+        how: str = "inner",
+        distance_field: str = "distance",
+        right_layer: Optional[str] = None,
+        suffix: str = "_right",
+        max_workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+    ) -> Path:
+        """
+        Join the k nearest right features to every left feature, e.g. gauges to reaches.
+
+        Uses the same persistent index, batching and worker processes as
+        spatial_join. Each left feature is written once per neighbour, nearest
+        first, with the distance in the right layer's units.
+
+        Args:
+            left: Path to the left dataset, whose geometries are written
+            right: Path to the right dataset
+            k: Neighbours per left feature
+            max_distance: Ignore right features farther than this distance
+            how: "inner" drops left features without a neighbour, "left" keeps them
+            distance_field: Name of the output distance field
+            right_layer: Right layer name, defaults to the first layer
+            suffix: Suffix for right fields whose names exist on the left
+            max_workers: Worker processes, defaults to max_threads and throttled to
+                the memory budget
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the left's format
+            where: Attribute filter on the left layer (OGR SQL WHERE clause)
+            bbox: Spatial filter on the left layer (minx, miny, maxx, maxy)
+            mask: Spatial filter geometry on the left layer
+
+        Returns:
+            Path to the output dataset, {stem}_nearest{ext}
+        """
+        try:
+            return self._join(
+                "nearest",
+                left,
+                right,
+                "nearest",
+                {"k": k, "max_distance": max_distance},
+                how,
+                right_layer,
+                suffix,
+                distance_field,
+                max_workers,
+                output_format,
+                (where, bbox, mask),
+            )
+        except Exception as e:
+            raise ProcessingError(f"Error finding nearest features: {str(e)}")
+
+    @profiled
+    def zonal_statistics(
+        self,
+        zones: Union[str, Path],
+        raster: Union[str, Path],
+        stats: Sequence[str] = DEFAULT_ZONAL_STATISTICS,
+        band: int = 1,
+        all_touched: bool = False,
+        prefix: str = "",
+        max_workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+    ) -> Path:
+        """
+        Summarize a raster (e.g. a DEM) within each polygon, e.g. elevation per watershed.
+
+        For every zone, only the raster window covering its bounding box is read
+        and the zone is rasterized into that window as a pixel mask. Statistics
+        are computed with NumPy, leaving out nodata and NaN pixels. Zones are
+        processed in spatially sorted tasks so consecutive reads hit GDAL's block
+        cache; worker processes each keep one read-only handle of the raster.
+        Zones in another coordinate system than the raster are reprojected first.
+
+        Args:
+            zones: Path to the polygon dataset
+            raster: Path to the raster
+            stats: Statistics to compute, any of ZONAL_STATISTICS
+            band: Raster band number
+            all_touched: Include every pixel a zone touches instead of the pixels
+                whose centre lies in it
+            prefix: Prefix of the statistic field names, e.g. "elev_"
+            max_workers: Worker processes, defaults to max_threads and throttled to
+                the memory budget
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the zones' format
+            where: Attribute filter on the zones (OGR SQL WHERE clause)
+            bbox: Spatial filter on the zones (minx, miny, maxx, maxy)
+            mask: Spatial filter geometry on the zones
+
+        Returns:
+            Path to the output dataset, {stem}_zonal{ext}, with the zones and their
+            statistics
+        """
+        try:
+            started = time.perf_counter()
+            stats = resolve_zonal_statistics(stats)
+            raster_ds = gdal.Open(str(raster))
+            if raster_ds is None:
+                raise ProcessingError(f"Could not open raster: {raster}")
+            if not 1 <= band <= raster_ds.RasterCount:
+                raise ProcessingError(f"Band {band} not found in {raster}")
+            north_up_geotransform(raster_ds)
+
+            ds, layer, fmt, output_path = self._open_input(
+                Path(zones), "zonal", output_format, where, bbox, mask
+            )
+            transform = self._layer_transform(layer, raster_ds.GetProjection())
+            zones_schema = LayerSchema.from_layer(layer)
+            schema = replace(
+                zones_schema,
+                fields=zones_schema.fields
+                + [
+                    FieldSpec(
+                        f"{prefix}{name}",
+                        ogr.OFTInteger64 if name in COUNT_STATISTICS else ogr.OFTReal,
+                    )
+                    for name in stats
+                ],
+            )
+            out_ds, out_layer = self._create_output(output_path, fmt, schema)
+
+            workers = worker_limit(
+                max_workers or ConfigManager().config.max_threads,
+                memory_budget() * BATCH_BUDGET_FRACTION,
+            )
+            metrics = {"zones": 0, "empty_zones": 0, "workers": workers}
+            for buffer, results in self._zonal_batches(
+                layer, transform, raster_ds, str(raster), band, stats, all_touched, workers
+            ):
+                out = replace(buffer, schema=schema, attributes=dict(buffer.attributes))
+                for name, values in results.items():
+                    if name in COUNT_STATISTICS:
+                        out.attributes[f"{prefix}{name}"] = values
+                    else:
+                        out.attributes[f"{prefix}{name}"] = np.ma.masked_invalid(values)
+                metrics["zones"] += write_buffer(out, out_layer)
+                if "count" in results:
+                    metrics["empty_zones"] += int((results["count"] == 0).sum())
+
+            ds = None
+            out_ds = None
+            raster_ds = None
+            metrics["seconds"] = time.perf_counter() - started
+            self.metrics["zonal_statistics"] = metrics
+            logger.info(f"Wrote zonal statistics of {raster} over {zones} to {output_path}")
+            return output_path
+
+        except Exception as e:
+            raise ProcessingError(f"Error computing zonal statistics: {str(e)}")
+
+    def _zonal_batches(
+        self,
+        layer,
+        transform,
+        raster_ds,
+        raster_path: str,
+        band: int,
+        stats: Tuple[str, ...],
+        all_touched: bool,
+        workers: int,
+    ) -> Iterator[Tuple[GeometryBuffer, Dict[str, np.ndarray]]]:
+        """Zonal statistics of each batch of zones, in worker processes when workers > 1."""
+
+        def zone_geoms(buffer: GeometryBuffer) -> np.ndarray:
+            if transform is None:
+                return buffer.to_shapely()
+            transformed, _ = buffer.transform(transform, raster_ds.GetProjection())
+            return transformed.to_shapely()
+
+        if workers <= 1:
+            for buffer in GeometryBuffer.iter_layer(layer):
+                geoms = zone_geoms(buffer)
+                results = new_zonal_results(len(geoms), stats)
+                for task in zonal_tasks(geoms):
+                    task_results = raster_zonal_statistics(
+                        raster_ds, band, geoms[task], stats, all_touched
+                    )
+                    for name, values in task_results.items():
+                        results[name][task] = values
+                yield buffer, results
+            return
+
+        def collect(buffer, tasks):
+            results = new_zonal_results(len(buffer), stats)
+            for task, future in tasks:
+                for name, values in future.result().items():
+                    results[name][task] = values
+            return buffer, results
+
+        # Keep a bounded number of batches in flight, yielding results in input order
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            in_flight = deque()
+            for buffer in GeometryBuffer.iter_layer(layer):
+                if len(in_flight) >= 2:
+                    yield collect(*in_flight.popleft())
+                geoms = zone_geoms(buffer)
+                wkbs = shapely.to_wkb(geoms)
+                tasks = [
+                    (
+                        task,
+                        executor.submit(
+                            zonal_task, raster_path, band, wkbs[task], stats, all_touched
+                        ),
+                    )
+                    for task in zonal_tasks(geoms)
+                ]
+                in_flight.append((buffer, tasks))
+            while in_flight:
+                yield collect(*in_flight.popleft())
+
+    def _join(
+        self,
+        operation: str,
+        left: Union[str, Path],
+        right: Union[str, Path],
+        kind: str,
+        params: Dict[str, Any],
+        how: str,
+        right_layer: Optional[str],
+        suffix: str,
+        distance_field: Optional[str],
+        max_workers: Optional[int],
+        output_format: Optional[str],
+        filters: Tuple,
+    ) -> Path:
+        """Shared implementation of spatial_join and nearest."""
+        if how not in JOIN_TYPES:
+            raise ProcessingError(
+                f"Unsupported join type: {how}. Choose from {', '.join(JOIN_TYPES)}"
+            )
+        started = time.perf_counter()
+        index = self.spatial_index(right, right_layer)
+        tag = "join" if kind == "query" else "nearest"
+        ds, layer, fmt, output_path = self._open_input(Path(left), tag, output_format, *filters)
+        transform = self._layer_transform(layer, index.schema.srs_wkt)
+
+        left_schema = LayerSchema.from_layer(layer)
+        right_fields = self._right_fields(left_schema, index, suffix)
+        fields = left_schema.fields + [spec for _, spec in right_fields]
+        if distance_field is not None:
+            fields.append(FieldSpec(distance_field, ogr.OFTReal))
+        schema = replace(left_schema, fields=fields)
+        out_ds, out_layer = self._create_output(output_path, fmt, schema)
+
+        max_workers = max_workers or ConfigManager().config.max_threads
+        workers = 1
+        if max_workers > 1 and layer.GetFeatureCount() > PARALLEL_QUERY_THRESHOLD:
+            index_bytes = sum(shapely.get_num_coordinates(index.geoms)) * 16
+            workers = worker_limit(max_workers, index_bytes * WORKING_SET_FACTOR)
+
+        stats = {"left_features": 0, "matches": 0, "unmatched": 0, "workers": workers}
+        for buffer, (left_index, right_index, distances) in self._query_batches(
+            layer, index, kind, params, transform, workers
+        ):
+            stats["left_features"] += len(buffer)
+            stats["matches"] += len(left_index)
+            if how == "left":
+                unmatched = np.setdiff1d(np.arange(len(buffer)), left_index)
+                stats["unmatched"] += len(unmatched)
+                order = np.argsort(np.concatenate([left_index, unmatched]), kind="stable")
+                left_index = np.concatenate([left_index, unmatched])[order]
+                right_index = np.concatenate([right_index, np.full(len(unmatched), -1)])[order]
+                if distances is not None:
+                    distances = np.concatenate([distances, np.full(len(unmatched), np.nan)])[order]
+            else:
+                stats["unmatched"] += len(buffer) - len(np.unique(left_index))
+
+            out = buffer.take(left_index)
+            for source, spec in right_fields:
+                out.attributes[spec.name] = _take_column(index.attributes[source], right_index)
+            if distance_field is not None:
+                out.attributes[distance_field] = np.array(
+                    [None if np.isnan(d) else float(d) for d in distances], dtype=object
+                )
+            write_buffer(replace(out, schema=schema), out_layer)
+
+        ds = None
+        out_ds = None
+        stats["seconds"] = time.perf_counter() - started
+        self.metrics[operation] = stats
+        logger.info(f"Wrote {operation} of {left} and {right} to {output_path}: {stats}")
+        return output_path
+
+    def _query_batches(
+        self,
+        layer,
+        index: SpatialIndex,
+        kind: str,
+        params: Dict[str, Any],
+        transform,
+        workers: int,
+    ) -> Iterator[Tuple[GeometryBuffer, Tuple]]:
+        """Query the index with each batch of a layer, in worker processes when workers > 1."""
+
+        def query_geoms(buffer: GeometryBuffer) -> np.ndarray:
+            if transform is None:
+                return buffer.to_shapely()
+            transformed, _ = buffer.transform(transform, index.schema.srs_wkt)
+            return transformed.to_shapely()
+
+        if workers <= 1:
+            for buffer in GeometryBuffer.iter_layer(layer):
+                yield buffer, run_query(index, query_geoms(buffer), kind, params)
+            return
+
+        # Keep a bounded number of batches in flight, yielding results in input order
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_query_worker, initargs=(index,)
+        ) as executor:
+            in_flight = deque()
+            for buffer in GeometryBuffer.iter_layer(layer):
+                if len(in_flight) >= 2 * workers:
+                    done_buffer, future = in_flight.popleft()
+                    yield done_buffer, future.result()
+                in_flight.append(
+                    (buffer, executor.submit(_query_worker, query_geoms(buffer), kind, params))
+                )
+            while in_flight:
+                done_buffer, future = in_flight.popleft()
+                yield done_buffer, future.result()
+
+    def _open_input(
+        self,
+        input_path: Path,
+        tag: str,
+        output_format: Optional[str],
+        where: Optional[str],
+        bbox: Optional[Sequence[float]],
+        mask: Any,
+    ):
+        """Open the left-hand dataset and resolve the output format and path."""
+        ds = ogr.Open(str(input_path), 0)
+        if ds is None:
+            raise ProcessingError(f"Could not open dataset: {input_path}")
+        layer = apply_filters(ds.GetLayer(), where, bbox, mask)
+        fmt = resolve_output_format(output_format, ds.GetDriver().GetName(), input_path)
+        return ds, layer, fmt, output_path_for(input_path, tag, fmt)
+
+    @staticmethod
+    def _layer_transform(layer, target_wkt: Optional[str]):
+        """Transform from a layer's coordinate system to another one, if they differ."""
+        source_srs = layer.GetSpatialRef()
+        if source_srs is None or not target_wkt:
+            return None
+        target_srs = spatial_reference(target_wkt)
+        if source_srs.IsSame(target_srs):
+            return None
+        return osr.CoordinateTransformation(source_srs, target_srs)
+
+    @staticmethod
+    def _right_fields(
+        left_schema: LayerSchema, index: SpatialIndex, suffix: str
+    ) -> List[Tuple[str, FieldSpec]]:
+        """Right field specs, suffixed where their names clash with left fields."""
+        taken = {spec.name.lower() for spec in left_schema.fields}
+        fields = []
+        for spec in index.schema.fields:
+            name = spec.name if spec.name.lower() not in taken else f"{spec.name}{suffix}"
+            taken.add(name.lower())
+            fields.append((spec.name, replace(spec, name=name)))
+        return fields
+
+    @staticmethod
+    def _create_output(output_path: Path, fmt: OutputFormat, schema: LayerSchema):
+        """Create the output dataset and its layer, replacing any previous output."""
+        driver = ogr.GetDriverByName(fmt.driver)
+        if output_path.exists():
+            driver.DeleteDataSource(str(output_path))
+        out_ds = driver.CreateDataSource(str(output_path))
+        srs = spatial_reference(schema.srs_wkt) if schema.srs_wkt else None
+        out_layer = create_layer(out_ds, schema.name, srs, schema.geom_type, fmt, fmt.layer_options)
+        for spec in schema.fields:
+            out_layer.CreateField(spec.to_defn())
+        return out_ds, out_layer
@@ -0,0 +1,132 @@
+import json
+from typing import Optional
+
+import numpy as np
+from osgeo import ogr
+
+from ...core.exceptions import ProcessingError
+from .geometry_buffer import FieldSpec, GeometryBuffer, LayerSchema
+
+# Extension name of WKB geometry columns in GeoArrow
+GEOARROW_WKB = "geoarrow.wkb"
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ProcessingError("Record batch streaming requires pyarrow")
+    return pyarrow
+
+
+def _field_spec(name: str, arrow_type) -> FieldSpec:
+    """Map an Arrow type onto an OGR field definition."""
+    pa = _pyarrow()
+    if pa.types.is_boolean(arrow_type):
+        return FieldSpec(name, ogr.OFTInteger, ogr.OFSTBoolean)
+    if pa.types.is_int8(arrow_type) or pa.types.is_int16(arrow_type):
+        return FieldSpec(name, ogr.OFTInteger, ogr.OFSTInt16)
+    if pa.types.is_integer(arrow_type):
+        wide = arrow_type.bit_width > 32 or pa.types.is_uint32(arrow_type)
+        return FieldSpec(name, ogr.OFTInteger64 if wide else ogr.OFTInteger)
+    if pa.types.is_float32(arrow_type):
+        return FieldSpec(name, ogr.OFTReal, ogr.OFSTFloat32)
+    if pa.types.is_floating(arrow_type):
+        return FieldSpec(name, ogr.OFTReal)
+    if pa.types.is_date(arrow_type):
+        return FieldSpec(name, ogr.OFTDate)
+    if pa.types.is_timestamp(arrow_type):
+        return FieldSpec(name, ogr.OFTDateTime)
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return FieldSpec(name, ogr.OFTBinary)
+    return FieldSpec(name, ogr.OFTString)
+
+
+def _column_values(column) -> np.ndarray:
+    """Convert an Arrow column to numpy, masking nulls."""
+    values = column.to_numpy(zero_copy_only=False)
+    if column.null_count:
+        return np.ma.masked_array(values, mask=column.is_null().to_numpy(zero_copy_only=False))
+    return values
+
+
+def record_batch_to_buffer(
+    batch,
+    geometry_column: str = "geometry",
+    fid_column: Optional[str] = "fid",
+    srs_wkt: Optional[str] = None,
+    layer_name: str = "layer",
+) -> GeometryBuffer:
+    """
+    Build a GeometryBuffer from a pyarrow RecordBatch with a WKB geometry column.
+
+    Args:
+        batch: pyarrow RecordBatch
+        geometry_column: Name of the WKB geometry column
+        fid_column: Name of the feature ID column, as written by
+            buffer_to_record_batch; ignored when the batch has no such column
+        srs_wkt: Coordinate system of the geometries, defaults to the CRS recorded
+            in the geometry column's GeoArrow metadata
+        layer_name: Layer name recorded in the schema
+
+    Returns:
+        GeometryBuffer holding the batch
+    """
+    if geometry_column not in batch.schema.names:
+        raise ProcessingError(f"Record batch has no geometry column: {geometry_column}")
+    if fid_column not in batch.schema.names:
+        fid_column = None
+
+    metadata = batch.schema.field(geometry_column).metadata or {}
+    if srs_wkt is None and b"ARROW:extension:metadata" in metadata:
+        crs = json.loads(metadata[b"ARROW:extension:metadata"] or b"{}").get("crs")
+        srs_wkt = crs if isinstance(crs, str) else None
+
+    fields = [
+        _field_spec(name, batch.schema.field(name).type)
+        for name in batch.schema.names
+        if name not in (geometry_column, fid_column)
+    ]
+    schema = LayerSchema(layer_name, ogr.wkbUnknown, srs_wkt, fields)
+    attributes = {spec.name: _column_values(batch.column(spec.name)) for spec in fields}
+    fids = batch.column(fid_column).to_numpy() if fid_column else None
+    wkbs = batch.column(geometry_column).to_numpy(zero_copy_only=False)
+    return GeometryBuffer.from_wkb(wkbs, schema, fids, attributes)
+
+
+def buffer_to_record_batch(
+    buffer: GeometryBuffer, geometry_column: str = "geometry", fid_column: str = "fid"
+):
+    """
+    Convert a GeometryBuffer into a pyarrow RecordBatch.
+
+    Geometries are written as a WKB column tagged with the GeoArrow extension
+    name and the buffer's coordinate system, and feature IDs as fid_column, which
+    record_batch_to_buffer reads back as IDs rather than as an attribute.
+
+    Returns:
+        pyarrow RecordBatch
+    """
+    pa = _pyarrow()
+    if fid_column in buffer.attributes:
+        raise ProcessingError(f"Feature ID column {fid_column} clashes with an attribute")
+    arrays = [pa.array(buffer.fids)]
+    names = [fid_column]
+    for spec in buffer.schema.fields:
+        values = buffer.attributes[spec.name]
+        mask = np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else None
+        arrays.append(pa.array(np.asarray(values), mask=mask))
+        names.append(spec.name)
+
+    extension = {"crs": buffer.schema.srs_wkt} if buffer.schema.srs_wkt else {}
+    geometry_field = pa.field(
+        geometry_column,
+        pa.binary(),
+        metadata={
+            "ARROW:extension:name": GEOARROW_WKB,
+            "ARROW:extension:metadata": json.dumps(extension),
+        },
+    )
+    fields = [pa.field(name, array.type) for name, array in zip(names, arrays)]
+    arrays.append(pa.array(buffer.to_wkb(), type=pa.binary()))
+    return pa.RecordBatch.from_arrays(arrays, schema=pa.schema(fields + [geometry_field]))
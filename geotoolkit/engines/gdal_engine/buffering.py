@@ -0,0 +1,72 @@
+from concurrent.futures import Executor
+from typing import Dict, Hashable, List, Union
+
+import numpy as np
+import shapely
+
+from ...core.constants import BUFFER_DISTANCES
+from ...core.exceptions import ProcessingError
+from .partitioning import spatial_order
+
+# Geometries unioned per leaf task before the tree reduction starts
+UNION_LEAF_SIZE = 2000
+
+
+def resolve_buffer_distance(distance: Union[str, float]) -> float:
+    """Resolve a BUFFER_DISTANCES preset name or a numeric distance."""
+    if isinstance(distance, str):
+        preset = distance.upper()
+        if preset not in BUFFER_DISTANCES:
+            raise ProcessingError(
+                f"Unknown buffer preset: {distance}. "
+                f"Choose from {', '.join(BUFFER_DISTANCES)} or pass a number"
+            )
+        return BUFFER_DISTANCES[preset]
+    return float(distance)
+
+
+def _union_wkbs(wkbs: List[bytes]) -> bytes:
+    """Worker: union a list of WKB geometries."""
+    return shapely.to_wkb(shapely.union_all(shapely.from_wkb(np.array(wkbs, dtype=object))))
+
+
+def tree_union(
+    groups: Dict[Hashable, np.ndarray], executor: Executor, leaf_size: int = UNION_LEAF_SIZE
+) -> Dict[Hashable, bytes]:
+    """
+    Union the geometries of each group with a parallel tree reduction.
+
+    Each group is ordered along a space-filling curve and split into spatially
+    compact leaves, which are unioned in parallel. Partial results are then merged
+    pairwise, round by round, until one geometry per group remains.
+
+    Args:
+        groups: Mapping of group key to an array of shapely geometries
+        executor: Executor running the union tasks
+        leaf_size: Geometries per leaf task
+
+    Returns:
+        Mapping of group key to the WKB of the group's union
+    """
+    partials: Dict[Hashable, list] = {}
+    for key, geoms in groups.items():
+        geoms = geoms[~shapely.is_missing(geoms)]
+        ordered = shapely.to_wkb(geoms[spatial_order(shapely.bounds(geoms))])
+        partials[key] = [
+            executor.submit(_union_wkbs, list(ordered[start : start + leaf_size]))
+            for start in range(0, max(len(ordered), 1), leaf_size)
+        ]
+
+    while any(len(futures) > 1 for futures in partials.values()):
+        for key, futures in partials.items():
+            if len(futures) == 1:
+                continue
+            merged = [
+                executor.submit(_union_wkbs, [left.result(), right.result()])
+                for left, right in zip(futures[0::2], futures[1::2])
+            ]
+            if len(futures) % 2:
+                merged.append(futures[-1])
+            partials[key] = merged
+
+    return {key: futures[0].result() for key, futures in partials.items()}
@@ -0,0 +1,88 @@
+from typing import Iterator, List, Optional
+
+import numpy as np
+import shapely
+from osgeo import ogr
+
+from ...utils.config import ConfigManager
+from ...utils.memory import AdaptiveBatchSize
+
+# Features read to estimate a layer's bytes per feature
+SAMPLE_FEATURES = 100
+
+# Estimated in-memory size of one attribute value
+FIELD_BYTES = 32
+
+
+def feature_bytes(feature: ogr.Feature) -> int:
+    """Approximate serialized size of a feature: its WKB plus its attribute values."""
+    geom = feature.GetGeometryRef()
+    return (geom.WkbSize() if geom is not None else 0) + feature.GetFieldCount() * FIELD_BYTES
+
+
+def sample_batch_size(layer) -> int:
+    """
+    Batch size fitting the memory budget, from the size of a layer's first features.
+
+    The layer's reading is reset afterwards; its filters are kept.
+    """
+    count = nbytes = 0
+    layer.ResetReading()
+    for feature in layer:
+        count += 1
+        nbytes += feature_bytes(feature)
+        if count >= SAMPLE_FEATURES:
+            break
+    layer.ResetReading()
+    if not count:
+        return ConfigManager().config.chunk_size
+    return AdaptiveBatchSize().observe(count, nbytes)
+
+
+def iter_feature_batches(layer, batch_size: Optional[int] = None) -> Iterator[List[ogr.Feature]]:
+    """
+    Iterate over a layer in lists of features.
+
+    Without a batch_size, batches start at the configured chunk_size and are
+    resized after each batch from the measured bytes per feature, so a batch
+    stays within its share of the memory budget.
+
+    Args:
+        layer: OGR layer to read
+        batch_size: Fixed number of features per batch
+
+    Yields:
+        Lists of features
+    """
+    adaptive = AdaptiveBatchSize() if batch_size is None else None
+    size = batch_size or adaptive.size
+    batch = []
+    nbytes = 0
+    for feature in layer:
+        batch.append(feature)
+        if adaptive is not None:
+            nbytes += feature_bytes(feature)
+        if len(batch) >= size:
+            yield batch
+            if adaptive is not None:
+                size = adaptive.observe(len(batch), nbytes)
+            batch = []
+            nbytes = 0
+    if batch:
+        yield batch
+
+
+def features_to_shapely(features: List[ogr.Feature]) -> np.ndarray:
+    """Convert the geometries of a batch of features into a shapely array (None for nulls)."""
+    wkbs = []
+    for feature in features:
+        geom = feature.GetGeometryRef()
+        wkbs.append(bytes(geom.ExportToIsoWkb()) if geom is not None else None)
+    return shapely.from_wkb(np.array(wkbs, dtype=object))
+
+
+def shapely_to_ogr(geom) -> Optional[ogr.Geometry]:
+    """Convert a shapely geometry into an OGR geometry."""
+    if geom is None:
+        return None
+    return ogr.CreateGeometryFromWkb(shapely.to_wkb(geom))
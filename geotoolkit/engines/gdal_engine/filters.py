@@ -0,0 +1,98 @@
+import re
+from typing import Any, List, Optional, Sequence, Set
+
+import shapely
+from osgeo import ogr
+
+from ...core.exceptions import ProcessingError
+
+# String literals of an OGR SQL expression, and its quoted or bare identifiers
+_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_IDENTIFIER = re.compile(r'"((?:[^"]|"")+)"|([A-Za-z_][A-Za-z0-9_]*)')
+
+
+def mask_to_ogr(mask: Any) -> ogr.Geometry:
+    """Convert a shapely geometry, OGR geometry, WKT or WKB mask into an OGR geometry."""
+    if isinstance(mask, ogr.Geometry):
+        return mask
+    if isinstance(mask, shapely.Geometry):
+        return ogr.CreateGeometryFromWkb(shapely.to_wkb(mask))
+    if isinstance(mask, str):
+        geom = ogr.CreateGeometryFromWkt(mask)
+    elif isinstance(mask, (bytes, bytearray)):
+        geom = ogr.CreateGeometryFromWkb(bytes(mask))
+    else:
+        raise ProcessingError(f"Unsupported mask type: {type(mask).__name__}")
+    if geom is None:
+        raise ProcessingError("Could not parse mask geometry")
+    return geom
+
+
+def apply_filters(
+    layer,
+    where: Optional[str] = None,
+    bbox: Optional[Sequence[float]] = None,
+    mask: Any = None,
+):
+    """
+    Push attribute and spatial filters down to an OGR layer.
+
+    Drivers evaluate the filters while reading, using their attribute and spatial
+    indexes where available, so only matching features reach the caller. A layer
+    holds a single spatial filter, so when both bbox and mask are given it is their
+    intersection: features must intersect the part of the mask inside the bbox,
+    not merely touch each of them somewhere.
+
+    Args:
+        layer: OGR layer to filter
+        where: OGR SQL WHERE clause, e.g. "STATEFP = '40'"
+        bbox: (minx, miny, maxx, maxy) in the layer's coordinate system
+        mask: Geometry in the layer's coordinate system (shapely, OGR, WKT or WKB)
+
+    Returns:
+        The filtered layer
+    """
+    if bbox is not None and len(bbox) != 4:
+        raise ProcessingError(f"bbox must be (minx, miny, maxx, maxy), got {bbox}")
+
+    layer.SetAttributeFilter(where)
+
+    if mask is not None:
+        geom = mask_to_ogr(mask)
+        if bbox is not None:
+            geom = geom.Intersection(ogr.CreateGeometryFromWkb(shapely.to_wkb(shapely.box(*bbox))))
+        layer.SetSpatialFilter(geom)
+    elif bbox is not None:
+        layer.SetSpatialFilterRect(*bbox)
+    else:
+        layer.SetSpatialFilter(None)
+
+    return layer
+
+
+def where_identifiers(where: Optional[str]) -> Set[str]:
+    """Lower-cased identifiers (field names and keywords) of an OGR SQL WHERE clause."""
+    if not where:
+        return set()
+    return {
+        (quoted.replace('""', '"') or bare).lower()
+        for quoted, bare in _IDENTIFIER.findall(_LITERAL.sub(" ", where))
+    }
+
+
+def ignored_fields(layer, where: Optional[str] = None) -> List[str]:
+    """
+    Fields a geometry-only read of a layer can skip: all but those the attribute
+    filter references.
+
+    Args:
+        layer: OGR layer
+        where: Attribute filter set on the layer
+
+    Returns:
+        Field names, for layer.SetIgnoredFields
+    """
+    referenced = where_identifiers(where)
+    layer_defn = layer.GetLayerDefn()
+    names = (layer_defn.GetFieldDefn(i).GetName() for i in range(layer_defn.GetFieldCount()))
+    return [name for name in names if name.lower() not in referenced]
@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+from osgeo import gdal, ogr
+
+from ...core.constants import OUTPUT_FORMAT_ALIASES, OUTPUT_FORMATS
+from ...core.exceptions import ProcessingError
+from ...utils.config import ConfigManager
+
+
+@dataclass
+class OutputFormat:
+    """Driver, extension and layer creation options of an output dataset"""
+
+    driver: str
+    extension: str
+    layer_options: List[str] = field(default_factory=list)
+
+
+def resolve_output_format(
+    output_format: Optional[str], input_driver: str, input_path: Path
+) -> OutputFormat:
+    """
+    Resolve an output format name, defaulting to the input's own driver.
+
+    GeoParquet output uses the configured row-group size and compression;
+    FlatGeobuf output is written with a packed spatial index.
+
+    Args:
+        output_format: Key or alias of OUTPUT_FORMATS, or None to keep the input format
+        input_driver: Name of the input dataset's driver
+        input_path: Path to the input dataset
+
+    Returns:
+        Resolved output format
+    """
+    if output_format is None:
+        return OutputFormat(input_driver, input_path.suffix)
+
+    key = output_format.lower().lstrip(".")
+    key = OUTPUT_FORMAT_ALIASES.get(key, key)
+    if key not in OUTPUT_FORMATS:
+        raise ProcessingError(
+            f"Unsupported output format: {output_format}. "
+            f"Choose from {', '.join(OUTPUT_FORMATS)}"
+        )
+
+    spec = OUTPUT_FORMATS[key]
+    if ogr.GetDriverByName(spec["driver"]) is None:
+        raise ProcessingError(f"This GDAL build has no {spec['driver']} driver")
+
+    layer_options = list(spec["layer_options"])
+    if key == "parquet":
+        config = ConfigManager().config
+        layer_options += [
+            f"ROW_GROUP_SIZE={config.parquet_row_group_size}",
+            f"COMPRESSION={config.parquet_compression}",
+        ]
+    return OutputFormat(spec["driver"], spec["extension"], layer_options)
+
+
+def output_path_for(input_path: Path, tag: str, output_format: OutputFormat) -> Path:
+    """Build an output path with a tag and the output format's extension."""
+    return input_path.with_name(f"{input_path.stem}_{tag}{output_format.extension}")
+
+
+def convert_dataset(input_path: Path, output_format: OutputFormat) -> Path:
+    """Convert a dataset to another format next to the input, returning the new path."""
+    output_path = input_path.with_suffix(output_format.extension)
+    if output_path == input_path:
+        return input_path
+
+    if output_path.exists():
+        ogr.GetDriverByName(output_format.driver).DeleteDataSource(str(output_path))
+
+    options = gdal.VectorTranslateOptions(
+        format=output_format.driver, layerCreationOptions=output_format.layer_options
+    )
+    if gdal.VectorTranslate(str(output_path), str(input_path), options=options) is None:
+        raise ProcessingError(f"Could not convert {input_path} to {output_format.driver}")
+    return output_path
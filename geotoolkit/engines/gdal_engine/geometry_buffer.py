@@ -0,0 +1,540 @@
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, replace
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+import numpy as np
+import shapely
+from osgeo import ogr
+
+from ...core.exceptions import ProcessingError
+from .features import iter_feature_batches, sample_batch_size
+from .qc import compute_qc_flags
+from .reprojection import approximate_transform_coordinates, transform_coordinates
+from .simplification import new_simplify_stats, simplify_geometries
+from .topology import repair_polygons
+
+# shapely type ids grouped by family: (single types, multi type, ragged array type,
+# empty single, empty multi)
+_FAMILIES = (
+    ((0,), 4, shapely.GeometryType.MULTIPOINT, shapely.Point, shapely.MultiPoint),
+    ((1, 2), 5, shapely.GeometryType.MULTILINESTRING, shapely.LineString, shapely.MultiLineString),
+    ((3,), 6, shapely.GeometryType.MULTIPOLYGON, shapely.Polygon, shapely.MultiPolygon),
+)
+
+
+@dataclass
+class FieldSpec:
+    """Picklable description of an OGR field"""
+
+    name: str
+    type: int
+    subtype: int = ogr.OFSTNone
+    width: int = 0
+    precision: int = 0
+
+    @classmethod
+    def from_defn(cls, defn) -> "FieldSpec":
+        return cls(
+            defn.GetName(), defn.GetType(), defn.GetSubType(), defn.GetWidth(), defn.GetPrecision()
+        )
+
+    def to_defn(self):
+        defn = ogr.FieldDefn(self.name, self.type)
+        defn.SetSubType(self.subtype)
+        defn.SetWidth(self.width)
+        defn.SetPrecision(self.precision)
+        return defn
+
+
+@dataclass
+class LayerSchema:
+    """Name, geometry type, spatial reference, fields and coordinate grid of a layer"""
+
+    name: str
+    geom_type: int
+    srs_wkt: Optional[str] = None
+    fields: List[FieldSpec] = field(default_factory=list)
+    coordinate_precision: Optional[float] = None
+
+    @classmethod
+    def from_layer(cls, layer) -> "LayerSchema":
+        layer_defn = layer.GetLayerDefn()
+        srs = layer.GetSpatialRef()
+        return cls(
+            layer.GetName(),
+            layer.GetGeomType(),
+            srs.ExportToWkt() if srs is not None else None,
+            [
+                FieldSpec.from_defn(layer_defn.GetFieldDefn(i))
+                for i in range(layer_defn.GetFieldCount())
+            ],
+        )
+
+
+def _gather(offsets: np.ndarray, index: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Select ranges of an offset array, returning the flat child indices and new offsets."""
+    starts = offsets[index]
+    lengths = offsets[index + 1] - starts
+    new_offsets = np.concatenate([[0], np.cumsum(lengths)]).astype(np.int64)
+    flat = np.repeat(starts - new_offsets[:-1], lengths) + np.arange(new_offsets[-1])
+    return flat.astype(np.int64), new_offsets
+
+
+def _offsets(counts: np.ndarray) -> np.ndarray:
+    return np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+
+@dataclass
+class GeometryBuffer:
+    """
+    Columnar in-memory representation of a vector layer.
+
+    Geometries are stored as ragged arrays: a coordinate array plus offsets from
+    features to parts, parts to rings and rings to coordinates. Points and lines
+    have one "ring" per part; empty geometries have no parts. geometry_types holds
+    shapely type ids (-1 for null geometries). When any feature has Z, coords has
+    a Z column, 0 for the features whose geometry_has_z flag is off. Operations
+    work on these arrays directly and return new buffers.
+    """
+
+    coords: np.ndarray
+    geom_offsets: np.ndarray
+    part_offsets: np.ndarray
+    ring_offsets: np.ndarray
+    geometry_types: np.ndarray
+    geometry_has_z: np.ndarray
+    fids: np.ndarray
+    attributes: Dict[str, np.ndarray]
+    schema: LayerSchema
+
+    def __len__(self) -> int:
+        return len(self.geometry_types)
+
+    @property
+    def has_z(self) -> bool:
+        return bool(self.geometry_has_z.any())
+
+    @property
+    def feature_index(self) -> np.ndarray:
+        """Feature index of every coordinate."""
+        counts = np.diff(self.ring_offsets[self.part_offsets[self.geom_offsets]])
+        return np.repeat(np.arange(len(self)), counts)
+
+    @classmethod
+    def from_shapely(
+        cls,
+        geoms: np.ndarray,
+        schema: LayerSchema,
+        fids: Optional[np.ndarray] = None,
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ) -> "GeometryBuffer":
+        """Build a buffer from an array of shapely geometries."""
+        geoms = np.asarray(geoms, dtype=object)
+        type_ids = shapely.get_type_id(geoms).astype(np.int8)
+        if np.any(type_ids == 7):
+            raise ProcessingError("GeometryCollections are not supported in a GeometryBuffer")
+
+        parts, part_owner = shapely.get_parts(geoms, return_index=True)
+        # Empty geometries (and empty parts of multi-geometries) get no parts
+        nonempty = ~shapely.is_empty(parts)
+        parts, part_owner = parts[nonempty], part_owner[nonempty]
+        polygon = shapely.get_type_id(parts) == 3
+        polygon_index = np.flatnonzero(polygon)
+        rings, ring_owner = shapely.get_rings(parts[polygon_index], return_index=True)
+
+        # Points and lines are their own single ring
+        rings = np.concatenate([rings, parts[~polygon]])
+        ring_owner = np.concatenate([polygon_index[ring_owner], np.flatnonzero(~polygon)])
+        order = np.argsort(ring_owner, kind="stable")
+        rings, ring_owner = rings[order], ring_owner[order]
+
+        has_z = shapely.has_z(geoms)
+        geom_offsets = _offsets(np.bincount(part_owner, minlength=len(geoms)))
+        part_offsets = _offsets(np.bincount(ring_owner, minlength=len(parts)))
+        ring_offsets = _offsets(shapely.get_num_coordinates(rings))
+        coords = shapely.get_coordinates(rings, include_z=bool(has_z.any()))
+        if has_z.any() and not has_z.all():
+            counts = np.diff(ring_offsets[part_offsets[geom_offsets]])
+            coords[~np.repeat(has_z, counts), 2] = 0.0
+        return cls(
+            coords=coords,
+            geom_offsets=geom_offsets,
+            part_offsets=part_offsets,
+            ring_offsets=ring_offsets,
+            geometry_types=type_ids,
+            geometry_has_z=has_z,
+            fids=np.arange(len(geoms), dtype=np.int64) if fids is None else np.asarray(fids),
+            attributes=dict(attributes or {}),
+            schema=schema,
+        )
+
+    @classmethod
+    def from_wkb(
+        cls,
+        wkbs: np.ndarray,
+        schema: LayerSchema,
+        fids: Optional[np.ndarray] = None,
+        attributes: Optional[Dict[str, np.ndarray]] = None,
+    ) -> "GeometryBuffer":
+        """Build a buffer from an array of WKB geometries."""
+        return cls.from_shapely(
+            shapely.from_wkb(np.asarray(wkbs, dtype=object)), schema, fids, attributes
+        )
+
+    @classmethod
+    def from_arrow_batch(
+        cls,
+        batch: Dict[str, np.ndarray],
+        schema: LayerSchema,
+        fid_column: str,
+        geometry_column: str,
+    ) -> "GeometryBuffer":
+        """
+        Build a buffer from a batch produced by OGR's GetArrowStreamAsNumPy.
+
+        Numeric attribute columns stay zero-copy views of the Arrow buffers.
+        """
+        attributes = {spec.name: batch[spec.name] for spec in schema.fields if spec.name in batch}
+        fids = batch.get(fid_column)
+        return cls.from_wkb(batch[geometry_column], schema, fids, attributes)
+
+    @classmethod
+    def iter_layer(cls, layer, batch_size: Optional[int] = None) -> Iterator["GeometryBuffer"]:
+        """
+        Read a layer as a sequence of buffers of at most batch_size features.
+
+        Uses the layer's Arrow stream when GDAL provides one and falls back to
+        reading features otherwise. Attribute and spatial filters set on the layer
+        are honoured. Without a batch_size, batches are sized to the memory budget
+        from the measured bytes per feature.
+        """
+        schema = LayerSchema.from_layer(layer)
+
+        if hasattr(layer, "GetArrowStreamAsNumPy"):
+            # The stream's batch size is fixed once it starts: size it from a sample
+            batch_size = batch_size or sample_batch_size(layer)
+            fid_column = layer.GetFIDColumn() or "OGC_FID"
+            geometry_column = layer.GetGeometryColumn() or "wkb_geometry"
+            stream = layer.GetArrowStreamAsNumPy(
+                options=[
+                    "INCLUDE_FID=YES",
+                    f"MAX_FEATURES_IN_BATCH={batch_size}",
+                    "GEOMETRY_ENCODING=WKB",
+                ]
+            )
+            for batch in stream:
+                yield cls.from_arrow_batch(batch, schema, fid_column, geometry_column)
+            return
+
+        names = [spec.name for spec in schema.fields]
+        for features in iter_feature_batches(layer, batch_size):
+            yield cls._from_features(features, schema, names)
+
+    @classmethod
+    def _from_features(cls, features, schema: LayerSchema, names: List[str]) -> "GeometryBuffer":
+        wkbs = []
+        for feature in features:
+            geom = feature.GetGeometryRef()
+            wkbs.append(bytes(geom.ExportToIsoWkb()) if geom is not None else None)
+        attributes = {
+            name: np.array([feature.GetField(i) for feature in features], dtype=object)
+            for i, name in enumerate(names)
+        }
+        fids = np.array([feature.GetFID() for feature in features], dtype=np.int64)
+        return cls.from_wkb(np.array(wkbs, dtype=object), schema, fids, attributes)
+
+    @classmethod
+    def from_layer(cls, layer, batch_size: Optional[int] = None) -> "GeometryBuffer":
+        """Load a whole layer into one buffer."""
+        return cls.concat(list(cls.iter_layer(layer, batch_size)), LayerSchema.from_layer(layer))
+
+    @classmethod
+    def concat(cls, buffers: List["GeometryBuffer"], schema: LayerSchema) -> "GeometryBuffer":
+        """Concatenate buffers sharing a schema."""
+        if not buffers:
+            return cls.from_shapely(np.empty(0, dtype=object), schema)
+
+        width = max(buffer.coords.shape[1] for buffer in buffers)
+        coords = [
+            np.pad(b.coords, ((0, 0), (0, width - b.coords.shape[1])), constant_values=0.0)
+            for b in buffers
+        ]
+
+        def shifted(name, child_totals):
+            shift = np.concatenate([[0], np.cumsum(child_totals)[:-1]])
+            return np.concatenate(
+                [[0]] + [getattr(b, name)[1:] + offset for b, offset in zip(buffers, shift)]
+            ).astype(np.int64)
+
+        names = buffers[0].attributes.keys()
+        return cls(
+            coords=np.concatenate(coords),
+            geom_offsets=shifted("geom_offsets", [len(b.part_offsets) - 1 for b in buffers]),
+            part_offsets=shifted("part_offsets", [len(b.ring_offsets) - 1 for b in buffers]),
+            ring_offsets=shifted("ring_offsets", [len(b.coords) for b in buffers]),
+            geometry_types=np.concatenate([b.geometry_types for b in buffers]),
+            geometry_has_z=np.concatenate([b.geometry_has_z for b in buffers]),
+            fids=np.concatenate([b.fids for b in buffers]),
+            attributes={
+                name: (
+                    np.ma.concatenate([b.attributes[name] for b in buffers])
+                    if any(isinstance(b.attributes[name], np.ma.MaskedArray) for b in buffers)
+                    else np.concatenate([b.attributes[name] for b in buffers])
+                )
+                for name in names
+            },
+            schema=schema,
+        )
+
+    def take(self, index: np.ndarray) -> "GeometryBuffer":
+        """Select features by position."""
+        index = np.asarray(index, dtype=np.int64)
+        part_index, geom_offsets = _gather(self.geom_offsets, index)
+        ring_index, part_offsets = _gather(self.part_offsets, part_index)
+        coord_index, ring_offsets = _gather(self.ring_offsets, ring_index)
+        return replace(
+            self,
+            coords=self.coords[coord_index],
+            geom_offsets=geom_offsets,
+            part_offsets=part_offsets,
+            ring_offsets=ring_offsets,
+            geometry_types=self.geometry_types[index],
+            geometry_has_z=self.geometry_has_z[index],
+            fids=self.fids[index],
+            attributes={name: values[index] for name, values in self.attributes.items()},
+        )
+
+    def to_shapely(self) -> np.ndarray:
+        """Rebuild an array of shapely geometries."""
+        result = np.full(len(self), None, dtype=object)
+        for singles, multi, ragged_type, empty_single, empty_multi in _FAMILIES:
+            mask = np.isin(self.geometry_types, singles + (multi,))
+            if not mask.any():
+                continue
+            single = np.isin(self.geometry_types[mask], singles)
+            nonempty = np.diff(self.geom_offsets)[mask] > 0
+            geoms = np.empty(int(mask.sum()), dtype=object)
+            geoms[~nonempty & single] = empty_single()
+            geoms[~nonempty & ~single] = empty_multi()
+
+            # from_ragged_array needs at least one part per geometry
+            index = np.flatnonzero(mask)[nonempty]
+            if len(index):
+                sub = self if len(index) == len(self) else self.take(index)
+                if ragged_type == shapely.GeometryType.MULTIPOINT:
+                    offsets = (sub.ring_offsets[sub.part_offsets[sub.geom_offsets]],)
+                elif ragged_type == shapely.GeometryType.MULTILINESTRING:
+                    offsets = (sub.ring_offsets[sub.part_offsets], sub.geom_offsets)
+                else:
+                    offsets = (sub.ring_offsets, sub.part_offsets, sub.geom_offsets)
+                built = shapely.from_ragged_array(ragged_type, sub.coords, offsets)
+                built[single[nonempty]] = shapely.get_geometry(built[single[nonempty]], 0)
+                flat = ~sub.geometry_has_z
+                if sub.coords.shape[1] == 3 and flat.any():
+                    built[flat] = shapely.force_2d(built[flat])
+                geoms[nonempty] = built
+            result[mask] = geoms
+        return result
+
+    def to_wkb(self) -> np.ndarray:
+        return shapely.to_wkb(self.to_shapely())
+
+    def with_geometries(self, geoms: np.ndarray) -> "GeometryBuffer":
+        """Replace the geometries, keeping FIDs, attributes and schema."""
+        return GeometryBuffer.from_shapely(geoms, self.schema, self.fids, self.attributes)
+
+    def with_attribute(self, spec: FieldSpec, values: np.ndarray) -> "GeometryBuffer":
+        """Add or replace an attribute column."""
+        fields = [f for f in self.schema.fields if f.name != spec.name] + [spec]
+        attributes = dict(self.attributes)
+        attributes[spec.name] = values
+        return replace(self, attributes=attributes, schema=replace(self.schema, fields=fields))
+
+    def transform(
+        self,
+        transform,
+        target_srs_wkt: str,
+        approximate: bool = False,
+        max_error: float = 0.5,
+    ) -> Tuple["GeometryBuffer", Dict[str, Any]]:
+        """
+        Reproject every coordinate in one vectorized call.
+
+        Args:
+            transform: osr.CoordinateTransformation from source to target CRS
+            target_srs_wkt: WKT of the target CRS, recorded in the schema
+            approximate: Use the per-feature affine approximation
+            max_error: Maximum error tolerated by the approximate mode
+
+        Returns:
+            Tuple of (reprojected buffer, metrics)
+        """
+        metrics = {"approximate": approximate, "features": len(self)}
+        if approximate:
+            coords, error, fallback = approximate_transform_coordinates(
+                self.coords, self.feature_index, len(self), transform, max_error
+            )
+            metrics.update(sampled_max_error=error, fallback_features=fallback)
+        else:
+            coords = transform_coordinates(self.coords, transform)
+        schema = replace(self.schema, srs_wkt=target_srs_wkt, coordinate_precision=None)
+        return replace(self, coords=coords, schema=schema), metrics
+
+    def force_2d(self) -> "GeometryBuffer":
+        """Drop Z values."""
+        schema = replace(self.schema, geom_type=ogr.GT_Flatten(self.schema.geom_type))
+        return replace(
+            self,
+            coords=np.ascontiguousarray(self.coords[:, :2]),
+            geometry_has_z=np.zeros(len(self), dtype=bool),
+            schema=schema,
+        )
+
+    def snap_to_grid(self, grid_size: float) -> Tuple["GeometryBuffer", int]:
+        """
+        Round X and Y to multiples of grid_size and drop vertices that become repeated.
+
+        Consecutive repeated vertices are removed from lines and rings, which keeps
+        rings closed. Lines and rings that would fall below 2 and 4 vertices keep
+        their repeated vertices, for repair to handle. Points are only rounded.
+
+        Args:
+            grid_size: Grid spacing in layer units
+
+        Returns:
+            Tuple of (snapped buffer, number of vertices removed)
+        """
+        coords = self.coords.copy()
+        inverse = round(1.0 / grid_size)
+        if inverse >= 1 and abs(inverse * grid_size - 1) < 1e-12:
+            # Dividing by an integral inverse keeps decimal grids exact
+            coords[:, :2] = np.round(coords[:, :2] * inverse) / inverse
+        else:
+            coords[:, :2] = np.round(coords[:, :2] / grid_size) * grid_size
+
+        ring_lengths = np.diff(self.ring_offsets)
+        n_rings = len(ring_lengths)
+        ring_index = np.repeat(np.arange(n_rings), ring_lengths)
+        part_owner = np.repeat(np.arange(len(self)), np.diff(self.geom_offsets))
+        ring_part = np.repeat(np.arange(len(self.part_offsets) - 1), np.diff(self.part_offsets))
+        ring_types = self.geometry_types[part_owner[ring_part]]
+        min_vertices = np.select(
+            [np.isin(ring_types, (1, 2, 5)), np.isin(ring_types, (3, 6))], [2, 4], 0
+        )
+
+        repeated = np.zeros(len(coords), dtype=bool)
+        repeated[1:] = (ring_index[1:] == ring_index[:-1]) & np.all(
+            coords[1:, :2] == coords[:-1, :2], axis=1
+        )
+        repeated &= min_vertices[ring_index] > 0
+        dropped = np.bincount(ring_index[repeated], minlength=n_rings)
+        collapsed = (dropped > 0) & (ring_lengths - dropped < min_vertices)
+        repeated &= ~collapsed[ring_index]
+        dropped[collapsed] = 0
+
+        return (
+            replace(
+                self,
+                coords=coords[~repeated],
+                ring_offsets=_offsets(ring_lengths - dropped),
+                schema=replace(self.schema, coordinate_precision=grid_size),
+            ),
+            int(repeated.sum()),
+        )
+
+    def simplify(
+        self,
+        max_vertices: int,
+        tolerance: Optional[float] = None,
+        preserve_topology: bool = True,
+        executor: Optional[Executor] = None,
+    ) -> Tuple["GeometryBuffer", Dict[str, int]]:
+        """
+        Simplify the features over a vertex budget, see simplify_geometries.
+
+        Returns:
+            Tuple of (buffer, simplification statistics)
+        """
+        counts = np.diff(self.ring_offsets[self.part_offsets[self.geom_offsets]])
+        if not (counts > max_vertices).any():
+            return self, new_simplify_stats()
+        geoms, stats = simplify_geometries(
+            self.to_shapely(), max_vertices, tolerance, preserve_topology, executor
+        )
+        return self.with_geometries(geoms), stats
+
+    def sinuosity(self) -> np.ndarray:
+        """
+        Sinuosity (path length over straight-line distance) of LineString features.
+
+        Other features get NaN; zero-length chords give 1, as in calculate_sinuosity.
+        """
+        result = np.full(len(self), np.nan)
+        lines = np.flatnonzero(self.geometry_types == 1)
+        if len(lines) == 0:
+            return result
+
+        xy = self.coords[:, :2]
+        cumulative = np.concatenate([[0.0], np.cumsum(np.linalg.norm(np.diff(xy, axis=0), axis=1))])
+        rings = self.part_offsets[self.geom_offsets[lines]]
+        starts = self.ring_offsets[rings]
+        ends = self.ring_offsets[np.minimum(rings + 1, len(self.ring_offsets) - 1)] - 1
+        # Empty lines have no parts
+        valid = (np.diff(self.geom_offsets)[lines] > 0) & (ends > starts)
+        path = cumulative[ends[valid]] - cumulative[starts[valid]]
+        chord = np.linalg.norm(xy[ends[valid]] - xy[starts[valid]], axis=1)
+        values = np.ones(len(path))
+        np.divide(path, chord, out=values, where=chord > 0)
+        result[lines[valid]] = values
+        result[lines[~valid]] = 1.0
+        return result
+
+    def quality_flags(
+        self, seen_hashes: Set[bytes], thresholds: Optional[Dict[str, float]] = None
+    ) -> Dict[str, np.ndarray]:
+        """Compute QC measures and flags (see qc.compute_qc_flags)."""
+        return compute_qc_flags(self.to_shapely(), seen_hashes, thresholds)
+
+    def repair(self) -> Tuple["GeometryBuffer", int]:
+        """Repair invalid polygons, returning the buffer and the number repaired."""
+        polygonal = np.isin(self.geometry_types, (3, 6))
+        if not polygonal.any():
+            return self, 0
+        geoms = self.to_shapely()
+        repaired = repair_polygons(geoms)
+        changed = int(sum(a is not b for a, b in zip(geoms, repaired)))
+        if changed == 0:
+            return self, 0
+        return self.with_geometries(repaired), changed
+
+
+def write_buffer(buffer: GeometryBuffer, out_layer) -> int:
+    """
+    Write a buffer's features to an OGR layer.
+
+    Returns:
+        Number of features written
+    """
+    out_defn = out_layer.GetLayerDefn()
+    names = [spec.name for spec in buffer.schema.fields]
+    columns = []
+    for name in names:
+        values = buffer.attributes[name]
+        mask = np.ma.getmaskarray(values) if isinstance(values, np.ma.MaskedArray) else None
+        columns.append((out_defn.GetFieldIndex(name), np.asarray(values), mask))
+
+    for row, wkb in enumerate(buffer.to_wkb()):
+        out_feature = ogr.Feature(out_defn)
+        if wkb is not None:
+            out_feature.SetGeometry(ogr.CreateGeometryFromWkb(wkb))
+        for index, values, mask in columns:
+            value = values[row]
+            if (mask is not None and mask[row]) or value is None:
+                out_feature.SetFieldNull(index)
+            elif isinstance(value, np.generic):
+                out_feature.SetField(index, str(value) if value.dtype.kind == "M" else value.item())
+            else:
+                out_feature.SetField(index, value)
+        out_layer.CreateFeature(out_feature)
+        out_feature = None
+    return len(buffer)
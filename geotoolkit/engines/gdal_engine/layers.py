@@ -0,0 +1,794 @@
+import pickle
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import Manager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+from osgeo import ogr, osr
+
+from ...core.exceptions import ProcessingError
+from ...utils.config import ConfigManager
+from ...utils.memory import (
+    BATCH_BUDGET_FRACTION,
+    WORKING_SET_FACTOR,
+    memory_budget,
+    worker_limit,
+)
+from ...utils.progress import CancellationToken, Progress, ProgressCallback, ProgressReporter
+from .buffering import UNION_LEAF_SIZE, tree_union
+from .features import feature_bytes, features_to_shapely, iter_feature_batches, shapely_to_ogr
+from .filters import apply_filters, ignored_fields
+from .formats import OutputFormat
+from .geometry_buffer import GeometryBuffer, LayerSchema, write_buffer
+from .pipeline import Pipeline, PipelineStep
+from .precision import create_layer
+from .qc import new_qc_report, update_qc_report
+from .raster import north_up_geotransform, open_shared_raster
+from .reprojection import transform_coordinates
+from .resume import ResumableRun
+from .sampling import line_samples, profile_metrics, sample_band
+from .srs import spatial_reference
+from .topology import clean_tiles, repair_polygons
+
+# Format of the single-layer datasets worker processes write before the merge
+PART_FORMAT = OutputFormat("GPKG", ".gpkg", ["SPATIAL_INDEX=NO"])
+
+PARTS_SUFFIX = ".parts"
+
+# Seconds between checks of worker progress and cancellation
+PROGRESS_POLL = 0.5
+
+
+def select_layers(ds, names: Optional[Sequence[str]] = None) -> List:
+    """
+    Layers of a dataset by name, in the order given.
+
+    Args:
+        ds: OGR dataset
+        names: Layer names, defaults to all layers
+
+    Returns:
+        List of OGR layers
+    """
+    if names is None:
+        return [ds.GetLayer(i) for i in range(ds.GetLayerCount())]
+    layers = []
+    for name in names:
+        layer = ds.GetLayerByName(name)
+        if layer is None:
+            raise ProcessingError(f"Layer not found: {name}")
+        layers.append(layer)
+    return layers
+
+
+def layer_workers(max_workers: Optional[int], n_layers: int) -> int:
+    """Worker processes for per-layer tasks: one per layer, each holding one batch."""
+    requested = min(max_workers or ConfigManager().config.max_threads, n_layers)
+    return worker_limit(max(requested, 1), memory_budget() * BATCH_BUDGET_FRACTION)
+
+
+class ForwardProgress:
+    """
+    Progress callback of a layer task's run, passing the features processed since
+    its previous report on to the parent run through a queue.
+    """
+
+    def __init__(self, queue):
+        self.queue = queue
+        self._done = 0
+
+    def __call__(self, progress: Progress):
+        self.queue.put(progress.done - self._done)
+        self._done = progress.done
+
+
+class _ReporterQueue:
+    """Queue handing forwarded counts straight to a reporter, for tasks run in this process."""
+
+    def __init__(self, reporter: ProgressReporter):
+        self.reporter = reporter
+
+    def put(self, count: int):
+        self.reporter.update(count)
+
+
+def run_layer_tasks(
+    task: Callable[..., Any], arguments: Dict[str, Tuple], max_workers: int, run: ResumableRun
+) -> Iterator[Tuple[str, Any]]:
+    """
+    Run a task per layer, in worker processes when there are several layers.
+
+    With one worker or one layer the tasks run in this process, one after another.
+    Tasks receive progress and cancel_token keyword arguments: workers report the
+    features they process through a shared queue, counted towards the run's
+    progress, and stop after their current batch once the run is cancelled,
+    through a shared event.
+
+    Args:
+        task: Picklable function
+        arguments: Task arguments by layer name
+        max_workers: Worker processes
+        run: Run whose progress and cancellation the tasks follow
+
+    Yields:
+        (layer name, task result) pairs, in the order the tasks finish
+    """
+    reporter = run.reporter
+    if max_workers <= 1 or len(arguments) <= 1:
+        for name, args in arguments.items():
+            progress = ForwardProgress(_ReporterQueue(reporter))
+            yield name, task(*args, progress=progress, cancel_token=reporter.cancel_token)
+        return
+
+    with Manager() as manager, ProcessPoolExecutor(max_workers=max_workers) as executor:
+        queue = manager.Queue()
+        cancelled = manager.Event()
+        futures = {
+            executor.submit(
+                task,
+                *args,
+                progress=ForwardProgress(queue),
+                cancel_token=CancellationToken(cancelled),
+            ): name
+            for name, args in arguments.items()
+        }
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, PROGRESS_POLL, FIRST_COMPLETED)
+                while not queue.empty():
+                    reporter.update(queue.get())
+                reporter.check_cancelled()
+                for future in done:
+                    yield futures[future], future.result()
+        except BaseException:
+            cancelled.set()
+            for future in futures:
+                future.cancel()
+            raise
+
+
+def create_schema_layer(out_ds, schema: LayerSchema, fmt: OutputFormat, options: List[str]):
+    """Create an output layer from a GeometryBuffer schema."""
+    out_layer = create_layer(
+        out_ds,
+        schema.name,
+        spatial_reference(schema.srs_wkt) if schema.srs_wkt else None,
+        schema.geom_type,
+        fmt,
+        options,
+        schema.coordinate_precision,
+    )
+    for spec in schema.fields:
+        out_layer.CreateField(spec.to_defn())
+    return out_layer
+
+
+def create_layer_like(
+    out_ds,
+    layer,
+    fmt: OutputFormat,
+    options: List[str],
+    srs=None,
+    geom_type=None,
+    fields: Optional[List[int]] = None,
+    grid_size: Optional[float] = None,
+):
+    """
+    Create an output layer copying the name and field definitions of a layer.
+
+    Args:
+        out_ds: Output dataset
+        layer: Source layer
+        fmt: Output format
+        options: Layer creation options
+        srs: Spatial reference, defaults to the source layer's
+        geom_type: Geometry type, defaults to the source layer's
+        fields: Indexes of the fields to copy, defaults to all fields
+        grid_size: Coordinate grid to declare on the layer, see precision.create_layer
+    """
+    out_layer = create_layer(
+        out_ds,
+        layer.GetName(),
+        srs or layer.GetSpatialRef(),
+        layer.GetGeomType() if geom_type is None else geom_type,
+        fmt,
+        options,
+        grid_size,
+    )
+    layer_defn = layer.GetLayerDefn()
+    if fields is None:
+        fields = range(layer_defn.GetFieldCount())
+    for i in fields:
+        out_layer.CreateField(layer_defn.GetFieldDefn(i))
+    return out_layer
+
+
+def write_layer(
+    layer,
+    pipeline: Pipeline,
+    out_ds,
+    run: ResumableRun,
+    create_output_layer: Callable[[Any, LayerSchema], Any],
+    batch_size: Optional[int] = None,
+) -> Tuple[int, LayerSchema]:
+    """
+    Stream a layer through a pipeline into an output dataset in committed batches.
+
+    The output layer of an interrupted run is truncated to its committed batches
+    and the features committed by that run are skipped.
+
+    Args:
+        layer: Input layer, with its filters applied
+        pipeline: Pipeline applied to every batch
+        out_ds: Output dataset
+        run: Run recording the committed batches
+        create_output_layer: Creates the output layer from the first batch's schema
+        batch_size: Features per batch, defaults to a size fitting the memory budget
+
+    Returns:
+        Tuple of (features written, output schema)
+    """
+    layer_name = layer.GetName()
+    out_layer = None
+    if run.resumed:
+        out_layer = out_ds.GetLayerByName(layer_name)
+        if out_layer is not None:
+            run.restore_layer(out_layer, layer_name)
+
+    written = 0
+    schema = None
+    for buffer in GeometryBuffer.iter_layer(layer, batch_size):
+        pending = run.pending(layer_name, buffer.fids)
+        if not len(pending):
+            continue
+        if len(pending) < len(buffer):
+            buffer = buffer.take(pending)
+        fids = buffer.fids
+
+        buffer = pipeline(buffer)
+        schema = buffer.schema
+        if out_layer is None:
+            out_layer = create_output_layer(out_ds, schema)
+        run.begin(out_layer)
+        count = write_buffer(buffer, out_layer)
+        run.commit(out_layer, layer_name, fids, count)
+        written += count
+
+    if schema is None:
+        schema = pipeline(GeometryBuffer.concat([], LayerSchema.from_layer(layer))).schema
+        if out_layer is None:
+            create_output_layer(out_ds, schema)
+    run.complete_layer(layer_name)
+    return written, schema
+
+
+def parts_directory(output_path: Path) -> Path:
+    """Directory holding the per-layer parts of an output while it is built."""
+    return output_path.with_name(output_path.name + PARTS_SUFFIX)
+
+
+def pipeline_layer_part(
+    dataset: str,
+    layer_name: str,
+    steps: List[PipelineStep],
+    part_path: str,
+    where: Optional[str] = None,
+    bbox: Optional[Sequence[float]] = None,
+    mask: Any = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Dict[str, Any]:
+    """
+    Worker: run a pipeline over one layer into a single-layer part dataset.
+
+    The part keeps its own checkpoint, so a rerun after a failure or cancellation
+    resumes the layer where the worker stopped.
+
+    Returns:
+        Dictionary with the part path, input features processed, features
+        written, output schema and pipeline metrics
+    """
+    ds = ogr.Open(dataset, 0)
+    if ds is None:
+        raise ProcessingError(f"Could not open dataset: {dataset}")
+    layer = apply_filters(select_layers(ds, [layer_name])[0], where, bbox, mask)
+
+    part_path = Path(part_path)
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    run = ResumableRun(
+        "layer_part",
+        dataset,
+        part_path,
+        {"layer": layer_name, "steps": steps, "where": where, "bbox": bbox, "mask": mask},
+        progress,
+        cancel_token,
+    )
+    run.start([layer])
+    out_ds = ogr.Open(str(part_path), 1) if run.resumed else None
+    if out_ds is None:
+        run.restart()
+        driver = ogr.GetDriverByName(PART_FORMAT.driver)
+        if part_path.exists():
+            driver.DeleteDataSource(str(part_path))
+        out_ds = driver.CreateDataSource(str(part_path))
+
+    pipeline = Pipeline(steps)
+    written, schema = write_layer(
+        layer,
+        pipeline,
+        out_ds,
+        run,
+        lambda part_ds, part_schema: create_schema_layer(
+            part_ds, part_schema, PART_FORMAT, PART_FORMAT.layer_options
+        ),
+        batch_size,
+    )
+    processed = run.reporter.done
+    ds = None
+    out_ds = None
+    run.finish()
+    return {
+        "path": str(part_path),
+        "features": processed,
+        "written": written,
+        "schema": schema,
+        "metrics": pipeline.metrics,
+    }
+
+
+def _create_part_dataset(part_path: Path):
+    """Create an empty part dataset, replacing one left by an earlier run."""
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    driver = ogr.GetDriverByName(PART_FORMAT.driver)
+    if part_path.exists():
+        driver.DeleteDataSource(str(part_path))
+    return driver.CreateDataSource(str(part_path))
+
+
+def clean_layer(
+    layer,
+    source_layer,
+    out_ds,
+    fmt: OutputFormat,
+    options: List[str],
+    where: Optional[str],
+    snap_tolerance: float,
+    cluster_tolerance: float,
+    min_area: float,
+    max_workers: int,
+    reporter: Optional[ProgressReporter] = None,
+) -> Dict[str, Any]:
+    """
+    Clean one layer tile by tile into a new output layer, see clean_tiles.
+
+    Args:
+        layer: Input layer, with its filters applied; read geometries only
+        source_layer: The same layer from a second handle, read for attributes
+        out_ds: Output dataset
+        fmt: Output format
+        options: Layer creation options
+        where: Attribute filter set on the layer
+        snap_tolerance: Snap tolerance
+        cluster_tolerance: Cluster tolerance
+        min_area: Minimum polygon area
+        max_workers: Worker processes for tiled cleaning
+        reporter: Counts the features of every tile written
+
+    Returns:
+        Cleaning statistics of the layer
+    """
+    # First pass: bounds and sizes only, keeping the fields the attribute filter uses
+    layer.SetIgnoredFields(ignored_fields(layer, where))
+    fids, bounds, sizes, present = [], [], [], []
+    for batch in iter_feature_batches(layer):
+        geoms = features_to_shapely(batch)
+        fids.append(np.array([feature.GetFID() for feature in batch], dtype=np.int64))
+        bounds.append(shapely.bounds(geoms))
+        sizes.append(np.array([feature_bytes(feature) for feature in batch]))
+        present.append(~shapely.is_missing(geoms))
+    fids = np.concatenate(fids or [np.empty(0, dtype=np.int64)])
+    bounds = np.concatenate(bounds or [np.empty((0, 4))])
+    sizes = np.concatenate(sizes or [np.empty(0)])
+    present = np.concatenate(present or [np.empty(0, dtype=bool)])
+
+    def read_tile(positions: np.ndarray) -> np.ndarray:
+        return features_to_shapely([layer.GetFeature(int(fid)) for fid in fids[positions]])
+
+    # Second pass: tiles stream through the cleaning, written with their
+    # attributes as they are final
+    out_layer = create_layer_like(out_ds, layer, fmt, options)
+    out_defn = out_layer.GetLayerDefn()
+    use_transactions = out_layer.TestCapability(ogr.OLCTransactions)
+    stats: Dict[str, Any] = {}
+    removed = 0
+    for positions, cleaned in clean_tiles(
+        bounds,
+        sizes,
+        read_tile,
+        snap_tolerance,
+        cluster_tolerance,
+        min_area,
+        max_workers,
+        stats,
+    ):
+        if use_transactions:
+            out_layer.StartTransaction()
+        for position, geom in zip(positions, cleaned):
+            if geom is None and present[position]:
+                removed += 1
+                continue
+            feature = source_layer.GetFeature(int(fids[position]))
+            out_feature = ogr.Feature(out_defn)
+            out_feature.SetGeometry(shapely_to_ogr(geom))
+            for i in range(feature.GetFieldCount()):
+                out_feature.SetField(i, feature.GetField(i))
+            out_layer.CreateFeature(out_feature)
+            out_feature = None
+        if use_transactions:
+            out_layer.CommitTransaction()
+        if reporter is not None:
+            reporter.update(len(positions))
+
+    stats["features_removed"] = removed
+    return stats
+
+
+def clean_layer_part(
+    dataset: str,
+    layer_name: str,
+    part_path: str,
+    where: Optional[str],
+    bbox: Optional[Sequence[float]],
+    mask: Any,
+    snap_tolerance: float,
+    cluster_tolerance: float,
+    min_area: float,
+    max_workers: int,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Dict[str, Any]:
+    """
+    Worker: clean one layer into a single-layer part dataset, see clean_layer.
+
+    Returns:
+        Dictionary with the part path, output schema and cleaning statistics
+    """
+    ds = ogr.Open(dataset, 0)
+    if ds is None:
+        raise ProcessingError(f"Could not open dataset: {dataset}")
+    layer = apply_filters(select_layers(ds, [layer_name])[0], where, bbox, mask)
+    # Attributes are read from a second handle while tiles are read by FID
+    source_ds = ogr.Open(dataset, 0)
+
+    part_path = Path(part_path)
+    out_ds = _create_part_dataset(part_path)
+    reporter = ProgressReporter(f"clean_topology {layer_name}", None, progress, cancel_token)
+    stats = clean_layer(
+        layer,
+        source_ds.GetLayerByName(layer_name),
+        out_ds,
+        PART_FORMAT,
+        PART_FORMAT.layer_options,
+        where,
+        snap_tolerance,
+        cluster_tolerance,
+        min_area,
+        max_workers,
+        reporter,
+    )
+    schema = LayerSchema.from_layer(out_ds.GetLayer())
+    ds = None
+    source_ds = None
+    out_ds = None
+    return {"path": str(part_path), "schema": schema, "stats": stats}
+
+
+def buffer_layer(
+    layer,
+    out_ds,
+    fmt: OutputFormat,
+    options: List[str],
+    distance: float,
+    dissolve: bool,
+    dissolve_field: Optional[str],
+    quad_segs: int,
+    max_workers: int,
+    reporter: Optional[ProgressReporter] = None,
+) -> Dict[str, Any]:
+    """
+    Buffer one layer into a new output layer, see GDALPreprocessor.buffer.
+
+    Args:
+        layer: Input layer, with its filters applied
+        out_ds: Output dataset
+        fmt: Output format
+        options: Layer creation options
+        distance: Buffer distance in layer units
+        dissolve: Whether to dissolve all buffers into one feature
+        dissolve_field: Field whose values define the dissolve groups
+        quad_segs: Segments used to approximate a quarter circle
+        max_workers: Worker processes for dissolving
+        reporter: Counts the features of every batch buffered
+
+    Returns:
+        Dictionary with the features buffered, and the dissolve groups and
+        workers when dissolving (None otherwise)
+    """
+    layer_defn = layer.GetLayerDefn()
+    group_parts: Dict[Any, List[np.ndarray]] = {}
+
+    if dissolve_field:
+        field_index = layer_defn.GetFieldIndex(dissolve_field)
+        if field_index == -1:
+            raise ProcessingError(f"Dissolve field not found: {dissolve_field}")
+        out_layer = create_layer_like(
+            out_ds, layer, fmt, options, geom_type=ogr.wkbMultiPolygon, fields=[field_index]
+        )
+    elif dissolve:
+        out_layer = create_layer_like(
+            out_ds, layer, fmt, options, geom_type=ogr.wkbMultiPolygon, fields=[]
+        )
+    else:
+        out_layer = create_layer_like(out_ds, layer, fmt, options, geom_type=ogr.wkbMultiPolygon)
+    out_defn = out_layer.GetLayerDefn()
+
+    features_count = 0
+    for features in iter_feature_batches(layer):
+        buffered = shapely.buffer(features_to_shapely(features), distance, quad_segs=quad_segs)
+        features_count += len(features)
+        if reporter is not None:
+            reporter.update(len(features))
+
+        if dissolve_field:
+            keys = np.array([f.GetField(field_index) for f in features], dtype=object)
+            for key in dict.fromkeys(keys.tolist()):
+                group_parts.setdefault(key, []).append(buffered[keys == key])
+            continue
+        if dissolve:
+            group_parts.setdefault(None, []).append(buffered)
+            continue
+
+        for feature, geom in zip(features, buffered):
+            out_feature = ogr.Feature(out_defn)
+            if geom is not None:
+                out_feature.SetGeometry(ogr.ForceToMultiPolygon(shapely_to_ogr(geom)))
+            for i in range(feature.GetFieldCount()):
+                out_feature.SetField(i, feature.GetField(i))
+            out_layer.CreateFeature(out_feature)
+            out_feature = None
+
+    if group_parts:
+        groups = {key: np.concatenate(parts) for key, parts in group_parts.items()}
+        # Each union task holds up to UNION_LEAF_SIZE buffered geometries
+        n_geoms = sum(len(geoms) for geoms in groups.values())
+        coords = sum(int(shapely.get_num_coordinates(g).sum()) for g in groups.values())
+        max_workers = worker_limit(
+            max_workers,
+            coords / max(n_geoms, 1) * 16 * UNION_LEAF_SIZE * WORKING_SET_FACTOR,
+        )
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            unions = tree_union(groups, executor)
+
+        for key, wkb in unions.items():
+            out_feature = ogr.Feature(out_defn)
+            out_feature.SetGeometry(ogr.ForceToMultiPolygon(ogr.CreateGeometryFromWkb(wkb)))
+            if dissolve_field:
+                out_feature.SetField(0, key)
+            out_layer.CreateFeature(out_feature)
+            out_feature = None
+
+    return {
+        "features": features_count,
+        "groups": len(group_parts) if group_parts else None,
+        "workers": max_workers if group_parts else None,
+    }
+
+
+def buffer_layer_part(
+    dataset: str,
+    layer_name: str,
+    part_path: str,
+    where: Optional[str],
+    bbox: Optional[Sequence[float]],
+    mask: Any,
+    distance: float,
+    dissolve: bool,
+    dissolve_field: Optional[str],
+    quad_segs: int,
+    max_workers: int,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Dict[str, Any]:
+    """
+    Worker: buffer one layer into a single-layer part dataset, see buffer_layer.
+
+    Returns:
+        Dictionary with the part path, output schema and buffer metrics
+    """
+    ds = ogr.Open(dataset, 0)
+    if ds is None:
+        raise ProcessingError(f"Could not open dataset: {dataset}")
+    layer = apply_filters(select_layers(ds, [layer_name])[0], where, bbox, mask)
+
+    part_path = Path(part_path)
+    out_ds = _create_part_dataset(part_path)
+    reporter = ProgressReporter(f"buffer {layer_name}", None, progress, cancel_token)
+    metrics = buffer_layer(
+        layer,
+        out_ds,
+        PART_FORMAT,
+        PART_FORMAT.layer_options,
+        distance,
+        dissolve,
+        dissolve_field,
+        quad_segs,
+        max_workers,
+        reporter,
+    )
+    schema = LayerSchema.from_layer(out_ds.GetLayer())
+    ds = None
+    out_ds = None
+    return {"path": str(part_path), "schema": schema, "metrics": metrics}
+
+
+def _repair_updates(buffer: GeometryBuffer, state: Dict[str, Any]) -> Tuple[np.ndarray, np.ndarray]:
+    """Invalid polygons, repaired as by GeometryBuffer.repair (see repair_polygons)."""
+    geoms = buffer.to_shapely()
+    repaired = repair_polygons(geoms)
+    changed = np.flatnonzero([a is not b for a, b in zip(geoms, repaired)])
+    return changed, shapely.to_wkb(repaired[changed])
+
+
+def _sinuosity_updates(
+    buffer: GeometryBuffer, state: Dict[str, Any]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Sinuosity of LineString features, see GeometryBuffer.sinuosity."""
+    values = buffer.sinuosity()
+    lines = np.flatnonzero(~np.isnan(values))
+    return lines, values[lines]
+
+
+def _quality_check_updates(
+    buffer: GeometryBuffer, state: Dict[str, Any], thresholds: Optional[Dict[str, float]] = None
+) -> Tuple[np.ndarray, np.ndarray]:
+    """QC flags of every feature, with the layer's report in the metrics."""
+    if "metrics" not in state:
+        state["metrics"] = new_qc_report(thresholds)
+        state["seen_hashes"] = set()
+    results = buffer.quality_flags(state["seen_hashes"], thresholds)
+    update_qc_report(state["metrics"], results)
+    return np.arange(len(buffer)), results["flags"]
+
+
+def _gradient_updates(
+    buffer: GeometryBuffer,
+    state: Dict[str, Any],
+    dem: str,
+    band: int = 1,
+    interval: Optional[float] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Gradient, minimum and maximum elevation of every feature, sampled from a DEM
+    (see sample_band), as rows of a (N, 3) array; NaN where no sample is valid.
+    """
+    if "metrics" not in state:
+        raster_ds = open_shared_raster(dem)
+        state["band"] = raster_ds.GetRasterBand(band)
+        state["geotransform"] = north_up_geotransform(raster_ds)
+        # Sample positions are spaced in layer units, then transformed to the DEM's
+        state["transform"] = None
+        if buffer.schema.srs_wkt and raster_ds.GetProjection():
+            source_srs = spatial_reference(buffer.schema.srs_wkt)
+            raster_srs = spatial_reference(raster_ds.GetProjection())
+            if not source_srs.IsSame(raster_srs):
+                state["transform"] = osr.CoordinateTransformation(source_srs, raster_srs)
+        state["metrics"] = {"features": 0, "samples": 0, "valid_samples": 0}
+
+    coords, owner, along = line_samples(buffer.to_shapely(), interval)
+    if state["transform"] is not None:
+        coords = transform_coordinates(coords, state["transform"])
+    values = sample_band(state["band"], state["geotransform"], coords)
+    profile = profile_metrics(values, owner, along, len(buffer))
+    metrics = state["metrics"]
+    metrics["features"] += len(buffer)
+    metrics["samples"] += len(values)
+    metrics["valid_samples"] += int(np.count_nonzero(~np.isnan(values)))
+    return np.arange(len(buffer)), np.column_stack(
+        [profile["gradient"], profile["min"], profile["max"]]
+    )
+
+
+# Per-batch updates of in-place operations, called with a batch, the layer's
+# state and the operation's parameters: positions of the features to update and
+# their new values. Layer-level results are kept in state["metrics"].
+LAYER_UPDATES: Dict[str, Callable[..., Tuple[np.ndarray, np.ndarray]]] = {
+    "repair": _repair_updates,
+    "sinuosity": _sinuosity_updates,
+    "quality_check": _quality_check_updates,
+    "gradient": _gradient_updates,
+}
+
+
+def layer_updates(
+    dataset: str,
+    layer_name: str,
+    operation: str,
+    part_path: str,
+    where: Optional[str] = None,
+    bbox: Optional[Sequence[float]] = None,
+    mask: Any = None,
+    params: Optional[Dict[str, Any]] = None,
+    batch_size: Optional[int] = None,
+    progress: Optional[ProgressCallback] = None,
+    cancel_token: Optional[CancellationToken] = None,
+) -> Dict[str, Any]:
+    """
+    Worker: compute the updates of an in-place operation over one layer.
+
+    The layer is only read, geometries only (attributes the filter needs are
+    kept), so workers can read layers of the same dataset side by side. The
+    updates of each batch are appended to a part file as soon as they are
+    computed, so only one batch is held in memory; read_updates reads them back.
+
+    Args:
+        dataset: Path to the dataset
+        layer_name: Layer to read
+        operation: One of LAYER_UPDATES
+        part_path: File receiving the updates
+        where: Attribute filter (OGR SQL WHERE clause)
+        bbox: Spatial filter (minx, miny, maxx, maxy)
+        mask: Spatial filter geometry
+        params: Keyword arguments of the operation
+        batch_size: Features per batch, defaults to a size fitting the memory budget
+        progress: Called with a Progress after every batch
+        cancel_token: Token checked after every batch
+
+    Returns:
+        Dictionary with the part path, batches and features read, and the
+        operation's metrics of the layer (None when it keeps none)
+    """
+    ds = ogr.Open(dataset, 0)
+    if ds is None:
+        raise ProcessingError(f"Could not open dataset: {dataset}")
+    layer = apply_filters(select_layers(ds, [layer_name])[0], where, bbox, mask)
+    layer.SetIgnoredFields(ignored_fields(layer, where))
+
+    part_path = Path(part_path)
+    part_path.parent.mkdir(parents=True, exist_ok=True)
+    reporter = ProgressReporter(f"{operation} {layer_name}", None, progress, cancel_token)
+    update = LAYER_UPDATES[operation]
+    state: Dict[str, Any] = {}
+    batches = 0
+    with open(part_path, "wb") as part:
+        for buffer in GeometryBuffer.iter_layer(layer, batch_size):
+            index, values = update(buffer, state, **(params or {}))
+            pickle.dump((buffer.fids, index, values), part, pickle.HIGHEST_PROTOCOL)
+            batches += 1
+            reporter.update(len(buffer))
+    ds = None
+    return {
+        "path": str(part_path),
+        "batches": batches,
+        "features": reporter.done,
+        "metrics": state.get("metrics"),
+    }
+
+
+def read_updates(part_path: str) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """
+    Read back the updates written by layer_updates, one batch at a time.
+
+    Yields:
+        Per batch, the FIDs read, the positions of the features to update and
+        their new values
+    """
+    with open(part_path, "rb") as part:
+        while True:
+            try:
+                yield pickle.load(part)
+            except EOFError:
+                return
@@ -0,0 +1,249 @@
+import struct
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from .geometry_buffer import GeometryBuffer, LayerSchema
+
+# Mapbox Vector Tile 2.1 encoder. Protobuf messages are written by hand: the
+# format only needs varints, length-delimited fields and packed uint32 arrays.
+
+MVT_VERSION = 2
+
+# Geometry commands
+_MOVE_TO, _LINE_TO, _CLOSE_PATH = 1, 2, 7
+
+# Feature.GeomType for shapely type ids
+_GEOM_TYPES = {0: 1, 4: 1, 1: 2, 2: 2, 5: 2, 3: 3, 6: 3}
+
+# Protobuf wire types
+_VARINT, _FIXED64, _LENGTH_DELIMITED = 0, 1, 2
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+def _key(field_number: int, wire_type: int) -> bytes:
+    return _varint((field_number << 3) | wire_type)
+
+
+def _message(field_number: int, payload: bytes) -> bytes:
+    return _key(field_number, _LENGTH_DELIMITED) + _varint(len(payload)) + payload
+
+
+def _packed(field_number: int, values: List[int]) -> bytes:
+    return _message(field_number, b"".join(_varint(value) for value in values))
+
+
+def _command(command: int, count: int) -> int:
+    return (command & 0x7) | (count << 3)
+
+
+def _encode_value(value: Any) -> bytes:
+    """Encode a Value message (string, double, int64, sint64 or bool)."""
+    if isinstance(value, (bool, np.bool_)):
+        return _key(7, _VARINT) + _varint(int(value))
+    if isinstance(value, (int, np.integer)):
+        value = int(value)
+        if value >= 0:
+            return _key(4, _VARINT) + _varint(value)
+        return _key(6, _VARINT) + _varint((value << 1) ^ (value >> 63))
+    if isinstance(value, (float, np.floating)):
+        return _key(3, _FIXED64) + struct.pack("<d", float(value))
+    return _message(1, str(value).encode("utf-8"))
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or (isinstance(value, (float, np.floating)) and np.isnan(value))
+
+
+def _clean_rings(buffer: GeometryBuffer) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Quantize coordinates to the tile grid and drop degenerate rings.
+
+    Consecutive repeated vertices are removed. Lines need two vertices and
+    polygon rings three distinct ones with a non-zero area; a polygon whose
+    exterior ring is dropped loses its holes too. Rings are oriented as MVT
+    requires: exterior rings with a positive area in tile coordinates (clockwise
+    with Y pointing down), holes with a negative one.
+
+    Returns:
+        Tuple of (integer coordinates, ring offsets, mask of kept rings)
+    """
+    coords = np.round(buffer.coords[:, :2]).astype(np.int64)
+    ring_lengths = np.diff(buffer.ring_offsets)
+    n_rings = len(ring_lengths)
+    ring_index = np.repeat(np.arange(n_rings), ring_lengths)
+
+    ring_part = np.repeat(np.arange(len(buffer.part_offsets) - 1), np.diff(buffer.part_offsets))
+    part_owner = np.repeat(np.arange(len(buffer)), np.diff(buffer.geom_offsets))
+    ring_types = buffer.geometry_types[part_owner[ring_part]]
+    polygon_rings = np.isin(ring_types, (3, 6))
+    point_rings = np.isin(ring_types, (0, 4))
+
+    repeated = np.zeros(len(coords), dtype=bool)
+    repeated[1:] = (ring_index[1:] == ring_index[:-1]) & np.all(coords[1:] == coords[:-1], axis=1)
+    repeated &= ~point_rings[ring_index]
+    coords = coords[~repeated]
+    ring_index = ring_index[~repeated]
+    ring_lengths = np.bincount(ring_index, minlength=n_rings)
+    ring_offsets = np.concatenate([[0], np.cumsum(ring_lengths)]).astype(np.int64)
+
+    # Shoelace area of every ring, in tile coordinates
+    next_coords = np.roll(coords, -1, axis=0)
+    last = ring_offsets[1:] - 1
+    next_coords[last[ring_lengths > 0]] = coords[ring_offsets[:-1][ring_lengths > 0]]
+    cross = coords[:, 0] * next_coords[:, 1] - next_coords[:, 0] * coords[:, 1]
+    area = np.bincount(ring_index, weights=cross, minlength=n_rings) / 2
+
+    keep = np.where(polygon_rings, (ring_lengths >= 4) & (area != 0), ring_lengths >= 1)
+    keep &= np.where(np.isin(ring_types, (1, 2, 5)), ring_lengths >= 2, True)
+
+    exterior = np.zeros(n_rings, dtype=bool)
+    exterior[buffer.part_offsets[:-1][np.diff(buffer.part_offsets) > 0]] = True
+    ring_part_kept = np.ones(len(buffer.part_offsets) - 1, dtype=bool)
+    ring_part_kept[ring_part[exterior & ~keep]] = False
+    keep &= ring_part_kept[ring_part]
+
+    reverse = polygon_rings & keep & (exterior != (area > 0))
+    for ring in np.flatnonzero(reverse):
+        start, end = ring_offsets[ring], ring_offsets[ring + 1]
+        coords[start:end] = coords[start:end][::-1]
+
+    return coords, ring_offsets, keep
+
+
+def encode_geometries(geoms: np.ndarray) -> List[Optional[Tuple[int, List[int]]]]:
+    """
+    Encode shapely geometries in tile coordinates as MVT geometry commands.
+
+    Args:
+        geoms: Array of points, lines and polygons in tile coordinates
+
+    Returns:
+        (GeomType, command integers) per geometry, None for geometries that are
+        empty or degenerate at tile resolution
+    """
+    buffer = GeometryBuffer.from_shapely(geoms, LayerSchema("", 0))
+    coords, ring_offsets, keep = _clean_rings(buffer)
+
+    encoded: List[Optional[Tuple[int, List[int]]]] = []
+    for i, type_id in enumerate(buffer.geometry_types):
+        rings = [
+            ring
+            for part in range(buffer.geom_offsets[i], buffer.geom_offsets[i + 1])
+            for ring in range(buffer.part_offsets[part], buffer.part_offsets[part + 1])
+            if keep[ring]
+        ]
+        if type_id < 0 or not rings:
+            encoded.append(None)
+            continue
+        geom_type = _GEOM_TYPES[int(type_id)]
+
+        # Polygon rings are written without their closing vertex
+        trim = 1 if geom_type == 3 else 0
+        vertices = np.concatenate(
+            [coords[ring_offsets[ring] : ring_offsets[ring + 1] - trim] for ring in rings]
+        )
+        deltas = np.diff(vertices, axis=0, prepend=np.zeros((1, 2), dtype=np.int64))
+        params = ((deltas << 1) ^ (deltas >> 63)).ravel().tolist()
+
+        if geom_type == 1:
+            encoded.append((geom_type, [_command(_MOVE_TO, len(vertices))] + params))
+            continue
+
+        commands: List[int] = []
+        position = 0
+        for ring in rings:
+            count = ring_offsets[ring + 1] - ring_offsets[ring] - trim
+            commands.append(_command(_MOVE_TO, 1))
+            commands.extend(params[position : position + 2])
+            commands.append(_command(_LINE_TO, count - 1))
+            commands.extend(params[position + 2 : position + 2 * count])
+            if trim:
+                commands.append(_command(_CLOSE_PATH, 1))
+            position += 2 * count
+        encoded.append((geom_type, commands))
+    return encoded
+
+
+def encode_layer(
+    name: str,
+    geoms: np.ndarray,
+    fids: np.ndarray,
+    attributes: Dict[str, np.ndarray],
+    extent: int = 4096,
+) -> Tuple[Optional[bytes], int]:
+    """
+    Encode a Layer message.
+
+    Args:
+        name: Layer name
+        geoms: Array of shapely geometries in tile coordinates (0 to extent, Y down)
+        fids: Feature IDs; negative IDs are left out
+        attributes: Attribute columns aligned with geoms; missing values are skipped
+        extent: Tile extent in tile coordinate units
+
+    Returns:
+        Tuple of (encoded layer or None when no feature survives encoding,
+        number of features encoded)
+    """
+    keys: Dict[str, int] = {}
+    values: Dict[Tuple[type, Any], int] = {}
+    value_messages: List[bytes] = []
+    features: List[bytes] = []
+
+    for i, geometry in enumerate(encode_geometries(geoms)):
+        if geometry is None:
+            continue
+        geom_type, commands = geometry
+
+        tags: List[int] = []
+        for key, column in attributes.items():
+            value = column[i]
+            if _is_missing(value):
+                continue
+            if isinstance(value, np.generic):
+                value = value.item()
+            value_key = (type(value), value)
+            if value_key not in values:
+                values[value_key] = len(value_messages)
+                value_messages.append(_encode_value(value))
+            tags.extend((keys.setdefault(key, len(keys)), values[value_key]))
+
+        feature = b""
+        if fids[i] >= 0:
+            feature += _key(1, _VARINT) + _varint(int(fids[i]))
+        if tags:
+            feature += _packed(2, tags)
+        feature += _key(3, _VARINT) + _varint(geom_type) + _packed(4, commands)
+        features.append(_message(2, feature))
+
+    if not features:
+        return None, 0
+
+    layer = _key(15, _VARINT) + _varint(MVT_VERSION) + _message(1, name.encode("utf-8"))
+    layer += b"".join(features)
+    layer += b"".join(_message(3, key.encode("utf-8")) for key in keys)
+    layer += b"".join(_message(4, value) for value in value_messages)
+    layer += _key(5, _VARINT) + _varint(extent)
+    return layer, len(features)
+
+
+def encode_tile(layers: List[bytes]) -> bytes:
+    """Encode a Tile message from encoded layers."""
+    return b"".join(_message(3, layer) for layer in layers)
+
+
+def tile_coordinates(geoms: np.ndarray, bounds: Tuple[float, float, float, float], extent: int):
+    """Map geometries from a tile's projected bounds to tile coordinates (Y down)."""
+    minx, _, maxx, maxy = bounds
+    scale = extent / (maxx - minx)
+    return shapely.transform(geoms, lambda coords: (coords - (minx, maxy)) * (scale, -scale))
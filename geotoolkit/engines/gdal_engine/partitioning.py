@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def _spread_bits(values: np.ndarray) -> np.ndarray:
+    """Interleave zeros between the low 16 bits of each value."""
+    values = values.astype(np.uint32) & 0x0000FFFF
+    values = (values | (values << 8)) & 0x00FF00FF
+    values = (values | (values << 4)) & 0x0F0F0F0F
+    values = (values | (values << 2)) & 0x33333333
+    values = (values | (values << 1)) & 0x55555555
+    return values
+
+
+def spatial_order(bounds: np.ndarray) -> np.ndarray:
+    """
+    Order features along a Z-order (Morton) curve of their bounding-box centres.
+
+    Consecutive features in the returned order are spatially close, so slicing the
+    ordered array yields compact spatial partitions.
+
+    Args:
+        bounds: (N, 4) array of minx, miny, maxx, maxy (NaN for missing geometries)
+
+    Returns:
+        Indices that sort the features along the curve, missing geometries last
+    """
+    valid = np.isfinite(bounds).all(axis=1)
+    if not valid.any():
+        return np.arange(len(bounds))
+
+    centre = (bounds[:, :2] + bounds[:, 2:]) / 2
+    low = centre[valid].min(axis=0)
+    span = np.maximum(centre[valid].max(axis=0) - low, np.finfo(np.float64).tiny)
+    cells = np.zeros((len(bounds), 2), dtype=np.uint32)
+    cells[valid] = ((centre[valid] - low) / span * 0xFFFF).astype(np.uint32)
+
+    keys = _spread_bits(cells[:, 0]) | (_spread_bits(cells[:, 1]) << 1)
+    keys = np.where(valid, keys.astype(np.uint64), np.iinfo(np.uint64).max)
+    return np.argsort(keys, kind="stable")
@@ -0,0 +1,143 @@
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+import numpy as np
+from osgeo import ogr, osr
+
+from ...core.constants import VALIDATION_THRESHOLDS
+from ...core.exceptions import ProcessingError
+from ...utils.read_epsg import get_epsg_code
+from .geometry_buffer import FieldSpec, GeometryBuffer
+from .qc import new_qc_report, update_qc_report
+from .simplification import new_simplify_stats
+from .srs import spatial_reference
+
+# A step is a name or a (name, keyword arguments) pair
+PipelineStep = Union[str, Tuple[str, Dict[str, Any]]]
+
+
+def _reproject(
+    buffer: GeometryBuffer,
+    state: Dict[str, Any],
+    target_epsg: Union[str, int],
+    approximate: bool = False,
+    max_error: float = 0.5,
+) -> GeometryBuffer:
+    if "transform" not in state:
+        target_srs = spatial_reference(int(get_epsg_code(target_epsg)))
+        source_srs = target_srs
+        if buffer.schema.srs_wkt:
+            source_srs = spatial_reference(buffer.schema.srs_wkt)
+        state["transform"] = osr.CoordinateTransformation(source_srs, target_srs)
+        state["target_wkt"] = target_srs.ExportToWkt()
+        state["metrics"] = {"features": 0, "fallback_features": 0, "sampled_max_error": 0.0}
+
+    buffer, stats = buffer.transform(
+        state["transform"], state["target_wkt"], approximate=approximate, max_error=max_error
+    )
+    metrics = state["metrics"]
+    metrics["features"] += stats["features"]
+    if approximate:
+        metrics["fallback_features"] += stats["fallback_features"]
+        metrics["sampled_max_error"] = max(metrics["sampled_max_error"], stats["sampled_max_error"])
+    return buffer
+
+
+def _force_2d(buffer: GeometryBuffer, state: Dict[str, Any]) -> GeometryBuffer:
+    return buffer.force_2d()
+
+
+def _repair(buffer: GeometryBuffer, state: Dict[str, Any]) -> GeometryBuffer:
+    buffer, repaired = buffer.repair()
+    state.setdefault("metrics", {"repaired_features": 0})["repaired_features"] += repaired
+    return buffer
+
+
+def _precision(
+    buffer: GeometryBuffer, state: Dict[str, Any], grid_size: float, repair: bool = False
+) -> GeometryBuffer:
+    metrics = state.setdefault(
+        "metrics", {"grid_size": grid_size, "vertices_removed": 0, "repaired_features": 0}
+    )
+    buffer, removed = buffer.snap_to_grid(grid_size)
+    metrics["vertices_removed"] += removed
+    if repair:
+        buffer, repaired = buffer.repair()
+        metrics["repaired_features"] += repaired
+    return buffer
+
+
+def _simplify(
+    buffer: GeometryBuffer,
+    state: Dict[str, Any],
+    max_vertices: Optional[int] = None,
+    tolerance: Optional[float] = None,
+    preserve_topology: bool = True,
+) -> GeometryBuffer:
+    max_vertices = max_vertices or VALIDATION_THRESHOLDS["MAX_VERTICES"]
+    metrics = state.setdefault("metrics", {"max_vertices": max_vertices, **new_simplify_stats()})
+    buffer, stats = buffer.simplify(max_vertices, tolerance, preserve_topology)
+    for key, value in stats.items():
+        metrics[key] += value
+    return buffer
+
+
+def _sinuosity(
+    buffer: GeometryBuffer, state: Dict[str, Any], field_name: str = "sinuosity"
+) -> GeometryBuffer:
+    values = np.ma.masked_invalid(buffer.sinuosity())
+    return buffer.with_attribute(FieldSpec(field_name, ogr.OFTReal), values)
+
+
+def _quality_check(
+    buffer: GeometryBuffer,
+    state: Dict[str, Any],
+    flag_field: str = "qc_flags",
+    thresholds: Optional[Dict[str, float]] = None,
+) -> GeometryBuffer:
+    if "metrics" not in state:
+        state["metrics"] = new_qc_report(thresholds)
+        state["seen_hashes"] = set()
+    results = buffer.quality_flags(state["seen_hashes"], thresholds)
+    update_qc_report(state["metrics"], results)
+    return buffer.with_attribute(
+        FieldSpec(flag_field, ogr.OFTInteger), results["flags"].astype(np.int32)
+    )
+
+
+PIPELINE_STEPS: Dict[str, Callable[..., GeometryBuffer]] = {
+    "reproject": _reproject,
+    "force_2d": _force_2d,
+    "repair": _repair,
+    "precision": _precision,
+    "simplify": _simplify,
+    "sinuosity": _sinuosity,
+    "quality_check": _quality_check,
+}
+
+
+class Pipeline:
+    """
+    A sequence of GeometryBuffer steps applied batch by batch.
+
+    Steps keep their state (transformations, duplicate hashes, running metrics)
+    across batches, so a layer can be streamed through the pipeline in chunks.
+    """
+
+    def __init__(self, steps: List[PipelineStep]):
+        self.steps = []
+        for step in steps:
+            name, kwargs = (step, {}) if isinstance(step, str) else step
+            if name not in PIPELINE_STEPS:
+                raise ProcessingError(
+                    f"Unknown pipeline step: {name}. Choose from {', '.join(PIPELINE_STEPS)}"
+                )
+            self.steps.append((name, PIPELINE_STEPS[name], dict(kwargs), {}))
+
+    def __call__(self, buffer: GeometryBuffer) -> GeometryBuffer:
+        for _, function, kwargs, state in self.steps:
+            buffer = function(buffer, state, **kwargs)
+        return buffer
+
+    @property
+    def metrics(self) -> Dict[str, Any]:
+        return {name: state["metrics"] for name, _, _, state in self.steps if "metrics" in state}
@@ -0,0 +1,74 @@
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+from osgeo import ogr
+
+from .formats import OutputFormat
+from .geometry_buffer import GeometryBuffer, LayerSchema
+
+# Drivers writing coordinates as text, with a layer option limiting their digits
+_TEXT_PRECISION_DRIVERS = ("GeoJSON", "GeoJSONSeq")
+
+
+def precision_decimals(grid_size: float) -> int:
+    """Decimal places needed to write coordinates on a grid exactly (2 for 0.25)."""
+    exponent = Decimal(repr(float(grid_size))).normalize().as_tuple().exponent
+    return max(0, -exponent)
+
+
+def snap_geometries(
+    geoms: np.ndarray, grid_size: float, repair: bool = False
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Snap an array of shapely geometries to a grid (see GeometryBuffer.snap_to_grid).
+
+    Args:
+        geoms: Array of shapely geometries (None for missing geometries)
+        grid_size: Grid spacing in the geometries' units
+        repair: Repair polygons made invalid by snapping
+
+    Returns:
+        Tuple of (snapped geometries, statistics)
+    """
+    buffer = GeometryBuffer.from_shapely(geoms, LayerSchema("", ogr.wkbUnknown))
+    buffer, removed = buffer.snap_to_grid(grid_size)
+    repaired = 0
+    if repair:
+        buffer, repaired = buffer.repair()
+    return buffer.to_shapely(), {"vertices_removed": removed, "repaired_features": repaired}
+
+
+def create_layer(
+    out_ds,
+    name: str,
+    srs,
+    geom_type: int,
+    fmt: OutputFormat,
+    options: List[str],
+    grid_size: Optional[float] = None,
+):
+    """
+    Create an output layer, declaring its coordinate grid in the format where possible.
+
+    GeoJSON layers write only the digits the grid needs. With GDAL 3.9 or later,
+    other formats record the grid as the geometry field's coordinate precision
+    (GeoPackage metadata, FlatGeobuf header, ...), which drivers use to round and
+    encode coordinates.
+    """
+    if grid_size is None:
+        return out_ds.CreateLayer(name, srs, geom_type, options=options)
+
+    if fmt.driver in _TEXT_PRECISION_DRIVERS:
+        options = options + [f"COORDINATE_PRECISION={precision_decimals(grid_size)}"]
+        return out_ds.CreateLayer(name, srs, geom_type, options=options)
+
+    if not hasattr(ogr, "CreateGeomCoordinatePrecision"):
+        return out_ds.CreateLayer(name, srs, geom_type, options=options)
+
+    precision = ogr.CreateGeomCoordinatePrecision()
+    precision.Set(grid_size, 0, 0)  # Z and M precision unknown
+    geom_field = ogr.GeomFieldDefn("", geom_type)
+    geom_field.SetSpatialRef(srs)
+    geom_field.SetCoordinatePrecision(precision)
+    return out_ds.CreateLayerFromGeomFieldDefn(name, geom_field, options)
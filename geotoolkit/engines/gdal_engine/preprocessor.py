@@ -1,13 +1,58 @@
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Union, List, Optional
-from osgeo import gdal, ogr, osr
+from typing import Union, List, Optional, Dict, Any, Callable, Iterable, Iterator, Sequence, Tuple
+from osgeo import gdal, ogr
+import numpy as np
 import re
+import shutil
 
 from ... import setup_logger
 from ...core.base import BasePreprocessor
-from ...core.exceptions import ProcessingError
+from ...core.constants import SUPPORTED_RASTER_FORMATS, VALIDATION_THRESHOLDS
+from ...core.exceptions import OperationCancelledError, ProcessingError
 from ...tools.spatial import SpatialReference
+from ...utils.config import ConfigManager
+from ...utils.memory import (
+    WORKING_SET_FACTOR,
+    warp_memory_limit,
+    worker_limit,
+)
+from ...utils.progress import CancellationToken, ProgressCallback
 from ...utils.read_epsg import get_epsg_code
+from .arrow import buffer_to_record_batch, record_batch_to_buffer
+from .buffering import resolve_buffer_distance
+from .filters import apply_filters
+from .formats import (
+    OutputFormat,
+    convert_dataset,
+    output_path_for,
+    resolve_output_format,
+)
+from .geometry_buffer import GeometryBuffer, LayerSchema, write_buffer
+from .indexing import build_indexes, bulk_load_options
+from .layers import (
+    PART_FORMAT,
+    buffer_layer,
+    buffer_layer_part,
+    clean_layer,
+    clean_layer_part,
+    create_schema_layer,
+    layer_updates,
+    layer_workers,
+    parts_directory,
+    pipeline_layer_part,
+    read_updates,
+    run_layer_tasks,
+    select_layers,
+    write_layer,
+)
+from .pipeline import Pipeline, PipelineStep
+from .profiles import cache_size, profiled
+from .qc import merge_qc_reports, new_qc_report
+from .raster import WARP_FORMAT, close_shared_rasters, north_up_geotransform, warp_raster
+from .resume import ResumableRun
+from .simplification import SIMPLIFY_TASK_VERTICES, new_simplify_stats
+from .vector_tiles import generate_vector_tiles
 
 logger = setup_logger(
     "gdal_processor",
@@ -21,10 +66,17 @@ class GDALPreprocessor(BasePreprocessor):
 
     def __init__(self):
         gdal.UseExceptions()
+        gdal.SetCacheMax(cache_size())
         self.spatial_ref = SpatialReference()
+        self.metrics: Dict[str, Dict[str, Any]] = {}
 
+    @profiled
     def clean_field_names(
-        self, dataset: Union[str, Path], exclude_fields: Optional[List[str]] = None
+        self,
+        dataset: Union[str, Path],
+        exclude_fields: Optional[List[str]] = None,
+        output_format: Optional[str] = None,
+        layers: Optional[List[str]] = None,
     ) -> Union[str, Path]:
         """
         Clean field names using GDAL.
@@ -32,6 +84,8 @@ class GDALPreprocessor(BasePreprocessor):
         Args:
             dataset: Path to input dataset
             exclude_fields: Fields to exclude from cleaning
+            output_format: Convert the result to this format (see OUTPUT_FORMATS)
+            layers: Names of the layers to clean, defaults to all layers
 
         Returns:
             Path to processed dataset
@@ -41,276 +95,1718 @@ class GDALPreprocessor(BasePreprocessor):
             if ds is None:
                 raise ProcessingError(f"Could not open dataset: {dataset}")
 
-            layer = ds.GetLayer()
-            layer_defn = layer.GetLayerDefn()
-
-            # Get field names and create mapping
-            field_mapping = {}
-            for i in range(layer_defn.GetFieldCount()):
-                field = layer_defn.GetFieldDefn(i)
-                old_name = field.GetName()
-
-                if exclude_fields and old_name in exclude_fields:
-                    continue
+            for layer in select_layers(ds, layers):
+                layer_defn = layer.GetLayerDefn()
 
-                # Clean field name: remove special chars, replace spaces
-                new_name = re.sub(r"[^a-zA-Z0-9_]", "_", old_name)
-                new_name = re.sub(r"_+", "_", new_name)  # Remove multiple underscores
-                new_name = new_name.strip("_").lower()
-
-                if new_name != old_name:
-                    field_mapping[old_name] = new_name
-
-            # Rename fields
-            for old_name, new_name in field_mapping.items():
-                layer.AlterFieldDefn(
-                    layer_defn.GetFieldIndex(old_name),
-                    ogr.FieldDefn(
-                        new_name,
-                        layer_defn.GetFieldDefn(layer_defn.GetFieldIndex(old_name)).GetType(),
-                    ),
-                    ogr.ALTER_NAME_FLAG,
-                )
+                # Get field names and create mapping
+                field_mapping = {}
+                for i in range(layer_defn.GetFieldCount()):
+                    field = layer_defn.GetFieldDefn(i)
+                    old_name = field.GetName()
+
+                    if exclude_fields and old_name in exclude_fields:
+                        continue
+
+                    # Clean field name: remove special chars, replace spaces
+                    new_name = re.sub(r"[^a-zA-Z0-9_]", "_", old_name)
+                    new_name = re.sub(r"_+", "_", new_name)  # Remove multiple underscores
+                    new_name = new_name.strip("_").lower()
+
+                    if new_name != old_name:
+                        field_mapping[old_name] = new_name
+
+                # Rename fields
+                for old_name, new_name in field_mapping.items():
+                    layer.AlterFieldDefn(
+                        layer_defn.GetFieldIndex(old_name),
+                        ogr.FieldDefn(
+                            new_name,
+                            layer_defn.GetFieldDefn(layer_defn.GetFieldIndex(old_name)).GetType(),
+                        ),
+                        ogr.ALTER_NAME_FLAG,
+                    )
 
             ds = None  # Close dataset
             logger.info(f"Cleaned field names in {dataset}")
-            return dataset
+            return self._convert_output(dataset, output_format)
 
         except Exception as e:
             raise ProcessingError(f"Error cleaning field names: {str(e)}")
 
+    @profiled
     def standardize_projection(
-        self, dataset: Union[str, Path], target_epsg: Union[str, int], in_place: bool = False
+        self,
+        dataset: Union[str, Path],
+        target_epsg: Union[str, int],
+        in_place: bool = False,
+        approximate: bool = False,
+        max_error: float = 0.5,
+        resampling: str = "bilinear",
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        grid_size: Optional[float] = None,
+        repair_snapped: bool = False,
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
     ):
         """
         Standardize the projection of a dataset to a specified coordinate system.
 
+        Rasters (see SUPPORTED_RASTER_FORMATS) are delegated to reproject_raster.
+        Vector layers are reprojected concurrently, see _process_layers. Features
+        are written in committed batches; a rerun after a failure or cancellation
+        resumes after the last committed batch.
+
         Args:
             dataset: Path to input dataset
             target_epsg: EPSG code or string identifier for the target coordinate system
             in_place: Whether to modify the input dataset or create a new one
+            approximate: Interpolate the transform over each feature's extent instead of
+                transforming every vertex exactly
+            max_error: Maximum error tolerated by the approximate mode, in target units.
+                Features exceeding it are transformed exactly.
+            resampling: Resampling method used for rasters
+            output_format: Vector output format (see OUTPUT_FORMATS), defaults to the
+                input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            grid_size: Snap output coordinates to a grid of this size, in target units,
+                dropping vertices that become duplicates
+            repair_snapped: Repair polygons made invalid by snapping
+            progress: Called with a Progress (rate, ETA) after every batch
+            cancel_token: Stops the operation after the current batch once cancelled
+            resume: Whether to continue an interrupted run from its checkpoint
+            layers: Names of the layers to reproject, defaults to all layers
+            max_workers: Worker processes reprojecting layers side by side, defaults
+                to max_threads
 
         Returns:
             Path to processed dataset
         """
+        if Path(dataset).suffix.lstrip(".").lower() in SUPPORTED_RASTER_FORMATS:
+            if where is not None or mask is not None:
+                raise ProcessingError("Only the bbox filter applies to rasters")
+            if grid_size is not None:
+                raise ProcessingError("grid_size only applies to vector datasets")
+            return self.reproject_raster(
+                dataset,
+                target_epsg,
+                in_place=in_place,
+                resampling=resampling,
+                approximate=approximate,
+                max_error=max_error,
+                bbox=bbox,
+            )
+
         try:
             epsg_code = get_epsg_code(target_epsg)
             input_path = Path(dataset)
 
-            if in_place:
-                output_path = input_path
-            else:
-                output_path = input_path.with_name(
-                    f"{input_path.stem}_reprojected{input_path.suffix}"
-                )
-
-            # Open the input dataset
             ds = ogr.Open(str(input_path), 0)
             if ds is None:
                 raise ProcessingError(f"Could not open dataset: {dataset}")
+            driver_name = ds.GetDriver().GetName()
+            for layer in select_layers(ds, layers):
+                if layer.GetSpatialRef() is None:
+                    logger.warning(
+                        f"Layer {layer.GetName()} has no defined CRS. Assuming EPSG:{epsg_code}"
+                    )
+            ds = None
 
-            # Create the output dataset
-            driver = ogr.GetDriverByName(ds.GetDriver().GetName())
-            out_ds = driver.CreateDataSource(str(output_path))
+            fmt = resolve_output_format(output_format, driver_name, input_path)
+            output_path = output_path_for(input_path, "reprojected", fmt)
+            run = ResumableRun(
+                "standardize_projection",
+                input_path,
+                output_path,
+                {
+                    "target_epsg": epsg_code,
+                    "approximate": approximate,
+                    "max_error": max_error,
+                    "output_format": fmt.driver,
+                    "where": where,
+                    "bbox": bbox,
+                    "mask": mask,
+                    "grid_size": grid_size,
+                    "repair_snapped": repair_snapped,
+                    "layers": layers,
+                },
+                progress,
+                cancel_token,
+                resume,
+            )
+
+            steps: List[PipelineStep] = [
+                (
+                    "reproject",
+                    {"target_epsg": epsg_code, "approximate": approximate, "max_error": max_error},
+                )
+            ]
+            if grid_size is not None:
+                steps.append(("precision", {"grid_size": grid_size, "repair": repair_snapped}))
+            processed = self._process_layers(
+                run, input_path, output_path, fmt, steps, layers, max_workers, where, bbox, mask
+            )
+
+            metrics = {
+                "approximate": approximate,
+                "max_error": max_error,
+                "sampled_max_error": 0.0,
+                "features": processed["features"],
+                "fallback_features": 0,
+                "grid_size": grid_size,
+                "vertices_removed": 0,
+                "repaired_features": 0,
+                "workers": processed["workers"],
+            }
+            for layer_metrics in processed["layers"].values():
+                reproject = layer_metrics.get("reproject", {})
+                metrics["fallback_features"] += reproject.get("fallback_features", 0)
+                metrics["sampled_max_error"] = max(
+                    metrics["sampled_max_error"], reproject.get("sampled_max_error", 0.0)
+                )
+                for key in ("vertices_removed", "repaired_features"):
+                    metrics[key] += layer_metrics.get("precision", {}).get(key, 0)
+            metrics.update(run.finish())
 
-            # Create the target spatial reference
-            target_srs = osr.SpatialReference()
-            target_srs.ImportFromEPSG(epsg_code)
+            if in_place:
+                output_path = self._replace_dataset(input_path, output_path, fmt, driver_name)
+
+            metrics["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["standardize_projection"] = metrics
+            if approximate:
+                logger.info(
+                    f"Approximate reprojection: max sampled error "
+                    f"{metrics['sampled_max_error']:.6g} (tolerance {max_error}), "
+                    f"{metrics['fallback_features']} of {metrics['features']} features "
+                    f"transformed exactly"
+                )
 
-            # Process each layer
-            for layer in ds:
-                source_srs = layer.GetSpatialRef()
+            logger.info(f"Standardized projection to EPSG:{epsg_code} in {output_path}")
+            return output_path
 
-                if source_srs is None:
-                    logger.warning(f"Source layer has no defined CRS. Assuming EPSG:{epsg_code}")
-                    source_srs = target_srs
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            raise ProcessingError(f"Error standardizing projection: {str(e)}")
 
-                # Create coordinate transformation
-                transform = osr.CoordinateTransformation(source_srs, target_srs)
+    @profiled
+    def reproject_raster(
+        self,
+        dataset: Union[str, Path],
+        target_epsg: Union[str, int],
+        in_place: bool = False,
+        resampling: str = "bilinear",
+        warp_memory: Optional[int] = None,
+        num_threads: Optional[int] = None,
+        approximate: bool = False,
+        max_error: float = 0.5,
+        bbox: Optional[Sequence[float]] = None,
+    ) -> Union[str, Path]:
+        """
+        Reproject a raster with a chunked, multithreaded warp.
 
-                # Create the output layer
-                out_layer = out_ds.CreateLayer(layer.GetName(), target_srs, layer.GetGeomType())
-                layer_defn = layer.GetLayerDefn()
+        Output is always written as a tiled, compressed GeoTIFF, so in_place only
+        replaces GeoTIFF inputs; other rasters are left alone and the output keeps
+        its own path.
 
-                # Copy field definitions
-                for i in range(layer_defn.GetFieldCount()):
-                    out_layer.CreateField(layer_defn.GetFieldDefn(i))
+        Args:
+            dataset: Path to input raster
+            target_epsg: EPSG code or string identifier for the target coordinate system
+            in_place: Whether to replace the input raster or create a new one
+            resampling: Resampling method (near, bilinear, cubic, ...)
+            warp_memory: Warp memory in megabytes, defaults to the configured warp_memory;
+                capped to a quarter of the memory budget
+            num_threads: Warping threads, defaults to the configured max_threads
+            approximate: Use GDAL's approximate transformer instead of exact transforms
+            max_error: Maximum error tolerated by the approximate mode, in target units
+            bbox: Only warp this extent (minx, miny, maxx, maxy), in the input's
+                coordinate system
 
-                # Process features
-                for feature in layer:
-                    geom = feature.GetGeometryRef()
-                    if geom is not None:
-                        geom.Transform(transform)
+        Returns:
+            Path to processed raster
+        """
+        try:
+            config = ConfigManager().config
+            epsg_code = get_epsg_code(target_epsg)
+            input_path = Path(dataset)
+            output_path = input_path.with_name(
+                f"{input_path.stem}_reprojected{WARP_FORMAT.extension}"
+            )
+
+            metrics = warp_raster(
+                input_path,
+                output_path,
+                epsg_code,
+                resampling=resampling,
+                warp_memory=warp_memory_limit(warp_memory or config.warp_memory),
+                num_threads=num_threads or config.max_threads,
+                max_error=max_error if approximate else None,
+                bbox=bbox,
+            )
+            self.metrics["reproject_raster"] = metrics
 
-                    out_feature = ogr.Feature(out_layer.GetLayerDefn())
-                    out_feature.SetGeometry(geom)
+            if in_place:
+                ds = gdal.Open(str(input_path))
+                driver_name = ds.GetDriver().ShortName
+                ds = None
+                output_path = self._replace_dataset(
+                    input_path, output_path, WARP_FORMAT, driver_name
+                )
 
-                    # Copy attributes
-                    for i in range(layer_defn.GetFieldCount()):
-                        out_feature.SetField(
-                            layer_defn.GetFieldDefn(i).GetNameRef(), feature.GetField(i)
-                        )
+            logger.info(f"Reprojected raster to EPSG:{epsg_code} in {output_path}")
+            return output_path
+
+        except Exception as e:
+            raise ProcessingError(f"Error reprojecting raster: {str(e)}")
+
+    @profiled
+    def quality_check(
+        self,
+        dataset: Union[str, Path],
+        flag_field: str = "qc_flags",
+        write_flags: bool = True,
+        thresholds: Optional[Dict[str, float]] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a vectorized quality-control pass driven by VALIDATION_THRESHOLDS.
 
-                    out_layer.CreateFeature(out_feature)
-                    out_feature = None
+        Vertex counts, areas, lengths, validity, null, empty and duplicate geometries
+        are computed for whole batches at once. Each feature receives a QCFlag bit
+        field and a summary report is built in the same pass. Layers are checked
+        in worker processes, see _update_layers; duplicates are looked for within
+        each layer.
 
+        Args:
+            dataset: Path to input dataset
+            flag_field: Name of the integer field receiving the QC flags
+            write_flags: Whether to write the flag field or only build the report
+            thresholds: Validation thresholds, defaults to VALIDATION_THRESHOLDS
+            output_format: Convert the flagged dataset to this format (see OUTPUT_FORMATS)
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            layers: Names of the layers to check, defaults to all layers
+            max_workers: Worker processes reading layers side by side, defaults to
+                max_threads
+
+        Returns:
+            Summary report, with the report of each layer under "layers"
+        """
+        try:
+            ds = ogr.Open(str(dataset), 1 if write_flags else 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            if write_flags:
+                for layer in selected:
+                    if layer.FindFieldIndex(flag_field, 1) == -1:
+                        layer.CreateField(ogr.FieldDefn(flag_field, ogr.OFTInteger))
+            # The report covers every layer, so a check always starts over
+            run = ResumableRun(
+                "quality_check",
+                dataset,
+                dataset,
+                {"flag_field": flag_field, "where": where, "bbox": bbox, "mask": mask},
+                resume=False,
+                check_source=False,
+            )
+            run.start(selected)
+            names = [layer.GetName() for layer in selected]
             ds = None
-            out_ds = None
 
-            logger.info(f"Standardized projection to EPSG:{epsg_code} in {output_path}")
-            return output_path
+            _, layer_reports = self._update_layers(
+                dataset,
+                names,
+                "quality_check",
+                (
+                    (lambda feature, flags: feature.SetField(flag_field, int(flags)))
+                    if write_flags
+                    else None
+                ),
+                run,
+                max_workers,
+                where,
+                bbox,
+                mask,
+                {"thresholds": thresholds},
+            )
+            run.finish()
+
+            report = new_qc_report(thresholds)
+            report["layers"] = {}
+            for name in names:
+                layer_report = layer_reports[name] or new_qc_report(thresholds)
+                del layer_report["thresholds"]
+                merge_qc_reports(report, layer_report)
+                report["layers"][name] = layer_report
+
+            report["dataset"] = str(self._convert_output(dataset, output_format))
+            # A copy, so metrics added to it (such as the GDAL profile) stay out of the report
+            self.metrics["quality_check"] = dict(report)
+            logger.info(
+                f"Quality check of {dataset}: {report['flagged_features']} of "
+                f"{report['features']} features flagged {report['flag_counts']}"
+            )
+            return report
 
         except Exception as e:
-            raise ProcessingError(f"Error standardizing projection: {str(e)}")
+            raise ProcessingError(f"Error running quality check: {str(e)}")
 
+    @profiled
     def repair_geometry(
-        self, dataset: Union[str, Path], in_place: bool = False
+        self,
+        dataset: Union[str, Path],
+        in_place: bool = False,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
     ) -> Union[str, Path]:
         """
         Fix common geometry errors using GDAL.
 
+        Invalid polygons are repaired with make_valid, keeping their polygonal
+        parts, as the pipeline's repair step does (see repair_polygons). Layers
+        are repaired in worker processes, see _update_layers. Features are updated in committed batches;
+        a rerun after a failure or cancellation resumes after the last committed
+        batch.
+
         Args:
             dataset: Path to input dataset
             in_place: Whether to modify the input dataset or create new one
+            output_format: Convert the result to this format (see OUTPUT_FORMATS)
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            progress: Called with a Progress (rate, ETA) after every batch
+            cancel_token: Stops the operation after the current batch once cancelled
+            resume: Whether to continue an interrupted run from its checkpoint
+            layers: Names of the layers to repair, defaults to all layers
+            max_workers: Worker processes reading layers side by side, defaults to
+                max_threads
 
         Returns:
             Path to processed dataset
         """
         try:
-            ds = ogr.Open(str(dataset), 1)
+            ds = ogr.Open(str(dataset), 0)
             if ds is None:
                 raise ProcessingError(f"Could not open dataset: {dataset}")
 
-            layer = ds.GetLayer()
-
-            for feature in layer:
-                geom = feature.GetGeometryRef()
-                if geom is None:
-                    continue
-
-                # Make valid geometry
-                if not geom.IsValid():
-                    valid_geom = geom.Buffer(0)  # Simple way to fix self-intersections
-                    feature.SetGeometry(valid_geom)
-                    layer.SetFeature(feature)
-
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            run = ResumableRun(
+                "repair_geometry",
+                dataset,
+                dataset,
+                {"where": where, "bbox": bbox, "mask": mask, "layers": layers},
+                progress,
+                cancel_token,
+                resume,
+                check_source=False,
+            )
+            run.start(selected)
+            names = [layer.GetName() for layer in selected if not run.is_complete(layer)]
             ds = None
+
+            repaired, _ = self._update_layers(
+                dataset,
+                names,
+                "repair",
+                lambda feature, wkb: feature.SetGeometry(ogr.CreateGeometryFromWkb(wkb)),
+                run,
+                max_workers,
+                where,
+                bbox,
+                mask,
+            )
+
+            self.metrics["repair_geometry"] = {"repaired": repaired, **run.finish()}
             logger.info(f"Repaired geometries in {dataset}")
-            return dataset
+            return self._convert_output(dataset, output_format)
 
+        except OperationCancelledError:
+            raise
         except Exception as e:
             raise ProcessingError(f"Error repairing geometries: {str(e)}")
 
+    @profiled
     def ensure_2d_geometry(
-        self, dataset: Union[str, Path], in_place: bool = False
+        self,
+        dataset: Union[str, Path],
+        in_place: bool = False,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
     ) -> Union[str, Path]:
         """
         Ensure all geometries in the dataset are 2D.
 
+        Z values are dropped from every layer, with layers processed concurrently,
+        see _process_layers. Features are written in committed batches; a rerun
+        after a failure or cancellation resumes after the last committed batch.
+
         Args:
             dataset: Path to input dataset
             in_place: Whether to modify the input dataset or create a new one
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            progress: Called with a Progress (rate, ETA) after every batch
+            cancel_token: Stops the operation after the current batch once cancelled
+            resume: Whether to continue an interrupted run from its checkpoint
+            layers: Names of the layers to convert, defaults to all layers
+            max_workers: Worker processes converting layers side by side, defaults
+                to max_threads
 
         Returns:
             Path to processed dataset
         """
         try:
             input_path = Path(dataset)
-            if not in_place:
-                output_path = input_path.with_name(f"{input_path.stem}_2d{input_path.suffix}")
-            else:
-                output_path = input_path
 
             ds = ogr.Open(str(input_path), 0)
             if ds is None:
                 raise ProcessingError(f"Could not open dataset: {dataset}")
 
-            driver = ogr.GetDriverByName(ds.GetDriver().GetName())
-            out_ds = driver.CreateDataSource(str(output_path))
+            driver_name = ds.GetDriver().GetName()
+            ds = None
+            fmt = resolve_output_format(output_format, driver_name, input_path)
+            output_path = output_path_for(input_path, "2d", fmt)
+            run = ResumableRun(
+                "ensure_2d_geometry",
+                input_path,
+                output_path,
+                {
+                    "output_format": fmt.driver,
+                    "where": where,
+                    "bbox": bbox,
+                    "mask": mask,
+                    "layers": layers,
+                },
+                progress,
+                cancel_token,
+                resume,
+            )
+            processed = self._process_layers(
+                run,
+                input_path,
+                output_path,
+                fmt,
+                ["force_2d"],
+                layers,
+                max_workers,
+                where,
+                bbox,
+                mask,
+            )
+            metrics = {"features": processed["features"], "workers": processed["workers"]}
+            metrics.update(run.finish())
 
-            for layer in ds:
-                out_layer = out_ds.CreateLayer(
-                    layer.GetName(), layer.GetSpatialRef(), layer.GetGeomType()
-                )
-                layer_defn = layer.GetLayerDefn()
+            if in_place:
+                output_path = self._replace_dataset(input_path, output_path, fmt, driver_name)
 
-                # Copy field definitions
-                for i in range(layer_defn.GetFieldCount()):
-                    out_layer.CreateField(layer_defn.GetFieldDefn(i))
+            metrics["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["ensure_2d_geometry"] = metrics
 
-                # Process features
-                for feature in layer:
-                    geom = feature.GetGeometryRef()
-                    if geom is not None:
-                        geom = ogr.ForceToLineString(geom)
+            logger.info(f"Ensured 2D geometries in {output_path}")
+            return output_path
 
-                    out_feature = ogr.Feature(out_layer.GetLayerDefn())
-                    out_feature.SetGeometry(geom)
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            raise ProcessingError(f"Error ensuring 2D geometries: {str(e)}")
 
-                    # Copy attributes
-                    for i in range(layer_defn.GetFieldCount()):
-                        out_feature.SetField(
-                            layer_defn.GetFieldDefn(i).GetNameRef(), feature.GetField(i)
-                        )
+    @profiled
+    def calculate_sinuosity(
+        self,
+        dataset: Union[str, Path],
+        field_name: str,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Calculate sinuosity for line geometries in the dataset.
+
+        Sinuosity is the path length over the straight-line distance between the
+        ends of each LineString (1 when they coincide). Layers are measured in
+        worker processes, see _update_layers. Features are updated in committed
+        batches; a rerun after a failure or cancellation resumes after the last
+        committed batch.
+
+        Args:
+            dataset: Path to input dataset
+            field_name: Field receiving the sinuosity values
+            output_format: Convert the result to this format (see OUTPUT_FORMATS)
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            progress: Called with a Progress (rate, ETA) after every batch
+            cancel_token: Stops the operation after the current batch once cancelled
+            resume: Whether to continue an interrupted run from its checkpoint
+            layers: Names of the layers to measure, defaults to all layers
+            max_workers: Worker processes reading layers side by side, defaults to
+                max_threads
+        """
+        try:
+            ds = ogr.Open(str(dataset), 1)  # Open for writing
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            for layer in selected:
+                # Add the field for sinuosity values if it doesn't exist
+                if layer.FindFieldIndex(field_name, 1) == -1:
+                    layer.CreateField(ogr.FieldDefn(field_name, ogr.OFTReal))
+            run = ResumableRun(
+                "calculate_sinuosity",
+                dataset,
+                dataset,
+                {
+                    "field_name": field_name,
+                    "where": where,
+                    "bbox": bbox,
+                    "mask": mask,
+                    "layers": layers,
+                },
+                progress,
+                cancel_token,
+                resume,
+                check_source=False,
+            )
+            run.start(selected)
+            names = [layer.GetName() for layer in selected if not run.is_complete(layer)]
+            ds = None  # Close dataset
+
+            measured, _ = self._update_layers(
+                dataset,
+                names,
+                "sinuosity",
+                lambda feature, value: feature.SetField(field_name, float(value)),
+                run,
+                max_workers,
+                where,
+                bbox,
+                mask,
+            )
+            self.metrics["calculate_sinuosity"] = {"features": measured, **run.finish()}
+            logger.info(f"Calculated sinuosity for {dataset}")
+            return self._convert_output(dataset, output_format)
+
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            raise ProcessingError(f"Error calculating sinuosity: {str(e)}")
+
+    @profiled
+    def calculate_gradient(
+        self,
+        dataset: Union[str, Path],
+        dem: Union[str, Path],
+        interval: Optional[float] = None,
+        band: int = 1,
+        gradient_field: str = "gradient",
+        min_field: str = "elev_min",
+        max_field: str = "elev_max",
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ):
+        """
+        Sample a DEM along line geometries and store their gradient and elevation range.
+
+        Samples are taken at every vertex, or at a regular interval along each
+        line. The sample coordinates of a whole batch are gathered into arrays,
+        converted to pixel indices at once and read block by block from the DEM
+        (see sample_band). Layers are sampled in worker processes, each reading
+        the DEM through its own shared handle, and the fields are then updated
+        in committed batches, see _update_layers. Like calculate_sinuosity, this
+        edits the input dataset in place; output_format writes a converted copy of
+        the updated dataset.
 
-                    out_layer.CreateFeature(out_feature)
-                    out_feature = None
+        Args:
+            dataset: Path to input dataset
+            dem: Path to the elevation raster
+            interval: Sample spacing in layer units, None to sample the vertices
+            band: Raster band number
+            gradient_field: Field receiving the gradient (elevation drop between the
+                first and last valid samples over the distance between them)
+            min_field: Field receiving the minimum sampled elevation
+            max_field: Field receiving the maximum sampled elevation
+            output_format: Convert the result to this format (see OUTPUT_FORMATS)
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            layers: Names of the layers to sample, defaults to all layers
+            max_workers: Worker processes reading layers side by side, defaults to
+                max_threads
+        """
+        try:
+            raster_ds = gdal.Open(str(dem))
+            if raster_ds is None:
+                raise ProcessingError(f"Could not open raster: {dem}")
+            if not 1 <= band <= raster_ds.RasterCount:
+                raise ProcessingError(f"Band {band} not found in {dem}")
+            north_up_geotransform(raster_ds)
+            raster_ds = None
+
+            ds = ogr.Open(str(dataset), 1)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+
+            fields = [gradient_field, min_field, max_field]
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            for layer in selected:
+                for name in fields:
+                    if layer.FindFieldIndex(name, 1) == -1:
+                        layer.CreateField(ogr.FieldDefn(name, ogr.OFTReal))
+            params = {"dem": str(dem), "band": band, "interval": interval}
+            run = ResumableRun(
+                "calculate_gradient",
+                dataset,
+                dataset,
+                {
+                    **params,
+                    "fields": fields,
+                    "where": where,
+                    "bbox": bbox,
+                    "mask": mask,
+                    "layers": layers,
+                },
+                check_source=False,
+            )
+            run.start(selected)
+            names = [layer.GetName() for layer in selected if not run.is_complete(layer)]
+            ds = None
+
+            def set_profile(feature, values):
+                for name, value in zip(fields, values):
+                    if np.isnan(value):
+                        feature.SetFieldNull(name)
+                    else:
+                        feature.SetField(name, float(value))
+
+            _, layer_metrics = self._update_layers(
+                dataset, names, "gradient", set_profile, run, max_workers, where, bbox, mask, params
+            )
+            metrics = {"features": 0, "samples": 0, "valid_samples": 0}
+            for sampled in layer_metrics.values():
+                for key, value in (sampled or {}).items():
+                    metrics[key] += value
+            metrics.update(run.finish())
+
+            self.metrics["calculate_gradient"] = metrics
+            logger.info(f"Calculated gradients of {dataset} from {dem}: {metrics}")
+            return self._convert_output(dataset, output_format)
+
+        except Exception as e:
+            raise ProcessingError(f"Error calculating gradient: {str(e)}")
+
+    @profiled
+    def clean_topology(
+        self,
+        dataset: Union[str, Path],
+        snap_tolerance: Optional[float] = None,
+        cluster_tolerance: Optional[float] = None,
+        min_area: Optional[float] = None,
+        in_place: bool = False,
+        max_workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        layers: Optional[List[str]] = None,
+    ) -> Union[str, Path]:
+        """
+        Snap nearby vertices and remove slivers using an STRtree spatial index.
+
+        Vertices closer than cluster_tolerance are made coincident, geometries are
+        snapped to neighbouring edges within snap_tolerance and polygon parts under
+        min_area are removed. Large layers are split into spatial tiles cleaned in
+        parallel, with features along tile seams reconciled afterwards (see
+        clean_layer). With several layers, each layer is cleaned in a worker
+        process into a part dataset merged into the output (see _merge_parts),
+        the tile workers being shared out between the layers. Only the feature
+        bounds and the tiles being cleaned are held in memory; features are
+        written tile by tile, so the output is in spatial rather than layer order.
+
+        Args:
+            dataset: Path to input dataset
+            snap_tolerance: Snap tolerance, defaults to VALIDATION_THRESHOLDS["SNAP_TOLERANCE"]
+            cluster_tolerance: Cluster tolerance, defaults to
+                VALIDATION_THRESHOLDS["CLUSTER_TOLERANCE"]
+            min_area: Minimum polygon area, defaults to VALIDATION_THRESHOLDS["MIN_AREA"]
+            in_place: Whether to modify the input dataset or create a new one
+            max_workers: Worker processes for layers and tiled cleaning, defaults to
+                max_threads
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            layers: Names of the layers to clean, defaults to all layers
+
+        Returns:
+            Path to processed dataset
+        """
+        try:
+            snap_tolerance = (
+                VALIDATION_THRESHOLDS["SNAP_TOLERANCE"]
+                if snap_tolerance is None
+                else snap_tolerance
+            )
+            cluster_tolerance = (
+                VALIDATION_THRESHOLDS["CLUSTER_TOLERANCE"]
+                if cluster_tolerance is None
+                else cluster_tolerance
+            )
+            min_area = VALIDATION_THRESHOLDS["MIN_AREA"] if min_area is None else min_area
+            max_workers = max_workers or ConfigManager().config.max_threads
+
+            input_path = Path(dataset)
+
+            ds = ogr.Open(str(input_path), 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+            driver_name = ds.GetDriver().GetName()
+            fmt = resolve_output_format(output_format, driver_name, input_path)
+            output_path = output_path_for(input_path, "clean", fmt)
+
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            run = ResumableRun(
+                "clean_topology",
+                input_path,
+                output_path,
+                {"where": where, "bbox": bbox, "mask": mask, "layers": layers},
+                resume=False,
+            )
+            run.start(selected)
+            workers = layer_workers(max_workers, len(selected))
+            out_ds = self._create_output_dataset(output_path, fmt)
+            stats: Dict[str, Any] = {"features_removed": 0, "layer_workers": workers, "layers": {}}
+
+            def add_layer_stats(layer_name: str, layer_stats: Dict[str, Any]):
+                stats["layers"][layer_name] = layer_stats
+                for key, value in layer_stats.items():
+                    if key == "workers":
+                        stats[key] = max(stats.get(key, 0), value)
+                    else:
+                        stats[key] = stats.get(key, 0) + value
+
+            if workers <= 1 or len(selected) <= 1:
+                # Attributes are read from a second handle while tiles are read by FID
+                source_ds = ogr.Open(str(input_path), 0)
+                for layer in selected:
+                    add_layer_stats(
+                        layer.GetName(),
+                        clean_layer(
+                            layer,
+                            source_ds.GetLayerByName(layer.GetName()),
+                            out_ds,
+                            fmt,
+                            self._layer_options(fmt),
+                            where,
+                            snap_tolerance,
+                            cluster_tolerance,
+                            min_area,
+                            max_workers,
+                            run.reporter,
+                        ),
+                    )
+                source_ds = None
+            else:
+                parts = parts_directory(output_path)
+                tile_workers = max(max_workers // workers, 1)
+                arguments = {
+                    layer.GetName(): (
+                        str(input_path),
+                        layer.GetName(),
+                        str(parts / f"{index}{PART_FORMAT.extension}"),
+                        where,
+                        bbox,
+                        mask,
+                        snap_tolerance,
+                        cluster_tolerance,
+                        min_area,
+                        tile_workers,
+                    )
+                    for index, layer in enumerate(selected)
+                }
+                ds = None
+                for layer_name, result, _ in self._merge_parts(
+                    run, out_ds, fmt, parts, clean_layer_part, arguments, workers
+                ):
+                    add_layer_stats(layer_name, result["stats"])
 
             ds = None
             out_ds = None
+            stats.update(run.finish())
 
-            logger.info(f"Ensured 2D geometries in {output_path}")
+            if in_place:
+                output_path = self._replace_dataset(input_path, output_path, fmt, driver_name)
+
+            stats["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["clean_topology"] = stats
+            logger.info(f"Cleaned topology in {output_path}: {stats}")
             return output_path
 
         except Exception as e:
-            raise ProcessingError(f"Error ensuring 2D geometries: {str(e)}")
+            raise ProcessingError(f"Error cleaning topology: {str(e)}")
+
+    @profiled
+    def buffer(
+        self,
+        dataset: Union[str, Path],
+        distance: Union[str, float] = "MEDIUM",
+        dissolve: bool = False,
+        dissolve_field: Optional[str] = None,
+        quad_segs: int = 8,
+        max_workers: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        layers: Optional[List[str]] = None,
+    ) -> Union[str, Path]:
+        """
+        Buffer features in batches and optionally dissolve the results.
+
+        Dissolving runs a parallel, tree-reduced union over spatial partitions,
+        either per value of dissolve_field or globally when dissolve is set (see
+        buffer_layer). Each layer is buffered into an output layer of the same
+        name and dissolved separately; with several layers, each is buffered in a
+        worker process into a part dataset merged into the output (see
+        _merge_parts), the dissolve workers being shared out between the layers.
 
-    def calculate_sinuosity(self, dataset: Union[str, Path], field_name: str):
+        Args:
+            dataset: Path to input dataset
+            distance: Buffer distance in layer units or a BUFFER_DISTANCES preset name
+            dissolve: Whether to dissolve all buffers into one feature
+            dissolve_field: Field whose values define the dissolve groups
+            quad_segs: Segments used to approximate a quarter circle
+            max_workers: Worker processes for layers and dissolving, defaults to
+                max_threads
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            layers: Names of the layers to buffer, defaults to all layers
+
+        Returns:
+            Path to buffered dataset
         """
-        Calculate sinuosity for line geometries in the dataset.
+        try:
+            distance = resolve_buffer_distance(distance)
+            max_workers = max_workers or ConfigManager().config.max_threads
+            input_path = Path(dataset)
+
+            ds = ogr.Open(str(input_path), 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
+
+            fmt = resolve_output_format(output_format, ds.GetDriver().GetName(), input_path)
+            output_path = output_path_for(input_path, "buffer", fmt)
+            selected = [
+                apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)
+            ]
+            run = ResumableRun(
+                "buffer",
+                input_path,
+                output_path,
+                {"where": where, "bbox": bbox, "mask": mask, "layers": layers},
+                resume=False,
+            )
+            run.start(selected)
+            workers = layer_workers(max_workers, len(selected))
+            out_ds = self._create_output_dataset(output_path, fmt)
+            metrics: Dict[str, Any] = {
+                "distance": distance,
+                "features": 0,
+                "layer_workers": workers,
+                "layers": {},
+            }
+            if workers <= 1 or len(selected) <= 1:
+                for layer in selected:
+                    metrics["layers"][layer.GetName()] = buffer_layer(
+                        layer,
+                        out_ds,
+                        fmt,
+                        self._layer_options(fmt),
+                        distance,
+                        dissolve,
+                        dissolve_field,
+                        quad_segs,
+                        max_workers,
+                        run.reporter,
+                    )
+            else:
+                parts = parts_directory(output_path)
+                dissolve_workers = max(max_workers // workers, 1)
+                arguments = {
+                    layer.GetName(): (
+                        str(input_path),
+                        layer.GetName(),
+                        str(parts / f"{index}{PART_FORMAT.extension}"),
+                        where,
+                        bbox,
+                        mask,
+                        distance,
+                        dissolve,
+                        dissolve_field,
+                        quad_segs,
+                        dissolve_workers,
+                    )
+                    for index, layer in enumerate(selected)
+                }
+                ds = None
+                for layer_name, result, _ in self._merge_parts(
+                    run, out_ds, fmt, parts, buffer_layer_part, arguments, workers
+                ):
+                    metrics["layers"][layer_name] = result["metrics"]
+            metrics["features"] = sum(m["features"] for m in metrics["layers"].values())
+
+            ds = None
+            out_ds = None
+            run.finish()
+
+            dissolved = [m for m in metrics["layers"].values() if m["groups"] is not None]
+            metrics["groups"] = sum(m["groups"] for m in dissolved) if dissolved else None
+            metrics["workers"] = max(m["workers"] for m in dissolved) if dissolved else None
+            metrics["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["buffer"] = metrics
+            logger.info(f"Buffered {metrics['features']} features by {distance} in {output_path}")
+            return output_path
+
+        except Exception as e:
+            raise ProcessingError(f"Error buffering features: {str(e)}")
+
+    @profiled
+    def simplify(
+        self,
+        dataset: Union[str, Path],
+        max_vertices: Optional[int] = None,
+        tolerance: Optional[float] = None,
+        preserve_topology: bool = True,
+        max_workers: Optional[int] = None,
+        batch_size: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        layers: Optional[List[str]] = None,
+    ) -> Path:
+        """
+        Simplify features with more vertices than a per-feature budget.
+
+        Features within the budget are written unchanged. The others are
+        simplified batch by batch with vectorized shapely calls, each with the
+        smallest tolerance that brings it within the budget, or with a fixed
+        tolerance. Batches with many over-budget vertices are split across worker
+        processes.
+
+        Args:
+            dataset: Path to input dataset
+            max_vertices: Vertex budget per feature, defaults to
+                VALIDATION_THRESHOLDS["MAX_VERTICES"]
+            tolerance: Fixed simplification tolerance in layer units for the
+                features over budget
+            preserve_topology: Keep simplified geometries valid (rings do not
+                collapse or cross)
+            max_workers: Worker processes for large batches, defaults to max_threads
+            batch_size: Features per batch, defaults to a size fitting the memory budget
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            layers: Names of the layers to simplify, defaults to all layers
+
+        Returns:
+            Path to simplified dataset
         """
         try:
-            ds = ogr.Open(str(dataset), 1)  # Open for writing
+            max_vertices = max_vertices or VALIDATION_THRESHOLDS["MAX_VERTICES"]
+            max_workers = worker_limit(
+                max_workers or ConfigManager().config.max_threads,
+                SIMPLIFY_TASK_VERTICES * 24 * WORKING_SET_FACTOR,
+            )
+            input_path = Path(dataset)
+            ds = ogr.Open(str(input_path), 0)
             if ds is None:
                 raise ProcessingError(f"Could not open dataset: {dataset}")
 
-            layer = ds.GetLayer()
-            srs = layer.GetSpatialRef()
-            epsg_code = srs.GetAuthorityCode(None)
-            logger.info(f"Calculating sinuosity with EPSG:{epsg_code}")
+            fmt = resolve_output_format(output_format, ds.GetDriver().GetName(), input_path)
+            output_path = output_path_for(input_path, "simplify", fmt)
+            out_ds = self._create_output_dataset(output_path, fmt)
+
+            metrics: Dict[str, Any] = {"max_vertices": max_vertices, "features": 0}
+            metrics.update(new_simplify_stats())
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                for layer in select_layers(ds, layers):
+                    layer = apply_filters(layer, where, bbox, mask)
+                    out_layer = self._create_schema_layer(
+                        out_ds, LayerSchema.from_layer(layer), fmt
+                    )
+                    for buffer in GeometryBuffer.iter_layer(layer, batch_size):
+                        buffer, stats = buffer.simplify(
+                            max_vertices, tolerance, preserve_topology, executor
+                        )
+                        for key, value in stats.items():
+                            metrics[key] += value
+                        metrics["features"] += write_buffer(buffer, out_layer)
 
-            # Add the field for sinuosity values if it doesn't exist
-            if layer.FindFieldIndex(field_name, 1) == -1:
-                field_defn = ogr.FieldDefn(field_name, ogr.OFTReal)
-                layer.CreateField(field_defn)
+            ds = None
+            out_ds = None
 
-            for feature in layer:
-                geom = feature.GetGeometryRef()
-                if geom is None or geom.GetGeometryType() != ogr.wkbLineString:
-                    continue
+            before, after = metrics["vertices_before"], metrics["vertices_after"]
+            metrics["vertex_reduction"] = 1 - after / before if before else 0.0
+            metrics["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["simplify"] = metrics
+            logger.info(
+                f"Simplified {metrics['features_simplified']} of {metrics['features']} features "
+                f"in {output_path}: {before} -> {after} vertices"
+            )
+            return output_path
 
-                # Compute actual path length
-                path_length = geom.Length()
+        except Exception as e:
+            raise ProcessingError(f"Error simplifying features: {str(e)}")
+
+    @profiled
+    def run_pipeline(
+        self,
+        dataset: Union[str, Path],
+        steps: List[PipelineStep],
+        batch_size: Optional[int] = None,
+        output_format: Optional[str] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        index_fields: Optional[List[str]] = None,
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+    ) -> Path:
+        """
+        Run several operations in one pass over a dataset.
 
-                # Compute straight-line distance (start -> end)
-                start_point = geom.GetPoint(0)  # (x, y, z)
-                end_point = geom.GetPoint(geom.GetPointCount() - 1)
+        Each layer is read once into GeometryBuffer batches, every step is applied to
+        the coordinate and offset arrays in memory, and the result is written once.
+        Layers are processed concurrently, see _process_layers. Batches are committed
+        one at a time; a rerun after a failure or cancellation resumes after the last
+        committed batch (the quality_check duplicate test then only compares features
+        processed by the rerun).
 
-                straight_distance = ((start_point[0] - end_point[0]) ** 2 +
-                                     (start_point[1] - end_point[1]) ** 2) ** 0.5
+        Args:
+            dataset: Path to input dataset
+            steps: Step names or (name, keyword arguments) pairs, applied in order.
+                Available steps: reproject (target_epsg, approximate, max_error),
+                force_2d, repair, precision (grid_size, repair), simplify
+                (max_vertices, tolerance, preserve_topology), sinuosity (field_name),
+                quality_check (flag_field, thresholds)
+            batch_size: Features per batch, defaults to a size fitting the memory budget
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the input's format
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+            index_fields: Attribute fields to index on the output
+            progress: Called with a Progress (rate, ETA) after every batch
+            cancel_token: Stops the operation after the current batch once cancelled
+            resume: Whether to continue an interrupted run from its checkpoint
+            layers: Names of the layers to process, defaults to all layers
+            max_workers: Worker processes running layers side by side, defaults to
+                max_threads
 
-                # Calculate sinuosity (handling division by zero)
-                if straight_distance > 0:
-                    sinuosity = path_length / straight_distance
-                else:
-                    sinuosity = 1  # Undefined, default to 1
+        Returns:
+            Path to processed dataset
+        """
+        try:
+            input_path = Path(dataset)
+            ds = ogr.Open(str(input_path), 0)
+            if ds is None:
+                raise ProcessingError(f"Could not open dataset: {dataset}")
 
-                feature.SetField(field_name, sinuosity)
-                layer.SetFeature(feature)
+            driver_name = ds.GetDriver().GetName()
+            ds = None
+            fmt = resolve_output_format(output_format, driver_name, input_path)
+            output_path = output_path_for(input_path, "pipeline", fmt)
+            run = ResumableRun(
+                "run_pipeline",
+                input_path,
+                output_path,
+                {
+                    "steps": steps,
+                    "output_format": fmt.driver,
+                    "where": where,
+                    "bbox": bbox,
+                    "mask": mask,
+                    "layers": layers,
+                },
+                progress,
+                cancel_token,
+                resume,
+            )
+            metrics = self._process_layers(
+                run,
+                input_path,
+                output_path,
+                fmt,
+                steps,
+                layers,
+                max_workers,
+                where,
+                bbox,
+                mask,
+                batch_size,
+            )
+            metrics.update(run.finish())
+
+            metrics["indexes"] = self._index_output(output_path, index_fields)
+            self.metrics["run_pipeline"] = metrics
+            logger.info(f"Ran pipeline of {len(steps)} steps on {dataset} into {output_path}")
+            return output_path
 
-            ds = None  # Close dataset
-            logger.info(f"Calculated sinuosity for {dataset}")
-            return dataset
+        except OperationCancelledError:
+            raise
+        except Exception as e:
+            raise ProcessingError(f"Error running pipeline: {str(e)}")
+
+    def iter_batches(
+        self,
+        dataset: Union[str, Path],
+        layer_name: Optional[str] = None,
+        batch_size: Optional[int] = None,
+        as_arrow: bool = False,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+    ) -> Iterator[Union[GeometryBuffer, Any]]:
+        """
+        Stream a layer as batches of features without writing anything to disk.
+
+        Memory use is bounded by the batch size. Batches are GeometryBuffers, or
+        pyarrow RecordBatches with a GeoArrow WKB geometry column when as_arrow is set.
+
+        Args:
+            dataset: Path to input dataset
+            layer_name: Layer to read, defaults to the first layer
+            batch_size: Features per batch, defaults to a size fitting the memory budget
+            as_arrow: Yield pyarrow RecordBatches instead of GeometryBuffers
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layer's coordinate system
+            mask: Spatial filter geometry (shapely, OGR, WKT or WKB) in the layer's
+                coordinate system
+
+        Yields:
+            Batches of features
+        """
+        ds = ogr.Open(str(dataset), 0)
+        if ds is None:
+            raise ProcessingError(f"Could not open dataset: {dataset}")
+        layer = ds.GetLayerByName(layer_name) if layer_name else ds.GetLayer()
+        if layer is None:
+            raise ProcessingError(f"Layer not found in {dataset}: {layer_name}")
+        apply_filters(layer, where, bbox, mask)
+
+        for buffer in GeometryBuffer.iter_layer(layer, batch_size):
+            yield buffer_to_record_batch(buffer) if as_arrow else buffer
+        ds = None
+
+    def stream_pipeline(
+        self, batches: Iterable[Union[GeometryBuffer, Any]], steps: List[PipelineStep]
+    ) -> Iterator[Union[GeometryBuffer, Any]]:
+        """
+        Apply pipeline steps lazily to a stream of batches.
+
+        Accepts GeometryBuffers or pyarrow RecordBatches (with a WKB "geometry"
+        column) and yields batches of the same kind, one at a time, so steps can be
+        chained with other in-process code without touching disk.
+
+        Args:
+            batches: Iterable of GeometryBuffers or pyarrow RecordBatches
+            steps: Step names or (name, keyword arguments) pairs (see run_pipeline)
+
+        Yields:
+            Processed batches
+        """
+        pipeline = Pipeline(steps)
+        for batch in batches:
+            if isinstance(batch, GeometryBuffer):
+                yield pipeline(batch)
+            else:
+                yield buffer_to_record_batch(pipeline(record_batch_to_buffer(batch)))
+        self.metrics["stream_pipeline"] = pipeline.metrics
+
+    @profiled
+    def write_batches(
+        self,
+        batches: Iterable[Union[GeometryBuffer, Any]],
+        output_path: Union[str, Path],
+        output_format: Optional[str] = None,
+        index_fields: Optional[List[str]] = None,
+    ) -> Path:
+        """
+        Write a stream of batches to a new dataset.
+
+        The output layer is created from the first batch's schema.
+
+        Args:
+            batches: Iterable of GeometryBuffers or pyarrow RecordBatches
+            output_path: Path to output dataset
+            output_format: Output format (see OUTPUT_FORMATS), defaults to the one
+                matching the output path's extension
+            index_fields: Attribute fields to index on the output
+
+        Returns:
+            Path to output dataset
+        """
+        try:
+            output_path = Path(output_path)
+            fmt = resolve_output_format(output_format or output_path.suffix, "", output_path)
+            out_ds = self._create_output_dataset(output_path, fmt)
+
+            out_layer = None
+            features = 0
+            for batch in batches:
+                if not isinstance(batch, GeometryBuffer):
+                    batch = record_batch_to_buffer(batch)
+                if out_layer is None:
+                    out_layer = self._create_schema_layer(out_ds, batch.schema, fmt)
+                features += write_buffer(batch, out_layer)
+            out_ds = None
+
+            self.metrics["write_batches"] = {
+                "features": features,
+                "indexes": self._index_output(output_path, index_fields),
+            }
+            logger.info(f"Wrote {features} streamed features to {output_path}")
+            return output_path
 
         except Exception as e:
-            raise ProcessingError(f"Error calculating sinuosity: {str(e)}")
+            raise ProcessingError(f"Error writing batches: {str(e)}")
+
+    @profiled
+    def export_vector_tiles(
+        self,
+        dataset: Union[str, Path],
+        output_path: Optional[Union[str, Path]] = None,
+        min_zoom: int = 0,
+        max_zoom: int = 14,
+        layers: Optional[List[str]] = None,
+        extent: int = 4096,
+        buffer: int = 64,
+        simplify: float = 1.0,
+        max_workers: Optional[int] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+    ) -> Path:
+        """
+        Export vector layers as a Mapbox Vector Tile pyramid in a PMTiles or MBTiles archive.
+
+        See vector_tiles.generate_vector_tiles.
+
+        Args:
+            dataset: Path to input dataset
+            output_path: Archive path ending in .pmtiles or .mbtiles, defaults to
+                {stem}.pmtiles next to the input
+            min_zoom: First zoom level
+            max_zoom: Last zoom level
+            layers: Names of the layers to export, defaults to all layers
+            extent: Tile extent in tile coordinate units
+            buffer: Tile buffer in tile coordinate units
+            simplify: Simplification tolerance in tile coordinate units (0 disables it)
+            max_workers: Worker processes, defaults to the configured max_threads
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy) in the layers' coordinate system
+            mask: Spatial filter geometry in the layers' coordinate system
+
+        Returns:
+            Path to the tile archive
+        """
+        try:
+            input_path = Path(dataset)
+            output_path = Path(output_path or input_path.with_suffix(".pmtiles"))
+            metrics = generate_vector_tiles(
+                input_path,
+                output_path,
+                min_zoom=min_zoom,
+                max_zoom=max_zoom,
+                layers=layers,
+                extent=extent,
+                buffer=buffer,
+                simplify=simplify,
+                max_workers=max_workers,
+                where=where,
+                bbox=bbox,
+                mask=mask,
+            )
+            self.metrics["export_vector_tiles"] = metrics
+            logger.info(
+                f"Wrote {metrics['tiles']} tiles (zoom {min_zoom}-{max_zoom}) to {output_path}"
+            )
+            return output_path
+
+        except Exception as e:
+            raise ProcessingError(f"Error exporting vector tiles: {str(e)}")
+
+    def _process_layers(
+        self,
+        run: ResumableRun,
+        input_path: Path,
+        output_path: Path,
+        fmt: OutputFormat,
+        steps: List[PipelineStep],
+        layers: Optional[List[str]] = None,
+        max_workers: Optional[int] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        batch_size: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Run a pipeline over the selected layers of a dataset into one output dataset.
+
+        With several layers left to process, each layer runs in a worker process
+        into a part dataset of its own (see pipeline_layer_part) and this process,
+        the output's only writer, merges the parts in as they finish. A single
+        layer is streamed straight into the output.
+
+        Returns:
+            Dictionary with the features written, the workers used and the
+            pipeline metrics of each layer
+        """
+        ds = ogr.Open(str(input_path), 0)
+        if ds is None:
+            raise ProcessingError(f"Could not open dataset: {input_path}")
+        selected = [apply_filters(layer, where, bbox, mask) for layer in select_layers(ds, layers)]
+        run.start(selected)
+        pending = [layer for layer in selected if not run.is_complete(layer)]
+        workers = layer_workers(max_workers, len(pending))
+        out_ds = self._open_resumable_output(run, output_path, fmt)
+        metrics: Dict[str, Any] = {"features": 0, "workers": workers, "layers": {}}
+
+        if workers <= 1 or len(pending) <= 1:
+            for layer in pending:
+                pipeline = Pipeline(steps)
+                written, _ = write_layer(
+                    layer,
+                    pipeline,
+                    out_ds,
+                    run,
+                    lambda out, schema: self._create_schema_layer(out, schema, fmt),
+                    batch_size,
+                )
+                metrics["features"] += written
+                metrics["layers"][layer.GetName()] = pipeline.metrics
+        else:
+            parts = parts_directory(output_path)
+            arguments = {
+                layer.GetName(): (
+                    str(input_path),
+                    layer.GetName(),
+                    steps,
+                    str(parts / f"{index}{PART_FORMAT.extension}"),
+                    where,
+                    bbox,
+                    mask,
+                    batch_size,
+                )
+                for index, layer in enumerate(pending)
+            }
+            ds = None
+            for layer_name, result, written in self._merge_parts(
+                run, out_ds, fmt, parts, pipeline_layer_part, arguments, workers
+            ):
+                metrics["features"] += written
+                metrics["layers"][layer_name] = result["metrics"]
+
+        ds = None
+        out_ds = None
+        return metrics
+
+    def _merge_parts(
+        self,
+        run: ResumableRun,
+        out_ds,
+        fmt: OutputFormat,
+        parts: Path,
+        task: Callable[..., Dict[str, Any]],
+        arguments: Dict[str, tuple],
+        workers: int,
+    ) -> Iterator[Tuple[str, Dict[str, Any], int]]:
+        """
+        Run a task writing a part dataset per layer in worker processes, and merge
+        the parts into the output, this process being the output's only writer.
+
+        Parts are merged in the order of arguments, each as soon as the layers
+        before it are merged; the parts directory is removed afterwards.
+
+        Args:
+            run: Run whose progress and cancellation the tasks follow
+            out_ds: Output dataset
+            fmt: Output format
+            parts: Directory of the part datasets
+            task: Worker writing a layer's part, returning its "path" and "schema"
+            arguments: Task arguments by layer name
+            workers: Worker processes
+
+        Yields:
+            (layer name, task result, features merged) triples
+        """
+        order = iter(arguments)
+        finished: Dict[str, Dict[str, Any]] = {}
+        name = next(order, None)
+        for layer_name, result in run_layer_tasks(task, arguments, workers, run):
+            finished[layer_name] = result
+            while name in finished:
+                result = finished.pop(name)
+                yield name, result, self._merge_part(run, out_ds, name, result, fmt)
+                name = next(order, None)
+        shutil.rmtree(parts, ignore_errors=True)
+
+    def _merge_part(
+        self, run: ResumableRun, out_ds, layer_name: str, part: Dict[str, Any], fmt: OutputFormat
+    ) -> int:
+        """
+        Copy a worker's part dataset into the output as one committed layer.
+
+        A layer left by an interrupted run is replaced.
+
+        Returns:
+            Number of features written
+        """
+        for index in range(out_ds.GetLayerCount()):
+            if out_ds.GetLayer(index).GetName() == layer_name:
+                out_ds.DeleteLayer(index)
+                break
+
+        out_layer = self._create_schema_layer(out_ds, part["schema"], fmt)
+        part_ds = ogr.Open(part["path"], 0)
+        if part_ds is None:
+            raise ProcessingError(f"Could not open layer part: {part['path']}")
+        written = 0
+        run.begin(out_layer)
+        for buffer in GeometryBuffer.iter_layer(part_ds.GetLayer()):
+            written += write_buffer(buffer, out_layer)
+        run.commit_layer(out_layer, layer_name)
+        part_ds = None
+        return written
+
+    def _update_layers(
+        self,
+        dataset: Union[str, Path],
+        layer_names: List[str],
+        operation: str,
+        set_value: Callable[[Any, Any], Any],
+        run: ResumableRun,
+        max_workers: Optional[int] = None,
+        where: Optional[str] = None,
+        bbox: Optional[Sequence[float]] = None,
+        mask: Any = None,
+        params: Optional[Dict[str, Any]] = None,
+    ) -> Tuple[int, Dict[str, Any]]:
+        """
+        Compute an in-place operation per layer in worker processes, then apply it.
+
+        Workers only read the dataset and write the updates of their layer to a
+        part file in a {dataset}.parts directory (see layer_updates). Once they
+        are done, this process alone opens the dataset for writing and applies the
+        updates layer by layer, reading one batch at a time and committing it,
+        skipping those committed by an earlier run.
+
+        Args:
+            dataset: Path to the dataset
+            layer_names: Layers to update
+            operation: One of LAYER_UPDATES
+            set_value: Sets a feature's new value, None to only compute the
+                operation's metrics
+            run: Run recording the committed batches
+            max_workers: Worker processes, defaults to max_threads
+            where: Attribute filter (OGR SQL WHERE clause)
+            bbox: Spatial filter (minx, miny, maxx, maxy)
+            mask: Spatial filter geometry
+            params: Keyword arguments of the operation
+
+        Returns:
+            Tuple of (features updated, the operation's metrics by layer)
+        """
+        workers = layer_workers(max_workers, len(layer_names))
+        parts = parts_directory(Path(dataset))
+        arguments = {
+            name: (
+                str(dataset),
+                name,
+                operation,
+                str(parts / f"{index}.updates"),
+                where,
+                bbox,
+                mask,
+                params,
+            )
+            for index, name in enumerate(layer_names)
+        }
+        results = dict(run_layer_tasks(layer_updates, arguments, workers, run))
+        layer_metrics = {name: results[name]["metrics"] for name in layer_names}
+        if set_value is None:
+            shutil.rmtree(parts, ignore_errors=True)
+            return 0, layer_metrics
+
+        ds = ogr.Open(str(dataset), 1)
+        if ds is None:
+            raise ProcessingError(f"Could not open dataset: {dataset}")
+        updated = 0
+        for name in layer_names:
+            layer = ds.GetLayerByName(name)
+            for fids, index, values in read_updates(results[name]["path"]):
+                pending = run.pending(name, fids)
+                if not len(pending):
+                    continue
+                keep = np.isin(index, pending)
+                run.begin(layer)
+                for fid, value in zip(fids[index[keep]], values[keep]):
+                    feature = layer.GetFeature(int(fid))
+                    set_value(feature, value)
+                    layer.SetFeature(feature)
+                run.commit(layer, name, fids[pending], report=False)
+                updated += int(keep.sum())
+            run.complete_layer(name)
+        ds = None
+        shutil.rmtree(parts, ignore_errors=True)
+        return updated, layer_metrics
+
+    def _create_schema_layer(self, out_ds, schema: LayerSchema, fmt: OutputFormat):
+        """Create an output layer from a GeometryBuffer schema."""
+        return create_schema_layer(out_ds, schema, fmt, self._layer_options(fmt))
+
+    def _open_resumable_output(self, run: ResumableRun, output_path: Path, fmt: OutputFormat):
+        """Reopen the output of an interrupted run, or create a new one."""
+        if run.resumed:
+            out_ds = ogr.Open(str(output_path), 1)
+            if out_ds is not None:
+                logger.info(f"Resuming into {output_path} from its checkpoint")
+                return out_ds
+            run.restart()
+        return self._create_output_dataset(output_path, fmt)
+
+    def _create_output_dataset(self, output_path: Path, fmt: OutputFormat):
+        """Create an output dataset, replacing any previous output at the same path."""
+        driver = ogr.GetDriverByName(fmt.driver)
+        if output_path.exists():
+            driver.DeleteDataSource(str(output_path))
+        return driver.CreateDataSource(str(output_path))
+
+    def _layer_options(self, fmt: OutputFormat) -> List[str]:
+        """Layer creation options, deferring index builds when build_indexes is enabled."""
+        if ConfigManager().config.build_indexes:
+            return bulk_load_options(fmt)
+        return fmt.layer_options
+
+    def _index_output(
+        self, output_path: Path, index_fields: Optional[List[str]]
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Build indexes on an operation's output after the bulk load.
+
+        Returns:
+            Index build timings, or None when indexing is disabled
+        """
+        if not (ConfigManager().config.build_indexes or index_fields):
+            return None
+        timings = build_indexes(output_path, index_fields)
+        built = sum(len(layer) for layer in timings["layers"].values())
+        seconds = sum(sum(layer.values()) for layer in timings["layers"].values())
+        logger.info(f"Built {built} indexes on {output_path} in {seconds:.2f}s")
+        return timings
+
+    def _replace_dataset(
+        self, input_path: Path, output_path: Path, fmt: OutputFormat, input_driver: str
+    ) -> Path:
+        """
+        Replace the input dataset with a processed copy, including sidecar files.
+
+        When the output format differs from the input's, the input is left alone
+        and the output keeps its own path.
+        """
+        if fmt.driver != input_driver:
+            logger.warning(
+                f"in_place ignored: output format {fmt.driver} differs from {input_driver}"
+            )
+            return output_path
+
+        close_shared_rasters(str(input_path))
+        driver = gdal.GetDriverByName(input_driver)
+        driver.Delete(str(input_path))
+        driver.Rename(str(input_path), str(output_path))
+        return input_path
+
+    def _convert_output(self, dataset: Union[str, Path], output_format: Optional[str]):
+        """Convert the result of an in-place operation to the requested output format."""
+        if output_format is None:
+            return dataset
+        fmt = resolve_output_format(output_format, "", Path(dataset))
+        return convert_dataset(Path(dataset), fmt)
@@ -0,0 +1,141 @@
+import functools
+import inspect
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional, Union
+
+from osgeo import gdal
+
+from ...core.constants import GDAL_PROFILES
+from ...core.exceptions import ConfigurationError
+from ...utils.config import ConfigManager
+from ...utils.memory import CACHE_BUDGET_FRACTION, MB
+from ...utils.profiling import profile_operation
+
+GDALProfile = Union[str, Dict[str, str]]
+
+
+def resolve_gdal_profile(profile: Optional[GDALProfile] = None) -> Dict[str, str]:
+    """
+    GDAL configuration options of a profile, on top of those derived from the config.
+
+    max_threads, timeout and the cache share of memory_budget always reach GDAL
+    (GDAL_NUM_THREADS, GDAL_HTTP_TIMEOUT, GDAL_CACHEMAX); a profile overrides them
+    and adds its own options.
+
+    Args:
+        profile: Name of one of GDAL_PROFILES or a dictionary of options, defaults
+            to the configured gdal_profile
+
+    Returns:
+        Dictionary of GDAL configuration options
+    """
+    config = ConfigManager().config
+    if profile is None:
+        profile = config.gdal_profile
+    if isinstance(profile, str):
+        if profile not in GDAL_PROFILES:
+            raise ConfigurationError(
+                f"Unknown GDAL profile: {profile}. Choose from {', '.join(GDAL_PROFILES)}"
+            )
+        profile = GDAL_PROFILES[profile]
+
+    options = {
+        "GDAL_NUM_THREADS": str(config.max_threads),
+        "GDAL_HTTP_TIMEOUT": str(config.timeout),
+        "GDAL_CACHEMAX": str(int(config.memory_budget * CACHE_BUDGET_FRACTION)),
+    }
+    options.update({key: str(value) for key, value in profile.items()})
+    return options
+
+
+def _cache_bytes(value: str) -> int:
+    """GDAL_CACHEMAX in bytes: megabytes, or a percentage of the memory budget."""
+    if value.endswith("%"):
+        return int(ConfigManager().config.memory_budget * MB * float(value[:-1]) / 100)
+    return int(float(value) * MB)
+
+
+def cache_size(profile: Optional[GDALProfile] = None) -> int:
+    """
+    GDAL block cache size of a profile in bytes, for gdal.SetCacheMax.
+
+    The block cache is shared by the whole process, so engines set it once when
+    they are created, from the configured gdal_profile, rather than per operation.
+
+    Args:
+        profile: Profile name or dictionary of options, see resolve_gdal_profile
+
+    Returns:
+        Cache size in bytes
+    """
+    return _cache_bytes(resolve_gdal_profile(profile)["GDAL_CACHEMAX"])
+
+
+@contextmanager
+def gdal_profile(profile: Optional[GDALProfile] = None) -> Iterator[Dict[str, str]]:
+    """
+    Apply a GDAL profile for the duration of a block and restore the previous settings.
+
+    Options are set as thread-local configuration options, so concurrent
+    operations in other threads keep their own settings. The block cache size is
+    process-wide in GDAL, so GDAL_CACHEMAX is left out: changing it here would
+    race with blocks in other threads. Engines apply it once, see cache_size.
+
+    Args:
+        profile: Profile name or dictionary of options, see resolve_gdal_profile
+
+    Yields:
+        The applied options
+    """
+    options = resolve_gdal_profile(profile)
+    options.pop("GDAL_CACHEMAX")
+    previous = {key: gdal.GetThreadLocalConfigOption(key, None) for key in options}
+    try:
+        for key, value in options.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+        yield options
+    finally:
+        for key, value in previous.items():
+            gdal.SetThreadLocalConfigOption(key, value)
+
+
+def profiled(operation):
+    """
+    Run an engine operation under a GDAL profile.
+
+    Adds a keyword-only gdal_profile argument (defaulting to the configured
+    gdal_profile) and reports the applied profile in the operation's metrics.
+    With the profiling setting on, the operation is also profiled, see
+    profile_operation.
+    """
+    signature = inspect.signature(operation)
+    # The input dataset: the first argument after self
+    dataset_argument = list(signature.parameters)[1]
+
+    @functools.wraps(operation)
+    def wrapper(self, *args, **kwargs):
+        profile = kwargs.pop("gdal_profile", None)
+        dataset = args[0] if args else kwargs.get(dataset_argument)
+        with profile_operation(operation.__name__, dataset) as report:
+            with gdal_profile(profile) as options:
+                result = operation(self, *args, **kwargs)
+            metrics = self.metrics.setdefault(operation.__name__, {})
+            if isinstance(metrics, dict):
+                metrics["gdal_profile"] = {
+                    "name": (
+                        "custom"
+                        if isinstance(profile, dict)
+                        else profile or ConfigManager().config.gdal_profile
+                    ),
+                    "options": options,
+                }
+            if report is not None:
+                report["metrics"] = metrics
+        return result
+
+    # Advertise gdal_profile in the signature, which the auto engine inspects
+    wrapper.__signature__ = signature.replace(
+        parameters=list(signature.parameters.values())
+        + [inspect.Parameter("gdal_profile", inspect.Parameter.KEYWORD_ONLY, default=None)]
+    )
+    return wrapper
@@ -0,0 +1,115 @@
+import hashlib
+from typing import Any, Dict, Optional, Set
+
+import numpy as np
+import shapely
+
+from ...core.constants import QCFlag, VALIDATION_THRESHOLDS
+
+# shapely type ids of polygonal and linear geometries
+_POLYGONAL = (3, 6)
+_LINEAR = (1, 2, 5)
+
+
+def geometry_hashes(geoms: np.ndarray) -> np.ndarray:
+    """Hash the normalized WKB of each geometry so identical shapes hash identically."""
+    wkbs = shapely.to_wkb(shapely.normalize(geoms))
+    return np.array(
+        [
+            hashlib.blake2b(wkb, digest_size=16).digest() if wkb is not None else None
+            for wkb in wkbs
+        ],
+        dtype=object,
+    )
+
+
+def compute_qc_flags(
+    geoms: np.ndarray,
+    seen_hashes: Set[bytes],
+    thresholds: Optional[Dict[str, float]] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute quality-control measures and flags for an array of geometries.
+
+    Args:
+        geoms: Array of shapely geometries (None for null geometries)
+        seen_hashes: Geometry hashes from earlier batches, updated in place so
+            duplicates are detected across batches
+        thresholds: Validation thresholds, defaults to VALIDATION_THRESHOLDS
+
+    Returns:
+        Dictionary of per-feature arrays: flags, vertices, area, length
+    """
+    thresholds = thresholds or VALIDATION_THRESHOLDS
+    flags = np.zeros(len(geoms), dtype=np.uint8)
+
+    null = shapely.is_missing(geoms)
+    empty = shapely.is_empty(geoms)
+    present = ~null & ~empty
+    type_ids = shapely.get_type_id(geoms)
+
+    vertices = shapely.get_num_coordinates(geoms)
+    area = np.where(present, shapely.area(geoms), 0.0)
+    length = np.where(present, shapely.length(geoms), 0.0)
+    invalid = present & ~shapely.is_valid(geoms)
+
+    polygonal = present & np.isin(type_ids, _POLYGONAL)
+    linear = present & np.isin(type_ids, _LINEAR)
+
+    flags[null] |= np.uint8(QCFlag.NULL_GEOMETRY)
+    flags[empty] |= np.uint8(QCFlag.EMPTY_GEOMETRY)
+    flags[invalid] |= np.uint8(QCFlag.INVALID_GEOMETRY)
+    flags[polygonal & (area < thresholds["MIN_AREA"])] |= np.uint8(QCFlag.SMALL_AREA)
+    flags[vertices > thresholds["MAX_VERTICES"]] |= np.uint8(QCFlag.TOO_MANY_VERTICES)
+    flags[linear & (length < thresholds["SNAP_TOLERANCE"])] |= np.uint8(QCFlag.SHORT_LENGTH)
+
+    hashes = geometry_hashes(np.where(present, geoms, None))
+    duplicate = np.zeros(len(geoms), dtype=bool)
+    for i in np.flatnonzero(present):
+        if hashes[i] in seen_hashes:
+            duplicate[i] = True
+        else:
+            seen_hashes.add(hashes[i])
+    flags[duplicate] |= np.uint8(QCFlag.DUPLICATE_GEOMETRY)
+
+    return {"flags": flags, "vertices": vertices, "area": area, "length": length}
+
+
+def new_qc_report(thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
+    """Create an empty summary report."""
+    return {
+        "features": 0,
+        "flagged_features": 0,
+        "flag_counts": {flag.name: 0 for flag in QCFlag},
+        "total_vertices": 0,
+        "max_vertices": 0,
+        "total_area": 0.0,
+        "total_length": 0.0,
+        "thresholds": dict(thresholds or VALIDATION_THRESHOLDS),
+    }
+
+
+def update_qc_report(report: Dict[str, Any], batch: Dict[str, np.ndarray]) -> None:
+    """Accumulate a batch of QC results into a summary report."""
+    flags = batch["flags"]
+    report["features"] += len(flags)
+    report["flagged_features"] += int(np.count_nonzero(flags))
+    for flag in QCFlag:
+        report["flag_counts"][flag.name] += int(np.count_nonzero(flags & flag))
+    if len(flags):
+        report["total_vertices"] += int(batch["vertices"].sum())
+        report["max_vertices"] = max(report["max_vertices"], int(batch["vertices"].max()))
+        report["total_area"] += float(batch["area"].sum())
+        report["total_length"] += float(batch["length"].sum())
+
+
+def merge_qc_reports(report: Dict[str, Any], other: Dict[str, Any]) -> None:
+    """Accumulate a summary report, such as a layer's, into another."""
+    report["features"] += other["features"]
+    report["flagged_features"] += other["flagged_features"]
+    for name, count in other["flag_counts"].items():
+        report["flag_counts"][name] += count
+    report["total_vertices"] += other["total_vertices"]
+    report["max_vertices"] = max(report["max_vertices"], other["max_vertices"])
+    report["total_area"] += other["total_area"]
+    report["total_length"] += other["total_length"]
@@ -0,0 +1,190 @@
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from osgeo import gdal, osr
+
+from ...core.constants import GTIFF_CREATION_OPTIONS, RESAMPLING_METHODS
+from ...core.exceptions import ProcessingError
+from .formats import OutputFormat
+
+# Format of warped rasters
+WARP_FORMAT = OutputFormat("GTiff", ".tif")
+
+# Read-only raster handles opened once per worker process, by path, with the
+# modification time and size of the file they were opened on
+_DATASETS: Dict[str, Tuple[Tuple[int, int], gdal.Dataset]] = {}
+
+
+def gtiff_creation_options(ds, num_threads: int) -> List[str]:
+    """Creation options for tiled, compressed GeoTIFF output matching the source data type."""
+    data_type = ds.GetRasterBand(1).DataType
+    is_float = data_type in (gdal.GDT_Float32, gdal.GDT_Float64)
+    return GTIFF_CREATION_OPTIONS + [
+        f"PREDICTOR={3 if is_float else 2}",
+        f"NUM_THREADS={num_threads}",
+    ]
+
+
+def _error_threshold_pixels(ds, dst_wkt: str, max_error: float) -> float:
+    """Convert an error tolerance in target units into the warper's pixel threshold."""
+    probe = gdal.Warp("", ds, options=gdal.WarpOptions(format="VRT", dstSRS=dst_wkt))
+    pixel_size = min(abs(probe.GetGeoTransform()[1]), abs(probe.GetGeoTransform()[5]))
+    probe = None
+    return max_error / pixel_size
+
+
+def warp_raster(
+    input_path: Union[str, Path],
+    output_path: Union[str, Path],
+    epsg_code: int,
+    resampling: str = "bilinear",
+    warp_memory: int = 512,
+    num_threads: int = 4,
+    max_error: Optional[float] = None,
+    bbox: Optional[Sequence[float]] = None,
+) -> Dict[str, Any]:
+    """
+    Reproject a raster with GDAL's chunked, multithreaded warper.
+
+    The warper processes the output in chunks sized by warp_memory and writes a
+    tiled, compressed GeoTIFF.
+
+    Args:
+        input_path: Path to input raster
+        output_path: Path to output GeoTIFF
+        epsg_code: Target EPSG code
+        resampling: Resampling method, one of RESAMPLING_METHODS
+        warp_memory: Warp memory budget in megabytes
+        num_threads: Number of warping and compression threads
+        max_error: Approximate transform tolerance in target units. None uses an
+            exact transform for every pixel.
+        bbox: Only warp this extent (minx, miny, maxx, maxy), in the input's
+            coordinate system. Only the source blocks it covers are read.
+
+    Returns:
+        Dictionary of warp metrics
+    """
+    if resampling not in RESAMPLING_METHODS:
+        raise ProcessingError(
+            f"Unsupported resampling method: {resampling}. "
+            f"Choose from {', '.join(RESAMPLING_METHODS)}"
+        )
+
+    ds = gdal.Open(str(input_path))
+    if ds is None:
+        raise ProcessingError(f"Could not open raster: {input_path}")
+
+    target_srs = osr.SpatialReference()
+    target_srs.ImportFromEPSG(epsg_code)
+    dst_wkt = target_srs.ExportToWkt()
+
+    error_threshold = 0.0
+    if max_error is not None:
+        error_threshold = _error_threshold_pixels(ds, dst_wkt, max_error)
+
+    options = gdal.WarpOptions(
+        format=WARP_FORMAT.driver,
+        dstSRS=dst_wkt,
+        resampleAlg=resampling,
+        multithread=True,
+        warpMemoryLimit=warp_memory,
+        warpOptions=[f"NUM_THREADS={num_threads}"],
+        creationOptions=gtiff_creation_options(ds, num_threads),
+        errorThreshold=error_threshold,
+        outputBounds=bbox,
+        outputBoundsSRS=ds.GetProjection() if bbox is not None else None,
+    )
+    out_ds = gdal.Warp(str(output_path), ds, options=options)
+    if out_ds is None:
+        raise ProcessingError(f"Warping {input_path} failed")
+
+    metrics = {
+        "resampling": resampling,
+        "warp_memory": warp_memory,
+        "num_threads": num_threads,
+        "approximate": max_error is not None,
+        "max_error": max_error,
+        "error_threshold_pixels": error_threshold,
+        "size": (out_ds.RasterXSize, out_ds.RasterYSize),
+    }
+    out_ds = None
+    ds = None
+    return metrics
+
+
+def _file_stamp(path: str) -> Tuple[int, int]:
+    """Modification time and size of a file, (0, 0) when it is not a local file."""
+    try:
+        stat = Path(path).stat()
+    except OSError:
+        return 0, 0
+    return stat.st_mtime_ns, stat.st_size
+
+
+def open_shared_raster(path: str):
+    """
+    Open a raster read-only, once per process.
+
+    Worker tasks reading the same raster reuse the handle, and with it GDAL's
+    block cache, across tasks. A file replaced since it was opened (e.g. by
+    reproject_raster with in_place) is opened again.
+    """
+    stamp = _file_stamp(path)
+    cached = _DATASETS.get(path)
+    if cached is not None and cached[0] == stamp:
+        return cached[1]
+    ds = gdal.Open(path)
+    if ds is None:
+        raise ProcessingError(f"Could not open raster: {path}")
+    _DATASETS[path] = (stamp, ds)
+    return ds
+
+
+def close_shared_rasters(path: Optional[str] = None):
+    """
+    Close the raster handles of open_shared_raster in this process.
+
+    Args:
+        path: Only close this raster's handle, defaults to all of them
+    """
+    if path is None:
+        _DATASETS.clear()
+    else:
+        _DATASETS.pop(str(path), None)
+
+
+def north_up_geotransform(ds) -> Tuple[float, ...]:
+    """Geotransform of a raster, which must not be rotated or sheared."""
+    geotransform = ds.GetGeoTransform()
+    if geotransform[2] != 0 or geotransform[4] != 0:
+        raise ProcessingError("Rotated rasters are not supported; warp the raster first")
+    return geotransform
+
+
+def pixel_windows(
+    bounds: np.ndarray, geotransform: Sequence[float], width: int, height: int
+) -> np.ndarray:
+    """
+    Raster windows covering bounding boxes, clipped to the raster.
+
+    Args:
+        bounds: (N, 4) array of minx, miny, maxx, maxy in the raster's coordinate system
+        geotransform: North-up geotransform of the raster
+        width: Raster width in pixels
+        height: Raster height in pixels
+
+    Returns:
+        (N, 4) integer array of xoff, yoff, xsize, ysize; boxes outside the raster
+        or missing get an empty window
+    """
+    x0, dx, _, y0, _, dy = geotransform
+    cols = (bounds[:, [0, 2]] - x0) / dx
+    rows = (bounds[:, [1, 3]] - y0) / dy
+    col0 = np.clip(np.floor(cols.min(axis=1)), 0, width)
+    col1 = np.clip(np.ceil(cols.max(axis=1)), 0, width)
+    row0 = np.clip(np.floor(rows.min(axis=1)), 0, height)
+    row1 = np.clip(np.ceil(rows.max(axis=1)), 0, height)
+    windows = np.column_stack([col0, row0, col1 - col0, row1 - row0])
+    windows[~np.isfinite(windows).all(axis=1)] = 0
+    return windows.astype(np.int64)
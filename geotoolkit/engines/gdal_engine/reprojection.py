@@ -0,0 +1,132 @@
+from typing import Tuple
+
+import numpy as np
+
+# Sample positions, as fractions of a feature's extent, used to fit the affine
+# approximation (3x3 grid) and to check it at points the fit never saw.
+_FIT_FRACTIONS = np.array([(u, v) for v in (0.0, 0.5, 1.0) for u in (0.0, 0.5, 1.0)])
+_CHECK_FRACTIONS = np.array([(u, v) for v in (0.25, 0.75) for u in (0.25, 0.75)])
+_SAMPLE_FRACTIONS = np.vstack([_FIT_FRACTIONS, _CHECK_FRACTIONS])
+
+# The fit is also checked at vertices of the feature itself, spread evenly along
+# its coordinate sequence (as fractions of it), first and last included
+_VERTEX_FRACTIONS = np.linspace(0.0, 1.0, 4)
+
+# Features with no more vertices than samples are cheaper to transform exactly
+_MIN_APPROX_VERTICES = len(_SAMPLE_FRACTIONS) + len(_VERTEX_FRACTIONS)
+
+
+def transform_coordinates(coords: np.ndarray, transform) -> np.ndarray:
+    """
+    Exactly transform an (N, 2) or (N, 3) coordinate array in a single PROJ call.
+
+    Args:
+        coords: Coordinate array in the source CRS
+        transform: osr.CoordinateTransformation from source to target CRS
+
+    Returns:
+        Coordinate array in the target CRS with the same shape as the input
+    """
+    if len(coords) == 0:
+        return coords.copy()
+
+    transformed = np.asarray(transform.TransformPoints(coords.tolist()), dtype=np.float64)
+    return transformed[:, : coords.shape[1]]
+
+
+def approximate_transform_coordinates(
+    coords: np.ndarray, feature_index: np.ndarray, n_features: int, transform, max_error: float
+) -> Tuple[np.ndarray, float, int]:
+    """
+    Reproject a coordinate array with a per-feature affine approximation.
+
+    The exact transform is evaluated on a small grid over each feature's extent and
+    an affine transform is fitted to it. The fit is checked against the exact
+    transform at sample points it was not fitted to: four inside the extent and
+    four of the feature's own vertices. Features whose fit deviates by more than
+    max_error (in target units) at any of them fall back to an exact transform of
+    every vertex. The error is sampled, not measured at every vertex, so a vertex
+    between the samples can deviate more where the transform bends sharply within
+    a feature. Z values are carried through unchanged for approximated features.
+
+    Args:
+        coords: (N, 2) or (N, 3) coordinate array in the source CRS, grouped by
+            feature in feature order
+        feature_index: Feature index of every coordinate
+        n_features: Number of features
+        transform: osr.CoordinateTransformation from source to target CRS
+        max_error: Maximum tolerated error in target CRS units
+
+    Returns:
+        Tuple of (transformed coordinates, maximum error at the sample points of
+        the approximated features, number of features that exceeded the tolerance
+        and fell back)
+    """
+    coords = coords.copy()
+    if len(coords) == 0:
+        return coords, 0.0, 0
+
+    vertex_counts = np.bincount(feature_index, minlength=n_features)
+    candidates = np.flatnonzero(vertex_counts > _MIN_APPROX_VERTICES)
+    exact = vertex_counts > 0
+    sampled_error = 0.0
+    fallback_count = 0
+
+    if len(candidates):
+        low = np.full((n_features, 2), np.inf)
+        high = np.full((n_features, 2), -np.inf)
+        np.minimum.at(low, feature_index, coords[:, :2])
+        np.maximum.at(high, feature_index, coords[:, :2])
+        origin = low[candidates]
+        # Pad degenerate extents (vertical/horizontal lines) so the fit stays defined
+        size = np.maximum(high[candidates] - origin, np.finfo(np.float64).eps)
+
+        grid = origin[:, None, :] + _SAMPLE_FRACTIONS * size[:, None, :]
+        counts = vertex_counts[candidates]
+        starts = np.cumsum(vertex_counts)[candidates] - counts
+        picks = starts[:, None] + np.rint(_VERTEX_FRACTIONS * (counts[:, None] - 1)).astype(int)
+        samples = np.concatenate([grid, coords[picks, :2]], axis=1)
+        fractions = (samples - origin[:, None, :]) / size[:, None, :]
+        exact_samples = transform_coordinates(samples.reshape(-1, 2), transform).reshape(
+            samples.shape
+        )
+
+        n_fit = len(_FIT_FRACTIONS)
+        design = np.concatenate(
+            [fractions[:, :n_fit], np.ones((len(candidates), n_fit, 1))], axis=2
+        )
+        affine = np.linalg.pinv(design) @ exact_samples[:, :n_fit]
+
+        check_design = np.concatenate(
+            [fractions, np.ones((len(candidates), samples.shape[1], 1))], axis=2
+        )
+        predicted = check_design @ affine
+        errors = np.linalg.norm(predicted - exact_samples, axis=2).max(axis=1)
+        errors[~np.isfinite(errors)] = np.inf
+
+        accepted = errors <= max_error
+        fallback_count = int((~accepted).sum())
+        if accepted.any():
+            sampled_error = float(errors[accepted].max())
+
+        approximated = candidates[accepted]
+        exact[approximated] = False
+
+        # Map every vertex of an approximated feature through its own affine transform
+        slot = np.full(n_features, -1)
+        slot[approximated] = np.flatnonzero(accepted)
+        vertex_slot = slot[feature_index]
+        use_affine = vertex_slot >= 0
+        if use_affine.any():
+            s = vertex_slot[use_affine]
+            local = (coords[use_affine, :2] - origin[s]) / size[s]
+            coords[use_affine, :2] = (
+                local[:, :1] * affine[s, 0] + local[:, 1:2] * affine[s, 1] + affine[s, 2]
+            )
+
+    use_exact = exact[feature_index]
+    if use_exact.any():
+        coords[use_exact] = transform_coordinates(coords[use_exact], transform)
+
+    return coords, sampled_error, fallback_count
+
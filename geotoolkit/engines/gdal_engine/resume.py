@@ -0,0 +1,163 @@
+from pathlib import Path
+from typing import Any, Dict, Optional, Sequence, Union
+
+import numpy as np
+from osgeo import ogr
+
+from ...utils.checkpoint import Checkpoint
+from ...utils.config import ConfigManager
+from ...utils.progress import CancellationToken, ProgressCallback, ProgressReporter
+
+
+class ResumableRun:
+    """
+    Progress reporting, cancellation and checkpointing of a batched operation.
+
+    Each batch written to an output layer is wrapped in a transaction where the
+    driver supports one (or synced to disk otherwise); once committed, the input
+    FIDs of the batch are recorded in a Checkpoint next to the output. A rerun
+    skips recorded features and truncates the output to the committed batches, so
+    a crash or cancellation loses at most one batch of work.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        dataset: Union[str, Path],
+        output_path: Union[str, Path],
+        params: Dict[str, Any],
+        progress: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+        resume: bool = True,
+        check_source: bool = True,
+    ):
+        """
+        Args:
+            operation: Operation name
+            dataset: Input dataset
+            output_path: Output dataset, which holds the checkpoint alongside
+            params: Operation parameters affecting the output
+            progress: Called with a Progress after every batch
+            cancel_token: Token checked after every batch
+            resume: Whether to continue from a matching checkpoint
+            check_source: Whether a modified input invalidates the checkpoint
+        """
+        self.reporter = ProgressReporter(operation, None, progress, cancel_token)
+        self.checkpoint: Optional[Checkpoint] = None
+        if ConfigManager().config.checkpoints:
+            self.checkpoint = Checkpoint.open(
+                output_path, operation, dataset, params, resume, check_source
+            )
+
+    @property
+    def resumed(self) -> bool:
+        return self.checkpoint is not None and self.checkpoint.resumed
+
+    def restart(self):
+        """Discard the checkpoint, e.g. when the interrupted run's output is gone."""
+        if self.resumed:
+            self.checkpoint.remove()
+            self.checkpoint.layers = {}
+            self.checkpoint.resumed = False
+
+    def start(self, layers: Sequence):
+        """Count the features to process and skip those committed by an earlier run."""
+        self.reporter.total = sum(max(layer.GetFeatureCount(), 0) for layer in layers)
+        if self.resumed:
+            self.reporter.skip(
+                sum(self.checkpoint.committed_count(layer.GetName()) for layer in layers)
+            )
+        self.reporter.check_cancelled()
+
+    def is_complete(self, layer) -> bool:
+        """Whether an earlier run finished the whole layer."""
+        return self.resumed and self.checkpoint.is_complete(layer.GetName())
+
+    def pending(self, layer_name: str, fids: Sequence[int]) -> np.ndarray:
+        """Positions of the features of a batch not committed by an earlier run."""
+        if not self.resumed:
+            return np.arange(len(fids))
+        return np.array(
+            [i for i, fid in enumerate(fids) if not self.checkpoint.committed(layer_name, fid)],
+            dtype=np.int64,
+        )
+
+    def restore_layer(self, out_layer, layer_name: str):
+        """Drop output features written after the last committed batch."""
+        written = self.checkpoint.written(layer_name) if self.resumed else 0
+        out_layer.SetNextByIndex(written)
+        extra = [feature.GetFID() for feature in out_layer]
+        for fid in extra:
+            out_layer.DeleteFeature(fid)
+        out_layer.ResetReading()
+
+    def begin(self, out_layer):
+        """Start writing a batch."""
+        if out_layer.TestCapability(ogr.OLCTransactions):
+            out_layer.StartTransaction()
+
+    def commit(
+        self,
+        out_layer,
+        layer_name: str,
+        fids: Sequence[int],
+        written: int = 0,
+        report: bool = True,
+    ):
+        """
+        Commit a batch, record it and report progress.
+
+        Args:
+            out_layer: Layer the batch was written to
+            layer_name: Input layer name
+            fids: Input FIDs of the batch that were not committed before
+            written: Features written to the output layer
+            report: Whether to count the batch towards progress, False when a
+                worker already reported its features
+        """
+        if out_layer.TestCapability(ogr.OLCTransactions):
+            out_layer.CommitTransaction()
+        else:
+            out_layer.SyncToDisk()
+        if self.checkpoint is not None:
+            self.checkpoint.commit(layer_name, fids, written)
+        if report:
+            self.reporter.update(len(fids))
+        else:
+            self.reporter.check_cancelled()
+
+    def commit_layer(self, out_layer, layer_name: str):
+        """
+        Commit a layer written in one piece, merged from a worker's part whose
+        features the worker reported, and mark it complete.
+
+        Args:
+            out_layer: Layer the features were written to
+            layer_name: Input layer name
+        """
+        if out_layer.TestCapability(ogr.OLCTransactions):
+            out_layer.CommitTransaction()
+        else:
+            out_layer.SyncToDisk()
+        self.complete_layer(layer_name)
+        self.reporter.check_cancelled()
+
+    def complete_layer(self, layer_name: str):
+        if self.checkpoint is not None:
+            self.checkpoint.complete(layer_name)
+
+    def finish(self) -> Dict[str, Any]:
+        """
+        Remove the checkpoint of the finished operation.
+
+        Returns:
+            Progress metrics
+        """
+        if self.checkpoint is not None:
+            self.checkpoint.remove()
+        progress = self.reporter.progress
+        return {
+            "seconds": progress.elapsed,
+            "features_per_second": progress.rate,
+            "resumed_features": self.reporter.skipped,
+        }
@@ -0,0 +1,141 @@
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from ...core.exceptions import ProcessingError
+
+# shapely type ids of lines
+_LINEAR = (1, 5)
+
+
+def line_samples(
+    geoms: np.ndarray, interval: Optional[float] = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sample positions along lines: their vertices, or points at a regular interval.
+
+    Interval samples start at each line's first vertex and include its last one.
+    Positions along MultiLineStrings run through the parts in order, without
+    counting the gaps between them.
+
+    Args:
+        geoms: Array of shapely geometries; only (Multi)LineStrings are sampled
+        interval: Spacing of the samples in layer units, None for the vertices
+
+    Returns:
+        Tuple of ((N, 2) sample coordinates, owning geometry index, distance along
+        the line), ordered by geometry and distance
+    """
+    lines = np.flatnonzero(np.isin(shapely.get_type_id(geoms), _LINEAR))
+    if interval is not None:
+        if interval <= 0:
+            raise ProcessingError(f"Sampling interval must be positive, got {interval}")
+        lengths = shapely.length(geoms[lines])
+        counts = np.ceil(lengths / interval).astype(np.int64) + 1
+        owner = np.repeat(np.arange(len(lines)), counts)
+        starts = np.concatenate([[0], np.cumsum(counts)[:-1]])
+        along = np.minimum((np.arange(len(owner)) - starts[owner]) * interval, lengths[owner])
+        points = shapely.line_interpolate_point(geoms[lines][owner], along)
+        return shapely.get_coordinates(points), lines[owner], along
+
+    parts, part_owner = shapely.get_parts(geoms[lines], return_index=True)
+    coords, coord_part = shapely.get_coordinates(parts, return_index=True)
+    steps = np.linalg.norm(np.diff(coords, axis=0), axis=1)
+    steps[coord_part[1:] != coord_part[:-1]] = 0.0
+    along = np.concatenate([[0.0], np.cumsum(steps)])
+    owner = part_owner[coord_part]
+    if len(owner):
+        # Restart the distance at each line's first vertex
+        first = np.concatenate([[True], owner[1:] != owner[:-1]])
+        along -= along[np.flatnonzero(first)][np.cumsum(first) - 1]
+    return coords, lines[owner], along
+
+
+def sample_band(band, geotransform: Sequence[float], coords: np.ndarray) -> np.ndarray:
+    """
+    Read the band values under a set of points.
+
+    All points are converted to pixel indices at once and grouped by the band's
+    native blocks; each block holding a sample is read once, through GDAL's
+    block cache, and its samples are gathered with NumPy indexing.
+
+    Args:
+        band: GDAL raster band
+        geotransform: North-up geotransform of the raster
+        coords: (N, 2) point coordinates in the raster's coordinate system
+
+    Returns:
+        Array of values, NaN outside the raster and for nodata pixels
+    """
+    x0, dx, _, y0, _, dy = geotransform
+    values = np.full(len(coords), np.nan)
+    cols = np.floor((coords[:, 0] - x0) / dx)
+    rows = np.floor((coords[:, 1] - y0) / dy)
+    inside = np.flatnonzero((cols >= 0) & (cols < band.XSize) & (rows >= 0) & (rows < band.YSize))
+    if not len(inside):
+        return values
+
+    cols = cols[inside].astype(np.int64)
+    rows = rows[inside].astype(np.int64)
+    block_width, block_height = band.GetBlockSize()
+    blocks_per_row = -(-band.XSize // block_width)
+    keys = rows // block_height * blocks_per_row + cols // block_width
+    order = np.argsort(keys, kind="stable")
+    bounds = np.flatnonzero(np.diff(keys[order])) + 1
+    for group in np.split(order, bounds):
+        key = keys[group[0]]
+        xoff = key % blocks_per_row * block_width
+        yoff = key // blocks_per_row * block_height
+        block = band.ReadAsArray(
+            int(xoff),
+            int(yoff),
+            int(min(block_width, band.XSize - xoff)),
+            int(min(block_height, band.YSize - yoff)),
+        )
+        values[inside[group]] = block[rows[group] - yoff, cols[group] - xoff]
+
+    nodata = band.GetNoDataValue()
+    if nodata is not None:
+        values[values == nodata] = np.nan
+    return values
+
+
+def profile_metrics(
+    values: np.ndarray, owner: np.ndarray, along: np.ndarray, n: int
+) -> Dict[str, np.ndarray]:
+    """
+    Minimum and maximum elevation and gradient of each line from its samples.
+
+    The gradient is the elevation difference between the first and last valid
+    samples over the distance between them along the line, unsigned since
+    lines may be digitized in either direction.
+
+    Args:
+        values: Sampled elevations, NaN where missing
+        owner: Line index of every sample, samples ordered by line and distance
+        along: Distance of every sample along its line
+        n: Number of lines
+
+    Returns:
+        Dictionary with "min", "max" and "gradient" arrays, NaN for lines without
+        valid samples (and gradients of lines with a single valid sample)
+    """
+    valid = ~np.isnan(values)
+    owner, along, values = owner[valid], along[valid], values[valid]
+    minimum = np.full(n, np.inf)
+    maximum = np.full(n, -np.inf)
+    np.minimum.at(minimum, owner, values)
+    np.maximum.at(maximum, owner, values)
+    sampled = np.isfinite(minimum)
+    minimum[~sampled] = np.nan
+    maximum[~sampled] = np.nan
+
+    gradient = np.full(n, np.nan)
+    if len(owner):
+        first = np.flatnonzero(np.concatenate([[True], owner[1:] != owner[:-1]]))
+        last = np.concatenate([first[1:], [len(owner)]]) - 1
+        run = along[last] - along[first]
+        drop = np.abs(values[first] - values[last])
+        gradient[owner[first]] = np.divide(drop, run, out=np.full(len(run), np.nan), where=run > 0)
+    return {"min": minimum, "max": maximum, "gradient": gradient}
@@ -0,0 +1,196 @@
+from concurrent.futures import Executor
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+
+# shapely type ids of geometries simplify can reduce (lines, rings and polygons)
+_SIMPLIFIABLE = (1, 2, 3, 5, 6)
+
+# Refinement steps of the per-feature tolerance search, each narrowing the
+# bracketing ratio of 4 by a square root
+_BISECTION_STEPS = 6
+
+# Batches whose over-budget features hold more vertices than this are simplified
+# in worker processes, in tasks of about SIMPLIFY_TASK_VERTICES vertices
+PARALLEL_SIMPLIFY_VERTICES = 1000000
+SIMPLIFY_TASK_VERTICES = 250000
+
+
+def new_simplify_stats() -> Dict[str, int]:
+    """Empty simplification statistics, to accumulate batch results into."""
+    return {"features_simplified": 0, "vertices_before": 0, "vertices_after": 0, "over_budget": 0}
+
+
+def _vertex_counts(geoms: np.ndarray, tolerance: np.ndarray, preserve_topology: bool):
+    """Simplify and count the vertices of the results."""
+    simplified = shapely.simplify(geoms, tolerance, preserve_topology=preserve_topology)
+    return simplified, shapely.get_num_coordinates(simplified)
+
+
+def _budget_tolerances(geoms: np.ndarray, max_vertices: int) -> np.ndarray:
+    """
+    Search, per geometry, the smallest tolerance that meets the vertex budget.
+
+    The search runs on plain Douglas-Peucker simplification, several times
+    faster than the topology-preserving variant and keeping the same vertices
+    in most cases. Tolerances start at the geometry's diagonal divided by the
+    budget and are scaled by 4 until they bracket the budget, then bisected
+    geometrically. Every step simplifies all searched geometries in one
+    vectorized call.
+
+    Returns:
+        Array of tolerances; geometries that cannot meet the budget (e.g. with
+        thousands of parts) get their diagonal
+    """
+    minx, miny, maxx, maxy = shapely.bounds(geoms).T
+    diagonal = np.hypot(maxx - minx, maxy - miny)
+    high = diagonal / max_vertices
+    _, counts = _vertex_counts(geoms, high, False)
+    fits = counts <= max_vertices
+    low = np.where(fits, high / 4, high)
+
+    # Bracket: lower tolerances that fit, raise those that do not
+    searching = np.flatnonzero(fits)
+    while len(searching):
+        _, counts = _vertex_counts(geoms[searching], low[searching], False)
+        lower = counts <= max_vertices
+        high[searching[lower]] = low[searching[lower]]
+        low[searching[lower]] /= 4
+        searching = searching[lower]
+    searching = np.flatnonzero(~fits)
+    while len(searching):
+        high[searching] = np.minimum(high[searching] * 4, diagonal[searching])
+        _, counts = _vertex_counts(geoms[searching], high[searching], False)
+        grow = (counts > max_vertices) & (high[searching] < diagonal[searching])
+        low[searching[~grow]] = high[searching[~grow]] / 4
+        searching = searching[grow]
+
+    searched = np.flatnonzero(low < high)
+    for _ in range(_BISECTION_STEPS):
+        if not len(searched):
+            break
+        middle = np.sqrt(low[searched] * high[searched])
+        _, counts = _vertex_counts(geoms[searched], middle, False)
+        within = counts <= max_vertices
+        high[searched[within]] = middle[within]
+        low[searched[~within]] = middle[~within]
+    return high
+
+
+def simplify_to_budget(
+    geoms: np.ndarray,
+    max_vertices: int,
+    tolerance: Optional[float] = None,
+    preserve_topology: bool = True,
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Simplify the geometries with more than max_vertices vertices.
+
+    Geometries within the budget are returned unchanged. With a tolerance, the
+    others are simplified with it; otherwise each gets the smallest tolerance
+    that brings it within the budget.
+
+    Args:
+        geoms: Array of shapely geometries
+        max_vertices: Vertex budget per geometry
+        tolerance: Fixed simplification tolerance in layer units
+        preserve_topology: Keep simplified geometries valid (no self-intersections,
+            collapsed rings or holes crossing shells)
+
+    Returns:
+        Tuple of (geometries, statistics)
+    """
+    counts = shapely.get_num_coordinates(geoms)
+    over = np.flatnonzero(
+        (counts > max_vertices) & np.isin(shapely.get_type_id(geoms), _SIMPLIFIABLE)
+    )
+    stats = new_simplify_stats()
+    if not len(over):
+        return geoms, stats
+    stats["features_simplified"] = len(over)
+    stats["vertices_before"] = int(counts[over].sum())
+
+    if tolerance is not None:
+        simplified, simplified_counts = _vertex_counts(geoms[over], tolerance, preserve_topology)
+    else:
+        candidates = geoms[over]
+        tolerances = _budget_tolerances(candidates, max_vertices)
+        simplified, simplified_counts = _vertex_counts(candidates, tolerances, preserve_topology)
+        # Topology preservation can keep a few more vertices than the search saw
+        minx, miny, maxx, maxy = shapely.bounds(candidates).T
+        diagonal = np.hypot(maxx - minx, maxy - miny)
+        retry = np.flatnonzero((simplified_counts > max_vertices) & (tolerances < diagonal))
+        while len(retry):
+            tolerances[retry] = np.minimum(tolerances[retry] * 1.5, diagonal[retry])
+            simplified[retry], simplified_counts[retry] = _vertex_counts(
+                candidates[retry], tolerances[retry], preserve_topology
+            )
+            retry = retry[
+                (simplified_counts[retry] > max_vertices) & (tolerances[retry] < diagonal[retry])
+            ]
+    stats["vertices_after"] = int(simplified_counts.sum())
+    stats["over_budget"] = int((simplified_counts > max_vertices).sum())
+
+    result = geoms.copy()
+    result[over] = simplified
+    return result, stats
+
+
+def _simplify_task(
+    wkbs: np.ndarray, max_vertices: int, tolerance: Optional[float], preserve_topology: bool
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Worker: simplify a chunk of over-budget geometries."""
+    geoms, stats = simplify_to_budget(
+        shapely.from_wkb(wkbs), max_vertices, tolerance, preserve_topology
+    )
+    return shapely.to_wkb(geoms), stats
+
+
+def simplify_geometries(
+    geoms: np.ndarray,
+    max_vertices: int,
+    tolerance: Optional[float] = None,
+    preserve_topology: bool = True,
+    executor: Optional[Executor] = None,
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Simplify over-budget geometries, in worker processes when they are large.
+
+    Only geometries over the budget leave the batch: when together they hold
+    more than PARALLEL_SIMPLIFY_VERTICES vertices and an executor is given, they
+    are split into tasks of about SIMPLIFY_TASK_VERTICES vertices.
+
+    Args:
+        geoms: Array of shapely geometries
+        max_vertices: Vertex budget per geometry
+        tolerance: Fixed simplification tolerance, see simplify_to_budget
+        preserve_topology: Keep simplified geometries valid
+        executor: Executor running the tasks of large batches
+
+    Returns:
+        Tuple of (geometries, statistics)
+    """
+    counts = shapely.get_num_coordinates(geoms)
+    over = np.flatnonzero(counts > max_vertices)
+    if executor is None or counts[over].sum() <= PARALLEL_SIMPLIFY_VERTICES:
+        return simplify_to_budget(geoms, max_vertices, tolerance, preserve_topology)
+
+    task_ids = np.cumsum(counts[over]) // SIMPLIFY_TASK_VERTICES
+    wkbs = shapely.to_wkb(geoms[over])
+    tasks = []
+    for task in np.unique(task_ids):
+        members = task_ids == task
+        future = executor.submit(
+            _simplify_task, wkbs[members], max_vertices, tolerance, preserve_topology
+        )
+        tasks.append((over[members], future))
+
+    result = geoms.copy()
+    totals = new_simplify_stats()
+    for index, future in tasks:
+        simplified, stats = future.result()
+        result[index] = shapely.from_wkb(simplified)
+        for key, value in stats.items():
+            totals[key] += value
+    return result, totals
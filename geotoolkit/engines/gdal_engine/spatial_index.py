@@ -0,0 +1,150 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from ...core.exceptions import ProcessingError
+from .geometry_buffer import GeometryBuffer, LayerSchema
+
+# Binary predicates accepted by STRtree.query
+SPATIAL_PREDICATES = (
+    "intersects",
+    "within",
+    "contains",
+    "overlaps",
+    "crosses",
+    "touches",
+    "covers",
+    "covered_by",
+    "contains_properly",
+    "dwithin",
+)
+
+
+@dataclass
+class SpatialIndex:
+    """
+    STRtree over a layer's geometries, kept with their FIDs and attributes.
+
+    Built once per dataset and reused by every query against it. Pickling sends
+    the geometries only; the tree is rebuilt on unpickling, once per worker
+    process.
+    """
+
+    geoms: np.ndarray
+    fids: np.ndarray
+    attributes: Dict[str, np.ndarray]
+    schema: LayerSchema
+    tree: shapely.STRtree = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.tree = shapely.STRtree(self.geoms)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["tree"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.tree = shapely.STRtree(self.geoms)
+
+    def __len__(self) -> int:
+        return len(self.geoms)
+
+    @classmethod
+    def from_layer(cls, layer) -> "SpatialIndex":
+        """Load a layer (honouring its filters) and index its geometries."""
+        buffer = GeometryBuffer.from_layer(layer)
+        return cls(buffer.to_shapely(), buffer.fids, buffer.attributes, buffer.schema)
+
+    def query(
+        self, geoms: np.ndarray, predicate: str = "intersects", distance: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Find the indexed features satisfying a predicate with each input geometry.
+
+        Args:
+            geoms: Array of query geometries
+            predicate: One of SPATIAL_PREDICATES, evaluated as predicate(input, indexed)
+            distance: Search distance, required by the "dwithin" predicate
+
+        Returns:
+            Tuple of (input positions, indexed positions), sorted by input position
+        """
+        if predicate not in SPATIAL_PREDICATES:
+            raise ProcessingError(
+                f"Unsupported predicate: {predicate}. Choose from {', '.join(SPATIAL_PREDICATES)}"
+            )
+        if predicate == "dwithin" and distance is None:
+            raise ProcessingError("The dwithin predicate requires a distance")
+        left, right = self.tree.query(geoms, predicate=predicate, distance=distance)
+        order = np.lexsort((right, left))
+        return left[order], right[order]
+
+    def nearest(
+        self, geoms: np.ndarray, k: int = 1, max_distance: Optional[float] = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Find the k nearest indexed features of each input geometry.
+
+        The nearest neighbour comes from STRtree.query_nearest. For k > 1, every
+        input is searched with a bulk "dwithin" query whose radius starts at the
+        nearest distance plus the expected spacing of k features, and doubles
+        for the inputs that found fewer than k neighbours, until the radius
+        reaches max_distance or covers the whole index.
+
+        Args:
+            geoms: Array of query geometries
+            k: Neighbours per input geometry
+            max_distance: Ignore features farther than this distance
+
+        Returns:
+            Tuple of (input positions, indexed positions, distances), sorted by input
+            position and distance. Inputs without a neighbour are left out.
+        """
+        if k < 1:
+            raise ProcessingError(f"k must be at least 1, got {k}")
+        (left, right), distances = self.tree.query_nearest(
+            geoms, max_distance=max_distance, return_distance=True, all_matches=False
+        )
+        if k == 1 or not len(left):
+            return left, right, distances
+
+        # Every neighbour lies within the nearest distance plus the index diagonal
+        minx, miny, maxx, maxy = shapely.total_bounds(self.geoms)
+        diagonal = np.hypot(maxx - minx, maxy - miny)
+        spacing = np.sqrt(max((maxx - minx) * (maxy - miny), diagonal**2 / len(self)) / len(self))
+        limit = distances + diagonal
+        radius = distances + spacing * np.sqrt(k)
+        if max_distance is not None:
+            limit = np.minimum(limit, max_distance)
+
+        pending = np.arange(len(left))
+        found_left, found_right, found_distances = [], [], []
+        while len(pending):
+            radius[pending] = np.minimum(radius[pending], limit[pending])
+            inputs = left[pending]
+            candidates, matches = self.tree.query(
+                geoms[inputs], predicate="dwithin", distance=radius[pending]
+            )
+            counts = np.bincount(candidates, minlength=len(pending))
+            done = (counts >= k) | (radius[pending] >= limit[pending])
+            keep = done[candidates]
+            found_left.append(inputs[candidates[keep]])
+            found_right.append(matches[keep])
+            found_distances.append(
+                shapely.distance(geoms[inputs[candidates[keep]]], self.geoms[matches[keep]])
+            )
+            pending = pending[~done]
+            radius[pending] *= 2
+
+        left = np.concatenate(found_left)
+        right = np.concatenate(found_right)
+        distances = np.concatenate(found_distances)
+        order = np.lexsort((right, distances, left))
+        left, right, distances = left[order], right[order], distances[order]
+        rank = np.arange(len(left)) - np.searchsorted(left, left)
+        keep = rank < k
+        return left[keep], right[keep], distances[keep]
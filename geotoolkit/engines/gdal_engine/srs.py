@@ -0,0 +1,26 @@
+from typing import Union
+
+from osgeo import osr
+
+
+def spatial_reference(definition: Union[str, int]):
+    """
+    Spatial reference from WKT or an EPSG code, in (x, y) axis order.
+
+    GDAL 3 follows the authority's axis order for spatial references built from
+    WKT or EPSG codes, so EPSG:4326 would read coordinates as (lat, lon). OGR
+    layers store (lon, lat), which is the traditional GIS order set here.
+
+    Args:
+        definition: WKT string or EPSG code
+
+    Returns:
+        osr.SpatialReference
+    """
+    srs = osr.SpatialReference()
+    if isinstance(definition, int):
+        srs.ImportFromEPSG(definition)
+    else:
+        srs.ImportFromWkt(definition)
+    srs.SetAxisMappingStrategy(osr.OAMS_TRADITIONAL_GIS_ORDER)
+    return srs
@@ -0,0 +1,278 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+from pathlib import Path
+from typing import Any, Dict, List, Tuple, Union
+
+import numpy as np
+
+from ...core.exceptions import ProcessingError
+
+TILE_ARCHIVE_FORMATS = ("pmtiles", "mbtiles")
+
+# PMTiles v3 layout constants
+_PMTILES_HEADER_SIZE = 127
+_PMTILES_ROOT_MAX = 16384 - _PMTILES_HEADER_SIZE
+_PMTILES_GZIP = 2
+_PMTILES_MVT = 1
+
+# MBTiles rows inserted per transaction
+_MBTILES_COMMIT_INTERVAL = 1000
+
+
+def tile_ids(z: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    PMTiles tile IDs: tiles of lower zooms first, then along a Hilbert curve.
+
+    Args:
+        z: Zoom level
+        x: Tile columns
+        y: Tile rows (XYZ scheme, row 0 at the top)
+
+    Returns:
+        Array of tile IDs
+    """
+    x = np.array(x, dtype=np.int64)
+    y = np.array(y, dtype=np.int64)
+    ids = np.full(x.shape, ((1 << (2 * z)) - 1) // 3, dtype=np.int64)
+    for a in range(z - 1, -1, -1):
+        s = 1 << a
+        rx = x & s
+        ry = y & s
+        ids += ((3 * rx) ^ ry) << a
+        flip = (ry == 0) & (rx != 0)
+        x = np.where(flip, s - 1 - x, x)
+        y = np.where(flip, s - 1 - y, y)
+        swap = ry == 0
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+    return ids
+
+
+def _varint(value: int) -> bytes:
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+
+class TileArchiveWriter:
+    """Base class of single-writer tile archives."""
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.tiles = 0
+        self.bytes = 0
+
+    def write(self, z: int, x: int, y: int, data: bytes):
+        """Add a gzip-compressed MVT tile (XYZ scheme)."""
+        raise NotImplementedError
+
+    def finish(self, metadata: Dict[str, Any]):
+        """
+        Write the archive metadata and close the archive.
+
+        Args:
+            metadata: name, bounds (west, south, east, north in degrees), minzoom,
+                maxzoom and vector_layers (TileJSON layer descriptions)
+        """
+        raise NotImplementedError
+
+
+class MBTilesWriter(TileArchiveWriter):
+    """MBTiles 1.3 archive: an SQLite database with TMS-addressed tiles."""
+
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        if self.path.exists():
+            self.path.unlink()
+        self.connection = sqlite3.connect(str(self.path))
+        self.connection.executescript("""
+            PRAGMA journal_mode = OFF;
+            PRAGMA synchronous = OFF;
+            CREATE TABLE metadata (name TEXT, value TEXT);
+            CREATE TABLE tiles (
+                zoom_level INTEGER, tile_column INTEGER, tile_row INTEGER, tile_data BLOB
+            );
+            """)
+        self.pending: List[Tuple[int, int, int, bytes]] = []
+
+    def write(self, z: int, x: int, y: int, data: bytes):
+        self.pending.append((z, x, (1 << z) - 1 - y, sqlite3.Binary(data)))
+        self.tiles += 1
+        self.bytes += len(data)
+        if len(self.pending) >= _MBTILES_COMMIT_INTERVAL:
+            self._flush()
+
+    def _flush(self):
+        with self.connection:
+            self.connection.executemany("INSERT INTO tiles VALUES (?, ?, ?, ?)", self.pending)
+        self.pending = []
+
+    def finish(self, metadata: Dict[str, Any]):
+        self._flush()
+        west, south, east, north = metadata["bounds"]
+        rows = {
+            "name": metadata["name"],
+            "format": "pbf",
+            "type": "overlay",
+            "version": "2",
+            "minzoom": str(metadata["minzoom"]),
+            "maxzoom": str(metadata["maxzoom"]),
+            "bounds": f"{west},{south},{east},{north}",
+            "center": f"{(west + east) / 2},{(south + north) / 2},{metadata['minzoom']}",
+            "json": json.dumps({"vector_layers": metadata["vector_layers"]}),
+        }
+        with self.connection:
+            self.connection.executemany("INSERT INTO metadata VALUES (?, ?)", rows.items())
+            self.connection.execute(
+                "CREATE UNIQUE INDEX tile_index ON tiles (zoom_level, tile_column, tile_row)"
+            )
+        self.connection.close()
+
+
+class PMTilesWriter(TileArchiveWriter):
+    """
+    PMTiles v3 archive: one file with a header, gzip-compressed directories,
+    metadata and tile data.
+
+    Tile data is appended to a temporary file as tiles arrive, identical tiles
+    (e.g. ocean or fully covered tiles) are stored once, and the directories are
+    built once all tiles are known.
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        super().__init__(path)
+        self.data_path = self.path.with_name(self.path.name + ".tmp")
+        self.data = open(self.data_path, "wb")
+        self.offset = 0
+        self.entries: List[Tuple[int, int, int]] = []
+        self.contents: Dict[bytes, Tuple[int, int]] = {}
+
+    def write(self, z: int, x: int, y: int, data: bytes):
+        digest = hashlib.sha1(data).digest()
+        if digest not in self.contents:
+            self.data.write(data)
+            self.contents[digest] = (self.offset, len(data))
+            self.offset += len(data)
+        offset, length = self.contents[digest]
+        self.entries.append((int(tile_ids(z, [x], [y])[0]), offset, length))
+        self.tiles += 1
+        self.bytes += len(data)
+
+    def _run_entries(self) -> List[Tuple[int, int, int, int]]:
+        """Sort entries by tile ID and merge runs of consecutive identical tiles."""
+        runs: List[List[int]] = []
+        for tile_id, offset, length in sorted(self.entries):
+            last = runs[-1] if runs else None
+            if last and last[0] + last[3] == tile_id and last[1] == offset:
+                last[3] += 1
+            else:
+                runs.append([tile_id, offset, length, 1])
+        return [tuple(run) for run in runs]
+
+    @staticmethod
+    def _serialize_directory(entries: List[Tuple[int, int, int, int]]) -> bytes:
+        out = bytearray(_varint(len(entries)))
+        last_id = 0
+        for tile_id, _, _, _ in entries:
+            out += _varint(tile_id - last_id)
+            last_id = tile_id
+        for _, _, _, run_length in entries:
+            out += _varint(run_length)
+        for _, _, length, _ in entries:
+            out += _varint(length)
+        for i, (_, offset, _, _) in enumerate(entries):
+            previous = entries[i - 1] if i else None
+            if previous and offset == previous[1] + previous[2]:
+                out += _varint(0)
+            else:
+                out += _varint(offset + 1)
+        return gzip.compress(bytes(out), mtime=0)
+
+    def _build_directories(self, entries) -> Tuple[bytes, bytes]:
+        """Root directory, plus leaf directories when the root would not fit the first 16 KiB."""
+        root = self._serialize_directory(entries)
+        if len(root) <= _PMTILES_ROOT_MAX:
+            return root, b""
+
+        leaf_size = 4096
+        while True:
+            root_entries = []
+            leaves = bytearray()
+            for start in range(0, len(entries), leaf_size):
+                leaf = self._serialize_directory(entries[start : start + leaf_size])
+                root_entries.append((entries[start][0], len(leaves), len(leaf), 0))
+                leaves += leaf
+            root = self._serialize_directory(root_entries)
+            if len(root) <= _PMTILES_ROOT_MAX:
+                return root, bytes(leaves)
+            leaf_size *= 2
+
+    def finish(self, metadata: Dict[str, Any]):
+        self.data.close()
+        entries = self._run_entries()
+        root, leaves = self._build_directories(entries)
+        meta = gzip.compress(json.dumps({**metadata, "format": "pbf"}).encode("utf-8"), mtime=0)
+
+        west, south, east, north = metadata["bounds"]
+        root_offset = _PMTILES_HEADER_SIZE
+        metadata_offset = root_offset + len(root)
+        leaves_offset = metadata_offset + len(meta)
+        data_offset = leaves_offset + len(leaves)
+        header = struct.pack(
+            "<7sB11Q6B4iB2i",
+            b"PMTiles",
+            3,
+            root_offset,
+            len(root),
+            metadata_offset,
+            len(meta),
+            leaves_offset,
+            len(leaves),
+            data_offset,
+            self.offset,
+            sum(entry[3] for entry in entries),
+            len(entries),
+            len(self.contents),
+            0,  # tile data is not clustered
+            _PMTILES_GZIP,
+            _PMTILES_GZIP,
+            _PMTILES_MVT,
+            metadata["minzoom"],
+            metadata["maxzoom"],
+            int(west * 1e7),
+            int(south * 1e7),
+            int(east * 1e7),
+            int(north * 1e7),
+            metadata["minzoom"],
+            int((west + east) / 2 * 1e7),
+            int((south + north) / 2 * 1e7),
+        )
+
+        with open(self.path, "wb") as f:
+            f.write(header)
+            f.write(root)
+            f.write(meta)
+            f.write(leaves)
+            with open(self.data_path, "rb") as data:
+                shutil.copyfileobj(data, f)
+        os.remove(self.data_path)
+
+
+def open_tile_archive(path: Union[str, Path]) -> TileArchiveWriter:
+    """Open an archive writer for a .pmtiles or .mbtiles path."""
+    suffix = Path(path).suffix.lstrip(".").lower()
+    if suffix == "pmtiles":
+        return PMTilesWriter(path)
+    if suffix == "mbtiles":
+        return MBTilesWriter(path)
+    raise ProcessingError(
+        f"Unsupported tile archive: {path}. Use one of: "
+        f"{', '.join('.' + fmt for fmt in TILE_ARCHIVE_FORMATS)}"
+    )
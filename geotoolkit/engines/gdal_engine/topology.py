@@ -0,0 +1,436 @@
+import itertools
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import shapely
+
+from ...utils.memory import BATCH_BUDGET_FRACTION, WORKING_SET_FACTOR, memory_budget, worker_limit
+
+# shapely type ids of polygonal geometries
+_POLYGONAL = (3, 6)
+
+# Layers smaller than this are cleaned in a single tile unless they exceed the memory budget
+MIN_FEATURES_PER_TILE = 50000
+
+
+def _coordinate_rings(geoms: np.ndarray) -> np.ndarray:
+    """Ring (or line, or point) index of every coordinate, in get_coordinates order."""
+    parts = shapely.get_parts(geoms)
+    polygon = shapely.get_type_id(parts) == 3
+    polygon_index = np.flatnonzero(polygon)
+    rings, ring_owner = shapely.get_rings(parts[polygon_index], return_index=True)
+    lengths = np.concatenate(
+        [shapely.get_num_coordinates(rings), shapely.get_num_coordinates(parts[~polygon])]
+    )
+    owner = np.concatenate([polygon_index[ring_owner], np.flatnonzero(~polygon)])
+    lengths = lengths[np.argsort(owner, kind="stable")]
+    return np.repeat(np.arange(len(lengths)), lengths)
+
+
+def cluster_vertices(geoms: np.ndarray, tolerance: float) -> Tuple[np.ndarray, int]:
+    """
+    Make vertices of different rings and lines closer than tolerance coincident.
+
+    Candidate pairs come from an STRtree over the distinct vertices. Clusters are
+    grown greedily from seeds, taken in order of their number of neighbours: a
+    seed takes the unassigned vertices within tolerance of it, so no vertex
+    moves by more than tolerance and closely spaced vertices do not chain into
+    one cluster. A cluster never takes two vertices of the same ring or line, so
+    segments do not collapse.
+
+    Args:
+        geoms: Array of shapely geometries
+        tolerance: Cluster tolerance in layer units
+
+    Returns:
+        Tuple of (clustered geometries, number of vertices moved)
+    """
+    include_z = bool(shapely.has_z(geoms).any())
+    coords = shapely.get_coordinates(geoms, include_z=include_z)
+    if len(coords) == 0 or tolerance <= 0:
+        return geoms, 0
+
+    unique, inverse = np.unique(coords[:, :2], axis=0, return_inverse=True)
+    inverse = inverse.reshape(-1)
+    points = shapely.points(unique)
+    left, right = shapely.STRtree(points).query(points, predicate="dwithin", distance=tolerance)
+    pairs = left != right
+    left, right = left[pairs], right[pairs]
+    if len(left) == 0:
+        return geoms, 0
+
+    # Rings and lines each distinct vertex belongs to
+    vertex_rings = np.unique(np.column_stack([inverse, _coordinate_rings(geoms)]), axis=0)
+    ring_starts = np.searchsorted(vertex_rings[:, 0], np.arange(len(unique) + 1))
+    neighbour_starts = np.searchsorted(left, np.arange(len(unique) + 1))
+
+    labels = np.arange(len(unique))
+    assigned = np.zeros(len(unique), dtype=bool)
+    degree = np.diff(neighbour_starts)
+    for seed in np.argsort(-degree, kind="stable")[: np.count_nonzero(degree)]:
+        if assigned[seed]:
+            continue
+        assigned[seed] = True
+        rings = set(vertex_rings[ring_starts[seed] : ring_starts[seed + 1], 1])
+        neighbours = right[neighbour_starts[seed] : neighbour_starts[seed + 1]]
+        neighbours = neighbours[~assigned[neighbours]]
+        distances = shapely.distance(points[seed], points[neighbours])
+        for vertex in neighbours[np.argsort(distances, kind="stable")]:
+            vertex_ring_ids = set(vertex_rings[ring_starts[vertex] : ring_starts[vertex + 1], 1])
+            if rings.isdisjoint(vertex_ring_ids):
+                rings |= vertex_ring_ids
+                labels[vertex] = seed
+                assigned[vertex] = True
+
+    moved = labels[inverse] != inverse
+    if not moved.any():
+        return geoms, 0
+    coords[:, :2] = unique[labels[inverse]]
+    return shapely.set_coordinates(geoms.copy(), coords), int(moved.sum())
+
+
+def snap_to_neighbours(geoms: np.ndarray, tolerance: float) -> Tuple[np.ndarray, int]:
+    """
+    Snap geometries to the vertices and edges of nearby geometries.
+
+    Each geometry snaps only to neighbours earlier in the array, so shared
+    boundaries converge on one side instead of snapping towards each other.
+
+    Args:
+        geoms: Array of shapely geometries
+        tolerance: Snap tolerance in layer units
+
+    Returns:
+        Tuple of (snapped geometries, number of geometries snapped)
+    """
+    present = ~shapely.is_missing(geoms) & ~shapely.is_empty(geoms)
+    if tolerance <= 0 or present.sum() < 2:
+        return geoms, 0
+
+    tree = shapely.STRtree(geoms)
+    targets, references = tree.query(geoms, predicate="dwithin", distance=tolerance)
+    earlier = references < targets
+    targets, references = targets[earlier], references[earlier]
+    if len(targets) == 0:
+        return geoms, 0
+
+    snapped_ids, group = np.unique(targets, return_inverse=True)
+    reference_geoms = shapely.geometrycollections(geoms[references], indices=group)
+
+    result = geoms.copy()
+    result[snapped_ids] = shapely.snap(geoms[snapped_ids], reference_geoms, tolerance)
+    return result, len(snapped_ids)
+
+
+def _polygonal_parts(geom):
+    """Keep only the polygonal parts of a repaired geometry."""
+    parts = shapely.get_parts(geom)
+    polygons = parts[np.isin(shapely.get_type_id(parts), _POLYGONAL)]
+    if len(polygons) == 0:
+        return None
+    if len(polygons) == 1:
+        return polygons[0]
+    return shapely.multipolygons(shapely.get_parts(polygons))
+
+
+def repair_polygons(geoms: np.ndarray) -> np.ndarray:
+    """Repair polygons invalidated by snapping, keeping the result polygonal."""
+    polygonal = np.isin(shapely.get_type_id(geoms), _POLYGONAL)
+    invalid = np.flatnonzero(polygonal & ~shapely.is_valid(geoms))
+    if len(invalid) == 0:
+        return geoms
+
+    result = geoms.copy()
+    for i, repaired in zip(invalid, shapely.make_valid(geoms[invalid])):
+        result[i] = _polygonal_parts(repaired)
+    return result
+
+
+def remove_slivers(geoms: np.ndarray, min_area: float) -> Tuple[np.ndarray, int]:
+    """
+    Drop polygon parts smaller than min_area.
+
+    Features with no remaining parts become None.
+
+    Args:
+        geoms: Array of shapely geometries
+        min_area: Minimum polygon area in squared layer units
+
+    Returns:
+        Tuple of (cleaned geometries, number of parts removed)
+    """
+    polygonal = np.flatnonzero(np.isin(shapely.get_type_id(geoms), _POLYGONAL))
+    if len(polygonal) == 0:
+        return geoms, 0
+
+    parts, owner = shapely.get_parts(geoms[polygonal], return_index=True)
+    sliver = shapely.area(parts) < min_area
+    if not sliver.any():
+        return geoms, 0
+
+    result = geoms.copy()
+    part_counts = np.bincount(owner, minlength=len(polygonal))
+    kept_counts = np.bincount(owner[~sliver], minlength=len(polygonal))
+
+    result[polygonal[kept_counts == 0]] = None
+    partial = np.flatnonzero((kept_counts > 0) & (kept_counts < part_counts))
+    if len(partial):
+        keep = ~sliver & np.isin(owner, partial)
+        _, group = np.unique(owner[keep], return_inverse=True)
+        rebuilt = shapely.multipolygons(parts[keep], indices=group)
+        single = kept_counts[partial] == 1
+        rebuilt[single] = shapely.get_geometry(rebuilt[single], 0)
+        result[polygonal[partial]] = rebuilt
+
+    return result, int(sliver.sum())
+
+
+def clean_geometries(
+    geoms: np.ndarray, snap_tolerance: float, cluster_tolerance: float, min_area: float
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """
+    Cluster vertices, snap to neighbours and remove slivers.
+
+    Args:
+        geoms: Array of shapely geometries
+        snap_tolerance: Vertex-to-edge snap tolerance
+        cluster_tolerance: Vertex-to-vertex cluster tolerance
+        min_area: Minimum polygon area
+
+    Returns:
+        Tuple of (cleaned geometries, statistics)
+    """
+    geoms, moved = cluster_vertices(geoms, cluster_tolerance)
+    geoms, snapped = snap_to_neighbours(geoms, snap_tolerance)
+    geoms = repair_polygons(geoms)
+    geoms, slivers = remove_slivers(geoms, min_area)
+    return geoms, {
+        "vertices_clustered": moved,
+        "features_snapped": snapped,
+        "slivers_removed": slivers,
+    }
+
+
+def _clean_tile(
+    wkbs: np.ndarray, snap_tolerance: float, cluster_tolerance: float, min_area: float
+) -> Tuple[np.ndarray, Dict[str, int]]:
+    """Worker: clean the geometries of one spatial tile."""
+    geoms, stats = clean_geometries(
+        shapely.from_wkb(wkbs), snap_tolerance, cluster_tolerance, min_area
+    )
+    return shapely.to_wkb(geoms), stats
+
+
+def _tile_layout(bounds: np.ndarray, n_tiles: int, margin: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Assign features to a grid of tiles by bounding-box centre.
+
+    Returns:
+        Tuple of (tile id per feature, seam mask for features within margin of an
+        interior tile boundary)
+    """
+    valid = np.isfinite(bounds).all(axis=1)
+    extent_min = bounds[valid, :2].min(axis=0)
+    extent_max = bounds[valid, 2:].max(axis=0)
+    grid = max(int(np.ceil(np.sqrt(n_tiles))), 1)
+    edges = [np.linspace(extent_min[k], extent_max[k], grid + 1) for k in range(2)]
+
+    centre = np.where(valid[:, None], (bounds[:, :2] + bounds[:, 2:]) / 2, extent_min)
+    cell = np.column_stack(
+        [
+            np.clip(np.searchsorted(edges[k], centre[:, k], side="right") - 1, 0, grid - 1)
+            for k in range(2)
+        ]
+    )
+
+    seam = np.zeros(len(bounds), dtype=bool)
+    for k in range(2):
+        # Outer edges of the grid are not seams
+        low = np.where(cell[:, k] > 0, edges[k][cell[:, k]], -np.inf)
+        high = np.where(cell[:, k] < grid - 1, edges[k][cell[:, k] + 1], np.inf)
+        seam |= (bounds[:, k] - margin < low) | (bounds[:, k + 2] + margin > high)
+
+    return cell[:, 1] * grid + cell[:, 0], seam & valid
+
+
+def _moved_vertices(before: np.ndarray, after: np.ndarray) -> np.ndarray:
+    """Vertices of the geometries before cleaning that are not in the cleaned ones."""
+    old = shapely.get_coordinates(before)
+    new = shapely.get_coordinates(after)
+    moved = ~np.isin(old[:, 0] + 1j * old[:, 1], new[:, 0] + 1j * new[:, 1])
+    return np.unique(old[moved], axis=0)
+
+
+def _clean_seams(
+    result: np.ndarray,
+    seam_ids: np.ndarray,
+    totals: Dict[str, Any],
+    snap_tolerance: float,
+    cluster_tolerance: float,
+    min_area: float,
+) -> np.ndarray:
+    """
+    Clean the features along tile seams again, together, in place.
+
+    Features sharing a vertex that the seam pass moves are added to the pass,
+    until it moves no vertex of a feature left out, so shared boundaries with
+    features away from the seams stay closed. Only the features in result are
+    considered: a feature already yielded with its tile is not cleaned again,
+    even if it shares a vertex the seam pass moves (see clean_tiles).
+
+    Returns:
+        Indices of the features cleaned again
+    """
+    if not len(seam_ids):
+        return seam_ids
+    tree = shapely.STRtree(result)
+    while True:
+        cleaned, stats = clean_geometries(
+            result[seam_ids], snap_tolerance, cluster_tolerance, min_area
+        )
+        moved = _moved_vertices(result[seam_ids], cleaned)
+        touching = np.unique(tree.query(shapely.points(moved), predicate="intersects")[1])
+        extra = np.setdiff1d(touching, seam_ids)
+        if not len(extra):
+            break
+        seam_ids = np.union1d(seam_ids, extra)
+
+    result[seam_ids] = cleaned
+    for key in ("vertices_clustered", "features_snapped", "slivers_removed"):
+        totals[key] += stats[key]
+    return seam_ids
+
+
+def _tile_count(sizes: np.ndarray, max_workers: int) -> int:
+    """Tiles keeping each tile's working set within the batch budget, two per worker."""
+    budget = memory_budget() * BATCH_BUDGET_FRACTION
+    tiles = int(np.ceil(float(sizes.sum()) * WORKING_SET_FACTOR / budget))
+    if max_workers > 1:
+        tiles = max(tiles, min(max_workers * 2, len(sizes) // MIN_FEATURES_PER_TILE))
+    return tiles
+
+
+def clean_tiles(
+    bounds: np.ndarray,
+    sizes: np.ndarray,
+    read_tile: Callable[[np.ndarray], np.ndarray],
+    snap_tolerance: float,
+    cluster_tolerance: float,
+    min_area: float,
+    max_workers: int = 1,
+    stats: Optional[Dict[str, Any]] = None,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Clean a layer tile by tile, yielding features once their geometries are final.
+
+    Features are assigned to a grid of spatial tiles small enough for a tile to
+    fit in the batch share of the memory budget, with at least two tiles per
+    worker for large layers. Each tile is read only when a worker is free and is
+    yielded when cleaned, except for the features along interior tile seams and
+    their neighbours: these are held back and cleaned again together at the end
+    (see _clean_seams), so clusters and snaps crossing a seam are reconciled.
+
+    Every feature within twice the larger tolerance of an interior tile boundary
+    is held, together with the features of its tile within that distance of it.
+    Limitation: a feature further from the seam that shares a vertex with a
+    held one is written with its tile, and is not re-snapped if the seam pass
+    moves that vertex, leaving a gap of at most the cluster tolerance.
+
+    Args:
+        bounds: (N, 4) feature bounds, NaN for missing and empty geometries
+        sizes: Approximate size of each feature in bytes
+        read_tile: Returns the shapely geometries of features by position
+        snap_tolerance: Vertex-to-edge snap tolerance
+        cluster_tolerance: Vertex-to-vertex cluster tolerance
+        min_area: Minimum polygon area
+        max_workers: Worker processes, throttled to the memory budget
+        stats: Dictionary receiving the statistics
+
+    Yields:
+        (feature positions, cleaned geometries) pairs
+    """
+    stats = stats if stats is not None else {}
+    stats.update(vertices_clustered=0, features_snapped=0, slivers_removed=0)
+    n_tiles = _tile_count(sizes, max_workers)
+    valid = np.isfinite(bounds).all(axis=1)
+    if n_tiles < 2 or valid.sum() < 2:
+        positions = np.arange(len(bounds))
+        geoms, tile_stats = clean_geometries(
+            read_tile(positions), snap_tolerance, cluster_tolerance, min_area
+        )
+        stats.update(tile_stats, tiles=1, workers=1, seam_features=0)
+        yield positions, geoms
+        return
+
+    margin = 2 * max(snap_tolerance, cluster_tolerance)
+    tile_ids, seam = _tile_layout(bounds, n_tiles, margin)
+    tiles: List[np.ndarray] = [np.flatnonzero(tile_ids == t) for t in np.unique(tile_ids)]
+    largest_tile = max(sizes[members].sum() for members in tiles)
+    workers = worker_limit(max_workers, largest_tile * WORKING_SET_FACTOR)
+    stats.update(tiles=len(tiles), workers=workers)
+
+    held_positions, held_geoms = [], []
+    for members, wkbs, tile_stats in _map_tiles(
+        tiles, read_tile, workers, snap_tolerance, cluster_tolerance, min_area
+    ):
+        for key, value in tile_stats.items():
+            stats[key] += value
+        geoms = shapely.from_wkb(wkbs)
+
+        # Hold back the seam features and the features within reach of them
+        seam_geoms = geoms[seam[members] & ~shapely.is_missing(geoms)]
+        held = seam[members].copy()
+        if len(seam_geoms):
+            near = shapely.STRtree(geoms).query(seam_geoms, predicate="dwithin", distance=margin)
+            held[near[1]] = True
+        held_positions.append(members[held])
+        held_geoms.append(geoms[held])
+        if not held.all():
+            yield members[~held], geoms[~held]
+
+    positions = np.concatenate(held_positions)
+    geoms = np.concatenate(held_geoms)
+    seam_ids = _clean_seams(
+        geoms,
+        np.flatnonzero(seam[positions] & ~shapely.is_missing(geoms)),
+        stats,
+        snap_tolerance,
+        cluster_tolerance,
+        min_area,
+    )
+    stats["seam_features"] = len(seam_ids)
+    if len(positions):
+        yield positions, geoms
+
+
+def _map_tiles(
+    tiles: List[np.ndarray],
+    read_tile: Callable[[np.ndarray], np.ndarray],
+    workers: int,
+    snap_tolerance: float,
+    cluster_tolerance: float,
+    min_area: float,
+) -> Iterator[Tuple[np.ndarray, np.ndarray, Dict[str, int]]]:
+    """Clean tiles with at most one tile per worker in memory, yielding them as they finish."""
+    args = (snap_tolerance, cluster_tolerance, min_area)
+    if workers <= 1:
+        for members in tiles:
+            yield (members, *_clean_tile(shapely.to_wkb(read_tile(members)), *args))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        queue = iter(tiles)
+        pending = {}
+
+        def submit(count: int):
+            for members in itertools.islice(queue, count):
+                wkbs = shapely.to_wkb(read_tile(members))
+                pending[executor.submit(_clean_tile, wkbs, *args)] = members
+
+        submit(workers)
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield (pending.pop(future), *future.result())
+                submit(1)
@@ -0,0 +1,389 @@
+import gzip
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import shapely
+from osgeo import ogr, osr
+
+from ...core.exceptions import ProcessingError
+from ...utils.config import ConfigManager
+from ...utils.memory import WORKING_SET_FACTOR, worker_limit
+from .filters import apply_filters
+from .geometry_buffer import GeometryBuffer, LayerSchema
+from .mvt import encode_layer, encode_tile, tile_coordinates
+from .srs import spatial_reference
+from .tile_archives import open_tile_archive, tile_ids
+
+# Half the width of the Web Mercator (EPSG:3857) square, in metres
+WEB_MERCATOR_EXTENT = 20037508.342789244
+
+# Latitude where Web Mercator reaches WEB_MERCATOR_EXTENT
+_MAX_LATITUDE = 85.0511287798066
+
+# Tiles rendered per worker task; neighbouring tiles share most of their features
+TILES_PER_TASK = 64
+
+# In-memory bytes per coordinate of a shapely geometry
+_BYTES_PER_COORDINATE = 16
+
+_FIELD_TYPES = {ogr.OFTInteger: "Number", ogr.OFTInteger64: "Number", ogr.OFTReal: "Number"}
+
+
+@dataclass
+class TileLayer:
+    """Features of one layer in Web Mercator, ready to be tiled"""
+
+    name: str
+    geoms: np.ndarray
+    fids: np.ndarray
+    attributes: Dict[str, np.ndarray]
+    schema: LayerSchema
+
+
+def tile_bounds(z: int, x: int, y: int) -> Tuple[float, float, float, float]:
+    """Web Mercator bounds (minx, miny, maxx, maxy) of an XYZ tile."""
+    size = 2 * WEB_MERCATOR_EXTENT / (1 << z)
+    minx = -WEB_MERCATOR_EXTENT + x * size
+    maxy = WEB_MERCATOR_EXTENT - y * size
+    return minx, maxy - size, minx + size, maxy
+
+
+def _lonlat(x: np.ndarray, y: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Inverse spherical Web Mercator."""
+    lon = np.degrees(x / 6378137.0)
+    lat = np.degrees(2 * np.arctan(np.exp(y / 6378137.0)) - np.pi / 2)
+    return lon, lat
+
+
+def load_tile_layer(layer) -> TileLayer:
+    """
+    Load a layer reprojected to Web Mercator.
+
+    Latitudes of geographic layers are clamped to the Web Mercator limits first.
+    """
+    target_srs = spatial_reference(3857)
+    target_wkt = target_srs.ExportToWkt()
+    source_srs = layer.GetSpatialRef()
+    transform = None
+    if source_srs is not None and not source_srs.IsSame(target_srs):
+        transform = osr.CoordinateTransformation(source_srs, target_srs)
+    geographic = source_srs is not None and source_srs.IsGeographic()
+
+    buffers = []
+    for buffer in GeometryBuffer.iter_layer(layer):
+        if transform is not None:
+            if geographic:
+                buffer.coords[:, 1] = np.clip(buffer.coords[:, 1], -_MAX_LATITUDE, _MAX_LATITUDE)
+            buffer, _ = buffer.transform(transform, target_wkt)
+        buffers.append(buffer)
+    buffer = GeometryBuffer.concat(buffers, LayerSchema.from_layer(layer))
+    return TileLayer(
+        layer.GetName(), buffer.to_shapely(), buffer.fids, buffer.attributes, buffer.schema
+    )
+
+
+def _candidate_tiles(bounds: np.ndarray, z: int, margin: float) -> np.ndarray:
+    """Unique (x, y) tiles overlapping the bounding boxes, grown by a margin."""
+    n = 1 << z
+    size = 2 * WEB_MERCATOR_EXTENT / n
+    valid = np.isfinite(bounds).all(axis=1)
+    bounds = bounds[valid]
+    if not len(bounds):
+        return np.empty((0, 2), dtype=np.int64)
+
+    def cell(values):
+        return np.clip(np.floor(values / size), 0, n - 1).astype(np.int64)
+
+    x0 = cell(bounds[:, 0] - margin + WEB_MERCATOR_EXTENT)
+    x1 = cell(bounds[:, 2] + margin + WEB_MERCATOR_EXTENT)
+    y0 = cell(WEB_MERCATOR_EXTENT - bounds[:, 3] - margin)
+    y1 = cell(WEB_MERCATOR_EXTENT - bounds[:, 1] + margin)
+
+    width = x1 - x0 + 1
+    counts = width * (y1 - y0 + 1)
+    owner = np.repeat(np.arange(len(counts)), counts)
+    local = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+    keys = np.unique((x0[owner] + local % width[owner]) * n + y0[owner] + local // width[owner])
+    return np.column_stack([keys // n, keys % n])
+
+
+def _bucket_features(
+    tree: shapely.STRtree, tiles: np.ndarray, z: int, margin: float
+) -> List[np.ndarray]:
+    """Features intersecting each buffered tile, found with one bulk query of the STRtree."""
+    if not len(tiles):
+        return []
+    size = 2 * WEB_MERCATOR_EXTENT / (1 << z)
+    minx = -WEB_MERCATOR_EXTENT + tiles[:, 0] * size
+    maxy = WEB_MERCATOR_EXTENT - tiles[:, 1] * size
+    boxes = shapely.box(minx - margin, maxy - size - margin, minx + size + margin, maxy + margin)
+    tile_index, feature_index = tree.query(boxes, predicate="intersects")
+    order = np.lexsort((feature_index, tile_index))
+    tile_index, feature_index = tile_index[order], feature_index[order]
+    splits = np.searchsorted(tile_index, np.arange(1, len(tiles)))
+    return np.split(feature_index, splits)
+
+
+def _dimension_parts(geom, dimension: int):
+    """Keep the parts of a clipped GeometryCollection with the source dimension."""
+    parts = shapely.get_parts(geom)
+    parts = parts[shapely.get_dimensions(parts) == dimension]
+    return shapely.union_all(parts) if len(parts) else None
+
+
+def _render_tiles(
+    z: int,
+    tiles: np.ndarray,
+    layers: List[Tuple[str, np.ndarray, np.ndarray, Dict[str, np.ndarray], List[np.ndarray]]],
+    extent: int,
+    buffer: int,
+) -> Tuple[List[Tuple[int, int, int, bytes]], int]:
+    """
+    Worker: clip, encode and compress a group of tiles.
+
+    Args:
+        z: Zoom level
+        tiles: (N, 2) array of tile columns and rows
+        layers: Per layer: name, geometries, FIDs, attributes and the positions of
+            the features of every tile
+        extent: Tile extent in tile coordinate units
+        buffer: Tile buffer in tile coordinate units
+
+    Returns:
+        Tuple of (encoded tiles, number of features written)
+    """
+    results = []
+    features = 0
+    for t, (x, y) in enumerate(tiles):
+        bounds = tile_bounds(z, int(x), int(y))
+        margin = (bounds[2] - bounds[0]) * buffer / extent
+        clip_box = (
+            bounds[0] - margin,
+            bounds[1] - margin,
+            bounds[2] + margin,
+            bounds[3] + margin,
+        )
+
+        encoded = []
+        for name, geoms, fids, attributes, members in layers:
+            index = members[t]
+            if not len(index):
+                continue
+            source = geoms[index]
+            clipped = shapely.clip_by_rect(source, *clip_box)
+            collections = np.flatnonzero(shapely.get_type_id(clipped) == 7)
+            for i in collections:
+                clipped[i] = _dimension_parts(clipped[i], shapely.get_dimensions(source[i]))
+            clipped[shapely.is_empty(clipped)] = None
+
+            layer, count = encode_layer(
+                name,
+                tile_coordinates(clipped, bounds, extent),
+                fids[index],
+                {key: column[index] for key, column in attributes.items()},
+                extent,
+            )
+            if layer is not None:
+                encoded.append(layer)
+                features += count
+
+        if encoded:
+            results.append((z, int(x), int(y), gzip.compress(encode_tile(encoded), mtime=0)))
+    return results, features
+
+
+def _zoom_tasks(
+    layers: List[TileLayer],
+    z: int,
+    extent: int,
+    buffer: int,
+    simplify: float,
+) -> Tuple[List[np.ndarray], List[Tuple[Any, ...]], float]:
+    """
+    Simplify every layer for a zoom level and bucket its features into tiles.
+
+    Returns:
+        Tuple of (tiles of every task, per-layer payload of every task, estimated
+        bytes of the largest task)
+    """
+    size = 2 * WEB_MERCATOR_EXTENT / (1 << z)
+    pixel = size / extent
+    margin = pixel * buffer
+
+    simplified = []
+    for layer in layers:
+        geoms = layer.geoms
+        if simplify > 0:
+            geoms = shapely.simplify(geoms, simplify * pixel, preserve_topology=False)
+        geoms = np.where(shapely.is_empty(geoms), None, geoms)
+        simplified.append(geoms)
+
+    tiles = np.unique(
+        np.concatenate(
+            [_candidate_tiles(shapely.bounds(geoms), z, margin) for geoms in simplified]
+        ),
+        axis=0,
+    )
+    if not len(tiles):
+        return [], [], 0.0
+    tiles = tiles[np.argsort(tile_ids(z, tiles[:, 0], tiles[:, 1]), kind="stable")]
+    buckets = [_bucket_features(shapely.STRtree(geoms), tiles, z, margin) for geoms in simplified]
+
+    task_tiles, task_layers = [], []
+    largest = 0.0
+    for start in range(0, len(tiles), TILES_PER_TASK):
+        stop = min(start + TILES_PER_TASK, len(tiles))
+        payload = []
+        nbytes = 0.0
+        for layer, geoms, members in zip(layers, simplified, buckets):
+            chunk = members[start:stop]
+            index = np.unique(np.concatenate(chunk)) if chunk else np.empty(0, dtype=np.int64)
+            local = [np.searchsorted(index, tile_members) for tile_members in chunk]
+            payload.append(
+                (
+                    layer.name,
+                    geoms[index],
+                    layer.fids[index],
+                    {key: column[index] for key, column in layer.attributes.items()},
+                    local,
+                )
+            )
+            nbytes += shapely.get_num_coordinates(geoms[index]).sum() * _BYTES_PER_COORDINATE
+        task_tiles.append(tiles[start:stop])
+        task_layers.append(payload)
+        largest = max(largest, nbytes * WORKING_SET_FACTOR)
+    return task_tiles, task_layers, largest
+
+
+def vector_layer_metadata(layers: List[TileLayer], min_zoom: int, max_zoom: int) -> List[Dict]:
+    """TileJSON vector_layers entries describing the tiled layers."""
+    return [
+        {
+            "id": layer.name,
+            "fields": {
+                spec.name: _FIELD_TYPES.get(spec.type, "String") for spec in layer.schema.fields
+            },
+            "minzoom": min_zoom,
+            "maxzoom": max_zoom,
+        }
+        for layer in layers
+    ]
+
+
+def generate_vector_tiles(
+    dataset: Union[str, Path],
+    output_path: Union[str, Path],
+    min_zoom: int = 0,
+    max_zoom: int = 14,
+    layers: Optional[Sequence[str]] = None,
+    extent: int = 4096,
+    buffer: int = 64,
+    simplify: float = 1.0,
+    max_workers: Optional[int] = None,
+    where: Optional[str] = None,
+    bbox: Optional[Sequence[float]] = None,
+    mask: Any = None,
+) -> Dict[str, Any]:
+    """
+    Build a Mapbox Vector Tile pyramid in a PMTiles or MBTiles archive.
+
+    Layers are loaded once in Web Mercator. For every zoom level, geometries are
+    simplified in one vectorized call, candidate tiles are derived from their
+    bounding boxes and features are bucketed into tiles with a bulk STRtree query.
+    Groups of neighbouring tiles are clipped and encoded in worker processes,
+    while the main process writes the archive.
+
+    Args:
+        dataset: Vector dataset to tile
+        output_path: Archive path ending in .pmtiles or .mbtiles
+        min_zoom: First zoom level
+        max_zoom: Last zoom level
+        layers: Names of the layers to tile, defaults to all layers
+        extent: Tile extent in tile coordinate units
+        buffer: Tile buffer in tile coordinate units, drawn around every tile
+        simplify: Simplification tolerance in tile coordinate units (0 disables it)
+        max_workers: Worker processes, defaults to the configured max_threads and
+            throttled to the memory budget
+        where: Attribute filter (OGR SQL WHERE clause)
+        bbox: Spatial filter (minx, miny, maxx, maxy) in each layer's coordinate system
+        mask: Spatial filter geometry in each layer's coordinate system
+
+    Returns:
+        Dictionary of tiling metrics
+    """
+    if not 0 <= min_zoom <= max_zoom <= 24:
+        raise ProcessingError(f"Invalid zoom range: {min_zoom}-{max_zoom}")
+    output_path = Path(output_path)
+    max_workers = max_workers or ConfigManager().config.max_threads
+    started = time.perf_counter()
+
+    ds = ogr.Open(str(dataset), 0)
+    if ds is None:
+        raise ProcessingError(f"Could not open dataset: {dataset}")
+    source_layers = [layer for layer in ds if layers is None or layer.GetName() in layers]
+    if layers is not None and len(source_layers) != len(set(layers)):
+        found = {layer.GetName() for layer in source_layers}
+        raise ProcessingError(f"Layers not found: {', '.join(sorted(set(layers) - found))}")
+    tile_layers = [
+        load_tile_layer(apply_filters(layer, where, bbox, mask)) for layer in source_layers
+    ]
+    ds = None
+
+    archive = open_tile_archive(output_path)
+    metrics: Dict[str, Any] = {"tiles_per_zoom": {}, "features": 0}
+
+    def write(future):
+        results, features = future.result()
+        for tile in results:
+            archive.write(*tile)
+        metrics["features"] += features
+
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for z in range(min_zoom, max_zoom + 1):
+            task_tiles, task_layers, task_bytes = _zoom_tasks(
+                tile_layers, z, extent, buffer, simplify
+            )
+            in_flight = 2 * worker_limit(max_workers, task_bytes)
+            tiles_before = archive.tiles
+
+            # Keep a bounded number of tasks in flight so results never pile up in memory
+            pending = set()
+            for tiles, payload in zip(task_tiles, task_layers):
+                if len(pending) >= in_flight:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(future)
+                pending.add(executor.submit(_render_tiles, z, tiles, payload, extent, buffer))
+            for future in pending:
+                write(future)
+            metrics["tiles_per_zoom"][z] = archive.tiles - tiles_before
+
+    bounds = np.array(
+        [shapely.total_bounds(layer.geoms) for layer in tile_layers if len(layer.geoms)]
+    )
+    if len(bounds) and np.isfinite(bounds).all():
+        west, south = _lonlat(bounds[:, 0].min(), bounds[:, 1].min())
+        east, north = _lonlat(bounds[:, 2].max(), bounds[:, 3].max())
+    else:
+        west, south, east, north = -180.0, -_MAX_LATITUDE, 180.0, _MAX_LATITUDE
+    archive.finish(
+        {
+            "name": Path(dataset).stem,
+            "bounds": [float(west), float(south), float(east), float(north)],
+            "minzoom": min_zoom,
+            "maxzoom": max_zoom,
+            "vector_layers": vector_layer_metadata(tile_layers, min_zoom, max_zoom),
+        }
+    )
+
+    metrics.update(
+        output=output_path,
+        tiles=archive.tiles,
+        bytes=archive.bytes,
+        seconds=time.perf_counter() - started,
+    )
+    return metrics
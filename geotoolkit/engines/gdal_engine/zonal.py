@@ -0,0 +1,190 @@
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+import shapely
+
+from ...core.exceptions import ProcessingError
+from ...utils.memory import window_rows
+from .partitioning import spatial_order
+from .raster import north_up_geotransform, open_shared_raster, pixel_windows
+
+ZONAL_STATISTICS = ("count", "nodata", "min", "max", "mean", "std", "sum", "median")
+
+DEFAULT_ZONAL_STATISTICS = ("count", "min", "max", "mean", "std")
+
+# Integer statistics; the others are floats, null for zones without valid pixels
+COUNT_STATISTICS = ("count", "nodata")
+
+# Zones per task: consecutive zones of a spatially sorted batch share raster blocks
+ZONAL_TASK_ZONES = 256
+
+# Raw pixel, its float64 copy, pixel centres and mask, per window pixel
+_BYTES_PER_PIXEL = 48
+
+
+def resolve_zonal_statistics(stats: Sequence[str]) -> Tuple[str, ...]:
+    """Validate the requested statistics."""
+    stats = tuple(stats)
+    unknown = [name for name in stats if name not in ZONAL_STATISTICS]
+    if unknown or not stats:
+        raise ProcessingError(
+            f"Unsupported zonal statistics: {', '.join(unknown) or 'none requested'}. "
+            f"Choose from {', '.join(ZONAL_STATISTICS)}"
+        )
+    return stats
+
+
+def zone_mask(
+    geom, window: Sequence[int], geotransform: Sequence[float], all_touched: bool = False
+) -> np.ndarray:
+    """
+    Rasterize a zone into a raster window.
+
+    Args:
+        geom: Prepared shapely polygon in the raster's coordinate system
+        window: xoff, yoff, xsize, ysize of the window
+        geotransform: North-up geotransform of the raster
+        all_touched: Include every pixel the zone touches instead of the pixels
+            whose centre lies in the zone
+
+    Returns:
+        Boolean array of the window's shape
+    """
+    xoff, yoff, xsize, ysize = window
+    x0, dx, _, y0, _, dy = geotransform
+    left = x0 + np.arange(xoff, xoff + xsize) * dx
+    top = y0 + np.arange(yoff, yoff + ysize) * dy
+    if all_touched:
+        pixels = shapely.box(
+            np.minimum(left, left + dx)[None, :],
+            np.minimum(top, top + dy)[:, None],
+            np.maximum(left, left + dx)[None, :],
+            np.maximum(top, top + dy)[:, None],
+        )
+        return shapely.intersects(geom, pixels)
+    return shapely.intersects_xy(geom, (left + dx / 2)[None, :], (top + dy / 2)[:, None])
+
+
+def zone_statistics(
+    band,
+    geom,
+    window: Sequence[int],
+    geotransform: Sequence[float],
+    stats: Sequence[str],
+    all_touched: bool = False,
+) -> Dict[str, float]:
+    """
+    Statistics of the valid pixels of a band inside a zone.
+
+    Only the window covering the zone is read, in strips of whole rows sized to
+    the memory budget; strips the zone does not cover are skipped. Per-strip
+    means and variances are combined as in band_statistics. Nodata and NaN
+    pixels are left out and counted separately.
+
+    Args:
+        band: GDAL raster band
+        geom: Shapely polygon in the raster's coordinate system, or None
+        window: Window covering the zone, see pixel_windows
+        geotransform: North-up geotransform of the raster
+        stats: Statistics to return, any of ZONAL_STATISTICS
+        all_touched: Include every pixel the zone touches
+
+    Returns:
+        Dictionary of statistic name to value, NaN for float statistics of zones
+        without valid pixels
+    """
+    nodata = band.GetNoDataValue()
+    count = 0
+    no_data_count = 0
+    mean = 0.0
+    m2 = 0.0
+    minimum = np.inf
+    maximum = -np.inf
+    values: List[np.ndarray] = []
+
+    xoff, yoff, xsize, ysize = window
+    if geom is not None and xsize > 0 and ysize > 0:
+        shapely.prepare(geom)
+        rows = window_rows(xsize, _BYTES_PER_PIXEL, band.GetBlockSize()[1])
+        for row in range(0, ysize, rows):
+            strip = (xoff, yoff + row, xsize, min(rows, ysize - row))
+            inside = zone_mask(geom, strip, geotransform, all_touched)
+            if not inside.any():
+                continue
+            data = band.ReadAsArray(*strip)[inside].astype(np.float64)
+            valid = ~np.isnan(data)
+            if nodata is not None:
+                valid &= data != nodata
+            no_data_count += int(data.size - valid.sum())
+            data = data[valid]
+            if not data.size:
+                continue
+
+            strip_mean = data.mean()
+            strip_m2 = np.square(data - strip_mean).sum()
+            minimum = min(minimum, data.min())
+            maximum = max(maximum, data.max())
+            total = count + data.size
+            delta = strip_mean - mean
+            mean += delta * data.size / total
+            m2 += strip_m2 + delta**2 * count * data.size / total
+            count = total
+            if "median" in stats:
+                values.append(data)
+
+    empty = count == 0
+    result = {
+        "count": count,
+        "nodata": no_data_count,
+        "min": np.nan if empty else float(minimum),
+        "max": np.nan if empty else float(maximum),
+        "mean": np.nan if empty else mean,
+        "std": np.nan if empty else (m2 / count) ** 0.5,
+        "sum": np.nan if empty else mean * count,
+        "median": np.nan if empty or not values else float(np.median(np.concatenate(values))),
+    }
+    return {name: result[name] for name in stats}
+
+
+def new_zonal_results(n: int, stats: Sequence[str]) -> Dict[str, np.ndarray]:
+    """Result columns for n zones."""
+    return {
+        name: np.zeros(n, dtype=np.int64 if name in COUNT_STATISTICS else np.float64)
+        for name in stats
+    }
+
+
+def raster_zonal_statistics(
+    ds, band_index: int, geoms: np.ndarray, stats: Sequence[str], all_touched: bool = False
+) -> Dict[str, np.ndarray]:
+    """
+    Statistics of a raster band for each zone, see zone_statistics.
+
+    Returns:
+        Dictionary of statistic name to an array with one value per zone
+    """
+    band = ds.GetRasterBand(band_index)
+    geotransform = north_up_geotransform(ds)
+    windows = pixel_windows(shapely.bounds(geoms), geotransform, ds.RasterXSize, ds.RasterYSize)
+    results = new_zonal_results(len(geoms), stats)
+    for i, (geom, window) in enumerate(zip(geoms, windows)):
+        for name, value in zone_statistics(
+            band, geom, window, geotransform, stats, all_touched
+        ).items():
+            results[name][i] = value
+    return results
+
+
+def zonal_tasks(geoms: np.ndarray, task_zones: int = ZONAL_TASK_ZONES) -> List[np.ndarray]:
+    """Split a batch of zones into tasks of spatially close zones, as index arrays."""
+    order = spatial_order(shapely.bounds(geoms))
+    return [order[start : start + task_zones] for start in range(0, len(order), task_zones)]
+
+
+def zonal_task(
+    raster_path: str, band_index: int, wkbs: np.ndarray, stats: Sequence[str], all_touched: bool
+) -> Dict[str, np.ndarray]:
+    """Worker: statistics of a task's zones, read through the worker's shared raster handle."""
+    return raster_zonal_statistics(
+        open_shared_raster(raster_path), band_index, shapely.from_wkb(wkbs), stats, all_touched
+    )
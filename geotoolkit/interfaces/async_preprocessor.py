@@ -0,0 +1,235 @@
+import asyncio
+import functools
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+from ..core.constants import COMMON_PROJECTIONS
+from ..utils.config import ConfigManager, GeoToolKitConfig
+
+# Preprocessor created once per worker process
+_WORKER_PREPROCESSOR = None
+
+
+def _init_worker(engine: str, config: Dict[str, Any]):
+    """Worker initializer: apply the parent's configuration and create the engine."""
+    global _WORKER_PREPROCESSOR
+    from .. import PreprocessorFactory
+
+    ConfigManager().config = GeoToolKitConfig.from_dict(config)
+    _WORKER_PREPROCESSOR = PreprocessorFactory.create(engine)
+
+
+def _call_operation(
+    preprocessor, name: str, args: Tuple, kwargs: Dict[str, Any]
+) -> Tuple[Any, Dict]:
+    """Run one preprocessor operation, returning its result and metrics."""
+    result = getattr(preprocessor, name)(*args, **kwargs)
+    return result, getattr(preprocessor, "metrics", {}).get(name)
+
+
+def _run_operation(name: str, args: Tuple, kwargs: Dict[str, Any]) -> Tuple[Any, Dict]:
+    """Worker: run one operation on the worker process's preprocessor."""
+    return _call_operation(_WORKER_PREPROCESSOR, name, args, kwargs)
+
+
+def _warm_up_worker() -> int:
+    """Worker: load the PROJ database and cache transforms between common projections."""
+    from osgeo import osr
+
+    wgs84 = osr.SpatialReference()
+    wgs84.ImportFromEPSG(COMMON_PROJECTIONS["WGS84"])
+    for epsg_code in COMMON_PROJECTIONS.values():
+        srs = osr.SpatialReference()
+        srs.ImportFromEPSG(epsg_code)
+        osr.CoordinateTransformation(wgs84, srs)
+    return os.getpid()
+
+
+class AsyncPreprocessor:
+    """
+    Awaitable facade over Preprocessor for asyncio applications.
+
+    Every preprocessing operation is available as a coroutine that runs on a
+    bounded executor, so the event loop is never blocked:
+
+        async with AsyncPreprocessor(max_concurrency=4) as preprocessor:
+            path = await preprocessor.standardize_projection("roads.shp", 4326)
+
+    Worker processes each receive an equal share of the memory budget. At most
+    max_concurrency operations run at once. Further calls wait their turn,
+    and once max_pending calls are waiting or running, new calls wait for a free
+    slot before they are queued (backpressure). Cancelling a call that has not
+    started yet removes it from the queue; cancelling a running call discards its
+    result, but its slot stays taken until the worker finishes.
+    """
+
+    def __init__(
+        self,
+        engine: Optional[str] = None,
+        max_concurrency: Optional[int] = None,
+        max_pending: Optional[int] = None,
+        executor: str = "process",
+    ):
+        """
+        Args:
+            engine: Processing engine, defaults to the configured preferred_engine
+            max_concurrency: Operations running at once, defaults to max_threads
+            max_pending: Operations waiting or running at once, defaults to max_pending_jobs
+            executor: "process" for worker processes or "thread" for worker threads
+        """
+        config = ConfigManager().config
+        self.engine = engine or config.preferred_engine
+        self.max_concurrency = max_concurrency or config.max_threads
+        self.max_pending = max(max_pending or config.max_pending_jobs, self.max_concurrency)
+        if executor not in ("process", "thread"):
+            raise ValueError(f"Unsupported executor: {executor}")
+        self.executor_type = executor
+        self.metrics: Dict[str, Dict[str, Any]] = {}
+
+        self._executor: Optional[Executor] = None
+        self._running: Optional[asyncio.Semaphore] = None
+        self._pending: Optional[asyncio.Semaphore] = None
+        self._preprocessor = None
+        self._waiting = 0
+
+    @property
+    def pending(self) -> int:
+        """Number of operations waiting or running."""
+        return self._waiting
+
+    def _ensure_started(self):
+        if self._executor is not None:
+            return
+        if self.executor_type == "process":
+            # Workers share the memory budget, so together they stay within it
+            config = ConfigManager().config.to_dict()
+            config["memory_budget"] = max(config["memory_budget"] // self.max_concurrency, 1)
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_concurrency,
+                initializer=_init_worker,
+                initargs=(self.engine, config),
+            )
+        else:
+            from .. import PreprocessorFactory
+
+            # Worker threads share one engine instance
+            self._preprocessor = PreprocessorFactory.create(self.engine)
+            self._executor = ThreadPoolExecutor(max_workers=self.max_concurrency)
+        self._running = asyncio.Semaphore(self.max_concurrency)
+        self._pending = asyncio.Semaphore(self.max_pending)
+
+    async def _submit(self, function) -> Any:
+        """Run a function on the executor within the concurrency and pending limits."""
+        self._ensure_started()
+        loop = asyncio.get_running_loop()
+
+        await self._pending.acquire()
+        self._waiting += 1
+        try:
+            await self._running.acquire()
+        except BaseException:
+            self._waiting -= 1
+            self._pending.release()
+            raise
+
+        def release(_=None):
+            self._waiting -= 1
+            self._running.release()
+            self._pending.release()
+
+        future = loop.run_in_executor(self._executor, function)
+        try:
+            result = await asyncio.shield(future)
+        except asyncio.CancelledError:
+            # The worker cannot be interrupted: keep its slot until it finishes
+            future.add_done_callback(release)
+            raise
+        except BaseException:
+            release()
+            raise
+        release()
+        return result
+
+    async def run(self, name: str, *args, **kwargs) -> Any:
+        """
+        Run a preprocessor operation by name.
+
+        Args:
+            name: Operation name, e.g. "standardize_projection"
+            *args: Positional arguments of the operation
+            **kwargs: Keyword arguments of the operation
+
+        Returns:
+            The operation's result
+        """
+        self._ensure_started()
+        if self.executor_type == "process":
+            operation = functools.partial(_run_operation, name, args, kwargs)
+        else:
+            operation = functools.partial(_call_operation, self._preprocessor, name, args, kwargs)
+        result, metrics = await self._submit(operation)
+        if metrics is not None:
+            self.metrics[name] = metrics
+        return result
+
+    async def warm_up(self) -> int:
+        """
+        Start every worker and prime its engine and CRS caches.
+
+        Returns:
+            Number of distinct worker processes warmed up
+        """
+        self._ensure_started()
+        pids = await asyncio.gather(
+            *(self._submit(_warm_up_worker) for _ in range(self.max_concurrency))
+        )
+        return len(set(pids))
+
+    async def download_ned_tile(
+        self, bbox, output_tif_path: Path, resolution: int = 10, session=None
+    ) -> bool:
+        """
+        Download a NED tile with async HTTP, counted against max_pending.
+
+        Downloads are I/O-bound and do not take an executor slot.
+        """
+        from ..tools.dem_downloader import download_ned_tile_async
+
+        self._ensure_started()
+        await self._pending.acquire()
+        self._waiting += 1
+        try:
+            return await download_ned_tile_async(bbox, output_tif_path, resolution, session)
+        finally:
+            self._waiting -= 1
+            self._pending.release()
+
+    def __getattr__(self, name):
+        """Expose engine operations as coroutines"""
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return functools.partial(self.run, name)
+
+    async def close(self, cancel_pending: bool = False):
+        """
+        Shut the executor down.
+
+        Args:
+            cancel_pending: Drop operations queued in the executor instead of
+                waiting for them
+        """
+        if self._executor is None:
+            return
+        executor, self._executor = self._executor, None
+        await asyncio.get_running_loop().run_in_executor(
+            None, functools.partial(executor.shutdown, wait=True, cancel_futures=cancel_pending)
+        )
+
+    async def __aenter__(self) -> "AsyncPreprocessor":
+        self._ensure_started()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close(cancel_pending=exc_type is not None)
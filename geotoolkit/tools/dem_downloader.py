@@ -1,9 +1,23 @@
+import asyncio
+from pathlib import Path
+
 import requests
 from osgeo import gdal
 import numpy as np
 
+from ..utils.logger import setup_logger
+
 gdal.UseExceptions()
 
+logger = setup_logger(
+    "dem_downloader",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+# Whether the thread fallback of download_ned_tile_async has been logged
+_fallback_logged = False
+
 
 def calculate_pixel_size(bbox, target_resolution):
     """
@@ -22,9 +36,13 @@ def calculate_pixel_size(bbox, target_resolution):
     return width_pixels, height_pixels
 
 
-def download_ned_tile(bbox, output_tif_path, resolution=10):
+# Use the higher resolution 3DEP service
+NED_EXPORT_URL = "https://elevation.nationalmap.gov/arcgis/rest/services/3DEPElevation/ImageServer/exportImage"
+
+
+def ned_export_params(bbox, resolution=10):
     """
-    Download NED tile within the specified bounding box and save it to a TIFF file.
+    Build the 3DEP exportImage query parameters for a bounding box and resolution.
     """
     min_long, min_lat, max_long, max_lat = bbox
 
@@ -39,10 +57,7 @@ def download_ned_tile(bbox, output_tif_path, resolution=10):
     Image dimensions: {width_pixels}x{height_pixels} pixels
     """)
 
-    # Use the higher resolution 3DEP service
-    url = "https://elevation.nationalmap.gov/arcgis/rest/services/3DEPElevation/ImageServer/exportImage"
-
-    params = {
+    return {
         "bbox": f"{min_long},{min_lat},{max_long},{max_lat}",
         "bboxSR": 4326,
         "size": f"{width_pixels},{height_pixels}",
@@ -54,8 +69,15 @@ def download_ned_tile(bbox, output_tif_path, resolution=10):
         "f": "image"
     }
 
+
+def download_ned_tile(bbox, output_tif_path, resolution=10):
+    """
+    Download NED tile within the specified bounding box and save it to a TIFF file.
+    """
+    params = ned_export_params(bbox, resolution)
+
     try:
-        response = requests.get(url, params=params, stream=True)
+        response = requests.get(NED_EXPORT_URL, params=params, stream=True)
         response.raise_for_status()
 
         with open(output_tif_path, 'wb') as f:
@@ -70,6 +92,102 @@ def download_ned_tile(bbox, output_tif_path, resolution=10):
         return False
 
 
+async def download_ned_tile_async(bbox, output_tif_path, resolution=10, session=None):
+    """
+    Download NED tile without blocking the event loop.
+
+    Uses aiohttp when it is installed, reusing the given ClientSession if any, and
+    otherwise runs download_ned_tile in a worker thread, logging a warning the first
+    time.
+    """
+    from ..utils.config import ConfigManager
+
+    global _fallback_logged
+    try:
+        import aiohttp
+    except ImportError:
+        if not _fallback_logged:
+            _fallback_logged = True
+            logger.warning(
+                "aiohttp is not installed; downloading DEMs in worker threads. "
+                "Install geotoolkit[async] for non-blocking downloads"
+            )
+        return await asyncio.to_thread(download_ned_tile, bbox, output_tif_path, resolution)
+
+    params = ned_export_params(bbox, resolution)
+    timeout = aiohttp.ClientTimeout(total=ConfigManager().config.timeout)
+    own_session = session is None
+    if own_session:
+        session = aiohttp.ClientSession(timeout=timeout)
+
+    try:
+        async with session.get(NED_EXPORT_URL, params=params) as response:
+            response.raise_for_status()
+            with open(output_tif_path, 'wb') as f:
+                async for chunk in response.content.iter_chunked(65536):
+                    f.write(chunk)
+
+        print(f"Successfully downloaded tile to {output_tif_path}")
+        return True
+
+    except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+        print(f"Error downloading data: {e}")
+        return False
+
+    finally:
+        if own_session:
+            await session.close()
+
+
+def band_statistics(band):
+    """
+    Compute min, max, mean, standard deviation and nodata count of a raster band.
+
+    The band is read in windows of whole rows sized to the memory budget, and the
+    per-window means and variances are combined, so memory use does not grow with
+    the raster size.
+    """
+    from ..utils.memory import window_rows
+
+    no_data_value = band.GetNoDataValue()
+    width, height = band.XSize, band.YSize
+    # Raw pixels, their float64 copy and the squared deviations
+    rows = window_rows(width, 24, band.GetBlockSize()[1])
+
+    count = 0
+    mean = 0.0
+    m2 = 0.0
+    minimum = np.inf
+    maximum = -np.inf
+    no_data_count = 0
+    for yoff in range(0, height, rows):
+        block = band.ReadAsArray(0, yoff, width, min(rows, height - yoff))
+        if no_data_value is not None:
+            no_data_count += int(np.sum(block == no_data_value))
+
+        data = block.astype(np.float64).ravel()
+        block_mean = data.mean()
+        block_m2 = np.square(data - block_mean).sum()
+        minimum = np.minimum(minimum, data.min())
+        maximum = np.maximum(maximum, data.max())
+
+        # Combine with the previous windows (Chan et al.)
+        total = count + data.size
+        delta = block_mean - mean
+        mean += delta * data.size / total
+        m2 += block_m2 + delta**2 * count * data.size / total
+        count = total
+
+    return {
+        "min": float(minimum),
+        "max": float(maximum),
+        "mean": float(mean),
+        "std": float((m2 / count) ** 0.5) if count else float("nan"),
+        "no_data_value": no_data_value,
+        "no_data_count": no_data_count,
+    }
+
+
 def verify_dem(tif_file_path):
     """
     Verify the downloaded DEM file and print statistics.
@@ -83,8 +201,8 @@ def verify_dem(tif_file_path):
         # Get raster band
         band = ds.GetRasterBand(1)
 
-        # Read data into numpy array
-        data = band.ReadAsArray()
+        # Compute statistics window by window
+        stats = band_statistics(band)
 
         # Get geotransform information
         geotransform = ds.GetGeoTransform()
@@ -96,17 +214,15 @@ def verify_dem(tif_file_path):
         print(f"Pixel Size: {geotransform[1]:.8f}, {geotransform[5]:.8f}")
 
         print("\nElevation Statistics:")
-        print(f"Min elevation: {np.min(data):.2f} meters")
-        print(f"Max elevation: {np.max(data):.2f} meters")
-        print(f"Mean elevation: {np.mean(data):.2f} meters")
-        print(f"Standard deviation: {np.std(data):.2f} meters")
+        print(f"Min elevation: {stats['min']:.2f} meters")
+        print(f"Max elevation: {stats['max']:.2f} meters")
+        print(f"Mean elevation: {stats['mean']:.2f} meters")
+        print(f"Standard deviation: {stats['std']:.2f} meters")
 
         # Check for no data values
-        no_data_value = band.GetNoDataValue()
-        if no_data_value is not None:
-            no_data_count = np.sum(data == no_data_value)
-            print(f"No data value: {no_data_value}")
-            print(f"Number of no data pixels: {no_data_count}")
+        if stats["no_data_value"] is not None:
+            print(f"No data value: {stats['no_data_value']}")
+            print(f"Number of no data pixels: {stats['no_data_count']}")
 
         ds = None  # Close the dataset
         return True
@@ -0,0 +1,284 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Sequence, Tuple, Union
+
+import numpy as np
+from osgeo import gdal
+
+from ..core.constants import GTIFF_CREATION_OPTIONS
+from ..core.exceptions import ProcessingError
+from ..engines.gdal_engine.raster import open_shared_raster
+from ..utils.config import ConfigManager
+from ..utils.logger import setup_logger
+from ..utils.memory import BATCH_BUDGET_FRACTION, memory_budget, worker_limit
+
+gdal.UseExceptions()
+
+logger = setup_logger(
+    "terrain",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+TERRAIN_PRODUCTS = ("slope", "aspect", "hillshade")
+
+# Output nodata value per product
+TERRAIN_NODATA = {"slope": -9999.0, "aspect": -9999.0, "hillshade": 0}
+
+METERS_PER_DEGREE = 111319.9  # at the equator, as in dem_downloader
+
+# Float64 arrays alive at once while computing a block, besides the products
+_WORKING_ARRAYS = 12
+
+
+def compute_derivatives(
+    padded: np.ndarray,
+    cellsize_x: Union[float, np.ndarray],
+    cellsize_y: float,
+    products: Iterable[str] = TERRAIN_PRODUCTS,
+    z_factor: float = 1.0,
+    azimuth: float = 315.0,
+    altitude: float = 45.0,
+    nodata: Optional[float] = None,
+) -> Dict[str, np.ndarray]:
+    """
+    Compute slope, aspect and hillshade with Horn's 3x3 kernel.
+
+    Args:
+        padded: Elevation array with a one-pixel halo on every side
+        cellsize_x: Cell width in elevation units, a scalar or a (rows, 1) array
+            for rasters whose cell width varies by row
+        cellsize_y: Cell height in elevation units
+        products: Products to compute, any of TERRAIN_PRODUCTS
+        z_factor: Multiplier applied to elevations
+        azimuth: Illumination azimuth in degrees clockwise from north
+        altitude: Illumination altitude in degrees above the horizon
+        nodata: Elevation nodata value
+
+    Returns:
+        Dictionary of product name to array without the halo
+    """
+    z = padded.astype(np.float64)
+    invalid = np.isnan(z)
+    if nodata is not None:
+        invalid |= z == nodata
+
+    a, b, c = z[:-2, :-2], z[:-2, 1:-1], z[:-2, 2:]
+    d, f = z[1:-1, :-2], z[1:-1, 2:]
+    g, h, i = z[2:, :-2], z[2:, 1:-1], z[2:, 2:]
+
+    dz_dx = ((c + 2 * f + i) - (a + 2 * d + g)) / (8 * cellsize_x) * z_factor
+    dz_dy = ((g + 2 * h + i) - (a + 2 * b + c)) / (8 * cellsize_y) * z_factor
+
+    # A pixel is nodata when any cell of its window is nodata
+    window_invalid = np.zeros(dz_dx.shape, dtype=bool)
+    for row in range(3):
+        for col in range(3):
+            window_invalid |= invalid[row : row + dz_dx.shape[0], col : col + dz_dx.shape[1]]
+
+    slope_rad = np.arctan(np.sqrt(dz_dx**2 + dz_dy**2))
+    aspect_rad = np.arctan2(dz_dy, -dz_dx)
+    flat = (dz_dx == 0) & (dz_dy == 0)
+
+    results = {}
+    for product in products:
+        if product == "slope":
+            result = np.degrees(slope_rad)
+        elif product == "aspect":
+            math_deg = np.degrees(aspect_rad)
+            result = np.where(
+                math_deg < 0,
+                90.0 - math_deg,
+                np.where(math_deg > 90.0, 450.0 - math_deg, 90.0 - math_deg),
+            )
+            result[flat] = -1.0
+        elif product == "hillshade":
+            zenith = np.radians(90.0 - altitude)
+            azimuth_math = np.radians((450.0 - azimuth) % 360.0)
+            aspect_pos = np.where(aspect_rad < 0, aspect_rad + 2 * np.pi, aspect_rad)
+            shade = 255.0 * (
+                np.cos(zenith) * np.cos(slope_rad)
+                + np.sin(zenith) * np.sin(slope_rad) * np.cos(azimuth_math - aspect_pos)
+            )
+            result = np.clip(np.round(shade), 1, 255)
+        else:
+            raise ProcessingError(f"Unsupported terrain product: {product}")
+
+        result[window_invalid] = TERRAIN_NODATA[product]
+        results[product] = result
+
+    return results
+
+
+def _cell_sizes(
+    geotransform: Sequence[float], is_geographic: bool, row_start: int, rows: int
+) -> Tuple[Union[float, np.ndarray], float]:
+    """Cell sizes in ground units, per row for geographic rasters."""
+    cellsize_x = abs(geotransform[1])
+    cellsize_y = abs(geotransform[5])
+    if not is_geographic:
+        return cellsize_x, cellsize_y
+
+    row_index = np.arange(row_start, row_start + rows, dtype=np.float64)
+    latitude = geotransform[3] + (row_index + 0.5) * geotransform[5]
+    cellsize_x = cellsize_x * METERS_PER_DEGREE * np.cos(np.radians(latitude))
+    return cellsize_x[:, None], cellsize_y * METERS_PER_DEGREE
+
+
+def _read_with_halo(band, xoff: int, yoff: int, width: int, height: int) -> np.ndarray:
+    """Read a block plus a one-pixel halo, replicating edge pixels at the raster border."""
+    x0, y0 = max(xoff - 1, 0), max(yoff - 1, 0)
+    x1 = min(xoff + width + 1, band.XSize)
+    y1 = min(yoff + height + 1, band.YSize)
+    data = band.ReadAsArray(x0, y0, x1 - x0, y1 - y0)
+
+    pad = (
+        (1 - (yoff - y0), 1 - (y1 - yoff - height)),
+        (1 - (xoff - x0), 1 - (x1 - xoff - width)),
+    )
+    return np.pad(data, pad, mode="edge")
+
+
+def _process_block(
+    dem_path: str,
+    window: Tuple[int, int, int, int],
+    products: Tuple[str, ...],
+    z_factor: float,
+    azimuth: float,
+    altitude: float,
+):
+    """Worker: compute terrain products for one block of the DEM."""
+    ds = open_shared_raster(dem_path)
+    band = ds.GetRasterBand(1)
+    xoff, yoff, width, height = window
+    padded = _read_with_halo(band, xoff, yoff, width, height)
+
+    srs = ds.GetSpatialRef()
+    cellsize_x, cellsize_y = _cell_sizes(
+        ds.GetGeoTransform(), bool(srs and srs.IsGeographic()), yoff, height
+    )
+    results = compute_derivatives(
+        padded,
+        cellsize_x,
+        cellsize_y,
+        products,
+        z_factor=z_factor,
+        azimuth=azimuth,
+        altitude=altitude,
+        nodata=band.GetNoDataValue(),
+    )
+    return window, results
+
+
+def _create_output(ds, path: Path, product: str, num_threads: int):
+    """Create a tiled GeoTIFF for a terrain product."""
+    data_type = gdal.GDT_Byte if product == "hillshade" else gdal.GDT_Float32
+    predictor = 2 if product == "hillshade" else 3
+    out_ds = gdal.GetDriverByName("GTiff").Create(
+        str(path),
+        ds.RasterXSize,
+        ds.RasterYSize,
+        1,
+        data_type,
+        options=GTIFF_CREATION_OPTIONS + [f"PREDICTOR={predictor}", f"NUM_THREADS={num_threads}"],
+    )
+    out_ds.SetGeoTransform(ds.GetGeoTransform())
+    out_ds.SetProjection(ds.GetProjection())
+    out_ds.GetRasterBand(1).SetNoDataValue(TERRAIN_NODATA[product])
+    return out_ds
+
+
+def derive_terrain(
+    dem_path: Union[str, Path],
+    output_dir: Optional[Union[str, Path]] = None,
+    products: Sequence[str] = TERRAIN_PRODUCTS,
+    block_size: int = 1024,
+    max_workers: Optional[int] = None,
+    z_factor: float = 1.0,
+    azimuth: float = 315.0,
+    altitude: float = 45.0,
+) -> Dict[str, Path]:
+    """
+    Derive slope, aspect and hillshade from a DEM in parallel blocks.
+
+    Each block is read with a one-pixel halo, so results match a whole-array
+    computation exactly, including at block seams. Edges of the raster are
+    handled by replicating the border pixels.
+
+    Args:
+        dem_path: Path to the input DEM
+        output_dir: Directory for the outputs, defaults to the DEM's directory
+        products: Products to derive, any of TERRAIN_PRODUCTS
+        block_size: Block width and height in pixels, reduced to fit the memory budget
+        max_workers: Worker processes, defaults to the configured max_threads and
+            throttled to the memory budget
+        z_factor: Multiplier applied to elevations
+        azimuth: Hillshade illumination azimuth in degrees
+        altitude: Hillshade illumination altitude in degrees
+
+    Returns:
+        Dictionary of product name to output path
+    """
+    products = tuple(products)
+    unknown = set(products) - set(TERRAIN_PRODUCTS)
+    if unknown:
+        raise ProcessingError(f"Unsupported terrain products: {', '.join(sorted(unknown))}")
+
+    dem_path = Path(dem_path)
+    output_dir = Path(output_dir) if output_dir else dem_path.parent
+    output_dir.mkdir(parents=True, exist_ok=True)
+    max_workers = max_workers or ConfigManager().config.max_threads
+
+    # Bound the memory of a block, then of the blocks being computed or waiting to be written
+    bytes_per_pixel = 8 * (_WORKING_ARRAYS + len(products))
+    max_block = int((memory_budget() * BATCH_BUDGET_FRACTION / bytes_per_pixel) ** 0.5)
+    block_size = max(min(block_size, max_block), 64)
+    max_workers = worker_limit(max_workers, 2 * (block_size + 2) ** 2 * bytes_per_pixel)
+
+    ds = gdal.Open(str(dem_path))
+    if ds is None:
+        raise ProcessingError(f"Could not open DEM: {dem_path}")
+
+    outputs = {product: output_dir / f"{dem_path.stem}_{product}.tif" for product in products}
+    out_datasets = {
+        product: _create_output(ds, path, product, max_workers) for product, path in outputs.items()
+    }
+
+    windows = [
+        (xoff, yoff, min(block_size, ds.RasterXSize - xoff), min(block_size, ds.RasterYSize - yoff))
+        for yoff in range(0, ds.RasterYSize, block_size)
+        for xoff in range(0, ds.RasterXSize, block_size)
+    ]
+    logger.info(
+        f"Deriving {', '.join(products)} for {dem_path} in {len(windows)} blocks "
+        f"with {max_workers} workers"
+    )
+
+    def write(result):
+        (xoff, yoff, _, _), arrays = result
+        for product, array in arrays.items():
+            out_datasets[product].GetRasterBand(1).WriteArray(array, xoff, yoff)
+
+    # Keep a bounded number of blocks in flight so results never pile up in memory
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        pending = set()
+        for window in windows:
+            if len(pending) >= 2 * max_workers:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    write(future.result())
+            pending.add(
+                executor.submit(
+                    _process_block, str(dem_path), window, products, z_factor, azimuth, altitude
+                )
+            )
+        for future in pending:
+            write(future.result())
+
+    for product in products:
+        out_datasets[product].FlushCache()
+        out_datasets[product] = None
+    ds = None
+
+    logger.info(f"Terrain derivatives written to {output_dir}")
+    return outputs
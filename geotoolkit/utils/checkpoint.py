@@ -0,0 +1,173 @@
+import bisect
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Union
+
+from ..core.exceptions import ProcessingError
+
+CHECKPOINT_VERSION = 1
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+
+def checkpoint_path(output_path: Union[str, Path]) -> Path:
+    """Checkpoint file kept next to an operation's output."""
+    output_path = Path(output_path)
+    return output_path.with_name(output_path.name + CHECKPOINT_SUFFIX)
+
+
+def _source_state(dataset: Union[str, Path]) -> Optional[List[float]]:
+    """Size and modification time identifying a version of the input dataset."""
+    try:
+        stat = os.stat(dataset)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+def _merge_ranges(ranges: List[List[int]]) -> List[List[int]]:
+    merged: List[List[int]] = []
+    for start, end in sorted(ranges):
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return merged
+
+
+class Checkpoint:
+    """
+    Persisted record of the features an operation has committed.
+
+    Input FIDs are stored per layer as merged, inclusive [first, last] ranges,
+    together with the number of features written to the output. The record is
+    only reused by a rerun of the same operation with the same parameters on an
+    unchanged input; otherwise the operation starts over.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        operation: str,
+        dataset: Union[str, Path],
+        params: Dict[str, Any],
+        check_source: bool = True,
+    ):
+        """
+        Args:
+            path: Checkpoint file, see checkpoint_path
+            operation: Operation name
+            dataset: Input dataset
+            params: Operation parameters affecting the output
+            check_source: Whether a modified input invalidates the checkpoint;
+                disable for operations that modify their input in place
+        """
+        self.path = Path(path)
+        self.header = {
+            "version": CHECKPOINT_VERSION,
+            "operation": operation,
+            "dataset": str(dataset),
+            "source": _source_state(dataset) if check_source else None,
+            # Normalized through JSON so loaded and fresh headers compare equal
+            "params": json.loads(json.dumps(params, default=str, sort_keys=True)),
+        }
+        self.layers: Dict[str, Dict[str, Any]] = {}
+        self.resumed = False
+
+    @classmethod
+    def open(
+        cls,
+        output_path: Union[str, Path],
+        operation: str,
+        dataset: Union[str, Path],
+        params: Dict[str, Any],
+        resume: bool = True,
+        check_source: bool = True,
+    ) -> "Checkpoint":
+        """
+        Load the checkpoint of an interrupted run, or start a new one.
+
+        Args:
+            output_path: Output of the operation; the checkpoint is kept next to it
+            operation: Operation name
+            dataset: Input dataset
+            params: Operation parameters affecting the output
+            resume: Whether to reuse a matching checkpoint
+            check_source: Whether a modified input invalidates the checkpoint
+
+        Returns:
+            Checkpoint with resumed set when an earlier run is continued
+        """
+        checkpoint = cls(checkpoint_path(output_path), operation, dataset, params, check_source)
+        if not checkpoint.path.exists():
+            return checkpoint
+        data = {}
+        if resume:
+            try:
+                with open(checkpoint.path, "r") as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                pass
+        if data and all(data.get(key) == value for key, value in checkpoint.header.items()):
+            checkpoint.layers = data.get("layers", {})
+            checkpoint.resumed = True
+        else:
+            # Stale record of another run: the output is about to be rebuilt
+            checkpoint.remove()
+        return checkpoint
+
+    def _layer(self, layer_name: str) -> Dict[str, Any]:
+        return self.layers.setdefault(layer_name, {"ranges": [], "written": 0, "complete": False})
+
+    def committed(self, layer_name: str, fid: int) -> bool:
+        """Whether a feature was committed by an earlier run."""
+        ranges = self.layers.get(layer_name, {}).get("ranges")
+        if not ranges:
+            return False
+        position = bisect.bisect_right(ranges, [fid, float("inf")]) - 1
+        return position >= 0 and ranges[position][0] <= fid <= ranges[position][1]
+
+    def committed_count(self, layer_name: str) -> int:
+        ranges = self.layers.get(layer_name, {}).get("ranges", [])
+        return sum(end - start + 1 for start, end in ranges)
+
+    def written(self, layer_name: str) -> int:
+        """Number of output features written for a layer by committed batches."""
+        return self.layers.get(layer_name, {}).get("written", 0)
+
+    def is_complete(self, layer_name: str) -> bool:
+        return self.layers.get(layer_name, {}).get("complete", False)
+
+    def commit(self, layer_name: str, fids: Iterable[int], written: int = 0):
+        """Record a committed batch and persist the checkpoint."""
+        layer = self._layer(layer_name)
+        ranges = layer["ranges"]
+        for fid in sorted(int(fid) for fid in fids):
+            if ranges and ranges[-1][1] + 1 == fid:
+                ranges[-1][1] = fid
+            else:
+                ranges.append([fid, fid])
+        layer["ranges"] = _merge_ranges(ranges)
+        layer["written"] += written
+        self.save()
+
+    def complete(self, layer_name: str):
+        """Mark a layer as fully processed."""
+        self._layer(layer_name)["complete"] = True
+        self.save()
+
+    def save(self):
+        """Write the checkpoint atomically."""
+        temp_path = self.path.with_name(self.path.name + ".tmp")
+        try:
+            with open(temp_path, "w") as f:
+                json.dump({**self.header, "layers": self.layers}, f)
+            os.replace(temp_path, self.path)
+        except Exception as e:
+            raise ProcessingError(f"Failed to save checkpoint: {str(e)}")
+
+    def remove(self):
+        """Delete the checkpoint once the operation has finished."""
+        if self.path.exists():
+            self.path.unlink()
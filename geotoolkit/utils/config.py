@@ -11,11 +11,22 @@ from ..core.exceptions import ConfigurationError
 class GeoToolKitConfig:
     preferred_engine: str = DEFAULT_CONFIG["preferred_engine"]
     max_threads: int = DEFAULT_CONFIG["max_threads"]
+    max_pending_jobs: int = DEFAULT_CONFIG["max_pending_jobs"]
     log_level: str = DEFAULT_CONFIG["log_level"]
     log_dir: Optional[Path] = None
     workspace: Optional[Path] = None
+    config_dir: Optional[Path] = None
     chunk_size: int = DEFAULT_CONFIG["chunk_size"]
     timeout: int = DEFAULT_CONFIG["timeout"]
+    warp_memory: int = DEFAULT_CONFIG["warp_memory"]
+    memory_budget: int = DEFAULT_CONFIG["memory_budget"]
+    parquet_row_group_size: int = DEFAULT_CONFIG["parquet_row_group_size"]
+    parquet_compression: str = DEFAULT_CONFIG["parquet_compression"]
+    build_indexes: bool = DEFAULT_CONFIG["build_indexes"]
+    checkpoints: bool = DEFAULT_CONFIG["checkpoints"]
+    progress_interval: float = DEFAULT_CONFIG["progress_interval"]
+    gdal_profile: str = DEFAULT_CONFIG["gdal_profile"]
+    profiling: bool = DEFAULT_CONFIG["profiling"]
 
     def to_dict(self) -> Dict[str, Any]:
         """Convert config to dictionary"""
@@ -32,6 +43,8 @@ class GeoToolKitConfig:
             config_dict["log_dir"] = Path(config_dict["log_dir"])
         if "workspace" in config_dict and config_dict["workspace"]:
             config_dict["workspace"] = Path(config_dict["workspace"])
+        if "config_dir" in config_dict and config_dict["config_dir"]:
+            config_dict["config_dir"] = Path(config_dict["config_dir"])
         return cls(**config_dict)
 
 
@@ -0,0 +1,123 @@
+from typing import Optional
+
+from .config import ConfigManager
+
+MB = 1024 * 1024
+
+# Share of the memory budget one batch or raster window may use. The rest covers
+# the copies alive at the same time: OGR features, shapely objects, output buffers.
+BATCH_BUDGET_FRACTION = 0.1
+
+# Share of the memory budget available to parallel workers together
+WORKER_BUDGET_FRACTION = 0.5
+
+# Share of the memory budget a raster warp may use
+WARP_BUDGET_FRACTION = 0.25
+
+# Share of the memory budget for GDAL's raster block cache
+CACHE_BUDGET_FRACTION = 0.1
+
+# Ratio of in-memory working set to serialized (WKB) size of features
+WORKING_SET_FACTOR = 4
+
+MIN_BATCH_SIZE = 16
+MAX_BATCH_SIZE = 65536
+
+# Weight of the latest batch in the running bytes-per-feature estimate
+_SMOOTHING = 0.5
+
+
+def memory_budget() -> int:
+    """Configured memory budget in bytes."""
+    return ConfigManager().config.memory_budget * MB
+
+
+def batch_size_for(bytes_per_item: float, fraction: float = BATCH_BUDGET_FRACTION) -> int:
+    """
+    Number of items of the given size that fit in a share of the memory budget.
+
+    Args:
+        bytes_per_item: Estimated in-memory size of one feature or pixel row
+        fraction: Share of the memory budget to fill
+
+    Returns:
+        Batch size between MIN_BATCH_SIZE and MAX_BATCH_SIZE
+    """
+    if bytes_per_item <= 0:
+        return ConfigManager().config.chunk_size
+    size = int(memory_budget() * fraction // bytes_per_item)
+    return max(MIN_BATCH_SIZE, min(size, MAX_BATCH_SIZE))
+
+
+def worker_limit(requested: int, bytes_per_worker: float) -> int:
+    """
+    Throttle a worker count so the workers together stay within the memory budget.
+
+    Args:
+        requested: Desired number of workers
+        bytes_per_worker: Estimated peak memory of one worker's task
+
+    Returns:
+        Number of workers to start, at least one
+    """
+    if bytes_per_worker <= 0:
+        return requested
+    allowed = int(memory_budget() * WORKER_BUDGET_FRACTION // bytes_per_worker)
+    return max(1, min(requested, allowed))
+
+
+def window_rows(width: int, bytes_per_pixel: int, block_height: int = 1) -> int:
+    """
+    Rows of a raster window that fit in the batch share of the memory budget.
+
+    Args:
+        width: Window width in pixels
+        bytes_per_pixel: In-memory size of one pixel, including working copies
+        block_height: Native block height; the result is a multiple of it
+
+    Returns:
+        Number of rows, at least one block
+    """
+    rows = int(memory_budget() * BATCH_BUDGET_FRACTION // max(width * bytes_per_pixel, 1))
+    block_height = max(block_height, 1)
+    return max(rows // block_height, 1) * block_height
+
+
+def warp_memory_limit(warp_memory: int) -> int:
+    """Cap a warp memory request, in megabytes, to the warp share of the budget."""
+    return max(
+        1, min(warp_memory, int(ConfigManager().config.memory_budget * WARP_BUDGET_FRACTION))
+    )
+
+
+class AdaptiveBatchSize:
+    """
+    Batch size that follows the measured size of the data.
+
+    Starts from the configured chunk_size and, after every batch, resizes the
+    next one so that a batch fills BATCH_BUDGET_FRACTION of the memory budget
+    given the running average of bytes per feature.
+    """
+
+    def __init__(self, initial: Optional[int] = None, fraction: float = BATCH_BUDGET_FRACTION):
+        self.size = initial or ConfigManager().config.chunk_size
+        self.fraction = fraction
+        self.bytes_per_item: Optional[float] = None
+
+    def observe(self, count: int, nbytes: float) -> int:
+        """
+        Record the size of a batch and return the next batch size.
+
+        Args:
+            count: Features in the batch
+            nbytes: Serialized or in-memory size of the batch in bytes
+        """
+        if count <= 0:
+            return self.size
+        measured = nbytes * WORKING_SET_FACTOR / count
+        if self.bytes_per_item is None:
+            self.bytes_per_item = measured
+        else:
+            self.bytes_per_item += _SMOOTHING * (measured - self.bytes_per_item)
+        self.size = batch_size_for(self.bytes_per_item, self.fraction)
+        return self.size
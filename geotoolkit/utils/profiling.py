@@ -0,0 +1,126 @@
+import cProfile
+import itertools
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .config import ConfigManager
+from .logger import setup_logger
+
+logger = setup_logger(
+    "profiling",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+# Categories of profiled time, by the first pattern found in a function's file
+# (or, for C functions, its name), checked in order; the rest is "python"
+PROFILE_CATEGORIES = (
+    ("proj", ("osgeo/osr.py", "osgeo._osr")),
+    ("gdal", ("osgeo/", "osgeo._")),
+    ("geometry", ("shapely",)),
+    ("logging", ("/logging/",)),
+    ("numpy", ("numpy",)),
+)
+
+# Operation metrics giving the number of features processed
+_FEATURE_METRICS = ("features", "left_features", "zones")
+
+_active = threading.local()
+_sequence = itertools.count()
+
+
+def profile_dir() -> Path:
+    """Directory of the profiles: a "profiles" directory next to the logs."""
+    log_dir = ConfigManager().config.log_dir
+    return Path(log_dir or Path(__file__).parent.parent / "logs") / "profiles"
+
+
+def time_breakdown(stats: pstats.Stats) -> Dict[str, float]:
+    """Seconds spent in each of PROFILE_CATEGORIES, from the functions' own time."""
+    breakdown = {name: 0.0 for name, _ in PROFILE_CATEGORIES}
+    breakdown["python"] = 0.0
+    for (filename, _, function), (_, _, own_time, _, _) in stats.stats.items():
+        location = (function if filename == "~" else filename).replace("\\", "/")
+        category = next(
+            (
+                name
+                for name, patterns in PROFILE_CATEGORIES
+                if any(pattern in location for pattern in patterns)
+            ),
+            "python",
+        )
+        breakdown[category] += own_time
+    return {name: round(seconds, 6) for name, seconds in breakdown.items()}
+
+
+@contextmanager
+def profile_operation(operation: str, dataset: Any = None) -> Iterator[Optional[Dict[str, Any]]]:
+    """
+    Profile an operation with cProfile when the profiling setting is on.
+
+    Writes {operation}-{time}-{pid}-{n}.prof (pstats format, readable with
+    pstats, snakeviz or speedscope) and a .json report with the dataset, the
+    operation's metrics, its feature count and the time spent in GDAL, PROJ,
+    shapely, NumPy, logging and other Python code. Only the outermost operation
+    of a thread is profiled; nested calls are part of its profile. When
+    profiling is off, the only cost is reading the setting.
+
+    Args:
+        operation: Operation name
+        dataset: Input dataset of the operation
+
+    Yields:
+        The report, to which the caller adds the operation's metrics, or None
+        when not profiling
+    """
+    if not ConfigManager().config.profiling or getattr(_active, "profiling", False):
+        yield None
+        return
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is active (one per process since Python 3.12)
+        logger.debug(f"Not profiling {operation}: another profiler is active")
+        yield None
+        return
+
+    _active.profiling = True
+    report: Dict[str, Any] = {
+        "operation": operation,
+        "dataset": str(dataset) if dataset is not None else None,
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    started = time.perf_counter()
+    try:
+        yield report
+    except Exception as e:
+        report["error"] = str(e)
+        raise
+    finally:
+        profiler.disable()
+        _active.profiling = False
+        report["seconds"] = time.perf_counter() - started
+        metrics = report.get("metrics") or {}
+        report["features"] = next(
+            (metrics[key] for key in _FEATURE_METRICS if isinstance(metrics.get(key), int)), None
+        )
+        report["breakdown"] = time_breakdown(pstats.Stats(profiler))
+
+        directory = profile_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        stem = f"{operation}-{time.strftime('%Y%m%dT%H%M%S')}-{os.getpid()}-{next(_sequence)}"
+        profiler.dump_stats(str(directory / f"{stem}.prof"))
+        with open(directory / f"{stem}.json", "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        logger.info(
+            f"Profiled {operation} in {report['seconds']:.2f}s {report['breakdown']}: "
+            f"{directory / stem}.prof"
+        )
@@ -0,0 +1,140 @@
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Optional
+
+from ..core.exceptions import OperationCancelledError
+from .config import ConfigManager
+from .logger import setup_logger
+
+logger = setup_logger(
+    "progress",
+    log_level="INFO",
+    log_dir=Path(__file__).parent.parent / "logs",
+)
+
+
+@dataclass
+class Progress:
+    """Snapshot of a running operation's progress"""
+
+    operation: str
+    done: int
+    total: Optional[int]
+    elapsed: float
+    rate: float
+    eta: Optional[float]
+
+    @property
+    def percent(self) -> Optional[float]:
+        if not self.total:
+            return None
+        return min(100.0 * self.done / self.total, 100.0)
+
+
+ProgressCallback = Callable[[Progress], None]
+
+
+class CancellationToken:
+    """
+    Cooperative cancellation flag checked by operations between batches.
+
+    Cancelling stops the operation after its current batch is committed, so a
+    rerun resumes from there. Any object with set() and is_set() can back the
+    token, e.g. a multiprocessing.Manager().Event() to cancel work in worker
+    processes.
+    """
+
+    def __init__(self, event=None):
+        self._event = event if event is not None else threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set()
+
+    def raise_if_cancelled(self, operation: str = "operation"):
+        if self.cancelled:
+            raise OperationCancelledError(f"{operation} was cancelled")
+
+
+class ProgressReporter:
+    """
+    Tracks the features processed by an operation.
+
+    Every update computes the processing rate and remaining time, invokes the
+    callback, logs a progress line every progress_interval seconds and raises
+    OperationCancelledError once the cancellation token is set. Features skipped
+    because an earlier run committed them count towards progress but not towards
+    the rate.
+    """
+
+    def __init__(
+        self,
+        operation: str,
+        total: Optional[int] = None,
+        callback: Optional[ProgressCallback] = None,
+        cancel_token: Optional[CancellationToken] = None,
+    ):
+        """
+        Args:
+            operation: Operation name used in log messages
+            total: Expected number of features, None if unknown
+            callback: Called with a Progress after every batch
+            cancel_token: Token checked after every batch
+        """
+        self.operation = operation
+        self.total = total
+        self.callback = callback
+        self.cancel_token = cancel_token
+        self.done = 0
+        self.skipped = 0
+        self._interval = ConfigManager().config.progress_interval
+        self._start = time.perf_counter()
+        self._last_log = self._start
+
+    @property
+    def progress(self) -> Progress:
+        elapsed = time.perf_counter() - self._start
+        processed = self.done - self.skipped
+        rate = processed / elapsed if elapsed > 0 else 0.0
+        eta = None
+        if self.total is not None and rate > 0:
+            eta = max(self.total - self.done, 0) / rate
+        return Progress(self.operation, self.done, self.total, elapsed, rate, eta)
+
+    def check_cancelled(self):
+        if self.cancel_token is not None:
+            self.cancel_token.raise_if_cancelled(self.operation)
+
+    def skip(self, count: int):
+        """Count features committed by an earlier run."""
+        self.done += count
+        self.skipped += count
+
+    def update(self, count: int):
+        """Count processed features, report progress and check for cancellation."""
+        self.done += count
+        progress = self.progress
+        if self.callback is not None:
+            self.callback(progress)
+
+        now = time.perf_counter()
+        if now - self._last_log >= self._interval:
+            self._last_log = now
+            logger.info(format_progress(progress))
+        self.check_cancelled()
+
+
+def format_progress(progress: Progress) -> str:
+    """One-line summary of a progress snapshot."""
+    done = f"{progress.done}"
+    if progress.total is not None:
+        done += f"/{progress.total} ({progress.percent:.1f}%)"
+    line = f"{progress.operation}: {done} features, {progress.rate:.0f} features/s"
+    if progress.eta is not None:
+        line += f", ETA {progress.eta:.0f}s"
+    return line
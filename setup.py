@@ -3,6 +3,9 @@ from setuptools import find_packages, setup
 with open("requirements.txt") as f:
     requirements = f.read().splitlines()
 
+# Non-blocking DEM downloads in AsyncPreprocessor; a worker thread is used without it
+async_requirements = ["aiohttp>=3.9"]
+
 setup(
     name="geotoolkit",
     packages=find_packages(),
@@ -11,4 +14,5 @@ setup(
     author="Ray Thurman",
     license="MIT",
     install_requires=requirements,
+    extras_require={"async": async_requirements, "all": async_requirements},
 )
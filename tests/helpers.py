@@ -0,0 +1,68 @@
+"""Helpers writing and reading small vector datasets; they require GDAL."""
+
+
+def write_dataset(path, layers):
+    """
+    Write a GeoPackage with one or more layers.
+
+    Args:
+        path: Output path
+        layers: {name: (epsg, [(wkt, {field: value}), ...])}; field types follow
+            the first feature's values
+
+    Returns:
+        The path
+    """
+    from osgeo import ogr
+
+    from geotoolkit.engines.gdal_engine.srs import spatial_reference
+
+    types = {int: ogr.OFTInteger, float: ogr.OFTReal, str: ogr.OFTString}
+    ds = ogr.GetDriverByName("GPKG").CreateDataSource(str(path))
+    for layer_name, (epsg, features) in layers.items():
+        layer = ds.CreateLayer(layer_name, spatial_reference(epsg), ogr.wkbUnknown)
+        fields = features[0][1] if features else {}
+        for field, value in fields.items():
+            layer.CreateField(ogr.FieldDefn(field, types[type(value)]))
+        layer.StartTransaction()
+        for wkt, values in features:
+            feature = ogr.Feature(layer.GetLayerDefn())
+            if wkt is not None:
+                feature.SetGeometry(ogr.CreateGeometryFromWkt(wkt))
+            for field, value in values.items():
+                feature.SetField(field, value)
+            layer.CreateFeature(feature)
+        layer.CommitTransaction()
+    ds = None
+    return path
+
+
+def read_layer(path, layer_name=None):
+    """Features of a layer as a list of (WKT, {field: value}), in FID order."""
+    from osgeo import ogr
+
+    ds = ogr.Open(str(path))
+    layer = ds.GetLayerByName(layer_name) if layer_name else ds.GetLayer()
+    layer_defn = layer.GetLayerDefn()
+    names = [layer_defn.GetFieldDefn(i).GetName() for i in range(layer_defn.GetFieldCount())]
+    features = []
+    for feature in layer:
+        geom = feature.GetGeometryRef()
+        features.append(
+            (
+                geom.ExportToIsoWkt() if geom is not None else None,
+                {name: feature.GetField(name) for name in names},
+            )
+        )
+    ds = None
+    return features
+
+
+def layer_names(path):
+    """Names of the layers of a dataset, in order."""
+    from osgeo import ogr
+
+    ds = ogr.Open(str(path))
+    names = [ds.GetLayer(i).GetName() for i in range(ds.GetLayerCount())]
+    ds = None
+    return names
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+pytest.importorskip("pyarrow")
+
+from osgeo import ogr  # noqa: E402
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.arrow import (  # noqa: E402
+    buffer_to_record_batch,
+    record_batch_to_buffer,
+)
+from geotoolkit.engines.gdal_engine.geometry_buffer import (  # noqa: E402
+    FieldSpec,
+    GeometryBuffer,
+    LayerSchema,
+)
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def make_buffer():
+    schema = LayerSchema("streams", ogr.wkbUnknown, None, [FieldSpec("name", ogr.OFTString)])
+    geoms = shapely.from_wkt(["POINT (1 2)", "LINESTRING (0 0, 1 1)"])
+    return GeometryBuffer.from_wkb(
+        shapely.to_wkb(geoms),
+        schema,
+        np.array([7, 9], dtype=np.int64),
+        {"name": np.array(["a", "b"], dtype=object)},
+    )
+
+
+def test_record_batch_round_trip_keeps_fids_out_of_the_attributes():
+    batch = buffer_to_record_batch(make_buffer())
+    assert batch.schema.names == ["fid", "name", "geometry"]
+
+    buffer = record_batch_to_buffer(batch)
+    assert [spec.name for spec in buffer.schema.fields] == ["name"]
+    assert list(buffer.fids) == [7, 9]
+    assert list(buffer.attributes["name"]) == ["a", "b"]
+    assert [geom.wkt for geom in buffer.to_shapely()] == ["POINT (1 2)", "LINESTRING (0 0, 1 1)"]
+
+
+def test_record_batch_without_fid_column():
+    batch = buffer_to_record_batch(make_buffer()).drop_columns(["fid"])
+    buffer = record_batch_to_buffer(batch)
+    assert [spec.name for spec in buffer.schema.fields] == ["name"]
+    assert len(buffer) == 2
+
+
+def test_fid_column_must_not_clash_with_an_attribute():
+    with pytest.raises(ProcessingError):
+        buffer_to_record_batch(make_buffer(), fid_column="name")
+
+
+def test_streamed_record_batches_write_without_a_fid_field(tmp_path):
+    path = write_dataset(
+        tmp_path / "streams.gpkg",
+        {"streams": (4326, [("POINT (1 2)", {"name": "a"}), ("POINT (3 4)", {"name": "b"})])},
+    )
+    preprocessor = GDALPreprocessor()
+    batches = preprocessor.iter_batches(path, as_arrow=True)
+    output = preprocessor.write_batches(batches, tmp_path / "copy.gpkg")
+    assert read_layer(output) == [("POINT (1 2)", {"name": "a"}), ("POINT (3 4)", {"name": "b"})]
+
+
+def test_pipelines_stream_over_buffers_and_record_batches(tmp_path):
+    features = [
+        (f"LINESTRING Z (0 0 1, {i} 1 2, {i + 1} 0 3, {i + 2} 1 4)", {"id": i}) for i in range(5)
+    ]
+    path = write_dataset(tmp_path / "streams.gpkg", {"streams": (4326, features)})
+    preprocessor = GDALPreprocessor()
+    steps = ["force_2d", ("simplify", {"max_vertices": 2}), "sinuosity"]
+
+    batches = preprocessor.iter_batches(path, batch_size=2, where="id > 0")
+    buffers = list(preprocessor.stream_pipeline(batches, steps))
+    assert [len(buffer) for buffer in buffers] == [2, 2]
+    geoms = np.concatenate([buffer.to_shapely() for buffer in buffers])
+    assert not shapely.has_z(geoms).any()
+    assert (shapely.get_num_coordinates(geoms) == 2).all()
+    assert preprocessor.metrics["stream_pipeline"]["simplify"]["features_simplified"] == 4
+
+    batches = preprocessor.iter_batches(path, batch_size=2, as_arrow=True)
+    records = list(preprocessor.stream_pipeline(batches, steps))
+    assert [record.num_rows for record in records] == [2, 2, 1]
+    assert records[0].column("id").to_pylist() == [0, 1]
+    assert records[0].column("sinuosity").to_pylist() == pytest.approx([1.0, 1.0])
@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.interfaces.async_preprocessor import AsyncPreprocessor  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+class Tracker:
+    """Blocking calls recording how many ran at once."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = 0
+        self.peak = 0
+        self.finished = []
+
+    def call(self, name, seconds=0.05):
+        def run():
+            with self.lock:
+                self.running += 1
+                self.peak = max(self.peak, self.running)
+            time.sleep(seconds)
+            with self.lock:
+                self.running -= 1
+                self.finished.append(name)
+            return name
+
+        return run
+
+
+def write_roads(tmp_path):
+    return write_dataset(
+        tmp_path / "roads.gpkg", {"roads": (4326, [("LINESTRING Z (0 0 1, 1 1 2)", {"id": 1})])}
+    )
+
+
+@pytest.mark.parametrize("executor", ["thread", "process"])
+def test_operations_are_awaitable(tmp_path, executor):
+    path = write_roads(tmp_path)
+
+    async def main():
+        async with AsyncPreprocessor("gdal", max_concurrency=1, executor=executor) as preprocessor:
+            return await preprocessor.ensure_2d_geometry(path), preprocessor.metrics
+
+    output, metrics = asyncio.run(main())
+    assert output == tmp_path / "roads_2d.gpkg"
+    assert read_layer(output)[0][1] == {"id": 1}
+    assert metrics["ensure_2d_geometry"]["features"] == 1
+
+
+def test_concurrency_is_bounded():
+    tracker = Tracker()
+
+    async def main():
+        preprocessor = AsyncPreprocessor("gdal", max_concurrency=2, executor="thread")
+        results = await asyncio.gather(*(preprocessor._submit(tracker.call(i)) for i in range(6)))
+        await preprocessor.close()
+        return results
+
+    assert asyncio.run(main()) == list(range(6))
+    assert tracker.peak == 2
+
+
+def test_backpressure_and_cancellation():
+    tracker = Tracker()
+
+    async def main():
+        preprocessor = AsyncPreprocessor(
+            "gdal", max_concurrency=1, max_pending=2, executor="thread"
+        )
+        running = asyncio.create_task(preprocessor._submit(tracker.call("running", 0.3)))
+        queued = asyncio.create_task(preprocessor._submit(tracker.call("queued")))
+        waiting = asyncio.create_task(preprocessor._submit(tracker.call("waiting")))
+        await asyncio.sleep(0.1)
+        # The third call waits for a pending slot
+        assert preprocessor.pending == 2
+        queued.cancel()
+        assert await running == "running"
+        assert await waiting == "waiting"
+        assert preprocessor.pending == 0
+        await preprocessor.close()
+        return queued
+
+    queued = asyncio.run(main())
+    assert queued.cancelled()
+    assert tracker.finished == ["running", "waiting"]
+
+
+def test_failures_release_their_slot():
+    def fail():
+        raise ValueError("no such layer")
+
+    async def main():
+        preprocessor = AsyncPreprocessor("gdal", max_concurrency=1, executor="thread")
+        with pytest.raises(ValueError):
+            await preprocessor._submit(fail)
+        assert preprocessor.pending == 0
+        result = await asyncio.wait_for(preprocessor._submit(lambda: "next"), 10)
+        await preprocessor.close()
+        return result
+
+    assert asyncio.run(main()) == "next"
+
+
+def test_unknown_executor():
+    with pytest.raises(ValueError):
+        AsyncPreprocessor("gdal", executor="fiber")
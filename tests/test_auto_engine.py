@@ -0,0 +1,111 @@
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("osgeo")
+
+from geotoolkit import PreprocessorFactory  # noqa: E402
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.auto_engine import cost_model  # noqa: E402
+from geotoolkit.engines.auto_engine import preprocessor as auto  # noqa: E402
+from geotoolkit.engines.auto_engine.cost_model import (  # noqa: E402
+    CostModel,
+    available_engines,
+    dataset_format,
+)
+from geotoolkit.engines.auto_engine.preprocessor import AutoPreprocessor  # noqa: E402
+
+from .helpers import write_dataset  # noqa: E402
+
+
+class SlowEngine:
+    def __init__(self):
+        self.metrics = {}
+
+    def clean_field_names(self, dataset):
+        self.metrics["clean_field_names"] = {"engine": type(self).__name__}
+        return dataset
+
+
+class FastEngine(SlowEngine):
+    def repair_geometry(self, dataset, in_place=False):
+        return dataset
+
+
+ENGINES = {"slow": SlowEngine, "fast": FastEngine}
+
+
+@pytest.fixture
+def engines(monkeypatch, tmp_path):
+    monkeypatch.setattr(cost_model, "cost_model_path", lambda: tmp_path / "cost_model.json")
+    monkeypatch.setattr(auto, "_engine_class", ENGINES.__getitem__)
+    preprocessor = AutoPreprocessor(engines=["slow", "fast"])
+    monkeypatch.setattr(preprocessor, "_engine", lambda engine: ENGINES[engine]())
+    model = CostModel(engines=["slow", "fast"])
+    model.fit("slow", "clean_field_names", "gpkg", {100: 1.0, 1100: 11.0})
+    model.fit("fast", "clean_field_names", "gpkg", {100: 0.1, 1100: 1.1})
+    preprocessor._model = model
+    return preprocessor
+
+
+def test_fit_and_estimate():
+    model = CostModel()
+    model.fit("gdal", "repair_geometry", "shp", {1000: 3.0, 100: 1.2})
+    assert model.estimate("gdal", "repair_geometry", "shp", 0) == pytest.approx(1.0)
+    assert model.estimate("gdal", "repair_geometry", "shp", 500) == pytest.approx(2.0)
+    assert model.estimate("gdal", "buffer", "shp", 500) is None
+
+    model.fit("gdal", "repair_geometry", "gpkg", {100: 3.2, 1000: 5.0})
+    # Formats without a benchmark average the benchmarked ones
+    assert model.estimate("gdal", "repair_geometry", "fgb", 0) == pytest.approx(2.0)
+
+
+def test_observations_move_the_per_feature_cost():
+    model = CostModel()
+    model.fit("gdal", "buffer", "shp", {100: 1.1, 200: 1.2})
+    model.observe("gdal", "buffer", "shp", 1000, 1.0 + 1000 * 0.006)
+    assert model.estimate("gdal", "buffer", "shp", 1000) == pytest.approx(
+        1.0 + 1000 * (0.001 + cost_model.OBSERVATION_WEIGHT * 0.005)
+    )
+
+
+def test_models_persist_for_the_same_engines(tmp_path):
+    model = CostModel(engines=available_engines())
+    model.fit("gdal", "buffer", "shp", {100: 1.0, 200: 2.0})
+    model.save(tmp_path / "model.json")
+    loaded = CostModel.load(tmp_path / "model.json")
+    assert loaded.coefficients == model.coefficients
+
+    CostModel(engines=["arcpy", "gdal", "other"]).save(tmp_path / "other.json")
+    assert CostModel.load(tmp_path / "other.json") is None
+    assert CostModel.load(tmp_path / "missing.json") is None
+
+
+def test_dataset_format():
+    assert dataset_format("data/roads.SHP") == "shp"
+    assert dataset_format(Path("data/hydro.gdb/streams")) == "gdb"
+
+
+def test_cheapest_engine_runs_the_operation(engines, tmp_path):
+    features = [(f"POINT ({i} 0)", {"id": i}) for i in range(10)]
+    path = str(write_dataset(tmp_path / "points.gpkg", {"points": (4326, features)}))
+
+    assert engines.clean_field_names(path) == path
+    selection = engines.metrics["engine_selection"]["clean_field_names"]
+    assert selection["engine"] == "fast"
+    assert selection["features"] == 10
+    assert selection["estimates"]["slow"] > selection["estimates"]["fast"]
+    assert engines.metrics["clean_field_names"] == {"engine": "FastEngine"}
+    assert (tmp_path / "cost_model.json").exists()
+
+
+def test_engines_without_the_operation_are_skipped(engines):
+    assert engines.select_engine("repair_geometry", "x.gpkg")[0] == "fast"
+    with pytest.raises(ProcessingError):
+        engines.select_engine("repair_geometry", "x.gpkg", tolerance=1)
+    with pytest.raises(AttributeError):
+        engines.buffer
+
+
+def test_factory_creates_auto_preprocessors():
+    assert isinstance(PreprocessorFactory.create("auto"), AutoPreprocessor)
@@ -0,0 +1,64 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.buffering import (  # noqa: E402
+    resolve_buffer_distance,
+    tree_union,
+)
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def test_presets_and_numbers_resolve():
+    assert resolve_buffer_distance("small") == 1.0
+    assert resolve_buffer_distance(2) == 2.0
+    with pytest.raises(ProcessingError):
+        resolve_buffer_distance("HUGE")
+
+
+def test_tree_union_matches_a_single_union():
+    rng = np.random.default_rng(0)
+    points = shapely.points(rng.uniform(0, 100, (200, 2)))
+    circles = shapely.buffer(points, 3)
+    groups = {"a": circles[:150], "b": circles[150:]}
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        unions = tree_union(groups, executor, leaf_size=16)
+    assert set(unions) == {"a", "b"}
+    for key, geoms in groups.items():
+        expected = shapely.union_all(geoms)
+        assert shapely.from_wkb(unions[key]).symmetric_difference(expected).area < 1e-6
+
+
+def test_buffer_dissolves_by_field(tmp_path):
+    features = [
+        ("POINT (0 0)", {"reach": "upper"}),
+        ("POINT (1 0)", {"reach": "upper"}),
+        ("POINT (10 0)", {"reach": "lower"}),
+    ]
+    path = write_dataset(tmp_path / "streams.gpkg", {"streams": (5070, features)})
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.buffer(path, "SMALL", dissolve_field="reach", max_workers=1)
+
+    rows = {values["reach"]: shapely.from_wkt(wkt) for wkt, values in read_layer(output)}
+    assert set(rows) == {"upper", "lower"}
+    assert len(rows["upper"].geoms) == 1
+    assert rows["upper"].bounds == pytest.approx((-1, -1, 2, 1))
+    assert preprocessor.metrics["buffer"]["groups"] == 2
+
+
+def test_buffer_without_dissolve_keeps_every_feature(tmp_path):
+    features = [("POINT (0 0)", {"id": 1}), ("POINT (1 0)", {"id": 2})]
+    path = write_dataset(tmp_path / "points.gpkg", {"points": (5070, features)})
+    output = GDALPreprocessor().buffer(path, 0.5, quad_segs=4)
+    rows = read_layer(output)
+    assert [values["id"] for _, values in rows] == [1, 2]
+    assert shapely.from_wkt(rows[0][0]).area == pytest.approx(
+        shapely.Point(0, 0).buffer(0.5, 4).area
+    )
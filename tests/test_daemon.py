@@ -0,0 +1,119 @@
+import socket
+import stat
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ConfigurationError, ProcessingError  # noqa: E402
+from geotoolkit.daemon import WorkerClient, serve, server  # noqa: E402
+from geotoolkit.daemon.protocol import decode, encode, parse_address  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def test_addresses():
+    assert parse_address(9000) == ("127.0.0.1", 9000)
+    assert parse_address("localhost:9000") == ("localhost", 9000)
+    assert parse_address(":9000") == ("127.0.0.1", 9000)
+    assert parse_address("/tmp/worker.sock") == Path("/tmp/worker.sock")
+    assert parse_address("run/v1:2/worker.sock") == Path("run/v1:2/worker.sock")
+    assert parse_address(("::1", 9000)) == ("::1", 9000)
+
+
+@pytest.mark.parametrize("address", ["0.0.0.0:9000", "example.com:9000", ("10.0.0.1", 9000)])
+def test_network_addresses_are_rejected(address):
+    with pytest.raises(ConfigurationError):
+        parse_address(address)
+
+
+def test_messages_encode_paths_and_arrays():
+    line = encode({"result": Path("a/b.gpkg"), "counts": np.arange(3), "ids": {2, 1}})
+    assert line.endswith(b"\n")
+    assert decode(line) == {"result": "a/b.gpkg", "counts": [0, 1, 2], "ids": [1, 2]}
+
+
+@pytest.fixture
+def daemon(tmp_path):
+    address = tmp_path / "worker.sock"
+    thread = threading.Thread(target=serve, args=(address, "gdal", 1), daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 60
+    while not address.exists():
+        assert time.monotonic() < deadline, "worker daemon did not start"
+        time.sleep(0.05)
+    client = WorkerClient(address, timeout=60)
+    yield client
+    client.shutdown()
+    thread.join(30)
+    assert not address.exists()
+
+
+@pytest.fixture
+def small_messages(monkeypatch):
+    monkeypatch.setattr(server, "MAX_MESSAGE_SIZE", 1024)
+
+
+def exchange(address, *lines):
+    """Send raw request lines and read responses until the daemon closes or goes quiet."""
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.settimeout(30)
+        sock.connect(str(address))
+        for line in lines:
+            sock.sendall(line)
+        sock.shutdown(socket.SHUT_WR)
+        data = b""
+        while chunk := sock.recv(65536):
+            data += chunk
+    return [decode(line) for line in data.splitlines()]
+
+
+def test_jobs_run_on_warm_workers(daemon, tmp_path):
+    path = write_dataset(
+        tmp_path / "roads.gpkg", {"roads": (4326, [("LINESTRING Z (0 0 1, 1 1 2)", {"id": 1})])}
+    )
+    assert daemon.ping()["jobs"] == 0
+
+    output = daemon.ensure_2d_geometry(str(path))
+    assert output == str(tmp_path / "roads_2d.gpkg")
+    assert read_layer(output)[0][1] == {"id": 1}
+    assert daemon.metrics["ensure_2d_geometry"]["features"] == 1
+    assert daemon.ping()["jobs"] == 1
+
+
+def test_failed_jobs_raise_and_batches_keep_their_order(daemon, tmp_path):
+    with pytest.raises(ProcessingError):
+        daemon.call("_private")
+    with pytest.raises(ProcessingError):
+        daemon.ensure_2d_geometry(str(tmp_path / "missing.gpkg"))
+    assert daemon.batch([{"method": "ping"}, {"method": "metrics"}])[0]["jobs"] == 0
+
+
+def test_the_socket_is_private(daemon):
+    assert stat.S_IMODE(daemon.address.stat().st_mode) == 0o600
+
+
+def test_malformed_requests_get_an_error(daemon):
+    responses = exchange(
+        daemon.address,
+        b"[1]\n",
+        encode({"id": 2, "method": ["ping"]}),
+        encode({"id": 3, "method": "batch", "jobs": [1]}),
+        encode({"id": 4, "method": "ping"}),
+    )
+    assert [response["ok"] for response in responses] == [False, False, True, True]
+    assert "JSON object" in responses[0]["error"]
+    assert responses[2]["result"][0]["ok"] is False
+    assert responses[3]["result"]["jobs"] == 0
+
+
+def test_oversized_requests_get_an_error(small_messages, daemon):
+    responses = exchange(daemon.address, b'{"method": "ping", "pad": "' + b"x" * 2048 + b'"}\n')
+    assert len(responses) == 1
+    assert not responses[0]["ok"]
+    assert "1024 bytes" in responses[0]["error"]
+    assert daemon.ping()["jobs"] == 0
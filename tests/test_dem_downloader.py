@@ -0,0 +1,25 @@
+import asyncio
+import sys
+
+import pytest
+
+pytest.importorskip("osgeo")
+pytest.importorskip("requests")
+
+from geotoolkit.tools import dem_downloader  # noqa: E402
+
+
+def test_download_falls_back_to_a_thread_without_aiohttp(monkeypatch):
+    monkeypatch.setitem(sys.modules, "aiohttp", None)
+    monkeypatch.setattr(dem_downloader, "_fallback_logged", False)
+    downloads, warnings = [], []
+    monkeypatch.setattr(
+        dem_downloader, "download_ned_tile", lambda *args: downloads.append(args) or True
+    )
+    monkeypatch.setattr(dem_downloader.logger, "warning", warnings.append)
+
+    bbox = (-100.0, 40.0, -99.9, 40.1)
+    for _ in range(2):
+        assert asyncio.run(dem_downloader.download_ned_tile_async(bbox, "dem.tif"))
+    assert downloads == [(bbox, "dem.tif", 10)] * 2
+    assert len(warnings) == 1
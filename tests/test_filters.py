@@ -0,0 +1,66 @@
+import pytest
+
+pytest.importorskip("osgeo")
+
+import shapely  # noqa: E402
+from osgeo import ogr  # noqa: E402
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.filters import (  # noqa: E402
+    apply_filters,
+    ignored_fields,
+    where_identifiers,
+)
+
+from .helpers import write_dataset  # noqa: E402
+
+
+def test_where_identifiers_are_whole_tokens():
+    assert where_identifiers("stream_id = 3") == {"stream_id"}
+
+
+def test_where_identifiers_skip_literals_and_unquote_names():
+    identifiers = where_identifiers("\"Stream Name\" = 'id or x' AND code IN (1, 2)")
+    assert {"stream name", "code"} <= identifiers
+    assert "id" not in identifiers
+
+
+def test_ignored_fields_keep_the_filter_fields(tmp_path):
+    path = write_dataset(
+        tmp_path / "data.gpkg",
+        {"streams": (4326, [("POINT (0 0)", {"id": 1, "stream_id": 3, "name": "a"})])},
+    )
+    ds = ogr.Open(str(path))
+    layer = ds.GetLayer()
+    assert ignored_fields(layer, "stream_id = 3") == ["id", "name"]
+    assert ignored_fields(layer) == ["id", "stream_id", "name"]
+
+
+def filtered_ids(path, **filters):
+    ds = ogr.Open(str(path))
+    layer = apply_filters(ds.GetLayer(), **filters)
+    return sorted(feature.GetField("id") for feature in layer)
+
+
+@pytest.fixture
+def points(tmp_path):
+    # Points at (i, i) for i in 0..9
+    features = [(f"POINT ({i} {i})", {"id": i, "even": i % 2}) for i in range(10)]
+    return write_dataset(tmp_path / "points.gpkg", {"points": (5070, features)})
+
+
+def test_where_and_bbox_filters(points):
+    assert filtered_ids(points, bbox=(1.5, 1.5, 5.5, 5.5)) == [2, 3, 4, 5]
+    assert filtered_ids(points, where="even = 0", bbox=(1.5, 1.5, 5.5, 5.5)) == [2, 4]
+
+
+def test_mask_and_bbox_filter_by_their_intersection(points):
+    mask = shapely.box(3.5, 3.5, 9.5, 9.5)
+    assert filtered_ids(points, mask=mask) == [4, 5, 6, 7, 8, 9]
+    # Point 2 is in the bbox only and point 8 in the mask only
+    assert filtered_ids(points, bbox=(1.5, 1.5, 5.5, 5.5), mask=mask) == [4, 5]
+
+
+def test_bbox_needs_four_values(points):
+    with pytest.raises(ProcessingError):
+        filtered_ids(points, bbox=(0, 0, 1))
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.formats import (  # noqa: E402
+    output_path_for,
+    resolve_output_format,
+)
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.utils.config import ConfigManager  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def test_default_keeps_the_input_format():
+    fmt = resolve_output_format(None, "ESRI Shapefile", Path("roads.shp"))
+    assert (fmt.driver, fmt.extension) == ("ESRI Shapefile", ".shp")
+    assert output_path_for(Path("data/roads.shp"), "2d", fmt) == Path("data/roads_2d.shp")
+
+
+def test_aliases_and_layer_options():
+    config = ConfigManager().config
+    parquet = resolve_output_format("GeoParquet", "GPKG", Path("roads.gpkg"))
+    assert (parquet.driver, parquet.extension) == ("Parquet", ".parquet")
+    assert f"ROW_GROUP_SIZE={config.parquet_row_group_size}" in parquet.layer_options
+    assert f"COMPRESSION={config.parquet_compression}" in parquet.layer_options
+
+    fgb = resolve_output_format(".fgb", "GPKG", Path("roads.gpkg"))
+    assert fgb.driver == "FlatGeobuf"
+    assert "SPATIAL_INDEX=YES" in fgb.layer_options
+
+
+def test_unknown_format():
+    with pytest.raises(ProcessingError):
+        resolve_output_format("dwg", "GPKG", Path("roads.gpkg"))
+
+
+def test_operations_write_the_requested_format(tmp_path):
+    path = write_dataset(
+        tmp_path / "roads.gpkg", {"roads": (4326, [("LINESTRING Z (0 0 1, 1 1 2)", {"id": 1})])}
+    )
+    output = GDALPreprocessor().ensure_2d_geometry(path, output_format="flatgeobuf")
+    assert Path(output) == tmp_path / "roads_2d.fgb"
+    [(wkt, values)] = read_layer(output)
+    assert shapely.from_wkt(wkt).equals(shapely.LineString([(0, 0), (1, 1)]))
+    assert not shapely.has_z(shapely.from_wkt(wkt))
+    assert values == {"id": 1}
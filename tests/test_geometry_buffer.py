@@ -0,0 +1,89 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine.geometry_buffer import (  # noqa: E402
+    GeometryBuffer,
+    LayerSchema,
+)
+
+SCHEMA = LayerSchema("test", 0)
+
+
+def round_trip(wkts):
+    geoms = np.array(shapely.from_wkt(wkts), dtype=object)
+    return GeometryBuffer.from_shapely(geoms, SCHEMA).to_shapely()
+
+
+@pytest.mark.parametrize(
+    "wkt",
+    [
+        "POINT EMPTY",
+        "LINESTRING EMPTY",
+        "POLYGON EMPTY",
+        "MULTIPOINT EMPTY",
+        "MULTILINESTRING EMPTY",
+        "MULTIPOLYGON EMPTY",
+    ],
+)
+def test_empty_geometries_round_trip(wkt):
+    result = round_trip([wkt, "POINT (1 2)", wkt])
+    assert [geom.wkt for geom in result] == [wkt, "POINT (1 2)", wkt]
+
+
+def test_empty_geometries_have_no_parts():
+    geoms = np.array(shapely.from_wkt(["POLYGON EMPTY", "POLYGON ((0 0, 1 0, 1 1, 0 0))"]))
+    buffer = GeometryBuffer.from_shapely(geoms, SCHEMA)
+    assert list(np.diff(buffer.geom_offsets)) == [0, 1]
+
+
+def test_null_geometries_round_trip():
+    geoms = np.array([None, shapely.Point(1, 2)], dtype=object)
+    result = GeometryBuffer.from_shapely(geoms, SCHEMA).to_shapely()
+    assert result[0] is None
+    assert result[1].equals(shapely.Point(1, 2))
+
+
+def test_multi_part_round_trip():
+    wkts = [
+        "MULTIPOLYGON (((0 0, 1 0, 1 1, 0 0)), "
+        "((5 5, 9 5, 9 9, 5 5), (6 5.5, 8 5.5, 8 7.5, 6 5.5)))",
+        "MULTILINESTRING ((0 0, 1 1), (2 2, 3 3, 4 2))",
+        "MULTIPOINT ((0 0), (1 1))",
+        "POLYGON ((0 0, 4 0, 4 4, 0 0), (1 0.5, 3 0.5, 3 2.5, 1 0.5))",
+    ]
+    result = round_trip(wkts)
+    assert [geom.wkt for geom in result] == [shapely.from_wkt(wkt).wkt for wkt in wkts]
+
+
+def test_mixed_dimensions_round_trip():
+    wkts = [
+        "POINT Z (1 1 1)",
+        "POLYGON ((0 0, 1 0, 1 1, 0 0))",
+        "LINESTRING Z (0 0 1, 1 1 2)",
+        "LINESTRING (0 0, 1 1)",
+    ]
+    result = round_trip(wkts)
+    assert [geom.wkt for geom in result] == [shapely.from_wkt(wkt).wkt for wkt in wkts]
+    assert list(shapely.has_z(result)) == [True, False, True, False]
+
+
+def test_concat_and_take_keep_dimensions():
+    flat = GeometryBuffer.from_shapely(np.array([shapely.Point(0, 0)]), SCHEMA)
+    raised = GeometryBuffer.from_shapely(np.array([shapely.Point(1, 1, 5)]), SCHEMA)
+    buffer = GeometryBuffer.concat([flat, raised], SCHEMA)
+    assert [geom.wkt for geom in buffer.to_shapely()] == ["POINT (0 0)", "POINT Z (1 1 5)"]
+    assert buffer.take(np.array([1, 0])).to_shapely()[1].wkt == "POINT (0 0)"
+    assert not buffer.force_2d().has_z
+
+
+def test_sinuosity_of_empty_lines():
+    geoms = np.array(
+        shapely.from_wkt(["LINESTRING EMPTY", "LINESTRING (0 0, 1 1, 2 0)", "POINT (0 0)"])
+    )
+    values = GeometryBuffer.from_shapely(geoms, SCHEMA).sinuosity()
+    assert values[0] == 1.0
+    assert values[1] == pytest.approx(2**0.5)
+    assert np.isnan(values[2])
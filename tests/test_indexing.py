@@ -0,0 +1,45 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine.formats import OutputFormat  # noqa: E402
+from geotoolkit.engines.gdal_engine.indexing import (  # noqa: E402
+    build_indexes,
+    bulk_load_options,
+)
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+
+from .helpers import write_dataset  # noqa: E402
+
+
+def sqlite_names(path):
+    with sqlite3.connect(str(path)) as connection:
+        return {name for (name,) in connection.execute("SELECT name FROM sqlite_master")}
+
+
+def test_geopackages_are_loaded_without_their_rtree():
+    fmt = OutputFormat("GPKG", ".gpkg", ["SPATIAL_INDEX=YES", "FID=fid"])
+    assert bulk_load_options(fmt) == ["FID=fid", "SPATIAL_INDEX=NO"]
+    fgb = OutputFormat("FlatGeobuf", ".fgb", ["SPATIAL_INDEX=YES"])
+    assert bulk_load_options(fgb) == ["SPATIAL_INDEX=YES"]
+
+
+def test_other_drivers_are_left_alone(tmp_path):
+    path = write_dataset(tmp_path / "roads.gpkg", {"roads": (4326, [("POINT (0 0)", {"id": 1})])})
+    output = GDALPreprocessor().ensure_2d_geometry(path, output_format="geojson")
+    assert build_indexes(output, ["id"]) == {"driver": "GeoJSON", "layers": {}}
+
+
+def test_outputs_are_indexed_after_the_bulk_load(tmp_path):
+    features = [("POINT (0 0)", {"id": 1, "name": "a"}), ("POINT (1 1)", {"id": 2, "name": "b"})]
+    path = write_dataset(tmp_path / "roads.gpkg", {"roads": (4326, features)})
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.ensure_2d_geometry(path, index_fields=["id", "missing"])
+
+    timings = preprocessor.metrics["ensure_2d_geometry"]["indexes"]
+    assert set(timings["layers"]["roads"]) == {"spatial", "id"}
+    names = sqlite_names(output)
+    assert "rtree_roads_geom" in names
+    assert "idx_roads_id" in names
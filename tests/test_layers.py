@@ -0,0 +1,141 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.constants import QCFlag  # noqa: E402
+from geotoolkit.core.exceptions import OperationCancelledError  # noqa: E402
+from geotoolkit.engines.gdal_engine.layers import layer_updates, read_updates  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.utils.progress import CancellationToken  # noqa: E402
+
+from .helpers import layer_names, read_layer, write_dataset  # noqa: E402
+
+BOWTIE = "POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))"
+
+
+def two_layers(path, count=6):
+    features = [
+        (BOWTIE if i % 2 else "POLYGON ((0 0, 1 0, 1 1, 0 0))", {"id": i}) for i in range(count)
+    ]
+    return write_dataset(path, {"a": (5070, features), "b": (5070, features)})
+
+
+def test_layer_updates_are_written_batch_by_batch(tmp_path):
+    path = two_layers(tmp_path / "data.gpkg")
+    part = tmp_path / "parts" / "a.updates"
+    result = layer_updates(str(path), "a", "repair", str(part), batch_size=2)
+    assert result["batches"] == 3
+    assert result["features"] == 6
+    batches = list(read_updates(result["path"]))
+    assert [len(fids) for fids, _, _ in batches] == [2, 2, 2]
+    assert all(list(index) == [1] for _, index, _ in batches)
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_worker_progress_reaches_the_caller(tmp_path, max_workers):
+    path = two_layers(tmp_path / "data.gpkg")
+    reports = []
+    GDALPreprocessor().repair_geometry(path, progress=reports.append, max_workers=max_workers)
+
+    assert reports[-1].done == reports[-1].total == 12
+    for layer_name in ("a", "b"):
+        geoms = shapely.from_wkt([wkt for wkt, _ in read_layer(path, layer_name)])
+        assert shapely.is_valid(geoms).all()
+        # Both lobes of the bow-ties are kept
+        assert shapely.area(geoms).tolist() == [0.5] * 6
+    assert not (tmp_path / "data.gpkg.parts").exists()
+
+
+def test_cancelling_stops_the_workers(tmp_path):
+    path = two_layers(tmp_path / "data.gpkg")
+    token = CancellationToken()
+    preprocessor = GDALPreprocessor()
+    with pytest.raises(OperationCancelledError):
+        preprocessor.repair_geometry(
+            path, progress=lambda _: token.cancel(), cancel_token=token, max_workers=2
+        )
+    # Cancelled while the workers computed the updates: nothing was applied
+    geoms = shapely.from_wkt([wkt for wkt, _ in read_layer(path, "a")])
+    assert not shapely.is_valid(geoms).all()
+
+    preprocessor.repair_geometry(path, max_workers=2)
+    geoms = shapely.from_wkt([wkt for wkt, _ in read_layer(path, "b")])
+    assert shapely.is_valid(geoms).all()
+
+
+def test_sinuosity_reports_progress_and_can_be_cancelled(tmp_path):
+    features = [("LINESTRING (0 0, 1 1, 2 0)", {"id": i}) for i in range(4)]
+    path = write_dataset(tmp_path / "streams.gpkg", {"a": (5070, features), "b": (5070, features)})
+    preprocessor = GDALPreprocessor()
+    token = CancellationToken()
+    with pytest.raises(OperationCancelledError):
+        preprocessor.calculate_sinuosity(
+            path, "sinuosity", progress=lambda _: token.cancel(), cancel_token=token, max_workers=2
+        )
+    # Cancelled while the workers measured the lines: nothing was written
+    assert all(values.get("sinuosity") is None for _, values in read_layer(path, "a"))
+
+    reports = []
+    preprocessor.calculate_sinuosity(path, "sinuosity", progress=reports.append, max_workers=2)
+    assert reports[-1].done == reports[-1].total == 8
+    for layer_name in ("a", "b"):
+        values = [values["sinuosity"] for _, values in read_layer(path, layer_name)]
+        assert values == pytest.approx([2**0.5] * 4)
+
+
+def test_quality_check_reports_every_layer(tmp_path):
+    path = two_layers(tmp_path / "data.gpkg")
+    report = GDALPreprocessor().quality_check(path, layers=["b"])
+    assert list(report["layers"]) == ["b"]
+    assert report["features"] == report["layers"]["b"]["features"] == 6
+    assert all("qc_flags" not in values for _, values in read_layer(path, "a"))
+    assert all(values["qc_flags"] is not None for _, values in read_layer(path, "b"))
+
+
+@pytest.mark.parametrize("write_flags", [True, False])
+def test_quality_check_runs_layers_in_workers(tmp_path, write_flags):
+    path = two_layers(tmp_path / "data.gpkg")
+    report = GDALPreprocessor().quality_check(path, write_flags=write_flags, max_workers=2)
+    assert list(report["layers"]) == ["a", "b"]
+    assert report["features"] == 12
+    assert report["flag_counts"]["INVALID_GEOMETRY"] == 6
+    # Duplicates are looked for within each layer
+    assert report["layers"]["a"]["flag_counts"]["DUPLICATE_GEOMETRY"] == 4
+    assert report["flag_counts"]["DUPLICATE_GEOMETRY"] == 8
+    assert "thresholds" not in report["layers"]["a"]
+    for layer_name in ("a", "b"):
+        flags = [values.get("qc_flags") for _, values in read_layer(path, layer_name)]
+        if write_flags:
+            assert [bool(flag & QCFlag.INVALID_GEOMETRY) for flag in flags] == [False, True] * 3
+        else:
+            assert flags == [None] * 6
+    assert not (tmp_path / "data.gpkg.parts").exists()
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_clean_topology_and_buffer_write_every_layer(tmp_path, max_workers):
+    squares = [(shapely.box(i, 0, i + 1, 1).wkt, {"id": i}) for i in range(4)]
+    path = write_dataset(tmp_path / "data.gpkg", {"a": (5070, squares), "b": (5070, squares)})
+    preprocessor = GDALPreprocessor()
+
+    cleaned = preprocessor.clean_topology(path, 0.001, 0.001, 0.001, max_workers=max_workers)
+    assert layer_names(cleaned) == ["a", "b"]
+    metrics = preprocessor.metrics["clean_topology"]
+    assert metrics["layer_workers"] == max_workers
+    assert metrics["layers"]["b"]["features_removed"] == 0
+    for layer_name in ("a", "b"):
+        assert sorted(values["id"] for _, values in read_layer(cleaned, layer_name)) == [0, 1, 2, 3]
+    assert not (tmp_path / "data_clean.gpkg.parts").exists()
+
+    buffered = preprocessor.buffer(path, 0.5, dissolve=True, max_workers=max_workers)
+    assert layer_names(buffered) == ["a", "b"]
+    metrics = preprocessor.metrics["buffer"]
+    assert metrics["layer_workers"] == max_workers
+    assert metrics["features"] == 8
+    assert metrics["groups"] == 2
+    for layer_name in ("a", "b"):
+        (wkt, _), *rest = read_layer(buffered, layer_name)
+        assert not rest
+        assert shapely.from_wkt(wkt).area == pytest.approx(5 + 4 + np.pi / 4, rel=0.01)
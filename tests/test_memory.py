@@ -0,0 +1,72 @@
+import pytest
+
+pytest.importorskip("osgeo")
+
+from osgeo import ogr  # noqa: E402
+
+from geotoolkit.engines.gdal_engine.features import iter_feature_batches  # noqa: E402
+from geotoolkit.utils.config import ConfigManager  # noqa: E402
+from geotoolkit.utils.memory import (  # noqa: E402
+    MAX_BATCH_SIZE,
+    MIN_BATCH_SIZE,
+    AdaptiveBatchSize,
+    batch_size_for,
+    warp_memory_limit,
+    window_rows,
+    worker_limit,
+)
+
+from .helpers import write_dataset  # noqa: E402
+
+
+@pytest.fixture
+def budget(monkeypatch):
+    """A 1 MB memory budget and batches starting at 100 features."""
+    config = ConfigManager().config
+    monkeypatch.setattr(config, "memory_budget", 1)
+    monkeypatch.setattr(config, "chunk_size", 100)
+    return config
+
+
+def test_batch_sizes_fill_their_share_of_the_budget(budget):
+    assert batch_size_for(1000) == 104
+    assert batch_size_for(1000, fraction=0.5) == 524
+    assert batch_size_for(10**9) == MIN_BATCH_SIZE
+    assert batch_size_for(1) == MAX_BATCH_SIZE
+    assert batch_size_for(0) == 100
+
+
+def test_workers_are_throttled_to_the_budget(budget):
+    assert worker_limit(8, 100 * 1024) == 5
+    assert worker_limit(2, 100 * 1024) == 2
+    assert worker_limit(8, 10**9) == 1
+    assert worker_limit(8, 0) == 8
+
+
+def test_raster_windows_and_warps(budget):
+    assert window_rows(1000, 8) == 13
+    assert window_rows(1000, 8, block_height=4) == 12
+    assert window_rows(10**7, 8, block_height=4) == 4
+    assert warp_memory_limit(64) == 1
+    budget.memory_budget = 2048
+    assert warp_memory_limit(64) == 64
+    assert warp_memory_limit(4096) == 512
+
+
+def test_adaptive_batch_size_follows_the_measured_bytes(budget):
+    adaptive = AdaptiveBatchSize()
+    assert adaptive.size == 100
+    # 250 serialized bytes per feature, 1000 in memory
+    assert adaptive.observe(100, 100 * 250) == 104
+    # The estimate moves halfway towards a batch of 3000 bytes per feature
+    assert adaptive.observe(10, 10 * 750) == 52
+    assert adaptive.observe(0, 0) == 52
+
+
+def test_feature_batches_are_resized_after_the_first(budget, tmp_path):
+    features = [(f"POINT ({i} {i})", {"id": i}) for i in range(300)]
+    path = write_dataset(tmp_path / "points.gpkg", {"points": (4326, features)})
+    ds = ogr.Open(str(path))
+    sizes = [len(batch) for batch in iter_feature_batches(ds.GetLayer())]
+    assert sizes == [100, 200]
+    assert [len(batch) for batch in iter_feature_batches(ds.GetLayer(), 64)] == [64] * 4 + [44]
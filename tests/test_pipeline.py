@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.geometry_buffer import (  # noqa: E402
+    GeometryBuffer,
+    LayerSchema,
+)
+from geotoolkit.engines.gdal_engine.pipeline import Pipeline  # noqa: E402
+from geotoolkit.engines.gdal_engine.srs import spatial_reference  # noqa: E402
+
+
+def geographic_buffer(geoms):
+    schema = LayerSchema("test", 0, spatial_reference(4326).ExportToWkt())
+    return GeometryBuffer.from_shapely(np.array(geoms, dtype=object), schema)
+
+
+def test_reproject_reads_geographic_sources_as_lon_lat():
+    buffer = geographic_buffer([shapely.Point(-100, 40)])
+    result = Pipeline([("reproject", {"target_epsg": 3857})])(buffer)
+    x, y = shapely.get_coordinates(result.to_shapely())[0]
+    assert x == pytest.approx(-11131949.08, abs=0.01)
+    assert y == pytest.approx(4865942.28, abs=0.01)
+
+
+def test_reproject_writes_geographic_targets_as_lon_lat():
+    schema = LayerSchema("test", 0, spatial_reference(3857).ExportToWkt())
+    buffer = GeometryBuffer.from_shapely(
+        np.array([shapely.Point(-11131949.08, 4865942.28)]), schema
+    )
+    result = Pipeline([("reproject", {"target_epsg": 4326})])(buffer)
+    x, y = shapely.get_coordinates(result.to_shapely())[0]
+    assert (x, y) == pytest.approx((-100, 40), abs=1e-6)
+
+
+def test_approximate_reproject_matches_exact():
+    line = shapely.LineString([(-100 + i * 0.001, 40 + i * 0.0005) for i in range(50)])
+    buffer = geographic_buffer([line])
+    exact = Pipeline([("reproject", {"target_epsg": 5070})])
+    approximate = Pipeline([("reproject", {"target_epsg": 5070, "approximate": True})])
+    expected = shapely.get_coordinates(exact(buffer).to_shapely())
+    actual = shapely.get_coordinates(approximate(buffer).to_shapely())
+    assert np.abs(actual - expected).max() <= 0.5
+    metrics = approximate.metrics["reproject"]
+    assert metrics["features"] == 1
+    assert metrics["fallback_features"] == 0
+    assert metrics["sampled_max_error"] <= 0.5
+
+
+def test_steps_are_fused_and_report_metrics():
+    geoms = [
+        shapely.LineString([(0, 0), (1, 1), (2, 0)]),
+        shapely.Polygon([(0, 0), (2, 2), (2, 0), (0, 2), (0, 0)]),
+        shapely.Point(0, 0, 1),
+    ]
+    pipeline = Pipeline(["force_2d", "repair", "sinuosity", "quality_check"])
+    result = pipeline(GeometryBuffer.from_shapely(np.array(geoms), LayerSchema("test", 0)))
+    assert not result.has_z
+    assert shapely.is_valid(result.to_shapely()).all()
+    assert result.attributes["sinuosity"][0] == pytest.approx(2**0.5)
+    assert pipeline.metrics["repair"]["repaired_features"] == 1
+    assert pipeline.metrics["quality_check"]["features"] == 3
+
+
+def test_unknown_step():
+    with pytest.raises(ProcessingError):
+        Pipeline(["nope"])
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from osgeo import ogr  # noqa: E402
+
+from geotoolkit.engines.gdal_engine.formats import OutputFormat  # noqa: E402
+from geotoolkit.engines.gdal_engine.geometry_buffer import (  # noqa: E402
+    GeometryBuffer,
+    LayerSchema,
+)
+from geotoolkit.engines.gdal_engine.pipeline import Pipeline  # noqa: E402
+from geotoolkit.engines.gdal_engine.precision import (  # noqa: E402
+    create_layer,
+    precision_decimals,
+    snap_geometries,
+)
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+# A notch that snaps onto the ring's bottom edge, making the polygon invalid
+NOTCHED = shapely.Polygon([(0, 0), (2, 0), (2, 1), (1, 0.004), (0, 1), (0, 0)])
+
+
+class RecordingDataset:
+    def CreateLayer(self, name, srs, geom_type, options=None):
+        self.options = options
+        return name
+
+
+@pytest.mark.parametrize(
+    "grid_size, decimals", [(0.001, 3), (0.25, 2), (0.1, 1), (1, 0), (10, 0), (1e-7, 7)]
+)
+def test_precision_decimals(grid_size, decimals):
+    assert precision_decimals(grid_size) == decimals
+
+
+def test_snapping_drops_repeated_vertices():
+    line = shapely.LineString([(0, 0), (0.004, 0.001), (1.0049, 1), (2.001, 0.999)])
+    (snapped,), stats = snap_geometries(np.array([line]), 0.01)
+    assert shapely.get_coordinates(snapped).tolist() == [[0, 0], [1, 1], [2, 1]]
+    assert stats == {"vertices_removed": 1, "repaired_features": 0}
+
+
+def test_collapsed_rings_keep_their_vertices():
+    tiny = shapely.box(0, 0, 0.004, 0.004)
+    (snapped,), stats = snap_geometries(np.array([tiny]), 0.01)
+    assert shapely.get_num_coordinates(snapped) == 5
+    assert stats["vertices_removed"] == 0
+
+
+def test_snapping_can_repair_what_it_invalidates():
+    (snapped,), _ = snap_geometries(np.array([NOTCHED]), 0.01)
+    assert not snapped.is_valid
+    (repaired,), stats = snap_geometries(np.array([NOTCHED]), 0.01, repair=True)
+    assert repaired.is_valid
+    assert stats["repaired_features"] == 1
+
+
+def test_precision_step_reports_metrics():
+    pipeline = Pipeline([("precision", {"grid_size": 0.01, "repair": True})])
+    buffer = GeometryBuffer.from_shapely(np.array([NOTCHED]), LayerSchema("test", 0))
+    assert shapely.is_valid(pipeline(buffer).to_shapely()).all()
+    assert pipeline.metrics["precision"] == {
+        "grid_size": 0.01,
+        "vertices_removed": 0,
+        "repaired_features": 1,
+    }
+
+
+def test_geojson_layers_write_only_the_grid_digits():
+    ds = RecordingDataset()
+    geojson = OutputFormat("GeoJSON", ".geojson", ["RFC7946=NO"])
+    create_layer(ds, "roads", None, ogr.wkbLineString, geojson, ["RFC7946=NO"], 0.25)
+    assert ds.options == ["RFC7946=NO", "COORDINATE_PRECISION=2"]
+    create_layer(ds, "roads", None, ogr.wkbLineString, geojson, ["RFC7946=NO"])
+    assert ds.options == ["RFC7946=NO"]
+
+
+def test_pipeline_outputs_are_snapped(tmp_path):
+    features = [("LINESTRING (0.123456 0.987654, 1.000001 2.5)", {"id": 1})]
+    path = write_dataset(tmp_path / "roads.gpkg", {"roads": (5070, features)})
+    output = GDALPreprocessor().run_pipeline(path, [("precision", {"grid_size": 0.001})])
+    [(wkt, _)] = read_layer(output)
+    np.testing.assert_allclose(
+        shapely.get_coordinates(shapely.from_wkt(wkt)), [[0.123, 0.988], [1.0, 2.5]]
+    )
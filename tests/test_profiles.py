@@ -0,0 +1,97 @@
+import inspect
+
+import pytest
+
+pytest.importorskip("osgeo")
+
+from osgeo import gdal  # noqa: E402
+
+from geotoolkit.core.exceptions import ConfigurationError  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.profiles import (  # noqa: E402
+    cache_size,
+    gdal_profile,
+    profiled,
+    resolve_gdal_profile,
+)
+from geotoolkit.utils.config import ConfigManager  # noqa: E402
+
+
+class Engine:
+    def __init__(self):
+        self.metrics = {}
+        self.seen = None
+
+    @profiled
+    def run(self, dataset, value=1):
+        self.seen = gdal.GetConfigOption("OGR_SQLITE_SYNCHRONOUS")
+        self.metrics["run"] = {"value": value}
+        return dataset
+
+
+@pytest.fixture
+def config(monkeypatch):
+    config = ConfigManager().config
+    monkeypatch.setattr(config, "max_threads", 3)
+    monkeypatch.setattr(config, "timeout", 20)
+    monkeypatch.setattr(config, "memory_budget", 1000)
+    return config
+
+
+def test_config_settings_reach_gdal(config):
+    assert resolve_gdal_profile("default") == {
+        "GDAL_NUM_THREADS": "3",
+        "GDAL_HTTP_TIMEOUT": "20",
+        "GDAL_CACHEMAX": "100",
+    }
+
+
+def test_profiles_override_and_extend_the_config(config, monkeypatch):
+    options = resolve_gdal_profile("bulk_load")
+    assert options["GDAL_NUM_THREADS"] == "ALL_CPUS"
+    assert options["GDAL_HTTP_TIMEOUT"] == "20"
+    assert options["OGR_SQLITE_SYNCHRONOUS"] == "OFF"
+    assert resolve_gdal_profile({"VSI_CACHE": True})["VSI_CACHE"] == "True"
+
+    monkeypatch.setattr(config, "gdal_profile", "low_memory")
+    assert resolve_gdal_profile()["GDAL_NUM_THREADS"] == "1"
+    with pytest.raises(ConfigurationError):
+        resolve_gdal_profile("turbo")
+
+
+def test_profiles_are_restored_after_the_block(config):
+    cache = gdal.GetCacheMax()
+    with gdal_profile("bulk_load") as options:
+        assert gdal.GetConfigOption("OGR_SQLITE_SYNCHRONOUS") == "OFF"
+        # The block cache is process-wide, so a scoped profile leaves it alone
+        assert gdal.GetCacheMax() == cache
+        assert "GDAL_CACHEMAX" not in options
+    assert gdal.GetConfigOption("OGR_SQLITE_SYNCHRONOUS") is None
+    assert gdal.GetCacheMax() == cache
+
+
+def test_engines_apply_the_cache_size_of_the_configured_profile(config, monkeypatch):
+    assert cache_size("default") == 100 * 1024 * 1024
+    assert cache_size("bulk_load") == 250 * 1024 * 1024
+    assert cache_size({"GDAL_CACHEMAX": "64"}) == 64 * 1024 * 1024
+
+    cache = gdal.GetCacheMax()
+    monkeypatch.setattr(config, "gdal_profile", "low_memory")
+    try:
+        GDALPreprocessor()
+        assert gdal.GetCacheMax() == 50 * 1024 * 1024
+    finally:
+        gdal.SetCacheMax(cache)
+
+
+def test_operations_report_their_profile(config):
+    engine = Engine()
+    assert "gdal_profile" in inspect.signature(Engine.run).parameters
+    assert engine.run("roads.gpkg", gdal_profile="bulk_load") == "roads.gpkg"
+    assert engine.seen == "OFF"
+    assert engine.metrics["run"]["value"] == 1
+    assert engine.metrics["run"]["gdal_profile"]["name"] == "bulk_load"
+
+    engine.run("roads.gpkg", gdal_profile={"OGR_SQLITE_CACHE": "8"})
+    assert engine.metrics["run"]["gdal_profile"]["name"] == "custom"
+    assert engine.metrics["run"]["gdal_profile"]["options"]["OGR_SQLITE_CACHE"] == "8"
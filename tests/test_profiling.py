@@ -0,0 +1,90 @@
+import json
+import pstats
+
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine.profiles import profiled  # noqa: E402
+from geotoolkit.utils.config import ConfigManager  # noqa: E402
+from geotoolkit.utils.profiling import (  # noqa: E402
+    PROFILE_CATEGORIES,
+    profile_operation,
+)
+
+
+class Engine:
+    def __init__(self):
+        self.metrics = {}
+
+    @profiled
+    def buffer_points(self, dataset, count=2000):
+        geoms = shapely.buffer(
+            shapely.points(np.random.default_rng(0).uniform(0, 1, (count, 2))), 1
+        )
+        self.metrics["buffer_points"] = {"features": len(geoms)}
+        return self.nested(dataset)
+
+    @profiled
+    def nested(self, dataset):
+        self.metrics["nested"] = {"zones": 1}
+        return dataset
+
+
+@pytest.fixture
+def profiling(monkeypatch, tmp_path):
+    config = ConfigManager().config
+    monkeypatch.setattr(config, "profiling", True)
+    monkeypatch.setattr(config, "log_dir", tmp_path)
+    return tmp_path / "profiles"
+
+
+def reports(directory):
+    return [json.loads(path.read_text()) for path in sorted(directory.glob("*.json"))]
+
+
+def test_nothing_is_profiled_by_default(monkeypatch, tmp_path):
+    monkeypatch.setattr(ConfigManager().config, "log_dir", tmp_path)
+    with profile_operation("reproject", "roads.gpkg") as report:
+        assert report is None
+    assert not (tmp_path / "profiles").exists()
+
+
+def test_operations_write_a_profile_and_a_report(profiling):
+    with profile_operation("reproject", "roads.gpkg") as report:
+        report["metrics"] = {"features": 7}
+        shapely.buffer(shapely.points(np.zeros((2000, 2))), 1)
+
+    [prof] = profiling.glob("reproject-*.prof")
+    assert pstats.Stats(str(prof)).total_tt > 0
+    [saved] = reports(profiling)
+    assert saved["operation"] == "reproject"
+    assert saved["dataset"] == "roads.gpkg"
+    assert saved["features"] == 7
+    assert set(saved["breakdown"]) == {name for name, _ in PROFILE_CATEGORIES} | {"python"}
+    assert saved["breakdown"]["geometry"] > 0
+    assert sum(saved["breakdown"].values()) <= saved["seconds"]
+
+
+def test_failures_are_reported(profiling):
+    with pytest.raises(ValueError):
+        with profile_operation("clip") as report:
+            raise ValueError("no overlap")
+    assert report["error"] == "no overlap"
+    [saved] = reports(profiling)
+    assert saved["error"] == "no overlap"
+    assert saved["dataset"] is None
+
+
+def test_nested_operations_are_part_of_the_outer_profile(profiling):
+    engine = Engine()
+    assert engine.buffer_points("points.gpkg") == "points.gpkg"
+    assert [path.name.split("-")[0] for path in profiling.glob("*.prof")] == ["buffer_points"]
+    [saved] = reports(profiling)
+    assert saved["features"] == 2000
+    assert saved["metrics"]["gdal_profile"]["name"] == "default"
+
+    engine.nested("points.gpkg")
+    assert len(reports(profiling)) == 2
@@ -0,0 +1,122 @@
+import pytest
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import OperationCancelledError  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.utils.checkpoint import Checkpoint, checkpoint_path  # noqa: E402
+from geotoolkit.utils.progress import (  # noqa: E402
+    CancellationToken,
+    ProgressReporter,
+    format_progress,
+)
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def test_checkpoints_record_fid_ranges(tmp_path):
+    source = tmp_path / "roads.gpkg"
+    source.write_bytes(b"roads")
+    output = tmp_path / "roads_out.gpkg"
+    checkpoint = Checkpoint.open(output, "repair", source, {"tolerance": 1})
+    checkpoint.commit("roads", [3, 1, 2], written=3)
+    checkpoint.commit("roads", [7, 5], written=2)
+    checkpoint.commit("roads", [4], written=1)
+    assert checkpoint.layers["roads"]["ranges"] == [[1, 5], [7, 7]]
+
+    resumed = Checkpoint.open(output, "repair", source, {"tolerance": 1})
+    assert resumed.resumed
+    assert resumed.committed("roads", 5) and not resumed.committed("roads", 6)
+    assert resumed.committed_count("roads") == 6
+    assert resumed.written("roads") == 6
+
+
+def test_stale_checkpoints_are_discarded(tmp_path):
+    source = tmp_path / "roads.gpkg"
+    source.write_bytes(b"roads")
+    output = tmp_path / "roads_out.gpkg"
+    Checkpoint.open(output, "repair", source, {"tolerance": 1}).commit("roads", [1])
+
+    assert not Checkpoint.open(output, "repair", source, {"tolerance": 2}).resumed
+    assert not checkpoint_path(output).exists()
+
+    Checkpoint.open(output, "repair", source, {"tolerance": 1}).commit("roads", [1])
+    source.write_bytes(b"roads, edited")
+    assert not Checkpoint.open(output, "repair", source, {"tolerance": 1}).resumed
+
+
+def test_reporter_counts_skipped_features_towards_progress_only():
+    reports = []
+    reporter = ProgressReporter("repair", 100, reports.append)
+    reporter.skip(40)
+    reporter.update(10)
+    progress = reports[-1]
+    assert progress.done == 50
+    assert progress.percent == 50.0
+    assert progress.rate == pytest.approx(10 / progress.elapsed)
+    assert progress.eta == pytest.approx(50 / progress.rate)
+    assert format_progress(progress).startswith("repair: 50/100 (50.0%) features")
+
+
+def test_reporter_raises_once_cancelled():
+    token = CancellationToken()
+    reporter = ProgressReporter("repair", cancel_token=token)
+    reporter.update(1)
+    token.cancel()
+    with pytest.raises(OperationCancelledError):
+        reporter.update(1)
+
+
+def test_cancelled_runs_resume_after_the_last_committed_batch(tmp_path):
+    features = [(f"POINT Z ({i} 0 1)", {"id": i}) for i in range(10)]
+    path = write_dataset(tmp_path / "points.gpkg", {"points": (4326, features)})
+    preprocessor = GDALPreprocessor()
+    token = CancellationToken()
+
+    def cancel_after_two_batches(progress):
+        if progress.done == 4:
+            token.cancel()
+
+    with pytest.raises(OperationCancelledError):
+        preprocessor.run_pipeline(
+            path,
+            ["force_2d"],
+            batch_size=2,
+            progress=cancel_after_two_batches,
+            cancel_token=token,
+            max_workers=1,
+        )
+    output = tmp_path / "points_pipeline.gpkg"
+    assert checkpoint_path(output).exists()
+
+    reports = []
+    assert (
+        preprocessor.run_pipeline(
+            path, ["force_2d"], batch_size=2, progress=reports.append, max_workers=1
+        )
+        == output
+    )
+    assert preprocessor.metrics["run_pipeline"]["resumed_features"] == 4
+    assert [report.done for report in reports] == [6, 8, 10]
+    assert [values["id"] for _, values in read_layer(output)] == list(range(10))
+    assert not checkpoint_path(output).exists()
+
+
+def test_ensure_2d_geometry_reports_progress_and_can_be_cancelled(tmp_path):
+    features = [(f"POINT Z ({i} 0 1)", {"id": i}) for i in range(10)]
+    path = write_dataset(tmp_path / "points.gpkg", {"a": (4326, features), "b": (4326, features)})
+    preprocessor = GDALPreprocessor()
+    reports = []
+    output = preprocessor.ensure_2d_geometry(path, progress=reports.append, max_workers=1)
+    assert reports[-1].done == reports[-1].total == 20
+
+    token = CancellationToken()
+    with pytest.raises(OperationCancelledError):
+        preprocessor.ensure_2d_geometry(
+            path, progress=lambda _: token.cancel(), cancel_token=token, max_workers=1
+        )
+    assert checkpoint_path(output).exists()
+    assert preprocessor.ensure_2d_geometry(path, max_workers=1) == output
+    for layer_name in ("a", "b"):
+        assert [values["id"] for _, values in read_layer(output, layer_name)] == list(range(10))
+    assert not checkpoint_path(output).exists()
@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.constants import VALIDATION_THRESHOLDS, QCFlag  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.qc import (  # noqa: E402
+    compute_qc_flags,
+    new_qc_report,
+    update_qc_report,
+)
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+THRESHOLDS = {**VALIDATION_THRESHOLDS, "MIN_AREA": 0.5, "MAX_VERTICES": 10, "SNAP_TOLERANCE": 0.1}
+
+
+def test_each_check_sets_its_flag():
+    square = shapely.box(0, 0, 1, 1)
+    geoms = np.array(
+        [
+            None,
+            shapely.Polygon(),
+            shapely.from_wkt("POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))"),
+            shapely.box(5, 5, 5.1, 5.1),
+            shapely.LineString([(0, 0), (0.05, 0)]),
+            shapely.LineString([(i, 0) for i in range(11)]),
+            square,
+            shapely.Polygon(square.exterior.coords[::-1]),
+        ],
+        dtype=object,
+    )
+    flags = compute_qc_flags(geoms, set(), THRESHOLDS)["flags"]
+    assert list(flags) == [
+        QCFlag.NULL_GEOMETRY,
+        QCFlag.EMPTY_GEOMETRY,
+        QCFlag.INVALID_GEOMETRY | QCFlag.SMALL_AREA,
+        QCFlag.SMALL_AREA,
+        QCFlag.SHORT_LENGTH,
+        QCFlag.TOO_MANY_VERTICES,
+        0,
+        QCFlag.DUPLICATE_GEOMETRY,
+    ]
+
+
+def test_duplicates_are_found_across_batches():
+    seen = set()
+    compute_qc_flags(np.array([shapely.box(0, 0, 1, 1)]), seen, THRESHOLDS)
+    flags = compute_qc_flags(np.array([shapely.box(0, 0, 1, 1)]), seen, THRESHOLDS)["flags"]
+    assert flags[0] == QCFlag.DUPLICATE_GEOMETRY
+
+
+def test_report_accumulates_batches():
+    report = new_qc_report(THRESHOLDS)
+    seen = set()
+    for geoms in ([shapely.box(0, 0, 1, 1), None], [shapely.box(0, 0, 2, 2)]):
+        update_qc_report(report, compute_qc_flags(np.array(geoms, dtype=object), seen, THRESHOLDS))
+    assert report["features"] == 3
+    assert report["flagged_features"] == 1
+    assert report["flag_counts"]["NULL_GEOMETRY"] == 1
+    assert report["total_area"] == pytest.approx(5)
+    assert report["max_vertices"] == 5
+
+
+def test_quality_check_writes_flags(tmp_path):
+    features = [
+        ("POLYGON ((0 0, 1 0, 1 1, 0 1, 0 0))", {"id": 1}),
+        ("POLYGON ((0 0, 1 1, 1 0, 0 1, 0 0))", {"id": 2}),
+    ]
+    path = write_dataset(tmp_path / "parcels.gpkg", {"parcels": (5070, features)})
+    preprocessor = GDALPreprocessor()
+    report = preprocessor.quality_check(path, thresholds=THRESHOLDS)
+    assert report["flag_counts"]["INVALID_GEOMETRY"] == 1
+    # The profile is reported in the metrics, not in the returned report
+    assert "gdal_profile" not in report
+    assert preprocessor.metrics["quality_check"]["gdal_profile"]["name"] == "default"
+    # A bowtie has zero area, so it is flagged as small as well as invalid
+    flags = [values["qc_flags"] for _, values in read_layer(path)]
+    assert flags == [0, QCFlag.INVALID_GEOMETRY | QCFlag.SMALL_AREA]
@@ -0,0 +1,63 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo")
+
+from osgeo import gdal  # noqa: E402
+
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.raster import (  # noqa: E402
+    close_shared_rasters,
+    open_shared_raster,
+)
+from geotoolkit.engines.gdal_engine.srs import spatial_reference  # noqa: E402
+
+
+def write_raster(path, driver="GTiff"):
+    raster = gdal.GetDriverByName(driver).Create(str(path), 20, 20, 1, gdal.GDT_Float32)
+    raster.SetGeoTransform((-100.0, 0.01, 0.0, 40.0, 0.0, -0.01))
+    raster.SetProjection(spatial_reference(4326).ExportToWkt())
+    raster.GetRasterBand(1).WriteArray(np.arange(400, dtype=np.float32).reshape(20, 20))
+    raster = None
+    return path
+
+
+def raster_epsg(path):
+    ds = gdal.Open(str(path))
+    driver = ds.GetDriver().ShortName
+    srs = ds.GetSpatialRef()
+    srs.AutoIdentifyEPSG()
+    return driver, srs.GetAuthorityCode(None)
+
+
+def test_reproject_raster_in_place_replaces_geotiffs(tmp_path):
+    path = write_raster(tmp_path / "dem.tif")
+    output = GDALPreprocessor().reproject_raster(path, 3857, in_place=True)
+    assert output == path
+    assert raster_epsg(path) == ("GTiff", "3857")
+    assert not (tmp_path / "dem_reprojected.tif").exists()
+
+
+def test_reproject_raster_in_place_leaves_other_formats_alone(tmp_path):
+    path = write_raster(tmp_path / "dem.img", "HFA")
+    output = GDALPreprocessor().reproject_raster(path, 3857, in_place=True)
+    assert output == tmp_path / "dem_reprojected.tif"
+    assert raster_epsg(path) == ("HFA", "4326")
+    assert raster_epsg(output) == ("GTiff", "3857")
+
+
+def test_shared_rasters_are_opened_once(tmp_path):
+    path = str(write_raster(tmp_path / "dem.tif"))
+    assert open_shared_raster(path) is open_shared_raster(path)
+
+
+def test_replaced_rasters_are_opened_again(tmp_path):
+    path = str(write_raster(tmp_path / "dem.tif"))
+    ds = open_shared_raster(path)
+    GDALPreprocessor().reproject_raster(path, 3857, in_place=True)
+    reopened = open_shared_raster(path)
+    assert reopened is not ds
+    assert reopened.GetRasterBand(1).ReadAsArray() is not None
+
+    close_shared_rasters()
+    assert open_shared_raster(path) is not reopened
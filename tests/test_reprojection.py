@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.reprojection import (  # noqa: E402
+    approximate_transform_coordinates,
+)
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+class FunctionTransform:
+    """Coordinate transformation applying a function to (x, y) points."""
+
+    def __init__(self, function):
+        self.function = function
+
+    def TransformPoints(self, points):
+        return [self.function(x, y) for x, y, *_ in points]
+
+
+def zigzag(start, n=40):
+    return shapely.LineString([start] + [(i / n, i % 2) for i in range(n + 1)])
+
+
+def approximate(geoms, transform, max_error):
+    coords, index = shapely.get_coordinates(geoms, return_index=True)
+    coords, error, fallback = approximate_transform_coordinates(
+        coords, index, len(geoms), transform, max_error
+    )
+    return shapely.set_coordinates(geoms.copy(), coords), error, fallback
+
+
+def test_affine_transforms_are_approximated_exactly():
+    transform = FunctionTransform(lambda x, y: (2 * x + 1, y - 3))
+    line = zigzag((0.5, 0.5))
+    (result,), error, fallback = approximate(np.array([line]), transform, 1e-6)
+    assert fallback == 0
+    assert error == pytest.approx(0, abs=1e-9)
+    expected = shapely.transform(line, lambda c: c * [2, 1] + [1, -3])
+    assert result.equals_exact(expected, 1e-9)
+
+
+def test_only_features_over_the_tolerance_fall_back():
+    curve = FunctionTransform(lambda x, y: (x, y + x * x))
+    lines = np.array([zigzag((0, 0)), shapely.LineString([(0, 0), (1, 1)]), zigzag((0.5, 0.5))])
+    _, error, fallback = approximate(lines, curve, 0.5)
+    assert fallback == 0
+    assert 0 < error <= 0.5
+    result, _, fallback = approximate(lines, curve, 1e-6)
+    # Short features are always transformed exactly and never counted
+    assert fallback == 2
+    expected = shapely.transform(lines, lambda c: c + np.column_stack([0 * c[:, 0], c[:, 0] ** 2]))
+    assert all(a.equals_exact(b, 1e-9) for a, b in zip(result, expected))
+
+
+def test_vertices_between_the_grid_samples_are_checked():
+    # Affine everywhere but near the first vertex, which no grid sample falls on
+    def bump(x, y):
+        return x, y + (10.0 if abs(x - 0.3) < 0.01 and abs(y - 0.3) < 0.01 else 0.0)
+
+    line = zigzag((0.3, 0.3))
+    (result,), error, fallback = approximate(np.array([line]), FunctionTransform(bump), 0.5)
+    assert fallback == 1
+    assert error == 0.0
+    assert shapely.get_coordinates(result)[0] == pytest.approx([0.3, 10.3])
+
+
+def reproject_streams(directory, **kwargs):
+    directory.mkdir()
+    lon = np.linspace(-100, -99, 200)
+    line = shapely.LineString(np.column_stack([lon, 40 + 0.2 * np.sin(lon * 20)]))
+    path = write_dataset(
+        directory / "streams.gpkg",
+        {"streams": (4326, [(line.wkt, {"id": 1}), ("POINT (-99.5 40.5)", {"id": 2})])},
+    )
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.standardize_projection(path, 5070, **kwargs)
+    geoms = [shapely.from_wkt(wkt) for wkt, _ in read_layer(output)]
+    return geoms, preprocessor.metrics["standardize_projection"]
+
+
+def test_approximate_reprojection_stays_within_the_tolerance(tmp_path):
+    exact, _ = reproject_streams(tmp_path / "exact")
+    approximate, metrics = reproject_streams(tmp_path / "approximate", approximate=True)
+    for a, b in zip(exact, approximate):
+        offsets = shapely.get_coordinates(a) - shapely.get_coordinates(b)
+        assert np.hypot(*offsets.T).max() <= 0.5
+    assert metrics["approximate"] is True
+    assert metrics["features"] == 2
+    assert metrics["sampled_max_error"] <= 0.5
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from osgeo import gdal  # noqa: E402
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.sampling import (  # noqa: E402
+    line_samples,
+    profile_metrics,
+    sample_band,
+)
+from geotoolkit.engines.gdal_engine.srs import spatial_reference  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+class ArrayBand:
+    """Raster band over a NumPy array, recording the windows read."""
+
+    def __init__(self, array, block_size=(4, 3), nodata=None):
+        self.array = array
+        self.YSize, self.XSize = array.shape
+        self.block_size = block_size
+        self.nodata = nodata
+        self.reads = []
+
+    def GetBlockSize(self):
+        return list(self.block_size)
+
+    def GetNoDataValue(self):
+        return self.nodata
+
+    def ReadAsArray(self, xoff, yoff, xsize, ysize):
+        self.reads.append((xoff, yoff, xsize, ysize))
+        return self.array[yoff : yoff + ysize, xoff : xoff + xsize]
+
+
+def test_vertex_samples_restart_along_each_line():
+    geoms = np.array(
+        [
+            shapely.LineString([(0, 0), (3, 4), (3, 5)]),
+            shapely.Point(0, 0),
+            shapely.MultiLineString([[(0, 0), (1, 0)], [(5, 0), (5, 2)]]),
+        ]
+    )
+    coords, owner, along = line_samples(geoms)
+    assert list(owner) == [0, 0, 0, 2, 2, 2, 2]
+    assert list(along) == [0, 5, 6, 0, 1, 1, 3]
+    assert coords.shape == (7, 2)
+
+
+def test_interval_samples_include_both_ends():
+    coords, owner, along = line_samples(np.array([shapely.LineString([(0, 0), (10, 0)])]), 4)
+    assert list(along) == [0, 4, 8, 10]
+    assert list(coords[:, 0]) == [0, 4, 8, 10]
+
+
+def test_interval_must_be_positive():
+    with pytest.raises(ProcessingError):
+        line_samples(np.array([shapely.LineString([(0, 0), (1, 0)])]), 0)
+
+
+def test_sample_band_reads_each_block_once():
+    array = np.arange(60, dtype=np.float64).reshape(6, 10)
+    array[0, 0] = -1
+    band = ArrayBand(array, nodata=-1)
+    geotransform = (0.0, 1.0, 0.0, 6.0, 0.0, -1.0)
+    coords = np.array([[0.5, 5.5], [9.5, 0.5], [2.5, 3.5], [2.7, 3.2], [-1, 3], [4.5, 6.5]])
+    values = sample_band(band, geotransform, coords)
+    np.testing.assert_array_equal(values, [np.nan, 59, 22, 22, np.nan, np.nan])
+    assert len(band.reads) == len(set(band.reads)) == 2
+
+
+def test_profile_metrics():
+    values = np.array([10.0, np.nan, 4.0, 7.0, np.nan])
+    owner = np.array([0, 0, 0, 1, 2])
+    along = np.array([0.0, 1.0, 2.0, 0.0, 0.0])
+    metrics = profile_metrics(values, owner, along, 3)
+    np.testing.assert_array_equal(metrics["min"], [4, 7, np.nan])
+    np.testing.assert_array_equal(metrics["max"], [10, 7, np.nan])
+    np.testing.assert_array_equal(metrics["gradient"], [3, np.nan, np.nan])
+
+
+def test_calculate_gradient_on_a_geographic_dem(tmp_path):
+    # DEM in EPSG:4269 rising 1000 per degree of longitude from -101
+    dem = tmp_path / "dem.tif"
+    raster = gdal.GetDriverByName("GTiff").Create(str(dem), 200, 200, 1, gdal.GDT_Float32)
+    raster.SetGeoTransform((-101.0, 0.01, 0.0, 41.0, 0.0, -0.01))
+    raster.SetProjection(spatial_reference(4269).ExportToWkt())
+    raster.GetRasterBand(1).WriteArray(np.tile(np.arange(200, dtype=np.float32) * 10, (200, 1)))
+    raster = None
+
+    # Line in Web Mercator from -100.5 to -99.5 along latitude 40
+    streams = write_dataset(
+        tmp_path / "streams.gpkg",
+        {
+            "streams": (
+                3857,
+                [("LINESTRING (-11187607.87 4865942.28, -11076290.29 4865942.28)", {})],
+            )
+        },
+    )
+    preprocessor = GDALPreprocessor()
+    preprocessor.calculate_gradient(streams, dem, interval=1000)
+
+    (_, values), *_ = read_layer(streams)
+    assert values["elev_min"] == pytest.approx(500, abs=10)
+    assert values["elev_max"] == pytest.approx(1500, abs=10)
+    assert values["gradient"] == pytest.approx(1000 / 111319.49, rel=0.02)
+    assert preprocessor.metrics["calculate_gradient"]["valid_samples"] > 100
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine import simplification  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.simplification import (  # noqa: E402
+    simplify_geometries,
+    simplify_to_budget,
+)
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def random_walks(n, vertices, seed=0):
+    """Noisy lines advancing along x, so they never cross themselves."""
+    rng = np.random.default_rng(seed)
+    x = np.broadcast_to(np.arange(vertices, dtype=float), (n, vertices))
+    y = rng.normal(0, 1, (n, vertices)).cumsum(axis=1)
+    return shapely.linestrings(np.stack([x, y], axis=-1))
+
+
+def wiggly_polygon(vertices=400):
+    angles = np.linspace(0, 2 * np.pi, vertices, endpoint=False)
+    radius = 10 + np.sin(angles * 37)
+    return shapely.Polygon(np.column_stack([radius * np.cos(angles), radius * np.sin(angles)]))
+
+
+def test_over_budget_features_are_brought_within_it():
+    geoms = np.concatenate([random_walks(20, 500), random_walks(5, 30, seed=1)])
+    simplified, stats = simplify_to_budget(geoms, 50)
+    counts = shapely.get_num_coordinates(simplified)
+    assert (counts <= 50).all()
+    # Close to the budget rather than far below it
+    assert counts[:20].min() >= 25
+    assert all(simplified[i] is geoms[i] for i in range(20, 25))
+    assert stats == {
+        "features_simplified": 20,
+        "vertices_before": 10000,
+        "vertices_after": int(counts[:20].sum()),
+        "over_budget": 0,
+    }
+
+
+def test_fixed_tolerance():
+    geoms = random_walks(3, 200)
+    simplified, stats = simplify_to_budget(geoms, 100, tolerance=2.0)
+    expected = shapely.simplify(geoms, 2.0)
+    assert all(a.equals(b) for a, b in zip(simplified, expected))
+    assert stats["features_simplified"] == 3
+
+
+def test_polygons_stay_valid():
+    (simplified,), stats = simplify_to_budget(np.array([wiggly_polygon()]), 40)
+    assert simplified.is_valid
+    assert shapely.get_num_coordinates(simplified) <= 40
+    assert stats["over_budget"] == 0
+
+
+def test_large_batches_are_split_into_tasks(monkeypatch):
+    monkeypatch.setattr(simplification, "PARALLEL_SIMPLIFY_VERTICES", 1000)
+    monkeypatch.setattr(simplification, "SIMPLIFY_TASK_VERTICES", 1200)
+    geoms = random_walks(10, 300)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        parallel, parallel_stats = simplify_geometries(geoms, 30, executor=executor)
+    serial, serial_stats = simplify_to_budget(geoms, 30)
+    assert all(a.equals(b) for a, b in zip(parallel, serial))
+    assert parallel_stats == serial_stats
+
+
+def test_simplify_writes_every_feature(tmp_path):
+    lines = random_walks(4, 120)
+    features = [(line.wkt, {"id": i}) for i, line in enumerate(lines)]
+    features.append(("LINESTRING (0 0, 1 1)", {"id": 4}))
+    path = write_dataset(tmp_path / "streams.gpkg", {"streams": (5070, features)})
+
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.simplify(path, max_vertices=20)
+    rows = read_layer(output)
+    assert [values["id"] for _, values in rows] == [0, 1, 2, 3, 4]
+    assert all(shapely.get_num_coordinates(shapely.from_wkt(wkt)) <= 20 for wkt, _ in rows)
+    metrics = preprocessor.metrics["simplify"]
+    assert metrics["features"] == 5
+    assert metrics["features_simplified"] == 4
+    assert metrics["vertex_reduction"] > 0.8
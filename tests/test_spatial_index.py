@@ -0,0 +1,123 @@
+import pickle
+
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.analyzer import GDALAnalyzer  # noqa: E402
+from geotoolkit.engines.gdal_engine.geometry_buffer import LayerSchema  # noqa: E402
+from geotoolkit.engines.gdal_engine.spatial_index import SpatialIndex  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+
+def point_index(points):
+    return SpatialIndex(
+        shapely.points(points), np.arange(len(points)), {}, LayerSchema("points", 1)
+    )
+
+
+def brute_force_nearest(index, geoms, k, max_distance):
+    pairs = []
+    for i, geom in enumerate(geoms):
+        distances = shapely.distance(geom, index.geoms)
+        for j in np.lexsort((np.arange(len(distances)), distances))[:k]:
+            if distances[j] <= max_distance:
+                pairs.append((i, j))
+    return pairs
+
+
+@pytest.mark.parametrize("k", [1, 3, 8])
+def test_k_nearest_matches_a_brute_force_search(k):
+    rng = np.random.default_rng(1)
+    index = point_index(rng.uniform(0, 100, (300, 2)))
+    geoms = shapely.points(rng.uniform(-20, 120, (40, 2)))
+    left, right, distances = index.nearest(geoms, k=k, max_distance=15)
+    assert list(zip(left, right)) == brute_force_nearest(index, geoms, k, 15)
+    np.testing.assert_allclose(distances, shapely.distance(geoms[left], index.geoms[right]))
+
+
+def test_predicate_queries():
+    index = point_index([(0, 0), (5, 5), (20, 20)])
+    left, right = index.query(np.array([shapely.box(-1, -1, 6, 6)]), predicate="contains")
+    assert list(zip(left, right)) == [(0, 0), (0, 1)]
+    left, right = index.query(np.array([shapely.Point(19, 19)]), "dwithin", distance=2)
+    assert list(right) == [2]
+    with pytest.raises(ProcessingError):
+        index.query(np.array([shapely.Point(0, 0)]), "dwithin")
+    with pytest.raises(ProcessingError):
+        index.query(np.array([shapely.Point(0, 0)]), "near")
+
+
+def test_unpickled_indexes_rebuild_their_tree():
+    index = pickle.loads(pickle.dumps(point_index([(0, 0), (5, 5)])))
+    assert list(index.nearest(np.array([shapely.Point(4, 4)]))[1]) == [1]
+
+
+@pytest.fixture
+def gauges_and_reaches(tmp_path):
+    gauges = write_dataset(
+        tmp_path / "gauges.gpkg",
+        {
+            "gauges": (
+                5070,
+                [
+                    ("POINT (1 1)", {"name": "g1"}),
+                    ("POINT (12 1)", {"name": "g2"}),
+                    ("POINT (50 50)", {"name": "g3"}),
+                ],
+            )
+        },
+    )
+    reaches = write_dataset(
+        tmp_path / "reaches.gpkg",
+        {
+            "reaches": (
+                5070,
+                [
+                    ("POLYGON ((0 0, 10 0, 10 10, 0 10, 0 0))", {"name": "upper", "order": 1}),
+                    ("POLYGON ((10 0, 20 0, 20 10, 10 10, 10 0))", {"name": "lower", "order": 2}),
+                ],
+            )
+        },
+    )
+    return gauges, reaches
+
+
+def test_point_in_polygon_join(gauges_and_reaches):
+    gauges, reaches = gauges_and_reaches
+    analyzer = GDALAnalyzer()
+    output = analyzer.spatial_join(gauges, reaches, predicate="within", how="left")
+    rows = [values for _, values in read_layer(output)]
+    assert rows == [
+        {"name": "g1", "name_right": "upper", "order": 1},
+        {"name": "g2", "name_right": "lower", "order": 2},
+        {"name": "g3", "name_right": None, "order": None},
+    ]
+    assert analyzer.metrics["spatial_join"]["matches"] == 2
+    assert analyzer.metrics["spatial_join"]["unmatched"] == 1
+
+    inner = analyzer.spatial_join(gauges, reaches, predicate="within")
+    assert [values["name"] for _, values in read_layer(inner)] == ["g1", "g2"]
+
+
+def test_nearest_reaches_of_gauges(gauges_and_reaches):
+    gauges, reaches = gauges_and_reaches
+    analyzer = GDALAnalyzer()
+    output = analyzer.nearest(gauges, reaches, k=2, max_distance=5, suffix="_reach")
+    rows = [(v["name"], v["name_reach"], v["distance"]) for _, v in read_layer(output)]
+    assert rows == [("g1", "upper", 0.0), ("g2", "lower", 0.0), ("g2", "upper", 2.0)]
+
+
+def test_indexes_are_reused_until_the_file_changes(gauges_and_reaches):
+    _, reaches = gauges_and_reaches
+    analyzer = GDALAnalyzer()
+    index = analyzer.spatial_index(reaches)
+    assert analyzer.spatial_index(reaches) is index
+    reaches.unlink()
+    write_dataset(reaches, {"reaches": (5070, [("POINT (0 0)", {"name": "moved"})])})
+    assert len(analyzer.spatial_index(reaches)) == 1
+    assert len(analyzer._indexes) == 1
@@ -0,0 +1,55 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("osgeo")
+
+from osgeo import gdal  # noqa: E402
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.srs import spatial_reference  # noqa: E402
+from geotoolkit.tools.terrain import compute_derivatives, derive_terrain  # noqa: E402
+
+
+def test_plane_rising_east_faces_west():
+    plane = np.tile(np.arange(6, dtype=np.float64) * 2, (5, 1))
+    results = compute_derivatives(plane, 1.0, 1.0)
+    assert results["slope"].shape == (3, 4)
+    np.testing.assert_allclose(results["slope"], np.degrees(np.arctan(2)))
+    np.testing.assert_allclose(results["aspect"], 270)
+    assert ((results["hillshade"] >= 1) & (results["hillshade"] <= 255)).all()
+
+
+def test_flat_cells_have_no_aspect():
+    results = compute_derivatives(np.zeros((4, 4)), 1.0, 1.0, ["aspect", "slope"])
+    assert (results["aspect"] == -1).all()
+    assert (results["slope"] == 0).all()
+
+
+def test_nodata_spreads_to_its_windows():
+    dem = np.ones((6, 6))
+    dem[0, 0] = -9999
+    slope = compute_derivatives(dem, 1.0, 1.0, ["slope"], nodata=-9999)["slope"]
+    assert slope[0, 0] == -9999
+    assert (slope[1:, 1:] == 0).all()
+
+
+def test_unknown_product():
+    with pytest.raises(ProcessingError):
+        compute_derivatives(np.zeros((3, 3)), 1.0, 1.0, ["curvature"])
+
+
+def test_blocks_match_a_whole_array_computation(tmp_path):
+    rng = np.random.default_rng(0)
+    elevation = rng.normal(100, 5, (130, 150)).astype(np.float32)
+    dem = tmp_path / "dem.tif"
+    raster = gdal.GetDriverByName("GTiff").Create(str(dem), 150, 130, 1, gdal.GDT_Float32)
+    raster.SetGeoTransform((500000.0, 10.0, 0.0, 4000000.0, 0.0, -10.0))
+    raster.SetProjection(spatial_reference(26913).ExportToWkt())
+    raster.GetRasterBand(1).WriteArray(elevation)
+    raster = None
+
+    outputs = derive_terrain(dem, tmp_path / "out", ["slope"], block_size=64, max_workers=2)
+
+    expected = compute_derivatives(np.pad(elevation, 1, mode="edge"), 10.0, 10.0, ["slope"])
+    slope = gdal.Open(str(outputs["slope"])).ReadAsArray()
+    np.testing.assert_allclose(slope, expected["slope"], rtol=1e-5)
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.engines.gdal_engine import topology  # noqa: E402
+from geotoolkit.engines.gdal_engine.preprocessor import GDALPreprocessor  # noqa: E402
+from geotoolkit.engines.gdal_engine.topology import (  # noqa: E402
+    clean_geometries,
+    cluster_vertices,
+    remove_slivers,
+)
+
+from geotoolkit.utils.config import ConfigManager  # noqa: E402
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+TOLERANCE = 0.001
+
+
+def max_move(before, after):
+    return np.abs(shapely.get_coordinates(before) - shapely.get_coordinates(after)).max()
+
+
+def test_clusters_vertices_of_neighbouring_features():
+    geoms = np.array([shapely.box(0, 0, 1, 1), shapely.box(1.0004, 0, 2, 1.0003)])
+    result, moved = cluster_vertices(geoms, TOLERANCE)
+    assert moved == 2
+    assert shapely.intersection(result[0], result[1]).length == pytest.approx(1)
+
+
+def test_closely_spaced_vertices_do_not_chain():
+    line = shapely.LineString([(i * 0.0005, 0) for i in range(2001)])
+    result, moved = cluster_vertices(np.array([line]), TOLERANCE)
+    assert moved == 0
+    assert result[0].length == pytest.approx(1)
+
+
+def test_vertices_move_at_most_the_tolerance():
+    lines = np.array([shapely.LineString([(k * 0.0009, 0), (k * 0.0009, 1)]) for k in range(6)])
+    result, _ = cluster_vertices(lines, TOLERANCE)
+    assert max_move(lines, result) <= TOLERANCE
+    assert len(np.unique(shapely.get_coordinates(result)[:, 0])) >= 3
+    assert (shapely.length(result) == 1).all()
+
+
+def test_small_polygons_survive_cleaning():
+    polygon = shapely.box(0, 0, 0.0008, 0.0008)
+    result, stats = clean_geometries(np.array([polygon]), TOLERANCE, TOLERANCE, 1e-9)
+    assert result[0].equals(polygon)
+    assert stats["slivers_removed"] == 0
+
+
+def test_remove_slivers():
+    geoms = np.array(
+        [
+            shapely.MultiPolygon([shapely.box(0, 0, 1, 1), shapely.box(5, 5, 5.001, 5.001)]),
+            shapely.box(9, 9, 9.001, 9.001),
+            shapely.LineString([(0, 0), (1, 1)]),
+        ]
+    )
+    result, removed = remove_slivers(geoms, 0.001)
+    assert removed == 2
+    assert result[0].equals(shapely.box(0, 0, 1, 1))
+    assert result[1] is None
+    assert result[2].equals(geoms[2])
+
+
+def test_seam_pass_recleans_features_sharing_moved_vertices():
+    geoms = np.array(
+        [
+            shapely.box(0, 0, 1, 1),
+            shapely.box(1, 0, 2, 1),
+            shapely.Polygon([(0.9995, 1.0005), (0.9995, 2), (0, 2), (0, 1.0005)]),
+        ]
+    )
+    totals = {"vertices_clustered": 0, "features_snapped": 0, "slivers_removed": 0}
+    cleaned = topology._clean_seams(geoms, np.array([0, 2]), totals, TOLERANCE, TOLERANCE, 1e-9)
+    assert list(cleaned) == [0, 1, 2]
+    assert shapely.intersection(geoms[0], geoms[1]).length == pytest.approx(1, abs=TOLERANCE)
+    assert shapely.intersection(geoms[0], geoms[2]).length == pytest.approx(1, abs=TOLERANCE)
+
+
+def jittered_grid(n, seed=0):
+    rng = np.random.default_rng(seed)
+    corners = np.array([(0, 0), (1, 0), (1, 1), (0, 1)], dtype=float)
+    return np.array(
+        [
+            shapely.Polygon(corners + (i, j) + rng.normal(0, 0.0002, (4, 2)))
+            for i in range(n)
+            for j in range(n)
+        ]
+    )
+
+
+def test_tiled_cleaning_keeps_every_feature(tmp_path, monkeypatch):
+    monkeypatch.setattr(topology, "MIN_FEATURES_PER_TILE", 100)
+    features = [(geom.wkt, {"id": i}) for i, geom in enumerate(jittered_grid(30))]
+    path = write_dataset(tmp_path / "parcels.gpkg", {"parcels": (5070, features)})
+
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.clean_topology(path, TOLERANCE, TOLERANCE, 0.001, max_workers=2)
+    assert preprocessor.metrics["clean_topology"]["tiles"] > 1
+    assert preprocessor.metrics["clean_topology"]["seam_features"] > 0
+    cleaned = read_layer(output)
+    assert sorted(values["id"] for _, values in cleaned) == list(range(900))
+    geoms = shapely.from_wkt([wkt for wkt, _ in cleaned])
+    assert shapely.is_valid(geoms).all()
+    assert shapely.area(geoms).sum() == pytest.approx(900, rel=1e-4)
+
+
+def test_clean_topology_streams_tiles_of_a_dataset(tmp_path, monkeypatch):
+    # A 1 MB budget splits the layer into several tiles
+    monkeypatch.setattr(ConfigManager().config, "memory_budget", 1)
+    features = [
+        (geom.wkt, {"id": i, "group_id": i % 2}) for i, geom in enumerate(jittered_grid(40))
+    ]
+    path = write_dataset(tmp_path / "parcels.gpkg", {"parcels": (5070, features)})
+
+    preprocessor = GDALPreprocessor()
+    output = preprocessor.clean_topology(path, 0.001, 0.001, 0.001, where="group_id = 1")
+
+    stats = preprocessor.metrics["clean_topology"]
+    assert stats["tiles"] > 1
+    assert stats["features_removed"] == 0
+    cleaned = read_layer(output)
+    assert sorted(values["id"] for _, values in cleaned) == list(range(1, 1600, 2))
+    geoms = shapely.from_wkt([wkt for wkt, _ in cleaned])
+    assert shapely.is_valid(geoms).all()
+    assert shapely.area(geoms).sum() == pytest.approx(800, rel=1e-4)
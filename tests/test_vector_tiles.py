@@ -0,0 +1,149 @@
+import gzip
+import json
+import sqlite3
+import struct
+
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine.mvt import encode_geometries, encode_layer  # noqa: E402
+from geotoolkit.engines.gdal_engine.tile_archives import tile_ids  # noqa: E402
+from geotoolkit.engines.gdal_engine.vector_tiles import (  # noqa: E402
+    WEB_MERCATOR_EXTENT,
+    generate_vector_tiles,
+    tile_bounds,
+)
+
+from .helpers import write_dataset  # noqa: E402
+
+
+def read_varint(data, position):
+    value = shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        shift += 7
+        if byte < 0x80:
+            return value, position
+
+
+def read_message(data):
+    """Fields of a protobuf message as {field number: [values]}."""
+    fields = {}
+    position = 0
+    while position < len(data):
+        key, position = read_varint(data, position)
+        if key & 7 == 0:
+            value, position = read_varint(data, position)
+        elif key & 7 == 1:
+            value, position = data[position : position + 8], position + 8
+        else:
+            length, position = read_varint(data, position)
+            value, position = data[position : position + length], position + length
+        fields.setdefault(key >> 3, []).append(value)
+    return fields
+
+
+def tile_layers(tile):
+    """Layer name and feature count of every layer of a gzip-compressed tile."""
+    layers = [read_message(layer) for layer in read_message(gzip.decompress(tile))[3]]
+    return {layer[1][0].decode(): len(layer.get(2, [])) for layer in layers}
+
+
+def test_tile_bounds():
+    e = WEB_MERCATOR_EXTENT
+    assert tile_bounds(0, 0, 0) == pytest.approx((-e, -e, e, e))
+    assert tile_bounds(1, 1, 0) == pytest.approx((0, 0, e, e))
+    assert tile_bounds(1, 0, 1) == pytest.approx((-e, -e, 0, 0))
+
+
+def test_tile_ids_follow_zoom_then_hilbert_order():
+    assert list(tile_ids(0, [0], [0])) == [0]
+    assert list(tile_ids(1, [0, 0, 1, 1], [0, 1, 1, 0])) == [1, 2, 3, 4]
+    assert tile_ids(2, [0], [0])[0] == 5
+
+
+def test_geometries_encode_as_mvt_commands():
+    # Examples from the Mapbox Vector Tile 2.1 specification, section 4.3.5
+    geoms = np.array(
+        [
+            shapely.Point(25, 17),
+            shapely.LineString([(2, 2), (2, 10), (10, 10)]),
+            shapely.Polygon([(3, 6), (8, 12), (20, 34), (3, 6)]),
+            shapely.Point(),
+        ]
+    )
+    assert encode_geometries(geoms) == [
+        (1, [9, 50, 34]),
+        (2, [9, 4, 4, 18, 0, 16, 16, 0]),
+        (3, [9, 6, 12, 18, 10, 12, 24, 44, 15]),
+        None,
+    ]
+
+
+def test_layers_share_keys_and_values():
+    layer, count = encode_layer(
+        "roads",
+        np.array([shapely.Point(1, 1), shapely.Point(2, 2), None]),
+        np.array([7, -1, 9]),
+        {"kind": np.array(["a", "a", "b"], dtype=object), "lanes": np.array([2.0, np.nan, 1.0])},
+    )
+    assert count == 2
+    fields = read_message(layer)
+    assert fields[1] == [b"roads"]
+    assert fields[3] == [b"kind", b"lanes"]
+    assert [read_message(value) for value in fields[4]] == [
+        {1: [b"a"]},
+        {3: [struct.pack("<d", 2)]},
+    ]
+    features = [read_message(feature) for feature in fields[2]]
+    assert [feature.get(1) for feature in features] == [[7], None]
+
+
+def test_pyramid_is_written_to_mbtiles(tmp_path):
+    features = [
+        ("POINT (-1000000 1000000)", {"name": "a"}),
+        ("LINESTRING (-1000000 -1000000, 1000000 -1000000)", {"name": "b"}),
+    ]
+    path = write_dataset(tmp_path / "roads.gpkg", {"roads": (3857, features)})
+    metrics = generate_vector_tiles(path, tmp_path / "roads.mbtiles", 0, 2, max_workers=2)
+    assert metrics["tiles_per_zoom"] == {0: 1, 1: 3, 2: 3}
+
+    with sqlite3.connect(str(tmp_path / "roads.mbtiles")) as connection:
+        tiles = {
+            (z, x, y): data
+            for z, x, y, data in connection.execute("SELECT * FROM tiles ORDER BY 1, 2, 3")
+        }
+        metadata = dict(connection.execute("SELECT * FROM metadata"))
+    assert tile_layers(tiles[0, 0, 0]) == {"roads": 2}
+    # MBTiles rows count from the bottom: row 1 of zoom 1 is the northern half
+    assert tile_layers(tiles[1, 0, 1]) == {"roads": 1}
+    assert json.loads(metadata["json"])["vector_layers"][0]["fields"] == {"name": "String"}
+    assert (metadata["minzoom"], metadata["maxzoom"]) == ("0", "2")
+
+
+def test_pyramid_is_written_to_pmtiles(tmp_path):
+    # Away from tile edges, so every zoom has a single tile
+    features = [("POINT (1000000 1000000)", {"id": 1})]
+    path = write_dataset(tmp_path / "points.gpkg", {"points": (3857, features)})
+    metrics = generate_vector_tiles(path, tmp_path / "points.pmtiles", 0, 3, max_workers=1)
+    assert metrics["tiles"] == 4
+    header = (tmp_path / "points.pmtiles").read_bytes()[:127]
+    assert header[:8] == b"PMTiles\x03"
+    # Addressed, tile entries and tile contents
+    assert struct.unpack("<3Q", header[72:96]) == (4, 4, 4)
+
+
+def test_invalid_requests(tmp_path):
+    path = write_dataset(tmp_path / "points.gpkg", {"points": (3857, [("POINT (1 1)", {"id": 1})])})
+    with pytest.raises(ProcessingError):
+        generate_vector_tiles(path, tmp_path / "points.pmtiles", 3, 2)
+    with pytest.raises(ProcessingError):
+        generate_vector_tiles(path, tmp_path / "points.zip", 0, 2)
+    with pytest.raises(ProcessingError):
+        generate_vector_tiles(path, tmp_path / "points.pmtiles", layers=["roads"])
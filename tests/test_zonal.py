@@ -0,0 +1,178 @@
+import numpy as np
+import pytest
+import shapely
+
+pytest.importorskip("osgeo")
+
+from osgeo import gdal  # noqa: E402
+
+from geotoolkit.core.exceptions import ProcessingError  # noqa: E402
+from geotoolkit.engines.gdal_engine import zonal  # noqa: E402
+from geotoolkit.engines.gdal_engine.analyzer import GDALAnalyzer  # noqa: E402
+from geotoolkit.engines.gdal_engine.srs import spatial_reference  # noqa: E402
+from geotoolkit.engines.gdal_engine.zonal import (  # noqa: E402
+    ZONAL_STATISTICS,
+    raster_zonal_statistics,
+    resolve_zonal_statistics,
+    zonal_tasks,
+)
+
+from .helpers import read_layer, write_dataset  # noqa: E402
+
+# A 10 x 10 raster of 1-unit pixels covering (0, 0, 10, 10), valued row * 10 + col
+GEOTRANSFORM = (0.0, 1.0, 0.0, 10.0, 0.0, -1.0)
+NODATA = -1.0
+
+
+def dem():
+    data = np.arange(100, dtype=np.float64).reshape(10, 10)
+    data[9, 4] = NODATA
+    data[5, 0] = np.nan
+    return data
+
+
+class ArrayBand:
+    def __init__(self, data):
+        self.data = data
+        self.reads = []
+
+    def GetNoDataValue(self):
+        return NODATA
+
+    def GetBlockSize(self):
+        return [self.data.shape[1], 1]
+
+    def ReadAsArray(self, xoff, yoff, xsize, ysize):
+        self.reads.append((xoff, yoff, xsize, ysize))
+        return self.data[yoff : yoff + ysize, xoff : xoff + xsize]
+
+
+class ArrayDataset:
+    RasterXSize = 10
+    RasterYSize = 10
+
+    def __init__(self, data):
+        self.band = ArrayBand(data)
+
+    def GetRasterBand(self, index):
+        return self.band
+
+    def GetGeoTransform(self):
+        return GEOTRANSFORM
+
+
+def expected_statistics(values):
+    valid = values[~np.isnan(values) & (values != NODATA)]
+    return {
+        "count": valid.size,
+        "nodata": values.size - valid.size,
+        "min": valid.min(),
+        "max": valid.max(),
+        "mean": valid.mean(),
+        "std": valid.std(),
+        "sum": valid.sum(),
+        "median": np.median(valid),
+    }
+
+
+@pytest.mark.parametrize("strips", [False, True])
+def test_statistics_of_the_pixels_centred_in_a_zone(monkeypatch, strips):
+    if strips:
+        # Read the window one row at a time
+        monkeypatch.setattr(zonal, "_BYTES_PER_PIXEL", 10**9)
+    ds = ArrayDataset(dem())
+    zone = shapely.box(0, 0, 5, 5)
+    results = raster_zonal_statistics(ds, 1, np.array([zone]), ZONAL_STATISTICS)
+    expected = expected_statistics(dem()[5:10, 0:5])
+    assert {name: values[0] for name, values in results.items()} == pytest.approx(expected)
+    assert results["count"][0] == 23
+    assert len(ds.band.reads) == (5 if strips else 1)
+
+
+def test_all_touched_includes_partly_covered_pixels():
+    zone = np.array([shapely.box(0.6, 0.6, 1.4, 1.4)])
+    centred = raster_zonal_statistics(ArrayDataset(dem()), 1, zone, ("count", "mean"))
+    assert centred["count"][0] == 0
+    assert np.isnan(centred["mean"][0])
+    touched = raster_zonal_statistics(
+        ArrayDataset(dem()), 1, zone, ("count", "mean"), all_touched=True
+    )
+    assert touched["count"][0] == 4
+    assert touched["mean"][0] == pytest.approx(np.mean([80, 81, 90, 91]))
+
+
+def test_zones_off_the_raster_are_empty():
+    ds = ArrayDataset(dem())
+    geoms = np.array([shapely.box(20, 20, 30, 30), None])
+    results = raster_zonal_statistics(ds, 1, geoms, ("count", "nodata", "max"))
+    assert results["count"].tolist() == [0, 0]
+    assert results["nodata"].tolist() == [0, 0]
+    assert np.isnan(results["max"]).all()
+    assert ds.band.reads == []
+
+
+def test_tasks_cover_every_zone_once():
+    geoms = shapely.buffer(shapely.points(np.random.default_rng(0).uniform(0, 100, (50, 2))), 1)
+    tasks = zonal_tasks(geoms, task_zones=16)
+    assert [len(task) for task in tasks] == [16, 16, 16, 2]
+    assert sorted(np.concatenate(tasks).tolist()) == list(range(50))
+
+
+def test_unknown_statistics_are_rejected():
+    assert resolve_zonal_statistics(["mean", "sum"]) == ("mean", "sum")
+    with pytest.raises(ProcessingError, match="mode"):
+        resolve_zonal_statistics(["mean", "mode"])
+    with pytest.raises(ProcessingError):
+        resolve_zonal_statistics([])
+
+
+def write_raster(path):
+    raster = gdal.GetDriverByName("GTiff").Create(str(path), 10, 10, 1, gdal.GDT_Float32)
+    raster.SetGeoTransform(GEOTRANSFORM)
+    raster.SetProjection(spatial_reference(5070).ExportToWkt())
+    band = raster.GetRasterBand(1)
+    band.SetNoDataValue(NODATA)
+    band.WriteArray(dem())
+    raster = None
+    return path
+
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_elevation_per_watershed(tmp_path, max_workers):
+    raster = write_raster(tmp_path / "dem.tif")
+    zones = write_dataset(
+        tmp_path / "watersheds.gpkg",
+        {
+            "watersheds": (
+                5070,
+                [
+                    ("POLYGON ((0 0, 5 0, 5 5, 0 5, 0 0))", {"name": "lower"}),
+                    ("POLYGON ((0 5, 10 5, 10 10, 0 10, 0 5))", {"name": "upper"}),
+                    ("POLYGON ((20 20, 30 20, 30 30, 20 20))", {"name": "outside"}),
+                ],
+            )
+        },
+    )
+    analyzer = GDALAnalyzer()
+    output = analyzer.zonal_statistics(
+        zones, raster, stats=["count", "mean"], prefix="elev_", max_workers=max_workers
+    )
+    assert output == tmp_path / "watersheds_zonal.gpkg"
+    rows = [values for _, values in read_layer(output)]
+    assert [row["name"] for row in rows] == ["lower", "upper", "outside"]
+    assert [row["elev_count"] for row in rows] == [23, 50, 0]
+    assert rows[0]["elev_mean"] == pytest.approx(expected_statistics(dem()[5:10, 0:5])["mean"])
+    assert rows[1]["elev_mean"] == pytest.approx(np.mean(np.arange(50)))
+    assert rows[2]["elev_mean"] is None
+    assert analyzer.metrics["zonal_statistics"]["zones"] == 3
+    assert analyzer.metrics["zonal_statistics"]["empty_zones"] == 1
+
+
+def test_missing_bands_are_reported(tmp_path):
+    raster = write_raster(tmp_path / "dem.tif")
+    zones = write_dataset(
+        tmp_path / "watersheds.gpkg",
+        {"watersheds": (5070, [("POLYGON ((0 0, 5 0, 5 5, 0 0))", {"name": "a"})])},
+    )
+    with pytest.raises(ProcessingError, match="Band 2"):
+        GDALAnalyzer().zonal_statistics(zones, raster, band=2)